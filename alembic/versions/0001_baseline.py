@@ -0,0 +1,101 @@
+"""Esquema inicial: câmeras, eventos, regras e logs de alerta.
+
+Bancos criados com ``create_all`` antes das migrações são marcados com esta
+revisão automaticamente por ``init_db`` (ou manualmente com
+``alembic stamp 0001``).
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-01-01 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cameras",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("url", sa.String(512), nullable=False),
+        sa.Column("source_type", sa.String(20), nullable=False),
+        sa.Column("enabled", sa.Boolean(), nullable=False),
+        sa.Column("frame_interval", sa.Integer(), nullable=False),
+        sa.Column("motion_detection_enabled", sa.Boolean(), nullable=False),
+        sa.Column("motion_threshold", sa.Float(), nullable=False),
+        sa.Column("motion_sensitivity", sa.String(20), nullable=False),
+        sa.Column("decoder_error_count", sa.Integer(), nullable=False),
+        sa.Column("decoder_error_rate", sa.Float(), nullable=False),
+        sa.Column("last_decoder_error", sa.String(255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        "events",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "camera_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("cameras.id"),
+            nullable=False,
+        ),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("keywords", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column("frame_path", sa.String(512), nullable=True),
+        sa.Column("annotated_frame_path", sa.String(512), nullable=True),
+        sa.Column("confidence", sa.Float(), nullable=True),
+        sa.Column("llm_provider", sa.String(50), nullable=True),
+        sa.Column("llm_model", sa.String(100), nullable=True),
+        sa.Column("processing_time_ms", sa.Integer(), nullable=True),
+    )
+    op.create_table(
+        "alert_rules",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("keywords", postgresql.ARRAY(sa.String()), nullable=False),
+        sa.Column("camera_ids", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column("phone_numbers", postgresql.ARRAY(sa.String()), nullable=False),
+        sa.Column("enabled", sa.Boolean(), nullable=False),
+        sa.Column("priority", sa.String(20), nullable=False),
+        sa.Column("cooldown_seconds", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        "alert_logs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "event_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("events.id"),
+            nullable=False,
+        ),
+        sa.Column(
+            "alert_rule_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("alert_rules.id"),
+            nullable=False,
+        ),
+        sa.Column("keywords_matched", postgresql.ARRAY(sa.String()), nullable=False),
+        sa.Column("sent_to", postgresql.ARRAY(sa.String()), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("error_message", sa.Text(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("alert_logs")
+    op.drop_table("alert_rules")
+    op.drop_table("events")
+    op.drop_table("cameras")
@@ -0,0 +1,49 @@
+"""Prioridade da câmera e resultado da triagem em cascata nos eventos.
+
+Colunas que antes só eram criadas por ``create_all`` em bancos novos. As
+que já existirem (bancos recriados depois dessas mudanças) são mantidas.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-01-02 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    (
+        "cameras",
+        sa.Column("priority", sa.String(10), nullable=False, server_default="normal"),
+    ),
+    ("events", sa.Column("triage_result", sa.JSON(), nullable=True)),
+    (
+        "events",
+        sa.Column("escalated", sa.Boolean(), nullable=False, server_default=sa.false()),
+    ),
+]
+
+
+def _existing_columns(table: str) -> set:
+    if op.get_context().as_sql:
+        return set()
+    inspector = sa.inspect(op.get_bind())
+    return {column["name"] for column in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    for table, column in COLUMNS:
+        if column.name not in _existing_columns(table):
+            op.add_column(table, column)
+
+
+def downgrade() -> None:
+    for table, column in reversed(COLUMNS):
+        op.drop_column(table, column.name)
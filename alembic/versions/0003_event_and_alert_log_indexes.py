@@ -0,0 +1,59 @@
+"""Índices das consultas de eventos e do histórico de alertas.
+
+- events(camera_id, timestamp DESC): get_by_camera e get_timeline por câmera
+- events(timestamp): get_timeline por período
+- events(keywords) GIN: search_by_keyword (keywords @> ARRAY[...])
+- alert_logs(sent_at) e alert_logs(alert_rule_id): get_logs
+
+Em produção com tabelas grandes, prefira criar os índices antes com
+``CREATE INDEX CONCURRENTLY`` e os mesmos nomes; ``if_not_exists`` faz a
+migração apenas registrá-los.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-01-03 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_events_camera_id_timestamp",
+        "events",
+        ["camera_id", sa.text("timestamp DESC")],
+        if_not_exists=True,
+    )
+    op.create_index("ix_events_timestamp", "events", ["timestamp"], if_not_exists=True)
+    op.create_index(
+        "ix_events_keywords",
+        "events",
+        ["keywords"],
+        postgresql_using="gin",
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_alert_logs_sent_at", "alert_logs", ["sent_at"], if_not_exists=True
+    )
+    op.create_index(
+        "ix_alert_logs_alert_rule_id",
+        "alert_logs",
+        ["alert_rule_id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alert_logs_alert_rule_id", table_name="alert_logs")
+    op.drop_index("ix_alert_logs_sent_at", table_name="alert_logs")
+    op.drop_index("ix_events_keywords", table_name="events")
+    op.drop_index("ix_events_timestamp", table_name="events")
+    op.drop_index("ix_events_camera_id_timestamp", table_name="events")
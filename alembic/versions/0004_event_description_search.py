@@ -0,0 +1,47 @@
+"""Busca textual em português nas descrições dos eventos.
+
+Adiciona ``events.search_vector`` (tsvector gerado a partir da descrição)
+com índice GIN. A coluna gerada reescreve a tabela ao ser adicionada; em
+tabelas grandes, rode a migração numa janela de manutenção.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-01-04 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "events",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "to_tsvector('portuguese', coalesce(description, ''))",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_events_search_vector",
+        "events",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_search_vector", table_name="events")
+    op.drop_column("events", "search_vector")
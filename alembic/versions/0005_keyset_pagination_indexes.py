@@ -0,0 +1,62 @@
+"""Índices (tempo, id) para a paginação por keyset.
+
+Substitui os índices só por tempo por versões com o id como desempate, que
+atendem ``WHERE (timestamp, id) < (...) ORDER BY timestamp DESC, id DESC``
+e a contagem por câmera/período com index-only scan.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-01-05 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_events_camera_id_timestamp_id",
+        "events",
+        ["camera_id", sa.text("timestamp DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_events_timestamp_id",
+        "events",
+        [sa.text("timestamp DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_alert_logs_sent_at_id",
+        "alert_logs",
+        [sa.text("sent_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_alert_logs_alert_rule_id_sent_at_id",
+        "alert_logs",
+        ["alert_rule_id", sa.text("sent_at DESC"), sa.text("id DESC")],
+    )
+    op.drop_index("ix_events_camera_id_timestamp", table_name="events")
+    op.drop_index("ix_events_timestamp", table_name="events")
+    op.drop_index("ix_alert_logs_sent_at", table_name="alert_logs")
+    op.drop_index("ix_alert_logs_alert_rule_id", table_name="alert_logs")
+
+
+def downgrade() -> None:
+    op.create_index("ix_alert_logs_alert_rule_id", "alert_logs", ["alert_rule_id"])
+    op.create_index("ix_alert_logs_sent_at", "alert_logs", ["sent_at"])
+    op.create_index("ix_events_timestamp", "events", ["timestamp"])
+    op.create_index(
+        "ix_events_camera_id_timestamp",
+        "events",
+        ["camera_id", sa.text("timestamp DESC")],
+    )
+    op.drop_index("ix_alert_logs_alert_rule_id_sent_at_id", table_name="alert_logs")
+    op.drop_index("ix_alert_logs_sent_at_id", table_name="alert_logs")
+    op.drop_index("ix_events_timestamp_id", table_name="events")
+    op.drop_index("ix_events_camera_id_timestamp_id", table_name="events")
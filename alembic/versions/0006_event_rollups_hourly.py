@@ -0,0 +1,75 @@
+"""Agregados por câmera e hora para estatísticas e séries temporais.
+
+Cria ``event_rollups_hourly`` e preenche com o histórico existente. Depois
+disso a tabela é mantida pelo EventPersister a cada lote gravado.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-01-06 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_rollups_hourly",
+        sa.Column(
+            "camera_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("cameras.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("hour", sa.DateTime(), primary_key=True),
+        sa.Column("events", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("alerts_sent", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("alerts_failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("confidence_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("confidence_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "processing_time_sum", sa.BigInteger(), nullable=False, server_default="0"
+        ),
+        sa.Column(
+            "processing_time_count", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+    op.create_index("ix_event_rollups_hourly_hour", "event_rollups_hourly", ["hour"])
+
+    op.execute(
+        """
+        INSERT INTO event_rollups_hourly (camera_id, hour, events, confidence_sum,
+            confidence_count, processing_time_sum, processing_time_count)
+        SELECT camera_id, date_trunc('hour', timestamp), count(*),
+            coalesce(sum(confidence), 0), count(confidence),
+            coalesce(sum(processing_time_ms), 0), count(processing_time_ms)
+        FROM events
+        GROUP BY camera_id, date_trunc('hour', timestamp)
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO event_rollups_hourly AS r (camera_id, hour, alerts_sent, alerts_failed)
+        SELECT e.camera_id, date_trunc('hour', l.sent_at),
+            count(*) FILTER (WHERE l.status = 'sent'),
+            count(*) FILTER (WHERE l.status = 'failed')
+        FROM alert_logs l JOIN events e ON e.id = l.event_id
+        GROUP BY e.camera_id, date_trunc('hour', l.sent_at)
+        ON CONFLICT (camera_id, hour) DO UPDATE SET
+            alerts_sent = r.alerts_sent + excluded.alerts_sent,
+            alerts_failed = r.alerts_failed + excluded.alerts_failed
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_event_rollups_hourly_hour", table_name="event_rollups_hourly")
+    op.drop_table("event_rollups_hourly")
@@ -0,0 +1,173 @@
+"""Particionamento mensal de ``events`` e ``alert_logs``.
+
+Recria as duas tabelas como particionadas por intervalo (RANGE) no tempo:
+``events`` por ``timestamp`` e ``alert_logs`` por ``sent_at``, com uma
+partição por mês (``events_p2025_01``, ...) e uma partição DEFAULT para
+linhas fora dos meses criados. A retenção passa a remover partições
+inteiras (ver ``src/storage/partitions.py``) em vez de DELETEs grandes.
+
+A chave primária de uma tabela particionada precisa incluir a coluna de
+partição, então passa a ser (id, timestamp) e (id, sent_at). Como uma FK
+para ``events`` precisaria referenciar (id, timestamp), a FK de
+``alert_logs.event_id`` deixa de existir no banco (o relacionamento
+continua no ORM); as duas tabelas usam o mesmo corte de retenção.
+
+As linhas existentes são copiadas para as partições, criadas do mês mais
+antigo com dados até três meses à frente.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-01-07 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tabela -> (coluna de partição, colunas copiadas, índices secundários)
+TABLES = {
+    "events": (
+        "timestamp",
+        [
+            "id",
+            "camera_id",
+            "timestamp",
+            "description",
+            "keywords",
+            "frame_path",
+            "annotated_frame_path",
+            "confidence",
+            "llm_provider",
+            "llm_model",
+            "processing_time_ms",
+            "triage_result",
+            "escalated",
+        ],
+        {
+            "ix_events_camera_id_timestamp_id": "(camera_id, timestamp DESC, id DESC)",
+            "ix_events_timestamp_id": "(timestamp DESC, id DESC)",
+            "ix_events_keywords": "USING gin (keywords)",
+            "ix_events_search_vector": "USING gin (search_vector)",
+        },
+    ),
+    "alert_logs": (
+        "sent_at",
+        [
+            "id",
+            "event_id",
+            "alert_rule_id",
+            "keywords_matched",
+            "sent_to",
+            "sent_at",
+            "status",
+            "error_message",
+        ],
+        {
+            "ix_alert_logs_sent_at_id": "(sent_at DESC, id DESC)",
+            "ix_alert_logs_alert_rule_id_sent_at_id": (
+                "(alert_rule_id, sent_at DESC, id DESC)"
+            ),
+        },
+    ),
+}
+
+FOREIGN_KEYS = {
+    "events": {"events_camera_id_fkey": "(camera_id) REFERENCES cameras (id)"},
+    "alert_logs": {
+        "alert_logs_alert_rule_id_fkey": "(alert_rule_id) REFERENCES alert_rules (id)"
+    },
+}
+
+# Partições mensais do mês mais antigo com dados até MONTHS_AHEAD à frente
+MONTHS_AHEAD = 3
+CREATE_PARTITIONS_SQL = """
+DO $$
+DECLARE
+    month timestamp;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', least(now()::timestamp, coalesce(
+                (SELECT min({column}) FROM {source}), now()::timestamp))),
+            date_trunc('month', greatest(now()::timestamp, coalesce(
+                (SELECT max({column}) FROM {source}), now()::timestamp)))
+                + interval '{months_ahead} months',
+            interval '1 month')
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+            '{table}_p' || to_char(month, 'YYYY_MM'),
+            month,
+            month + interval '1 month');
+    END LOOP;
+END $$
+"""
+
+
+def _swap(table: str, partitioned: bool) -> None:
+    """Recria ``table`` (particionada ou não) e copia as linhas."""
+    column, columns, indexes = TABLES[table]
+    source = f"{table}_old"
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {source}")
+    # Libera os nomes de índices e constraints para a tabela nova
+    op.execute(f"ALTER TABLE {source} RENAME CONSTRAINT {table}_pkey TO {source}_pkey")
+    for name in FOREIGN_KEYS[table]:
+        op.execute(f"ALTER TABLE {source} DROP CONSTRAINT IF EXISTS {name}")
+    for name in indexes:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    suffix = f" PARTITION BY RANGE ({column})" if partitioned else ""
+    op.execute(
+        f"CREATE TABLE {table} (LIKE {source} INCLUDING DEFAULTS INCLUDING GENERATED)"
+        + suffix
+    )
+    primary_key = f"id, {column}" if partitioned else "id"
+    op.execute(
+        f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})"
+    )
+    for name, definition in FOREIGN_KEYS[table].items():
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY {definition}")
+
+    if partitioned:
+        op.execute(
+            CREATE_PARTITIONS_SQL.format(
+                table=table, column=column, source=source, months_ahead=MONTHS_AHEAD
+            )
+        )
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    for name, definition in indexes.items():
+        op.execute(f"CREATE INDEX {name} ON {table} {definition}")
+
+    column_list = ", ".join(columns)
+    op.execute(
+        f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {source}"
+    )
+    op.execute(f"DROP TABLE {source}")
+    op.execute(f"ANALYZE {table}")
+
+
+def upgrade() -> None:
+    op.drop_constraint("alert_logs_event_id_fkey", "alert_logs", type_="foreignkey")
+    for table in TABLES:
+        _swap(table, partitioned=True)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        _swap(table, partitioned=False)
+    # Logs cujo evento saiu pela retenção ficam sem validar
+    op.create_foreign_key(
+        "alert_logs_event_id_fkey",
+        "alert_logs",
+        "events",
+        ["event_id"],
+        ["id"],
+        postgresql_not_valid=True,
+    )
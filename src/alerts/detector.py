@@ -79,6 +79,7 @@ class KeywordDetector:
         description: str,
         keywords: Optional[List[str]] = None,
         camera_id: Optional[uuid.UUID] = None,
+        priorities: Optional[Set[str]] = None,
     ) -> List[AlertMatch]:
         """Detecta matches de alertas em uma descrição.
 
@@ -86,6 +87,7 @@ class KeywordDetector:
             description: Descrição do evento
             keywords: Lista de keywords já extraídas (opcional)
             camera_id: ID da câmera de origem (opcional)
+            priorities: Considera apenas regras destas prioridades (opcional)
 
         Returns:
             Lista de AlertMatch para regras que deram match
@@ -102,6 +104,9 @@ class KeywordDetector:
             if not rule.enabled:
                 continue
 
+            if priorities is not None and rule.priority not in priorities:
+                continue
+
             # Verifica se a regra se aplica a esta câmera
             if rule.camera_ids and camera_id:
                 if str(camera_id) not in rule.camera_ids:
@@ -132,6 +137,30 @@ class KeywordDetector:
 
         return matches
 
+    def match_keywords(
+        self,
+        description: str,
+        keywords: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Retorna as keywords de regras ativas presentes na análise.
+
+        Diferente de ``detect``, não considera câmera nem cooldown e não
+        registra alertas; é usado para decidir se uma análise de triagem
+        deve ser confirmada pelo modelo principal.
+        """
+        text_to_search = description.lower()
+        if keywords:
+            text_to_search += " " + " ".join(keywords).lower()
+
+        matched: List[str] = []
+        for rule_id, rule in self._rules.items():
+            if not rule.enabled:
+                continue
+            for keyword in self._find_matches(rule_id, text_to_search):
+                if keyword not in matched:
+                    matched.append(keyword)
+        return matched
+
     def _find_matches(self, rule_id: uuid.UUID, text: str) -> List[str]:
         """Encontra keywords que dão match no texto."""
         patterns = self._keyword_patterns.get(rule_id, [])
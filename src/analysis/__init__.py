@@ -1,5 +1,45 @@
 from .base import BaseLLMVision, AnalysisResult
 from .factory import LLMVisionFactory
 from .lmstudio_vision import LMStudioVision
+from .mock_vision import MockVision
+from .result_cache import PerceptualHashCache, dhash
+from .image_prep import ImagePreparer, ImageProfile, PreparedImage
+from .mosaic import build_mosaic
+from .streaming import KeywordStreamParser
+from .metrics import ProviderMetrics, provider_metrics
+from .executor import run_blocking, shutdown_executor
+from .resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimiter,
+    ResilientVision,
+    TokenBucket,
+)
+from .router import RouterVision
+from .cascade import CascadeVision
 
-__all__ = ["BaseLLMVision", "AnalysisResult", "LLMVisionFactory", "LMStudioVision"]
+__all__ = [
+    "BaseLLMVision",
+    "AnalysisResult",
+    "LLMVisionFactory",
+    "LMStudioVision",
+    "MockVision",
+    "PerceptualHashCache",
+    "dhash",
+    "ImagePreparer",
+    "ImageProfile",
+    "PreparedImage",
+    "build_mosaic",
+    "KeywordStreamParser",
+    "ProviderMetrics",
+    "provider_metrics",
+    "run_blocking",
+    "shutdown_executor",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "RateLimiter",
+    "ResilientVision",
+    "TokenBucket",
+    "RouterVision",
+    "CascadeVision",
+]
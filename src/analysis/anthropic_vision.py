@@ -1,13 +1,15 @@
 """Provider Anthropic Claude Vision."""
 
 import base64
+import json
 import logging
 import time
-from typing import Optional
+from typing import AsyncIterator, List, Optional
 
 from anthropic import AsyncAnthropic
 
 from .base import BaseLLMVision, AnalysisResult
+from .structured import response_schema
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,10 @@ logger = logging.getLogger(__name__)
 class AnthropicVision(BaseLLMVision):
     """Implementação do provider Anthropic Claude Vision."""
 
+    batch_mode = "multi_image"
+    supports_streaming = True
+    TOOL_NAME = "registrar_analise"
+
     def __init__(self, api_key: str, model: str = "claude-sonnet-4-20250514"):
         super().__init__(api_key, model)
         self.client = AsyncAnthropic(api_key=api_key)
@@ -23,6 +29,62 @@ class AnthropicVision(BaseLLMVision):
     def provider_name(self) -> str:
         return "anthropic"
 
+    def _tools(self) -> List[dict]:
+        """Ferramenta que recebe a análise no modo de saída estruturada."""
+        if not self.structured_output:
+            return []
+        return [
+            {
+                "name": self.TOOL_NAME,
+                "description": "Registra a análise do frame da câmera",
+                "input_schema": response_schema(self.max_keywords),
+            }
+        ]
+
+    def _request_kwargs(self, image_data: bytes, prompt: Optional[str]) -> dict:
+        """Monta os parâmetros da requisição de análise de um frame."""
+        # Converte imagem para base64
+        image_base64 = base64.b64encode(image_data).decode("utf-8")
+        image_block = {
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": "image/jpeg",
+                "data": image_base64,
+            },
+        }
+
+        kwargs = {
+            "model": self.model,
+            "max_tokens": 500,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        image_block,
+                        {"type": "text", "text": prompt or self.analysis_prompt},
+                    ],
+                }
+            ],
+        }
+
+        tools = self._tools() if self.use_schema(prompt) else []
+        if tools:
+            # Saída estruturada: a resposta vem como entrada da ferramenta
+            kwargs["tools"] = tools
+            kwargs["tool_choice"] = {"type": "tool", "name": self.TOOL_NAME}
+        return kwargs
+
+    @staticmethod
+    def _usage_counts(message) -> dict:
+        """Tokens de entrada, saída e lidos do cache de uma resposta."""
+        usage = getattr(message, "usage", None)
+        return {
+            "tokens_in": getattr(usage, "input_tokens", None),
+            "tokens_out": getattr(usage, "output_tokens", None),
+            "cached_tokens": getattr(usage, "cache_read_input_tokens", None),
+        }
+
     async def analyze_frame(
         self,
         image_data: bytes,
@@ -32,58 +94,84 @@ class AnthropicVision(BaseLLMVision):
         start_time = time.time()
 
         try:
-            # Converte imagem para base64
-            image_base64 = base64.b64encode(image_data).decode("utf-8")
-
             # Prepara a mensagem
             message = await self.client.messages.create(
-                model=self.model,
-                max_tokens=500,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": "image/jpeg",
-                                    "data": image_base64,
-                                },
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt or self.ANALYSIS_PROMPT,
-                            },
-                        ],
-                    }
-                ],
+                **self._request_kwargs(image_data, prompt)
             )
 
             # Extrai a resposta
             response_text = ""
             for block in message.content:
-                if hasattr(block, "text"):
+                if getattr(block, "type", None) == "tool_use":
+                    response_text += json.dumps(block.input, ensure_ascii=False)
+                elif hasattr(block, "text"):
                     response_text += block.text
 
-            description, keywords, confidence = self.parse_response(response_text)
+            return self.build_result(
+                response_text, start_time, **self._usage_counts(message)
+            )
 
-            processing_time = int((time.time() - start_time) * 1000)
+        except Exception as e:
+            logger.error(f"Erro na análise Anthropic: {e}")
+            raise
 
-            return AnalysisResult(
-                description=description,
-                keywords=keywords,
-                confidence=confidence,
-                raw_response=response_text,
-                provider=self.provider_name,
-                model=self.model,
-                processing_time_ms=processing_time,
+    async def _stream_chunks(
+        self,
+        image_data: bytes,
+        prompt: Optional[str],
+        usage: dict,
+    ) -> AsyncIterator[str]:
+        """Recebe a análise em streaming (texto ou JSON parcial da ferramenta)."""
+        try:
+            async with self.client.messages.stream(
+                **self._request_kwargs(image_data, prompt)
+            ) as stream:
+                async for event in stream:
+                    if event.type != "content_block_delta":
+                        continue
+                    delta = event.delta
+                    text = getattr(delta, "text", None) or getattr(
+                        delta, "partial_json", None
+                    )
+                    if text:
+                        yield text
+                message = await stream.get_final_message()
+            usage.update(self._usage_counts(message))
+        except Exception as e:
+            logger.error(f"Erro na análise Anthropic (streaming): {e}")
+            raise
+
+    async def _request_images(self, images: List[bytes], prompt: str) -> str:
+        """Envia um lote de imagens numa única requisição."""
+        content = []
+        for index, image_data in enumerate(images, start=1):
+            content.append({"type": "text", "text": f"Imagem {index}:"})
+            content.append(
+                {
+                    "type": "image",
+                    "source": {
+                        "type": "base64",
+                        "media_type": "image/jpeg",
+                        "data": base64.b64encode(image_data).decode("utf-8"),
+                    },
+                }
             )
+        content.append({"type": "text", "text": prompt})
 
+        try:
+            message = await self.client.messages.create(
+                model=self.model,
+                max_tokens=500 * len(images),
+                messages=[{"role": "user", "content": content}],
+            )
         except Exception as e:
-            logger.error(f"Erro na análise Anthropic: {e}")
+            logger.error(f"Erro na análise em lote Anthropic: {e}")
             raise
 
+        return "".join(
+            block.text for block in message.content if hasattr(block, "text")
+        )
+
     async def health_check(self) -> bool:
         """Verifica se a API Anthropic está acessível."""
         try:
@@ -1,10 +1,24 @@
 """Interface base para provedores de LLM Vision."""
 
+import asyncio
 import json
+import logging
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
 
+from src.config import settings
+from .executor import run_blocking
+from .image_prep import ImageProfile, get_profile
+from .mosaic import build_mosaic
+from .streaming import KeywordStreamParser
+from .structured import extract_json, normalize_analysis
+
+logger = logging.getLogger(__name__)
+
+# Chamado com as keywords assim que o stream as entrega
+KeywordsCallback = Callable[[List[str]], Awaitable[None]]
 
 @dataclass
 class AnalysisResult:
@@ -17,6 +31,19 @@ class AnalysisResult:
     provider: Optional[str] = None
     model: Optional[str] = None
     processing_time_ms: Optional[int] = None
+    cached: bool = False
+    # Análise em cascata: resultado da triagem e se o frame foi escalado
+    escalated: bool = False
+    triage: Optional["AnalysisResult"] = None
+    # Uso de tokens informado pelo provedor e falha ao interpretar o JSON
+    tokens_in: Optional[int] = None
+    tokens_out: Optional[int] = None
+    cached_tokens: Optional[int] = None
+    parse_failed: bool = False
+    # Tempo até as keywords estarem disponíveis (streaming)
+    first_keyword_ms: Optional[int] = None
+    # Chamadas ao LLM feitas para o frame (escalada na cascata e hedge somam)
+    llm_calls: int = 1
 
     def to_dict(self) -> dict:
         """Converte para dicionário."""
@@ -27,6 +54,10 @@ class AnalysisResult:
             "provider": self.provider,
             "model": self.model,
             "processing_time_ms": self.processing_time_ms,
+            "cached": self.cached,
+            "escalated": self.escalated,
+            "triage": self.triage.to_dict() if self.triage else None,
+            "first_keyword_ms": self.first_keyword_ms,
         }
 
 
@@ -52,9 +83,81 @@ Foque em:
 Seja objetivo e preciso. As palavras-chave devem ser termos simples que descrevam os elementos principais da cena.
 Responda APENAS com o JSON, sem texto adicional."""
 
+    # Prompt do modo compacto: campos curtos e keywords limitadas reduzem os
+    # tokens de saída. Com ~100 tokens fica abaixo do prefixo mínimo do cache
+    # de prompt dos provedores (1024 tokens), então não é cacheado (nem
+    # precisa: o custo está na imagem). As keywords vêm primeiro para ficarem
+    # disponíveis cedo no streaming
+    COMPACT_PROMPT = """Analise a imagem de câmera de segurança.
+Responda APENAS com JSON: {{"k": ["até {max_keywords} palavras-chave simples"], "c": confiança de 0 a 1, "d": "descrição objetiva da cena"}}
+Foque em pessoas e suas ações, veículos, objetos suspeitos ou incomuns e atividades relevantes para segurança."""
+
+    BATCH_PROMPT = """Você receberá {count} imagens de câmeras de segurança, numeradas de 1 a {count} na ordem em que aparecem.
+Analise cada imagem separadamente e descreva o que está acontecendo.
+
+Responda em formato JSON com a seguinte estrutura, com um item por imagem:
+{{
+    "frames": [
+        {{
+            "id": 1,
+            "description": "Descrição detalhada do que está acontecendo na cena",
+            "keywords": ["lista", "de", "palavras", "chave", "relevantes"],
+            "confidence": 0.95
+        }}
+    ]
+}}
+
+Foque em pessoas, veículos, objetos suspeitos e atividades relevantes para segurança.
+Não misture elementos de imagens diferentes.
+Responda APENAS com o JSON, sem texto adicional."""
+
+    MOSAIC_PROMPT = """Esta imagem é um mosaico de {count} quadros de câmeras de segurança, numerados de 1 a {count} no canto superior esquerdo de cada quadro (da esquerda para a direita, de cima para baixo).
+Analise cada quadro separadamente e descreva o que está acontecendo.
+
+Responda em formato JSON com a seguinte estrutura, com um item por quadro:
+{{
+    "frames": [
+        {{
+            "id": 1,
+            "description": "Descrição detalhada do que está acontecendo no quadro",
+            "keywords": ["lista", "de", "palavras", "chave", "relevantes"],
+            "confidence": 0.95
+        }}
+    ]
+}}
+
+Foque em pessoas, veículos, objetos suspeitos e atividades relevantes para segurança.
+Não misture elementos de quadros diferentes.
+Responda APENAS com o JSON, sem texto adicional."""
+
+    # Como o provedor analisa lotes em analyze_batch:
+    # - "multi_image": várias imagens na mesma requisição (_request_images)
+    # - "mosaic": uma única imagem em grade com os frames numerados
+    # - None: uma requisição por frame
+    batch_mode: Optional[str] = None
+
+    # Provedores que implementam _stream_chunks
+    supports_streaming = False
+
     def __init__(self, api_key: str, model: str):
         self.api_key = api_key
         self.model = model
+        self.structured_output = settings.llm_structured_output
+        self.max_keywords = settings.llm_max_keywords
+
+    @property
+    def analysis_prompt(self) -> str:
+        """Prompt padrão de análise conforme o modo de resposta."""
+        if self.structured_output:
+            return self.COMPACT_PROMPT.format(max_keywords=self.max_keywords)
+        return self.ANALYSIS_PROMPT
+
+    def use_schema(self, prompt: Optional[str]) -> bool:
+        """Verifica se a chamada usa o JSON schema nativo do provedor.
+
+        Prompts customizados (lotes, mosaico) definem o próprio formato.
+        """
+        return self.structured_output and prompt is None
 
     @property
     @abstractmethod
@@ -62,6 +165,16 @@ Responda APENAS com o JSON, sem texto adicional."""
         """Nome do provedor."""
         pass
 
+    @property
+    def image_profile(self) -> ImageProfile:
+        """Tamanho máximo e qualidade JPEG das imagens enviadas ao provedor."""
+        return get_profile(self.provider_name)
+
+    @property
+    def can_hedge(self) -> bool:
+        """Se ``analyze_frame_hedged`` tem outro backend para duplicar a requisição."""
+        return False
+
     @abstractmethod
     async def analyze_frame(
         self,
@@ -79,28 +192,251 @@ Responda APENAS com o JSON, sem texto adicional."""
         """
         pass
 
-    def parse_response(self, response_text: str) -> tuple[str, List[str], Optional[float]]:
-        """Extrai descrição, keywords e confiança da resposta."""
-        try:
-            # Tenta extrair JSON da resposta
-            json_str = response_text.strip()
+    async def analyze_frame_hedged(
+        self,
+        image_data: bytes,
+        prompt: Optional[str] = None,
+        on_keywords: Optional[KeywordsCallback] = None,
+    ) -> AnalysisResult:
+        """Analisa um frame de câmera com prioridade alta.
+
+        Provedores únicos não têm para onde duplicar a requisição; o
+        ``RouterVision`` sobrescreve este método para fazer hedge entre
+        backends. Com ``on_keywords`` a análise é feita em streaming.
+        """
+        if on_keywords:
+            return await self.analyze_frame_stream(image_data, prompt, on_keywords)
+        return await self.analyze_frame(image_data, prompt)
+
+    async def analyze_frame_stream(
+        self,
+        image_data: bytes,
+        prompt: Optional[str] = None,
+        on_keywords: Optional[KeywordsCallback] = None,
+    ) -> AnalysisResult:
+        """Analisa um frame recebendo a resposta em streaming.
+
+        ``on_keywords`` é chamado assim que o campo de keywords do JSON se
+        completa, antes do restante da resposta (ex.: a descrição). O
+        resultado completo é retornado ao fim do stream, com o tempo até as
+        keywords em ``first_keyword_ms``.
+
+        Provedores sem streaming analisam o frame inteiro e chamam
+        ``on_keywords`` ao final.
+        """
+        if not self.supports_streaming:
+            result = await self.analyze_frame(image_data, prompt)
+            result.first_keyword_ms = result.processing_time_ms
+            if on_keywords and result.keywords:
+                await on_keywords(result.keywords)
+            return result
 
-            # Remove possíveis marcadores de código
-            if json_str.startswith("```"):
-                lines = json_str.split("\n")
-                json_str = "\n".join(lines[1:-1])
+        start_time = time.time()
+        parser = KeywordStreamParser()
+        usage: dict = {}
+        chunks: List[str] = []
+        first_keyword_ms: Optional[int] = None
 
-            data = json.loads(json_str)
+        async for chunk in self._stream_chunks(image_data, prompt, usage):
+            chunks.append(chunk)
+            keywords = parser.feed(chunk)
+            if keywords is not None:
+                first_keyword_ms = int((time.time() - start_time) * 1000)
+                if on_keywords and keywords:
+                    await on_keywords(keywords)
 
-            description = data.get("description", response_text)
-            keywords = data.get("keywords", [])
-            confidence = data.get("confidence")
+        result = self.build_result("".join(chunks), start_time, **usage)
+        result.first_keyword_ms = (
+            first_keyword_ms
+            if first_keyword_ms is not None
+            else result.processing_time_ms
+        )
+        if on_keywords and not parser.done and result.keywords:
+            # Keywords não reconhecidas no stream: entrega as da resposta final
+            await on_keywords(result.keywords)
+        return result
 
-            return description, keywords, confidence
+    async def _stream_chunks(
+        self,
+        image_data: bytes,
+        prompt: Optional[str],
+        usage: dict,
+    ) -> AsyncIterator[str]:
+        """Gera os pedaços de texto da resposta em streaming.
+
+        Provedores com ``supports_streaming`` sobrescrevem; ao fim do stream
+        preenchem ``usage`` com tokens_in/tokens_out/cached_tokens. Sem
+        sobrescrever, a resposta completa de ``analyze_frame`` é entregue
+        num único pedaço.
+        """
+        result = await self.analyze_frame(image_data, prompt)
+        usage.update(
+            tokens_in=result.tokens_in,
+            tokens_out=result.tokens_out,
+            cached_tokens=result.cached_tokens,
+        )
+        yield result.raw_response or ""
+
+    async def analyze_batch(
+        self,
+        images: List[bytes],
+        prompt: Optional[str] = None,
+    ) -> List[AnalysisResult]:
+        """Analisa vários frames (de várias câmeras ou em sequência) de uma vez.
+
+        Conforme ``batch_mode``, envia as imagens numa única requisição ou
+        como um mosaico, e separa a resposta em um ``AnalysisResult`` por
+        frame, na mesma ordem de ``images``. Frames ausentes na resposta são
+        analisados individualmente.
+
+        Args:
+            images: Bytes das imagens (JPEG)
+            prompt: Prompt customizado para o lote (opcional)
 
-        except json.JSONDecodeError:
+        Returns:
+            Lista de AnalysisResult, um por imagem
+        """
+        if len(images) == 1 or self.batch_mode is None:
+            return list(
+                await asyncio.gather(
+                    *(self.analyze_frame(image, prompt) for image in images)
+                )
+            )
+
+        start_time = time.time()
+        if self.batch_mode == "mosaic":
+            profile = self.image_profile
+            mosaic = await run_blocking(
+                build_mosaic, images, profile.max_side, profile.jpeg_quality
+            )
+            result = await self.analyze_frame(
+                mosaic, prompt or self.MOSAIC_PROMPT.format(count=len(images))
+            )
+            response_text = result.raw_response or ""
+        else:
+            response_text = await self._request_images(
+                images, prompt or self.BATCH_PROMPT.format(count=len(images))
+            )
+
+        processing_time = int((time.time() - start_time) * 1000)
+        results = self.parse_batch_response(
+            response_text, len(images), processing_time
+        )
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            retried = await asyncio.gather(
+                *(self.analyze_frame(images[i]) for i in missing)
+            )
+            for i, result in zip(missing, retried):
+                results[i] = result
+        return results
+
+    async def _request_images(self, images: List[bytes], prompt: str) -> str:
+        """Envia várias imagens numa única requisição e retorna o texto.
+
+        Provedores com ``batch_mode = "multi_image"`` sobrescrevem. Sem
+        sobrescrever, cada imagem é analisada numa requisição própria e as
+        respostas são reunidas no formato do lote.
+        """
+        results = await asyncio.gather(*(self.analyze_frame(image) for image in images))
+        return json.dumps(
+            {
+                "frames": [
+                    {
+                        "id": position,
+                        "description": result.description,
+                        "keywords": result.keywords,
+                        "confidence": result.confidence,
+                    }
+                    for position, result in enumerate(results, start=1)
+                ]
+            },
+            ensure_ascii=False,
+        )
+
+    def parse_batch_response(
+        self,
+        response_text: str,
+        count: int,
+        processing_time_ms: Optional[int] = None,
+    ) -> List[Optional[AnalysisResult]]:
+        """Separa a resposta de um lote em um resultado por frame.
+
+        Posições sem item correspondente (ou resposta inválida) ficam None.
+        """
+        results: List[Optional[AnalysisResult]] = [None] * count
+        data = extract_json(response_text)
+        if data is None:
+            return results
+
+        items = data.get("frames", []) if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return results
+
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            try:
+                index = int(item.get("id", position + 1)) - 1
+            except (TypeError, ValueError):
+                continue
+            if not 0 <= index < count or results[index] is not None:
+                continue
+            description, keywords, confidence = normalize_analysis(
+                item, self.max_keywords
+            )
+            results[index] = AnalysisResult(
+                description=description or "",
+                keywords=keywords,
+                confidence=confidence,
+                raw_response=json.dumps(item, ensure_ascii=False),
+                provider=self.provider_name,
+                model=self.model,
+                processing_time_ms=processing_time_ms,
+            )
+        return results
+
+    def parse_response(self, response_text: str) -> tuple[str, List[str], Optional[float]]:
+        """Extrai descrição, keywords e confiança da resposta."""
+        description, keywords, confidence, _ = self._parse(response_text)
+        return description, keywords, confidence
+
+    def _parse(
+        self, response_text: str
+    ) -> tuple[str, List[str], Optional[float], bool]:
+        """Interpreta a resposta; o último item indica se havia JSON válido."""
+        data = extract_json(response_text)
+        if not isinstance(data, dict):
             # Fallback: usa a resposta como descrição
-            return response_text, self._extract_keywords(response_text), None
+            return response_text, self._extract_keywords(response_text), None, False
+
+        description, keywords, confidence = normalize_analysis(data, self.max_keywords)
+        return description or response_text, keywords, confidence, True
+
+    def build_result(
+        self,
+        response_text: str,
+        start_time: float,
+        tokens_in: Optional[int] = None,
+        tokens_out: Optional[int] = None,
+        cached_tokens: Optional[int] = None,
+    ) -> AnalysisResult:
+        """Monta o AnalysisResult de uma resposta do provedor."""
+        description, keywords, confidence, parsed = self._parse(response_text)
+        return AnalysisResult(
+            description=description,
+            keywords=keywords,
+            confidence=confidence,
+            raw_response=response_text,
+            provider=self.provider_name,
+            model=self.model,
+            processing_time_ms=int((time.time() - start_time) * 1000),
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            cached_tokens=cached_tokens,
+            parse_failed=not parsed,
+        )
 
     def _extract_keywords(self, text: str) -> List[str]:
         """Extrai palavras-chave básicas do texto."""
@@ -138,3 +474,20 @@ Responda APENAS com o JSON, sem texto adicional."""
     async def health_check(self) -> bool:
         """Verifica se o provedor está funcionando."""
         return True
+
+    async def health_report(self) -> dict:
+        """Saúde do provedor para o health check, usando o cliente da instância.
+
+        Provedores compostos (roteador, cascata, resiliência) incluem o
+        estado de cada backend.
+        """
+        try:
+            healthy, error = await self.health_check(), None
+        except Exception as e:
+            healthy, error = False, str(e)
+        return {
+            "provider": self.provider_name,
+            "model": self.model,
+            "healthy": healthy,
+            "error": error,
+        }
@@ -0,0 +1,278 @@
+"""Análise em cascata: modelo barato primeiro, modelo principal quando necessário."""
+
+import asyncio
+import logging
+import time
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional
+
+from .base import AnalysisResult, BaseLLMVision, KeywordsCallback
+from .image_prep import ImageProfile
+
+logger = logging.getLogger(__name__)
+
+# Recebe descrição e keywords da triagem e retorna as keywords de alerta presentes
+AlertMatcher = Callable[[str, List[str]], List[str]]
+
+
+class CascadeVision(BaseLLMVision):
+    """Analisa cada frame primeiro com um modelo barato (triagem).
+
+    O frame só é enviado ao modelo principal (``premium``) quando:
+    - a triagem encontra keywords de alguma regra de alerta ativa;
+    - a confiança da triagem está abaixo de ``min_confidence`` (ou ausente);
+    - a triagem falha.
+
+    O resultado escalado leva a triagem em ``AnalysisResult.triage`` para que
+    as duas análises sejam salvas no evento. Se o modelo principal falhar, o
+    resultado da triagem é usado para não perder o evento.
+    """
+
+    REASON_ALERT_KEYWORDS = "alert_keywords"
+    REASON_LOW_CONFIDENCE = "low_confidence"
+    REASON_TRIAGE_ERROR = "triage_error"
+
+    def __init__(
+        self,
+        triage: BaseLLMVision,
+        premium: BaseLLMVision,
+        alert_matcher: Optional[AlertMatcher] = None,
+        min_confidence: float = 0.6,
+    ):
+        super().__init__(api_key="", model=f"{triage.model}>{premium.model}")
+        self.triage = triage
+        self.premium = premium
+        self.alert_matcher = alert_matcher
+        self.min_confidence = min_confidence
+        self._calls = 0
+        self._escalations: Dict[str, int] = {
+            self.REASON_ALERT_KEYWORDS: 0,
+            self.REASON_LOW_CONFIDENCE: 0,
+            self.REASON_TRIAGE_ERROR: 0,
+        }
+        self._premium_failures = 0
+
+    @property
+    def provider_name(self) -> str:
+        return "cascade"
+
+    @property
+    def image_profile(self) -> ImageProfile:
+        """Perfil que atende o mais exigente dos dois níveis."""
+        a, b = self.triage.image_profile, self.premium.image_profile
+        return ImageProfile(
+            max_side=max(a.max_side, b.max_side),
+            jpeg_quality=max(a.jpeg_quality, b.jpeg_quality),
+        )
+
+    @property
+    def can_hedge(self) -> bool:
+        """O hedge vale para a chamada ao modelo principal."""
+        return self.premium.can_hedge
+
+    def escalation_reason(self, result: AnalysisResult) -> Optional[str]:
+        """Motivo para escalar a análise de triagem (None = não escalar)."""
+        if self.alert_matcher is not None:
+            matched = self.alert_matcher(result.description, result.keywords)
+            if matched:
+                return self.REASON_ALERT_KEYWORDS
+        if result.confidence is None or result.confidence < self.min_confidence:
+            return self.REASON_LOW_CONFIDENCE
+        return None
+
+    async def analyze_frame(
+        self,
+        image_data: bytes,
+        prompt: Optional[str] = None,
+    ) -> AnalysisResult:
+        """Analisa o frame na triagem e escala para o modelo principal se preciso."""
+        return await self._analyze(image_data, prompt, hedged=False)
+
+    async def analyze_frame_hedged(
+        self,
+        image_data: bytes,
+        prompt: Optional[str] = None,
+        on_keywords: Optional[KeywordsCallback] = None,
+    ) -> AnalysisResult:
+        """Como ``analyze_frame``, com hedge na chamada ao modelo principal.
+
+        Com ``on_keywords`` o modelo principal responde em streaming (com
+        hedge), como em ``analyze_frame_stream``.
+        """
+        return await self._analyze(
+            image_data, prompt, hedged=True, on_keywords=on_keywords
+        )
+
+    async def analyze_frame_stream(
+        self,
+        image_data: bytes,
+        prompt: Optional[str] = None,
+        on_keywords: Optional[KeywordsCallback] = None,
+    ) -> AnalysisResult:
+        """Triagem completa e, se escalado, modelo principal em streaming.
+
+        As keywords da triagem não são entregues a ``on_keywords`` quando o
+        frame é escalado: quem confirma o alerta é o modelo principal.
+        """
+        return await self._analyze(
+            image_data, prompt, hedged=False, stream=True, on_keywords=on_keywords
+        )
+
+    async def _analyze(
+        self,
+        image_data: bytes,
+        prompt: Optional[str],
+        hedged: bool,
+        stream: bool = False,
+        on_keywords: Optional[KeywordsCallback] = None,
+    ) -> AnalysisResult:
+        self._calls += 1
+        start_time = time.time()
+
+        triage_result: Optional[AnalysisResult] = None
+        try:
+            triage_result = await self.triage.analyze_frame(image_data, prompt)
+            reason = self.escalation_reason(triage_result)
+        except Exception as e:
+            logger.warning(
+                f"Triagem {self.triage.provider_name} falhou, "
+                f"usando o modelo principal: {e}"
+            )
+            reason = self.REASON_TRIAGE_ERROR
+
+        if reason is None:
+            if on_keywords and triage_result.keywords:
+                await on_keywords(triage_result.keywords)
+            return triage_result
+
+        self._escalations[reason] += 1
+        logger.debug(f"Escalando frame para {self.premium.provider_name}: {reason}")
+
+        try:
+            if hedged:
+                result = await self.premium.analyze_frame_hedged(
+                    image_data, prompt, on_keywords
+                )
+            elif stream:
+                result = await self.premium.analyze_frame_stream(
+                    image_data, prompt, on_keywords
+                )
+            else:
+                result = await self.premium.analyze_frame(image_data, prompt)
+        except Exception as e:
+            self._premium_failures += 1
+            if triage_result is None:
+                raise
+            logger.warning(
+                f"Modelo principal {self.premium.provider_name} falhou, "
+                f"usando o resultado da triagem: {e}"
+            )
+            return replace(triage_result, llm_calls=triage_result.llm_calls + 1)
+
+        return replace(
+            result,
+            escalated=True,
+            triage=triage_result,
+            processing_time_ms=int((time.time() - start_time) * 1000),
+            llm_calls=result.llm_calls + 1,
+        )
+
+    async def analyze_batch(
+        self,
+        images: List[bytes],
+        prompt: Optional[str] = None,
+    ) -> List[AnalysisResult]:
+        """Faz a triagem do lote e escala só os frames que precisam."""
+        self._calls += len(images)
+        start_time = time.time()
+
+        try:
+            triage_results: List[Optional[AnalysisResult]] = list(
+                await self.triage.analyze_batch(images, prompt)
+            )
+            reasons = [self.escalation_reason(r) for r in triage_results]
+        except Exception as e:
+            logger.warning(
+                f"Triagem {self.triage.provider_name} falhou no lote, "
+                f"usando o modelo principal: {e}"
+            )
+            triage_results = [None] * len(images)
+            reasons = [self.REASON_TRIAGE_ERROR] * len(images)
+
+        escalate = [i for i, reason in enumerate(reasons) if reason is not None]
+        if not escalate:
+            return triage_results
+
+        for i in escalate:
+            self._escalations[reasons[i]] += 1
+
+        try:
+            premium_results = await self.premium.analyze_batch(
+                [images[i] for i in escalate], prompt
+            )
+        except Exception as e:
+            self._premium_failures += 1
+            if any(triage_results[i] is None for i in escalate):
+                raise
+            logger.warning(
+                f"Modelo principal {self.premium.provider_name} falhou no lote, "
+                f"usando o resultado da triagem: {e}"
+            )
+            for i in escalate:
+                triage_results[i] = replace(
+                    triage_results[i], llm_calls=triage_results[i].llm_calls + 1
+                )
+            return triage_results
+
+        processing_time = int((time.time() - start_time) * 1000)
+        results = list(triage_results)
+        for i, result in zip(escalate, premium_results):
+            results[i] = replace(
+                result,
+                escalated=True,
+                triage=triage_results[i],
+                processing_time_ms=processing_time,
+                llm_calls=result.llm_calls + 1,
+            )
+        return results
+
+    async def health_check(self) -> bool:
+        """Saudável se o modelo principal responder."""
+        return await self.premium.health_check()
+
+    async def health_report(self) -> dict:
+        """Saúde da triagem e do modelo principal (que decide o status)."""
+        triage, premium = await asyncio.gather(
+            self.triage.health_report(), self.premium.health_report()
+        )
+        return {
+            "provider": self.provider_name,
+            "model": self.model,
+            "healthy": premium["healthy"],
+            "error": premium["error"],
+            "triage": triage,
+            "premium": premium,
+        }
+
+    def get_stats(self) -> dict:
+        """Retorna a taxa de escalada e o estado dos dois níveis."""
+        escalated = sum(self._escalations.values())
+        triage_stats = (
+            self.triage.get_stats() if hasattr(self.triage, "get_stats") else None
+        )
+        premium_stats = (
+            self.premium.get_stats() if hasattr(self.premium, "get_stats") else None
+        )
+        return {
+            "provider": self.provider_name,
+            "degraded": any(
+                s.get("degraded") for s in (triage_stats, premium_stats) if s
+            ),
+            "calls": self._calls,
+            "escalated": escalated,
+            "escalation_rate": escalated / self._calls if self._calls else 0.0,
+            "escalation_reasons": dict(self._escalations),
+            "premium_failures": self._premium_failures,
+            "triage": triage_stats,
+            "premium": premium_stats,
+        }
@@ -0,0 +1,52 @@
+"""Pool de threads dedicado ao trabalho bloqueante da análise.
+
+SDKs síncronos e processamento de imagem (decode, resize, encode, hash)
+rodam aqui em vez do event loop. O pool é limitado por
+``settings.llm_thread_pool_size`` para que chamadas lentas não consumam as
+threads do executor padrão usado pela captura.
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Retorna o pool compartilhado, criando-o na primeira chamada."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.llm_thread_pool_size,
+            thread_name_prefix="llm-vision",
+        )
+        logger.info(
+            f"Pool de threads da análise criado "
+            f"({settings.llm_thread_pool_size} threads)"
+        )
+    return _executor
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Executa uma função bloqueante no pool da análise."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown_executor(wait: bool = True):
+    """Encerra o pool compartilhado (chamado no shutdown da aplicação)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
@@ -5,10 +5,14 @@ from typing import Optional
 
 from src.config import settings, LLMProvider
 from .base import BaseLLMVision
+from .cascade import AlertMatcher, CascadeVision
 from .openai_vision import OpenAIVision
 from .anthropic_vision import AnthropicVision
 from .gemini_vision import GeminiVision
 from .lmstudio_vision import LMStudioVision
+from .mock_vision import MockVision
+from .resilience import CircuitBreaker, RateLimiter, ResilientVision
+from .router import RouterVision
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +25,11 @@ class LLMVisionFactory:
         LLMProvider.ANTHROPIC: AnthropicVision,
         LLMProvider.GEMINI: GeminiVision,
         LLMProvider.LMSTUDIO: LMStudioVision,
+        LLMProvider.MOCK: MockVision,
     }
 
     _instance: Optional[BaseLLMVision] = None
+    _alert_matcher: Optional[AlertMatcher] = None
 
     @classmethod
     def create(
@@ -46,8 +52,8 @@ class LLMVisionFactory:
             ValueError: Se o provedor não for suportado ou API key não estiver configurada
         """
         provider = provider or settings.llm_provider
-        api_key = api_key or settings.get_llm_api_key()
-        model = model or settings.get_llm_model()
+        api_key = api_key or settings.get_llm_api_key(provider)
+        model = model or settings.get_llm_model(provider)
 
         if not api_key:
             raise ValueError(
@@ -62,13 +68,119 @@ class LLMVisionFactory:
         logger.info(f"Criando provedor LLM: {provider.value} com modelo {model}")
         return provider_class(api_key=api_key, model=model)
 
+    @classmethod
+    def wrap_resilient(
+        cls, instance: BaseLLMVision, fail_fast: bool = False
+    ) -> ResilientVision:
+        """Envolve um provedor com rate limit, retry e circuit breaker.
+
+        Args:
+            fail_fast: Falhar na hora com o circuito aberto e sem retry
+                (backends do roteador, que faz o failover)
+        """
+        return ResilientVision(
+            instance,
+            rate_limiter=RateLimiter(
+                requests_per_minute=settings.llm_requests_per_minute,
+                tokens_per_minute=settings.llm_tokens_per_minute,
+            ),
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=settings.llm_circuit_failure_threshold,
+                recovery_timeout=settings.llm_circuit_recovery_seconds,
+            ),
+            max_retries=settings.llm_max_retries,
+            base_delay=settings.llm_retry_base_delay,
+            max_delay=settings.llm_retry_max_delay,
+            estimated_tokens=settings.llm_estimated_tokens_per_call,
+            fail_fast=fail_fast,
+        )
+
     @classmethod
     def get_instance(cls) -> BaseLLMVision:
         """Retorna uma instância singleton do provedor LLM."""
         if cls._instance is None:
-            cls._instance = cls.create()
+            pool = settings.get_llm_pool()
+            if len(pool) > 1:
+                instance = cls.create_router(pool)
+            else:
+                provider, model = pool[0] if pool else (None, None)
+                instance = cls._create_backend(provider, model)
+            if settings.llm_cascade_enabled:
+                instance = cls.create_cascade(instance)
+            cls._instance = instance
         return cls._instance
 
+    @classmethod
+    def create_cascade(cls, premium: BaseLLMVision) -> CascadeVision:
+        """Coloca um modelo de triagem na frente do provedor principal."""
+        triage = cls._create_backend(
+            settings.llm_cascade_triage_provider,
+            settings.llm_cascade_triage_model or None,
+        )
+        logger.info(
+            f"Análise em cascata: triagem {triage.provider_name}:{triage.model}, "
+            f"escalada para {premium.provider_name}:{premium.model}"
+        )
+        return CascadeVision(
+            triage,
+            premium,
+            alert_matcher=cls._alert_matcher,
+            min_confidence=settings.llm_cascade_min_confidence,
+        )
+
+    @classmethod
+    def set_alert_matcher(cls, matcher: Optional[AlertMatcher]):
+        """Define como a cascata encontra keywords das regras de alerta ativas."""
+        cls._alert_matcher = matcher
+        if isinstance(cls._instance, CascadeVision):
+            cls._instance.alert_matcher = matcher
+
+    @classmethod
+    def _create_backend(
+        cls,
+        provider: Optional[LLMProvider],
+        model: Optional[str],
+        fail_fast: bool = False,
+    ) -> BaseLLMVision:
+        """Cria um provedor, com a camada de resiliência se habilitada."""
+        instance = cls.create(provider=provider, model=model)
+        if settings.llm_resilience_enabled:
+            instance = cls.wrap_resilient(instance, fail_fast=fail_fast)
+        return instance
+
+    @classmethod
+    def create_router(cls, pool: list[tuple[LLMProvider, str]]) -> RouterVision:
+        """Cria o roteador com um backend por entrada do pool.
+
+        Entradas cujo provedor não pode ser criado (ex.: sem API key) são
+        ignoradas com um aviso.
+        """
+        backends = []
+        for provider, model in pool:
+            try:
+                # Sem esperar o circuito nem repetir: o roteador tenta outro backend
+                backends.append(cls._create_backend(provider, model, fail_fast=True))
+            except ValueError as e:
+                logger.warning(f"Ignorando {provider.value}:{model} no pool: {e}")
+
+        if not backends:
+            raise ValueError("Nenhum provedor do pool LLM pôde ser criado")
+
+        logger.info(
+            f"Roteador LLM com {len(backends)} backends: "
+            f"{', '.join(RouterVision.backend_name(b) for b in backends)}"
+        )
+        return RouterVision(
+            backends, hedge_min_delay_ms=settings.llm_hedge_min_delay_ms
+        )
+
+    @classmethod
+    def get_resilience_stats(cls) -> Optional[dict]:
+        """Estado do provedor em uso (roteador, circuit breaker, endpoints)."""
+        if cls._instance is not None and hasattr(cls._instance, "get_stats"):
+            return cls._instance.get_stats()
+        return None
+
     @classmethod
     def reset_instance(cls):
         """Reseta a instância singleton."""
@@ -79,6 +191,24 @@ class LLMVisionFactory:
         """Retorna lista de provedores disponíveis."""
         return [p.value for p in cls._providers.keys()]
 
+    @classmethod
+    async def check_instance_health(cls) -> dict:
+        """Verifica o provedor em uso (pool, triagem e circuit breakers).
+
+        Reaproveita os clientes da instância singleton em vez de criar um
+        provedor novo a cada verificação.
+        """
+        try:
+            instance = cls.get_instance()
+        except Exception as e:
+            return {
+                "provider": settings.llm_provider.value,
+                "model": None,
+                "healthy": False,
+                "error": str(e),
+            }
+        return await instance.health_report()
+
     @classmethod
     async def check_provider_health(
         cls,
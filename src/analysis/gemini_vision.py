@@ -2,13 +2,13 @@
 
 import logging
 import time
-from typing import Optional
+from typing import AsyncIterator, List, Optional
 
 import google.generativeai as genai
-from PIL import Image
-import io
 
 from .base import BaseLLMVision, AnalysisResult
+from .executor import run_blocking
+from .structured import gemini_response_schema
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +16,9 @@ logger = logging.getLogger(__name__)
 class GeminiVision(BaseLLMVision):
     """Implementação do provider Google Gemini Vision."""
 
+    batch_mode = "multi_image"
+    supports_streaming = True
+
     def __init__(self, api_key: str, model: str = "gemini-pro-vision"):
         super().__init__(api_key, model)
         genai.configure(api_key=api_key)
@@ -25,6 +28,32 @@ class GeminiVision(BaseLLMVision):
     def provider_name(self) -> str:
         return "gemini"
 
+    def _request_args(self, image_data: bytes, prompt: Optional[str]) -> tuple:
+        """Monta o conteúdo e a configuração da requisição de um frame."""
+        # Envia o JPEG como blob, sem decodificar com PIL
+        image = {"mime_type": "image/jpeg", "data": image_data}
+
+        # Prepara o prompt (texto fixo primeiro: o cache implícito do
+        # Gemini reaproveita prefixos iguais entre chamadas)
+        analysis_prompt = prompt or self.analysis_prompt
+
+        config = {"max_output_tokens": 500, "temperature": 0.3}
+        if self.use_schema(prompt):
+            config["response_mime_type"] = "application/json"
+            config["response_schema"] = gemini_response_schema()
+
+        return [analysis_prompt, image], genai.types.GenerationConfig(**config)
+
+    @staticmethod
+    def _usage_counts(response) -> dict:
+        """Tokens de entrada, saída e em cache de uma resposta."""
+        usage = getattr(response, "usage_metadata", None)
+        return {
+            "tokens_in": getattr(usage, "prompt_token_count", None),
+            "tokens_out": getattr(usage, "candidates_token_count", None),
+            "cached_tokens": getattr(usage, "cached_content_token_count", None),
+        }
+
     async def analyze_frame(
         self,
         image_data: bytes,
@@ -34,47 +63,75 @@ class GeminiVision(BaseLLMVision):
         start_time = time.time()
 
         try:
-            # Converte bytes para PIL Image
-            image = Image.open(io.BytesIO(image_data))
-
-            # Prepara o prompt
-            analysis_prompt = prompt or self.ANALYSIS_PROMPT
+            contents, config = self._request_args(image_data, prompt)
 
-            # Faz a requisição (Gemini usa API síncrona)
-            response = self.generative_model.generate_content(
-                [analysis_prompt, image],
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=500,
-                    temperature=0.3,
-                ),
+            # Faz a requisição pela API assíncrona do SDK
+            response = await self.generative_model.generate_content_async(
+                contents, generation_config=config
             )
 
             # Extrai a resposta
             response_text = response.text if response.text else ""
-            description, keywords, confidence = self.parse_response(response_text)
-
-            processing_time = int((time.time() - start_time) * 1000)
-
-            return AnalysisResult(
-                description=description,
-                keywords=keywords,
-                confidence=confidence,
-                raw_response=response_text,
-                provider=self.provider_name,
-                model=self.model,
-                processing_time_ms=processing_time,
+            return self.build_result(
+                response_text, start_time, **self._usage_counts(response)
             )
 
         except Exception as e:
             logger.error(f"Erro na análise Gemini: {e}")
             raise
 
+    async def _stream_chunks(
+        self,
+        image_data: bytes,
+        prompt: Optional[str],
+        usage: dict,
+    ) -> AsyncIterator[str]:
+        """Recebe a análise em streaming."""
+        try:
+            contents, config = self._request_args(image_data, prompt)
+            response = await self.generative_model.generate_content_async(
+                contents, generation_config=config, stream=True
+            )
+            async for chunk in response:
+                if getattr(chunk, "usage_metadata", None):
+                    usage.update(self._usage_counts(chunk))
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Pedaço sem partes de texto (ex.: apenas metadados)
+                    continue
+                if text:
+                    yield text
+        except Exception as e:
+            logger.error(f"Erro na análise Gemini (streaming): {e}")
+            raise
+
+    async def _request_images(self, images: List[bytes], prompt: str) -> str:
+        """Envia um lote de imagens numa única requisição."""
+        parts: list = [prompt]
+        for index, image_data in enumerate(images, start=1):
+            parts.append(f"Imagem {index}:")
+            parts.append({"mime_type": "image/jpeg", "data": image_data})
+
+        try:
+            response = await self.generative_model.generate_content_async(
+                parts,
+                generation_config=genai.types.GenerationConfig(
+                    max_output_tokens=500 * len(images),
+                    temperature=0.3,
+                ),
+            )
+        except Exception as e:
+            logger.error(f"Erro na análise em lote Gemini: {e}")
+            raise
+
+        return response.text if response.text else ""
+
     async def health_check(self) -> bool:
         """Verifica se a API Gemini está acessível."""
         try:
-            # Lista modelos disponíveis como teste
-            models = genai.list_models()
-            return any(models)
+            # Lista modelos disponíveis como teste (chamada síncrona do SDK)
+            return await run_blocking(lambda: any(genai.list_models()))
         except Exception as e:
             logger.error(f"Health check Gemini falhou: {e}")
             return False
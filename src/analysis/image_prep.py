@@ -0,0 +1,232 @@
+"""Preparação de imagens antes do envio ao LLM."""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class ImageProfile:
+    """Tamanho de entrada efetivo e qualidade JPEG de um provedor.
+
+    ``max_side`` é o maior lado (em pixels) que o provedor realmente usa;
+    imagens maiores são reduzidas no servidor, então enviá-las só aumenta o
+    upload e o tempo de encode.
+    """
+
+    max_side: int
+    jpeg_quality: int
+
+
+# Perfis por provedor:
+# - openai: com detail="low" a imagem é reduzida para 512x512
+# - anthropic: imagens com lado maior que 1568px são redimensionadas
+# - gemini: imagens são divididas em blocos de 768x768
+# - lmstudio: modelos locais (LLaVA/Qwen-VL) trabalham perto de 672px
+PROVIDER_PROFILES: Dict[str, ImageProfile] = {
+    "openai": ImageProfile(max_side=512, jpeg_quality=80),
+    "anthropic": ImageProfile(max_side=1568, jpeg_quality=80),
+    "gemini": ImageProfile(max_side=768, jpeg_quality=80),
+    "lmstudio": ImageProfile(max_side=672, jpeg_quality=85),
+}
+
+DEFAULT_PROFILE = ImageProfile(max_side=1024, jpeg_quality=85)
+
+
+def get_profile(provider: str) -> ImageProfile:
+    """Retorna o perfil de imagem de um provedor."""
+    return PROVIDER_PROFILES.get(provider, DEFAULT_PROFILE)
+
+
+@dataclass
+class PreparedImage:
+    """Imagem pronta para envio ao LLM."""
+
+    data: bytes
+    width: int
+    height: int
+    original_bytes: int
+    cropped: bool = False
+
+    @property
+    def size(self) -> int:
+        """Tamanho da imagem preparada em bytes."""
+        return len(self.data)
+
+
+def motion_crop_region(
+    boxes: Sequence[Box],
+    frame_width: int,
+    frame_height: int,
+    margin: float = 0.15,
+    min_fraction: float = 0.25,
+) -> Optional[Box]:
+    """Calcula a região de recorte a partir das caixas de movimento.
+
+    A região é a união das caixas expandida por ``margin`` (fração do lado
+    da união) e limitada ao frame. Se a região ficar menor que
+    ``min_fraction`` de cada lado do frame ela é ampliada em torno do centro,
+    para que o LLM ainda tenha contexto da cena.
+
+    Returns:
+        (x, y, w, h) da região, ou None se não houver caixas ou se a região
+        cobrir praticamente o frame inteiro
+    """
+    if not boxes:
+        return None
+
+    x0 = min(b[0] for b in boxes)
+    y0 = min(b[1] for b in boxes)
+    x1 = max(b[0] + b[2] for b in boxes)
+    y1 = max(b[1] + b[3] for b in boxes)
+
+    pad_x = int((x1 - x0) * margin)
+    pad_y = int((y1 - y0) * margin)
+    x0, y0 = x0 - pad_x, y0 - pad_y
+    x1, y1 = x1 + pad_x, y1 + pad_y
+
+    # Garante um tamanho mínimo em torno do centro da região
+    min_w = int(frame_width * min_fraction)
+    min_h = int(frame_height * min_fraction)
+    if x1 - x0 < min_w:
+        center = (x0 + x1) // 2
+        x0, x1 = center - min_w // 2, center + (min_w - min_w // 2)
+    if y1 - y0 < min_h:
+        center = (y0 + y1) // 2
+        y0, y1 = center - min_h // 2, center + (min_h - min_h // 2)
+
+    # Desloca para dentro do frame antes de limitar
+    if x0 < 0:
+        x1, x0 = x1 - x0, 0
+    if y0 < 0:
+        y1, y0 = y1 - y0, 0
+    if x1 > frame_width:
+        x0, x1 = max(0, x0 - (x1 - frame_width)), frame_width
+    if y1 > frame_height:
+        y0, y1 = max(0, y0 - (y1 - frame_height)), frame_height
+
+    w, h = x1 - x0, y1 - y0
+    if w <= 0 or h <= 0:
+        return None
+    if w * h >= 0.9 * frame_width * frame_height:
+        return None
+    return (x0, y0, w, h)
+
+
+class ImagePreparer:
+    """Reduz, recorta e recodifica frames conforme o perfil do provedor.
+
+    Toda a preparação é feita com um único decode e um único encode. O
+    trabalho é síncrono (CPU) e deve rodar fora do event loop.
+    """
+
+    def __init__(
+        self,
+        crop_to_motion: bool = False,
+        crop_margin: float = 0.15,
+        min_crop_fraction: float = 0.25,
+        max_side: Optional[int] = None,
+        jpeg_quality: Optional[int] = None,
+    ):
+        """
+        Args:
+            crop_to_motion: Recortar para a união das caixas de movimento
+            crop_margin: Margem adicionada em volta da união das caixas
+            min_crop_fraction: Lado mínimo do recorte em fração do frame
+            max_side: Sobrescreve o maior lado do perfil do provedor
+            jpeg_quality: Sobrescreve a qualidade JPEG do perfil do provedor
+        """
+        self.crop_to_motion = crop_to_motion
+        self.crop_margin = crop_margin
+        self.min_crop_fraction = min_crop_fraction
+        self.max_side = max_side
+        self.jpeg_quality = jpeg_quality
+
+    def resolve_profile(self, profile: ImageProfile) -> ImageProfile:
+        """Aplica os overrides configurados sobre um perfil."""
+        return ImageProfile(
+            max_side=self.max_side or profile.max_side,
+            jpeg_quality=self.jpeg_quality or profile.jpeg_quality,
+        )
+
+    def prepare(
+        self,
+        image_data: bytes,
+        profile: ImageProfile,
+        motion_boxes: Optional[Sequence[Box]] = None,
+    ) -> PreparedImage:
+        """Prepara um frame JPEG para envio.
+
+        Args:
+            image_data: Frame original (JPEG)
+            profile: Perfil do provedor de destino
+            motion_boxes: Caixas de movimento (x, y, w, h) em coordenadas
+                do frame original
+
+        Returns:
+            PreparedImage; em caso de falha no decode o frame original é
+            devolvido sem alterações
+        """
+        profile = self.resolve_profile(profile)
+        frame = cv2.imdecode(np.frombuffer(image_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            logger.warning("Falha ao decodificar frame para preparação, enviando original")
+            return PreparedImage(
+                data=image_data, width=0, height=0, original_bytes=len(image_data)
+            )
+
+        height, width = frame.shape[:2]
+        cropped = False
+        if self.crop_to_motion and motion_boxes:
+            region = motion_crop_region(
+                motion_boxes,
+                width,
+                height,
+                margin=self.crop_margin,
+                min_fraction=self.min_crop_fraction,
+            )
+            if region:
+                x, y, w, h = region
+                frame = frame[y : y + h, x : x + w]
+                height, width = h, w
+                cropped = True
+
+        scale = profile.max_side / max(width, height)
+        if scale < 1.0:
+            width = max(1, int(width * scale))
+            height = max(1, int(height * scale))
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        elif not cropped:
+            # Frame já cabe no perfil: reencodar só perderia qualidade
+            return PreparedImage(
+                data=image_data,
+                width=width,
+                height=height,
+                original_bytes=len(image_data),
+            )
+
+        ok, buffer = cv2.imencode(
+            ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, profile.jpeg_quality]
+        )
+        if not ok:
+            return PreparedImage(
+                data=image_data,
+                width=width,
+                height=height,
+                original_bytes=len(image_data),
+            )
+
+        return PreparedImage(
+            data=buffer.tobytes(),
+            width=width,
+            height=height,
+            original_bytes=len(image_data),
+            cropped=cropped,
+        )
@@ -1,107 +1,366 @@
 """Provider LM Studio para modelos locais com visão."""
 
+import asyncio
 import base64
 import logging
 import time
-from typing import Optional
+from collections import deque
+from typing import AsyncIterator, Deque, List, Optional, Sequence, Tuple
 
 from openai import AsyncOpenAI
 
 from src.config import settings
 from .base import BaseLLMVision, AnalysisResult
+from .openai_vision import usage_counts
+from .resilience import is_transient
+from .structured import response_schema
 
 logger = logging.getLogger(__name__)
 
 
+class LMStudioEndpoint:
+    """Um servidor OpenAI-compatível do pool do LM Studio.
+
+    Limita as requisições simultâneas com um semáforo e acompanha latência,
+    vazão e falhas consecutivas para a ejeção passiva.
+    """
+
+    THROUGHPUT_WINDOW = 60.0
+
+    def __init__(self, url: str, api_key: str, max_concurrency: int):
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.client = AsyncOpenAI(api_key=api_key, base_url=url)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Requisições atribuídas ao endpoint (em execução + aguardando vaga)
+        self.outstanding = 0
+        self.completed = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejection_count = 0
+        self._total_latency_ms = 0.0
+        self._completions: Deque[float] = deque()
+
+    @property
+    def load(self) -> float:
+        """Requisições pendentes por vaga de concorrência."""
+        return self.outstanding / self.max_concurrency
+
+    def is_available(self, now: float) -> bool:
+        """Verifica se o endpoint não está ejetado."""
+        return now >= self.ejected_until
+
+    def record_success(self, latency_ms: float, now: float):
+        """Registra uma resposta e readmite o endpoint."""
+        if self.ejected_until:
+            logger.info(f"Endpoint LM Studio readmitido: {self.url}")
+        self.ejected_until = 0.0
+        self.consecutive_failures = 0
+        self.completed += 1
+        self._total_latency_ms += latency_ms
+        self._completions.append(now)
+
+    def record_failure(
+        self, now: float, eject_failures: int, eject_seconds: float
+    ) -> bool:
+        """Registra uma falha; retorna True se o endpoint foi ejetado."""
+        self.errors += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= eject_failures:
+            self.ejected_until = now + eject_seconds
+            self.ejection_count += 1
+            logger.warning(
+                f"Endpoint LM Studio ejetado por {eject_seconds}s após "
+                f"{self.consecutive_failures} falhas: {self.url}"
+            )
+            return True
+        return False
+
+    def throughput_per_minute(self, now: float) -> int:
+        """Respostas concluídas no último minuto."""
+        while self._completions and now - self._completions[0] > self.THROUGHPUT_WINDOW:
+            self._completions.popleft()
+        return len(self._completions)
+
+    def get_stats(self, now: float) -> dict:
+        """Retorna estatísticas do endpoint."""
+        return {
+            "url": self.url,
+            "max_concurrency": self.max_concurrency,
+            "outstanding": self.outstanding,
+            "completed": self.completed,
+            "errors": self.errors,
+            "ejected": not self.is_available(now),
+            "ejections": self.ejection_count,
+            "avg_latency_ms": (
+                self._total_latency_ms / self.completed if self.completed else 0.0
+            ),
+            "throughput_per_minute": self.throughput_per_minute(now),
+        }
+
+
+def parse_endpoints(
+    urls: Sequence[str], default_concurrency: int
+) -> List[Tuple[str, int]]:
+    """Interpreta a lista de URLs do pool.
+
+    Cada URL pode trazer um limite de concorrência próprio após ``#``
+    (ex.: ``http://gpu1:1234/v1#4``); sem ele usa ``default_concurrency``.
+    """
+    endpoints = []
+    for url in urls:
+        url = url.strip()
+        if not url:
+            continue
+        base, _, limit = url.partition("#")
+        endpoints.append((base, int(limit) if limit else default_concurrency))
+    return endpoints
+
+
 class LMStudioVision(BaseLLMVision):
     """Implementação do provider LM Studio para modelos locais.
 
     LM Studio expõe uma API compatível com OpenAI em localhost.
     Suporta modelos com visão como LLaVA, Qwen-VL, etc.
+
+    Aceita vários endpoints (um por servidor de inferência). Cada frame vai
+    para o endpoint disponível com menos requisições pendentes por vaga;
+    endpoints com falhas consecutivas de conexão/5xx são ejetados por um
+    tempo e readmitidos quando voltam a responder.
+
+    Lotes são enviados como mosaico: muitos modelos locais aceitam apenas
+    uma imagem por requisição.
     """
 
+    batch_mode = "mosaic"
+    supports_streaming = True
+
     def __init__(
         self,
         api_key: str = "lmstudio",
         model: str = "local-model",
         base_url: Optional[str] = None,
+        base_urls: Optional[Sequence[str]] = None,
+        max_concurrency: Optional[int] = None,
+        eject_failures: Optional[int] = None,
+        eject_seconds: Optional[float] = None,
     ):
         super().__init__(api_key, model)
-        self.base_url = base_url or settings.lmstudio_api_url
-        self.client = AsyncOpenAI(
-            api_key=api_key or "lmstudio",  # LM Studio não precisa de key real
-            base_url=self.base_url,
+        if base_urls is None:
+            base_urls = [base_url] if base_url else settings.get_lmstudio_urls()
+
+        endpoints = parse_endpoints(
+            base_urls, max_concurrency or settings.lmstudio_endpoint_concurrency
         )
+        if not endpoints:
+            raise ValueError("Nenhum endpoint LM Studio configurado")
+
+        self.endpoints = [
+            LMStudioEndpoint(
+                url=url,
+                api_key=api_key or "lmstudio",  # LM Studio não precisa de key real
+                max_concurrency=limit,
+            )
+            for url, limit in endpoints
+        ]
+        self.eject_failures = eject_failures or settings.lmstudio_eject_failures
+        self.eject_seconds = eject_seconds or settings.lmstudio_eject_seconds
+
+        # Compatibilidade: primeiro endpoint
+        self.base_url = self.endpoints[0].url
+        self.client = self.endpoints[0].client
 
     @property
     def provider_name(self) -> str:
         return "lmstudio"
 
+    def pick_endpoint(
+        self, exclude: Sequence[LMStudioEndpoint] = ()
+    ) -> Optional[LMStudioEndpoint]:
+        """Escolhe o endpoint disponível com menos requisições pendentes.
+
+        Se todos estiverem ejetados, escolhe o que sai da ejeção primeiro
+        para que ele seja testado (readmissão passiva).
+        """
+        now = time.monotonic()
+        candidates = [e for e in self.endpoints if e not in exclude]
+        if not candidates:
+            return None
+
+        available = [e for e in candidates if e.is_available(now)]
+        if available:
+            return min(available, key=lambda e: e.load)
+        return min(candidates, key=lambda e: e.ejected_until)
+
     async def analyze_frame(
         self,
         image_data: bytes,
         prompt: Optional[str] = None,
     ) -> AnalysisResult:
         """Analisa um frame usando modelo local via LM Studio."""
-        start_time = time.time()
+        tried: List[LMStudioEndpoint] = []
+        last_error: Optional[Exception] = None
+
+        while True:
+            endpoint = self.pick_endpoint(exclude=tried)
+            if endpoint is None:
+                raise last_error
+            tried.append(endpoint)
 
+            try:
+                return await self._analyze_on(endpoint, image_data, prompt)
+            except Exception as e:
+                last_error = e
+                if not is_transient(e):
+                    raise
+                logger.warning(
+                    f"Endpoint LM Studio {endpoint.url} falhou, "
+                    f"tentando outro endpoint: {e}"
+                )
+
+    async def _analyze_on(
+        self,
+        endpoint: LMStudioEndpoint,
+        image_data: bytes,
+        prompt: Optional[str],
+    ) -> AnalysisResult:
+        """Executa a análise em um endpoint respeitando seu limite."""
+        endpoint.outstanding += 1
         try:
-            # Converte imagem para base64
-            image_base64 = base64.b64encode(image_data).decode("utf-8")
-
-            # Prepara a mensagem
-            messages = [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": prompt or self.ANALYSIS_PROMPT,
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{image_base64}",
-                            },
+            async with endpoint._semaphore:
+                start_time = time.time()
+                try:
+                    result = await self._request(
+                        endpoint.client, image_data, prompt, start_time
+                    )
+                except Exception as e:
+                    if is_transient(e):
+                        endpoint.record_failure(
+                            time.monotonic(), self.eject_failures, self.eject_seconds
+                        )
+                    logger.error(f"Erro na análise LM Studio ({endpoint.url}): {e}")
+                    raise
+
+                endpoint.record_success(result.processing_time_ms, time.monotonic())
+                return result
+        finally:
+            endpoint.outstanding -= 1
+
+    def _request_kwargs(self, image_data: bytes, prompt: Optional[str]) -> dict:
+        """Monta os parâmetros da requisição de análise de um frame."""
+        # Converte imagem para base64
+        image_base64 = base64.b64encode(image_data).decode("utf-8")
+
+        # Prepara a mensagem
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": prompt or self.analysis_prompt,
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/jpeg;base64,{image_base64}",
                         },
-                    ],
-                }
-            ]
-
-            # Faz a requisição
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=500,
-                temperature=0.3,
-            )
+                    },
+                ],
+            }
+        ]
 
-            # Extrai a resposta
-            response_text = response.choices[0].message.content or ""
-            description, keywords, confidence = self.parse_response(response_text)
+        kwargs = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": 500,
+            "temperature": 0.3,
+        }
+        # LM Studio aceita response_format com JSON schema (saída estruturada)
+        if self.use_schema(prompt):
+            kwargs["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "analise_frame",
+                    "strict": True,
+                    "schema": response_schema(self.max_keywords),
+                },
+            }
+        return kwargs
 
-            processing_time = int((time.time() - start_time) * 1000)
+    async def _request(
+        self,
+        client: AsyncOpenAI,
+        image_data: bytes,
+        prompt: Optional[str],
+        start_time: float,
+    ) -> AnalysisResult:
+        """Faz a requisição de análise a um endpoint."""
+        response = await client.chat.completions.create(
+            **self._request_kwargs(image_data, prompt)
+        )
 
-            return AnalysisResult(
-                description=description,
-                keywords=keywords,
-                confidence=confidence,
-                raw_response=response_text,
-                provider=self.provider_name,
-                model=self.model,
-                processing_time_ms=processing_time,
-            )
+        # Extrai a resposta
+        response_text = response.choices[0].message.content or ""
+        return self.build_result(response_text, start_time, **usage_counts(response))
 
-        except Exception as e:
-            logger.error(f"Erro na análise LM Studio: {e}")
-            raise
+    async def _stream_chunks(
+        self,
+        image_data: bytes,
+        prompt: Optional[str],
+        usage: dict,
+    ) -> AsyncIterator[str]:
+        """Recebe a análise em streaming do endpoint menos carregado.
 
-    async def health_check(self) -> bool:
-        """Verifica se o LM Studio está acessível."""
+        Sem failover entre endpoints: pedaços já entregues não podem ser
+        desfeitos. Falhas contam para a ejeção e o retry fica com a camada
+        de resiliência.
+        """
+        endpoint = self.pick_endpoint()
+        endpoint.outstanding += 1
         try:
-            # Tenta listar modelos para verificar conexão
-            await self.client.models.list()
-            return True
-        except Exception as e:
-            logger.error(f"Health check LM Studio falhou: {e}")
-            return False
+            async with endpoint._semaphore:
+                start_time = time.time()
+                try:
+                    stream = await endpoint.client.chat.completions.create(
+                        **self._request_kwargs(image_data, prompt), stream=True
+                    )
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+                        if getattr(chunk, "usage", None):
+                            usage.update(usage_counts(chunk))
+                except Exception as e:
+                    if is_transient(e):
+                        endpoint.record_failure(
+                            time.monotonic(), self.eject_failures, self.eject_seconds
+                        )
+                    logger.error(f"Erro na análise LM Studio ({endpoint.url}): {e}")
+                    raise
+
+                endpoint.record_success(
+                    (time.time() - start_time) * 1000, time.monotonic()
+                )
+        finally:
+            endpoint.outstanding -= 1
+
+    async def health_check(self) -> bool:
+        """Verifica se ao menos um endpoint do LM Studio está acessível."""
+        for endpoint in self.endpoints:
+            try:
+                # Tenta listar modelos para verificar conexão
+                await endpoint.client.models.list()
+                return True
+            except Exception as e:
+                logger.error(f"Health check LM Studio falhou ({endpoint.url}): {e}")
+        return False
+
+    def get_stats(self) -> dict:
+        """Retorna estatísticas por endpoint."""
+        now = time.monotonic()
+        return {
+            "provider": self.provider_name,
+            "model": self.model,
+            "endpoints": [e.get_stats(now) for e in self.endpoints],
+        }
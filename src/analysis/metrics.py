@@ -0,0 +1,141 @@
+"""Métricas de chamadas aos provedores LLM."""
+
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional
+
+
+@dataclass
+class _ProviderCounters:
+    """Contadores acumulados de um provedor."""
+
+    calls: int = 0
+    errors: int = 0
+    bytes_sent: int = 0
+    original_bytes: int = 0
+    total_latency_ms: int = 0
+    latency_count: int = 0
+    total_prep_ms: float = 0.0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    usage_count: int = 0
+    cached_tokens: int = 0
+    cache_hits: int = 0
+    parse_failures: int = 0
+    total_first_keyword_ms: int = 0
+    first_keyword_count: int = 0
+    latencies: Deque[int] = field(default_factory=lambda: deque(maxlen=256))
+
+
+class ProviderMetrics:
+    """Acumula bytes enviados, latência e tokens por provedor LLM.
+
+    Mantém as últimas latências de cada provedor para calcular percentis
+    sem guardar o histórico completo.
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, _ProviderCounters] = {}
+
+    def _counters(self, provider: str) -> _ProviderCounters:
+        return self._providers.setdefault(provider, _ProviderCounters())
+
+    def record(
+        self,
+        provider: str,
+        bytes_sent: int,
+        latency_ms: Optional[int],
+        original_bytes: Optional[int] = None,
+        prep_ms: float = 0.0,
+        tokens_in: Optional[int] = None,
+        tokens_out: Optional[int] = None,
+        cached_tokens: Optional[int] = None,
+        parse_failed: bool = False,
+        first_keyword_ms: Optional[int] = None,
+    ):
+        """Registra uma chamada bem-sucedida.
+
+        Args:
+            provider: Nome do provedor
+            bytes_sent: Tamanho da imagem enviada
+            latency_ms: Latência da chamada ao provedor
+            original_bytes: Tamanho do frame antes da preparação
+            prep_ms: Tempo gasto preparando a imagem
+            tokens_in: Tokens de entrada informados pelo provedor
+            tokens_out: Tokens de saída informados pelo provedor
+            cached_tokens: Tokens de entrada lidos do cache de prompt
+            parse_failed: Se a resposta não trouxe JSON válido
+            first_keyword_ms: Tempo até as keywords chegarem no streaming
+        """
+        counters = self._counters(provider)
+        counters.calls += 1
+        counters.bytes_sent += bytes_sent
+        counters.original_bytes += (
+            original_bytes if original_bytes is not None else bytes_sent
+        )
+        counters.total_prep_ms += prep_ms
+        if latency_ms is not None:
+            counters.total_latency_ms += latency_ms
+            counters.latency_count += 1
+            counters.latencies.append(latency_ms)
+        if tokens_in is not None or tokens_out is not None:
+            counters.usage_count += 1
+            counters.tokens_in += tokens_in or 0
+            counters.tokens_out += tokens_out or 0
+        if cached_tokens:
+            counters.cached_tokens += cached_tokens
+            counters.cache_hits += 1
+        if parse_failed:
+            counters.parse_failures += 1
+        if first_keyword_ms is not None:
+            counters.total_first_keyword_ms += first_keyword_ms
+            counters.first_keyword_count += 1
+
+    def record_error(self, provider: str):
+        """Registra uma chamada que falhou."""
+        self._counters(provider).errors += 1
+
+    def reset(self):
+        """Zera as métricas de todos os provedores."""
+        self._providers.clear()
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Retorna as métricas agregadas por provedor."""
+        stats = {}
+        for provider, c in self._providers.items():
+            latencies = sorted(c.latencies)
+            p95 = latencies[math.ceil(len(latencies) * 0.95) - 1] if latencies else 0
+            stats[provider] = {
+                "calls": c.calls,
+                "errors": c.errors,
+                "bytes_sent": c.bytes_sent,
+                "avg_bytes_sent": c.bytes_sent // c.calls if c.calls else 0,
+                "bytes_saved": c.original_bytes - c.bytes_sent,
+                "avg_latency_ms": (
+                    c.total_latency_ms / c.latency_count if c.latency_count else 0.0
+                ),
+                "p95_latency_ms": p95,
+                "avg_prep_ms": c.total_prep_ms / c.calls if c.calls else 0.0,
+                "tokens_in": c.tokens_in,
+                "tokens_out": c.tokens_out,
+                "avg_tokens_in": (
+                    c.tokens_in / c.usage_count if c.usage_count else 0.0
+                ),
+                "avg_tokens_out": (
+                    c.tokens_out / c.usage_count if c.usage_count else 0.0
+                ),
+                "cached_tokens": c.cached_tokens,
+                "cache_hits": c.cache_hits,
+                "parse_failures": c.parse_failures,
+                "avg_first_keyword_ms": (
+                    c.total_first_keyword_ms / c.first_keyword_count
+                    if c.first_keyword_count
+                    else 0.0
+                ),
+            }
+        return stats
+
+
+# Instância global compartilhada pelo pipeline de análise
+provider_metrics = ProviderMetrics()
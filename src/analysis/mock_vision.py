@@ -0,0 +1,228 @@
+"""Provedor simulado para testes de carga sem chamadas reais ao LLM."""
+
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from typing import AsyncIterator, List, Optional
+
+from src.config import settings
+from .base import BaseLLMVision, AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+# Vocabulário usado quando não há keywords fixas configuradas
+MOCK_VOCABULARY = [
+    "pessoa",
+    "carro",
+    "moto",
+    "bicicleta",
+    "cachorro",
+    "portão",
+    "calçada",
+    "rua",
+    "entrega",
+    "caminhão",
+    "mochila",
+    "movimento",
+]
+
+LATENCY_DISTRIBUTIONS = ("fixed", "normal", "lognormal")
+
+
+class MockVisionError(Exception):
+    """Erro simulado com status HTTP, reconhecido pela camada de resiliência."""
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = None
+        if retry_after is not None:
+            # Mesmo formato dos SDKs: exc.response.headers["retry-after"]
+            self.response = type(
+                "MockResponse", (), {"headers": {"retry-after": str(retry_after)}}
+            )()
+
+
+class MockVision(BaseLLMVision):
+    """Provedor determinístico com perfis de latência e falha configuráveis.
+
+    Cada chamada sorteia, com um gerador de números aleatórios semeado:
+    - a latência (fixa, normal ou lognormal com a média e o desvio dados);
+    - um erro 500 (``error_rate``) ou 429 (``rate_limit_rate``);
+    - as keywords, quando não há uma lista fixa em ``keywords``.
+
+    Com a mesma semente e a mesma ordem de chamadas os resultados se
+    repetem, o que permite comparar execuções de benchmarks da fila, dos
+    workers e dos alertas. As chamadas simultâneas em andamento são
+    contadas em ``in_flight``/``max_in_flight``.
+    """
+
+    batch_mode = "multi_image"
+    supports_streaming = True
+
+    def __init__(
+        self,
+        api_key: str = "mock",
+        model: str = "mock-vision",
+        latency_distribution: Optional[str] = None,
+        latency_ms: Optional[float] = None,
+        latency_std_ms: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        rate_limit_rate: Optional[float] = None,
+        keywords: Optional[List[str]] = None,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(api_key, model)
+        self.latency_distribution = (
+            latency_distribution or settings.mock_latency_distribution
+        )
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Distribuição de latência inválida: {self.latency_distribution}"
+            )
+        self.latency_ms = (
+            latency_ms if latency_ms is not None else settings.mock_latency_ms
+        )
+        self.latency_std_ms = (
+            latency_std_ms if latency_std_ms is not None else settings.mock_latency_std_ms
+        )
+        self.error_rate = error_rate if error_rate is not None else settings.mock_error_rate
+        self.rate_limit_rate = (
+            rate_limit_rate if rate_limit_rate is not None else settings.mock_rate_limit_rate
+        )
+        self.keywords = keywords if keywords is not None else settings.get_mock_keywords()
+        self.seed = seed if seed is not None else settings.mock_seed
+        self._random = random.Random(self.seed)
+
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def provider_name(self) -> str:
+        return "mock"
+
+    def sample_latency_ms(self) -> float:
+        """Sorteia a latência de uma chamada."""
+        mean, std = self.latency_ms, self.latency_std_ms
+        if self.latency_distribution == "normal":
+            return max(0.0, self._random.gauss(mean, std))
+        if self.latency_distribution == "lognormal" and mean > 0:
+            # Parâmetros da lognormal com a média e o desvio pedidos
+            sigma = math.sqrt(math.log(1 + (std / mean) ** 2))
+            mu = math.log(mean) - sigma**2 / 2
+            return self._random.lognormvariate(mu, sigma)
+        return max(0.0, mean)
+
+    def _draw_failure(self) -> Optional[MockVisionError]:
+        """Sorteia se a chamada falha e com qual erro."""
+        draw = self._random.random()
+        if draw < self.rate_limit_rate:
+            self.rate_limited += 1
+            return MockVisionError(429, "Rate limit simulado", retry_after=1)
+        if draw < self.rate_limit_rate + self.error_rate:
+            self.errors += 1
+            return MockVisionError(500, "Erro simulado do provedor")
+        return None
+
+    def _draw_keywords(self) -> List[str]:
+        """Keywords fixas ou sorteadas do vocabulário."""
+        if self.keywords:
+            return list(self.keywords)
+        count = self._random.randint(1, 3)
+        return self._random.sample(MOCK_VOCABULARY, count)
+
+    def _response(self, keywords: List[str]) -> str:
+        """Resposta no formato compacto, na ordem em que chega no streaming."""
+        return json.dumps(
+            {
+                "k": keywords,
+                "c": round(self._random.uniform(0.6, 0.99), 2),
+                "d": f"Cena simulada com {', '.join(keywords)}.",
+            },
+            ensure_ascii=False,
+        )
+
+    async def _simulate_call(self, count: int = 1) -> List[str]:
+        """Sorteia o resultado da chamada, aguarda a latência e responde.
+
+        Returns:
+            Uma resposta por imagem da requisição
+        """
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Sorteios feitos antes de aguardar para não depender da ordem
+            # em que chamadas concorrentes terminam
+            latency = self.sample_latency_ms()
+            failure = self._draw_failure()
+            responses = [self._response(self._draw_keywords()) for _ in range(count)]
+            await asyncio.sleep(latency / 1000)
+            if failure:
+                raise failure
+            return responses
+        finally:
+            self.in_flight -= 1
+
+    async def analyze_frame(
+        self,
+        image_data: bytes,
+        prompt: Optional[str] = None,
+    ) -> AnalysisResult:
+        start_time = time.time()
+        (response_text,) = await self._simulate_call()
+        return self.build_result(
+            response_text,
+            start_time,
+            tokens_in=len(image_data) // 100,
+            tokens_out=len(response_text) // 4,
+        )
+
+    async def _stream_chunks(
+        self,
+        image_data: bytes,
+        prompt: Optional[str],
+        usage: dict,
+    ) -> AsyncIterator[str]:
+        """Entrega a resposta simulada em pedaços após a latência sorteada."""
+        (response_text,) = await self._simulate_call()
+        usage.update(tokens_in=len(image_data) // 100, tokens_out=len(response_text) // 4)
+        for i in range(0, len(response_text), 16):
+            await asyncio.sleep(0)
+            yield response_text[i : i + 16]
+
+    async def _request_images(self, images: List[bytes], prompt: str) -> str:
+        frames = []
+        for i, response in enumerate(await self._simulate_call(len(images))):
+            data = json.loads(response)
+            frames.append(
+                {
+                    "id": i + 1,
+                    "description": data["d"],
+                    "keywords": data["k"],
+                    "confidence": data["c"],
+                }
+            )
+        return json.dumps({"frames": frames}, ensure_ascii=False)
+
+    async def health_check(self) -> bool:
+        return True
+
+    def get_stats(self) -> dict:
+        """Retorna contadores de chamadas, falhas e concorrência."""
+        return {
+            "provider": self.provider_name,
+            "degraded": False,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "latency_distribution": self.latency_distribution,
+        }
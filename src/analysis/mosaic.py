@@ -0,0 +1,88 @@
+"""Mosaico de frames para análise em lote numa única imagem."""
+
+import logging
+import math
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Lado mínimo de cada quadro: abaixo disso o modelo perde os detalhes
+MIN_TILE_SIDE = 256
+
+
+def mosaic_grid(count: int) -> Tuple[int, int]:
+    """Retorna (linhas, colunas) da grade mais quadrada para ``count`` quadros."""
+    cols = max(1, math.ceil(math.sqrt(count)))
+    rows = max(1, math.ceil(count / cols))
+    return rows, cols
+
+
+def build_mosaic(
+    images: List[bytes],
+    max_side: int = 1024,
+    jpeg_quality: int = 85,
+) -> bytes:
+    """Monta um mosaico em grade com os frames numerados de 1 a N.
+
+    Cada frame é reduzido (mantendo a proporção) para caber no seu quadro e
+    recebe o número no canto superior esquerdo, na ordem de ``images``
+    (da esquerda para a direita, de cima para baixo). Frames que não puderem
+    ser decodificados ficam como quadros pretos.
+
+    Args:
+        images: Bytes das imagens (JPEG)
+        max_side: Maior lado do mosaico em pixels
+        jpeg_quality: Qualidade JPEG do mosaico
+
+    Returns:
+        Bytes do mosaico em JPEG
+    """
+    rows, cols = mosaic_grid(len(images))
+    tile_w = max(MIN_TILE_SIDE, max_side // cols)
+    tile_h = max(MIN_TILE_SIDE, max_side // cols * 3 // 4)
+
+    canvas = np.zeros((rows * tile_h, cols * tile_w, 3), dtype=np.uint8)
+
+    for index, data in enumerate(images):
+        row, col = divmod(index, cols)
+        x0, y0 = col * tile_w, row * tile_h
+
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            logger.warning(f"Frame {index + 1} do mosaico não pôde ser decodificado")
+        else:
+            height, width = frame.shape[:2]
+            scale = min(tile_w / width, tile_h / height)
+            new_w = max(1, int(width * scale))
+            new_h = max(1, int(height * scale))
+            resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_AREA)
+            ox = x0 + (tile_w - new_w) // 2
+            oy = y0 + (tile_h - new_h) // 2
+            canvas[oy : oy + new_h, ox : ox + new_w] = resized
+
+        # Borda e número do quadro
+        cv2.rectangle(
+            canvas, (x0, y0), (x0 + tile_w - 1, y0 + tile_h - 1), (255, 255, 255), 1
+        )
+        label = str(index + 1)
+        cv2.rectangle(canvas, (x0, y0), (x0 + 36, y0 + 32), (0, 0, 0), -1)
+        cv2.putText(
+            canvas,
+            label,
+            (x0 + 6, y0 + 25),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.8,
+            (0, 255, 255),
+            2,
+            cv2.LINE_AA,
+        )
+
+    ok, encoded = cv2.imencode(
+        ".jpg", canvas, [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+    )
+    if not ok:
+        raise ValueError("Falha ao codificar o mosaico")
+    return encoded.tobytes()
@@ -3,18 +3,35 @@
 import base64
 import logging
 import time
-from typing import Optional
+from typing import AsyncIterator, List, Optional
 
 from openai import AsyncOpenAI
 
 from .base import BaseLLMVision, AnalysisResult
+from .structured import response_schema
 
 logger = logging.getLogger(__name__)
 
 
+def usage_counts(response) -> dict:
+    """Tokens de entrada, saída e em cache de uma resposta chat.completions."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "tokens_in": getattr(usage, "prompt_tokens", None),
+        "tokens_out": getattr(usage, "completion_tokens", None),
+        "cached_tokens": getattr(details, "cached_tokens", None),
+    }
+
+
 class OpenAIVision(BaseLLMVision):
     """Implementação do provider OpenAI GPT-4 Vision."""
 
+    batch_mode = "multi_image"
+    supports_streaming = True
+
     def __init__(self, api_key: str, model: str = "gpt-4o"):
         super().__init__(api_key, model)
         self.client = AsyncOpenAI(api_key=api_key)
@@ -23,6 +40,50 @@ class OpenAIVision(BaseLLMVision):
     def provider_name(self) -> str:
         return "openai"
 
+    def _request_kwargs(self, image_data: bytes, prompt: Optional[str]) -> dict:
+        """Monta os parâmetros da requisição de análise de um frame."""
+        # Converte imagem para base64
+        image_base64 = base64.b64encode(image_data).decode("utf-8")
+
+        # Prepara a mensagem (o texto fixo vem antes da imagem: o cache
+        # automático de prompt reaproveita prefixos a partir de 1024 tokens,
+        # o que não acontece com o prompt compacto)
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": prompt or self.analysis_prompt,
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/jpeg;base64,{image_base64}",
+                            "detail": "low",  # Usa resolução baixa para economia
+                        },
+                    },
+                ],
+            }
+        ]
+
+        kwargs = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": 500,
+            "temperature": 0.3,
+        }
+        if self.use_schema(prompt):
+            kwargs["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "analise_frame",
+                    "strict": True,
+                    "schema": response_schema(self.max_keywords),
+                },
+            }
+        return kwargs
+
     async def analyze_frame(
         self,
         image_data: bytes,
@@ -32,57 +93,69 @@ class OpenAIVision(BaseLLMVision):
         start_time = time.time()
 
         try:
-            # Converte imagem para base64
-            image_base64 = base64.b64encode(image_data).decode("utf-8")
-
-            # Prepara a mensagem
-            messages = [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": prompt or self.ANALYSIS_PROMPT,
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{image_base64}",
-                                "detail": "low",  # Usa resolução baixa para economia
-                            },
-                        },
-                    ],
-                }
-            ]
-
             # Faz a requisição
             response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=500,
-                temperature=0.3,
+                **self._request_kwargs(image_data, prompt)
             )
 
             # Extrai a resposta
             response_text = response.choices[0].message.content or ""
-            description, keywords, confidence = self.parse_response(response_text)
+            return self.build_result(response_text, start_time, **usage_counts(response))
 
-            processing_time = int((time.time() - start_time) * 1000)
+        except Exception as e:
+            logger.error(f"Erro na análise OpenAI: {e}")
+            raise
 
-            return AnalysisResult(
-                description=description,
-                keywords=keywords,
-                confidence=confidence,
-                raw_response=response_text,
-                provider=self.provider_name,
-                model=self.model,
-                processing_time_ms=processing_time,
+    async def _stream_chunks(
+        self,
+        image_data: bytes,
+        prompt: Optional[str],
+        usage: dict,
+    ) -> AsyncIterator[str]:
+        """Recebe a análise em streaming."""
+        try:
+            stream = await self.client.chat.completions.create(
+                **self._request_kwargs(image_data, prompt),
+                stream=True,
+                stream_options={"include_usage": True},
             )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if getattr(chunk, "usage", None):
+                    usage.update(usage_counts(chunk))
+        except Exception as e:
+            logger.error(f"Erro na análise OpenAI (streaming): {e}")
+            raise
 
+    async def _request_images(self, images: List[bytes], prompt: str) -> str:
+        """Envia um lote de imagens numa única requisição."""
+        content = [{"type": "text", "text": prompt}]
+        for image_data in images:
+            image_base64 = base64.b64encode(image_data).decode("utf-8")
+            content.append(
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/jpeg;base64,{image_base64}",
+                        "detail": "low",
+                    },
+                }
+            )
+
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": content}],
+                max_tokens=500 * len(images),
+                temperature=0.3,
+            )
         except Exception as e:
-            logger.error(f"Erro na análise OpenAI: {e}")
+            logger.error(f"Erro na análise em lote OpenAI: {e}")
             raise
 
+        return response.choices[0].message.content or ""
+
     async def health_check(self) -> bool:
         """Verifica se a API OpenAI está acessível."""
         try:
@@ -0,0 +1,454 @@
+"""Limitação de taxa, retry e circuit breaker para provedores LLM."""
+
+import asyncio
+import logging
+import random
+import time
+from enum import Enum
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+from .base import AnalysisResult, BaseLLMVision, KeywordsCallback
+from .image_prep import ImageProfile
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Token bucket com reposição contínua.
+
+    ``rate_per_minute`` tokens são repostos por minuto até ``capacity``
+    (padrão: um minuto de tokens). Com taxa 0 o bucket não limita nada.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        """Verifica se o bucket limita a taxa (rate_per_minute > 0)."""
+        return self.rate_per_minute > 0
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(
+            self.capacity, self._tokens + elapsed * self.rate_per_minute / 60.0
+        )
+
+    @property
+    def available(self) -> float:
+        """Tokens disponíveis no momento."""
+        if not self.enabled:
+            return float("inf")
+        self._refill()
+        return self._tokens
+
+    def time_until(self, amount: float) -> float:
+        """Segundos até haver ``amount`` tokens disponíveis."""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        missing = amount - self._tokens
+        if missing <= 0:
+            return 0.0
+        return missing * 60.0 / self.rate_per_minute
+
+    def try_acquire(self, amount: float = 1) -> bool:
+        """Consome ``amount`` tokens se estiverem disponíveis."""
+        if not self.enabled:
+            return True
+        if self.time_until(amount) > 0:
+            return False
+        self._tokens -= min(amount, self.capacity)
+        return True
+
+    def consume(self, amount: float):
+        """Consome tokens incondicionalmente (o saldo pode ficar negativo)."""
+        if self.enabled:
+            self._refill()
+            self._tokens -= amount
+
+
+class RateLimiter:
+    """Limita requisições e tokens por minuto de um provedor."""
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._throttled_count = 0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, estimated_tokens: int = 0):
+        """Aguarda até a requisição caber nos dois limites."""
+        # O lock mantém a ordem de chegada entre os workers
+        async with self._lock:
+            throttled = False
+            while True:
+                wait = max(
+                    self.requests.time_until(1),
+                    self.tokens.time_until(estimated_tokens),
+                )
+                if wait <= 0:
+                    break
+                throttled = True
+                await asyncio.sleep(wait)
+
+            self.requests.try_acquire(1)
+            self.tokens.try_acquire(estimated_tokens)
+            if throttled:
+                self._throttled_count += 1
+
+    def get_stats(self) -> dict:
+        """Retorna estatísticas do limitador."""
+        return {
+            "requests_per_minute": self.requests.rate_per_minute,
+            "tokens_per_minute": self.tokens.rate_per_minute,
+            "available_requests": (
+                int(self.requests.available) if self.requests.enabled else None
+            ),
+            "available_tokens": (
+                int(self.tokens.available) if self.tokens.enabled else None
+            ),
+            "throttled": self._throttled_count,
+        }
+
+
+class CircuitState(str, Enum):
+    """Estados do circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """O circuito está aberto e a chamada não pode esperar a recuperação."""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"Circuit breaker aberto, nova tentativa em {retry_in:.1f}s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Interrompe as chamadas a um provedor fora do ar.
+
+    Depois de ``failure_threshold`` falhas consecutivas o circuito abre e as
+    chamadas aguardam ``recovery_timeout`` segundos. Em seguida uma única
+    chamada de teste é liberada (half-open): sucesso fecha o circuito, falha
+    o reabre. Enquanto isso os frames continuam esperando na fila.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._open_count = 0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> CircuitState:
+        """Estado atual do circuito."""
+        return self._state
+
+    def _retry_in(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.recovery_timeout - time.monotonic())
+
+    async def before_call(self, wait: bool = True):
+        """Aguarda até o circuito permitir uma chamada.
+
+        Args:
+            wait: Com False, levanta ``CircuitOpenError`` em vez de aguardar
+                (quem chama tem outro provedor para tentar)
+        """
+        while True:
+            if self._state == CircuitState.CLOSED:
+                return
+
+            if self._state == CircuitState.OPEN:
+                retry_in = self._retry_in()
+                if retry_in > 0:
+                    if not wait:
+                        raise CircuitOpenError(retry_in)
+                    await asyncio.sleep(retry_in)
+                    continue
+                self._state = CircuitState.HALF_OPEN
+                self._probe_in_flight = False
+                logger.info("Circuit breaker half-open, liberando chamada de teste")
+
+            # Half-open: apenas uma chamada de teste por vez
+            if not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            if not wait:
+                raise CircuitOpenError(0.0)
+            await asyncio.sleep(min(1.0, self.recovery_timeout))
+
+    @property
+    def probe_in_flight(self) -> bool:
+        """Verifica se a chamada de teste do half-open está em andamento."""
+        return self._state == CircuitState.HALF_OPEN and self._probe_in_flight
+
+    @property
+    def accepting_calls(self) -> bool:
+        """Verifica se uma chamada agora seria liberada sem esperar.
+
+        Falso com o circuito aberto antes de ``recovery_timeout`` e no
+        half-open enquanto a chamada de teste estiver em andamento.
+        """
+        if self._state == CircuitState.OPEN:
+            return self._retry_in() == 0
+        return not self.probe_in_flight
+
+    def release_probe(self):
+        """Libera a chamada de teste interrompida sem resultado (cancelada).
+
+        O circuito continua half-open e a próxima chamada faz o teste.
+        """
+        if self._state == CircuitState.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        """Registra uma chamada bem-sucedida."""
+        if self._state != CircuitState.CLOSED:
+            logger.info("Circuit breaker fechado, provedor recuperado")
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """Registra uma falha transitória (429, 5xx, timeout)."""
+        self._failures += 1
+        if self._state == CircuitState.HALF_OPEN or (
+            self._state == CircuitState.CLOSED
+            and self._failures >= self.failure_threshold
+        ):
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+            self._open_count += 1
+            self._probe_in_flight = False
+            logger.warning(
+                f"Circuit breaker aberto após {self._failures} falhas, "
+                f"pausando chamadas por {self.recovery_timeout}s"
+            )
+
+    def get_stats(self) -> dict:
+        """Retorna o estado do circuito."""
+        return {
+            "state": self._state.value,
+            "consecutive_failures": self._failures,
+            "open_count": self._open_count,
+            "probe_in_flight": self.probe_in_flight,
+            "retry_in_seconds": (
+                round(self._retry_in(), 1) if self._state == CircuitState.OPEN else 0.0
+            ),
+        }
+
+
+def error_status(exc: BaseException) -> Optional[int]:
+    """Extrai o status HTTP de uma exceção de SDK (openai, anthropic, google)."""
+    for attr in ("status_code", "code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Extrai o header Retry-After (em segundos) da resposta de erro."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Verifica se o erro é transitório e a chamada pode ser repetida."""
+    status = error_status(exc)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    # Erros de conexão/timeout dos SDKs não carregam status
+    name = type(exc).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+class ResilientVision(BaseLLMVision):
+    """Envolve um provedor com rate limit, retry e circuit breaker.
+
+    Cada chamada a ``analyze_frame``:
+    1. aguarda o circuit breaker permitir chamadas;
+    2. aguarda vaga no limite de requisições/tokens por minuto;
+    3. repete erros transitórios com backoff exponencial com jitter,
+       respeitando o Retry-After enviado pelo provedor.
+
+    Com ``fail_fast`` (backends de um ``RouterVision``) o circuito aberto
+    levanta ``CircuitOpenError`` na hora e os erros transitórios não são
+    repetidos: quem tenta de novo é o roteador, em outro backend.
+    """
+
+    def __init__(
+        self,
+        inner: BaseLLMVision,
+        rate_limiter: Optional[RateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        estimated_tokens: int = 1000,
+        fail_fast: bool = False,
+    ):
+        super().__init__(inner.api_key, inner.model)
+        self.inner = inner
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.estimated_tokens = estimated_tokens
+        self.fail_fast = fail_fast
+        self._retry_count = 0
+        self._failed_count = 0
+
+    @property
+    def provider_name(self) -> str:
+        return self.inner.provider_name
+
+    @property
+    def image_profile(self) -> ImageProfile:
+        return self.inner.image_profile
+
+    def backoff_delay(self, attempt: int, exc: Optional[BaseException] = None) -> float:
+        """Calcula a espera antes da próxima tentativa.
+
+        Usa full jitter sobre ``base_delay * 2**attempt`` (limitado a
+        ``max_delay``); se o provedor enviou Retry-After, espera no mínimo
+        esse tempo.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        hint = retry_after(exc) if exc is not None else None
+        if hint is not None:
+            delay = max(delay, min(hint, self.max_delay))
+        return delay
+
+    async def analyze_frame(
+        self,
+        image_data: bytes,
+        prompt: Optional[str] = None,
+    ) -> AnalysisResult:
+        """Analisa um frame pelo provedor interno com retry e limites."""
+        return await self._call_with_retry(
+            lambda: self.inner.analyze_frame(image_data, prompt),
+            self.estimated_tokens,
+        )
+
+    async def analyze_frame_stream(
+        self,
+        image_data: bytes,
+        prompt: Optional[str] = None,
+        on_keywords: Optional[KeywordsCallback] = None,
+    ) -> AnalysisResult:
+        """Analisa um frame em streaming pelo provedor interno com retry e limites."""
+        return await self._call_with_retry(
+            lambda: self.inner.analyze_frame_stream(image_data, prompt, on_keywords),
+            self.estimated_tokens,
+        )
+
+    async def analyze_batch(
+        self,
+        images: List[bytes],
+        prompt: Optional[str] = None,
+    ) -> List[AnalysisResult]:
+        """Analisa um lote pelo provedor interno com retry e limites."""
+        return await self._call_with_retry(
+            lambda: self.inner.analyze_batch(images, prompt),
+            self.estimated_tokens * len(images),
+        )
+
+    async def _call_with_retry(
+        self, call: Callable[[], Awaitable[T]], estimated_tokens: int
+    ) -> T:
+        """Executa a chamada respeitando circuito e limites, com retry."""
+        attempt = 0
+        while True:
+            await self.circuit_breaker.before_call(wait=not self.fail_fast)
+
+            try:
+                await self.rate_limiter.acquire(estimated_tokens)
+                result = await call()
+            except asyncio.CancelledError:
+                # Chamada cancelada (ex.: hedge perdedor) não diz nada sobre o
+                # provedor: libera o teste do half-open para a próxima chamada
+                self.circuit_breaker.release_probe()
+                raise
+            except Exception as e:
+                if not is_transient(e):
+                    # Erro do pedido (ex.: 400): repetir não resolve
+                    self.circuit_breaker.record_success()
+                    self._failed_count += 1
+                    raise
+
+                self.circuit_breaker.record_failure()
+                if self.fail_fast or attempt >= self.max_retries:
+                    self._failed_count += 1
+                    raise
+
+                delay = self.backoff_delay(attempt, e)
+                attempt += 1
+                self._retry_count += 1
+                logger.warning(
+                    f"Erro transitório em {self.provider_name} "
+                    f"(status={error_status(e)}): {e}. "
+                    f"Tentativa {attempt}/{self.max_retries} em {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self.circuit_breaker.record_success()
+            return result
+
+    async def health_check(self) -> bool:
+        return await self.inner.health_check()
+
+    async def health_report(self) -> dict:
+        """Saúde do provedor interno; com o circuito aberto não está saudável."""
+        report = await self.inner.health_report()
+        report["circuit"] = self.circuit_breaker.state.value
+        if self.circuit_breaker.state == CircuitState.OPEN:
+            report["healthy"] = False
+            report["error"] = report["error"] or "Circuit breaker aberto"
+        return report
+
+    def get_stats(self) -> dict:
+        """Retorna o estado do rate limiter, do circuito e os retries."""
+        return {
+            "provider": self.provider_name,
+            "model": self.model,
+            "degraded": self.circuit_breaker.state != CircuitState.CLOSED,
+            "circuit": self.circuit_breaker.get_stats(),
+            "rate_limiter": self.rate_limiter.get_stats(),
+            "retries": self._retry_count,
+            "failed": self._failed_count,
+            "backend": (
+                self.inner.get_stats() if hasattr(self.inner, "get_stats") else None
+            ),
+        }
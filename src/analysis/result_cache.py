@@ -0,0 +1,173 @@
+"""Cache de resultados de análise indexado por hash perceptual do frame."""
+
+import dataclasses
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+from .base import AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+
+def dhash(image_data: bytes, hash_size: int = 8) -> Optional[int]:
+    """Calcula o difference hash (dHash) de uma imagem JPEG.
+
+    A imagem é decodificada já reduzida e em escala de cinza, redimensionada
+    para (hash_size + 1) x hash_size e cada bit indica se um pixel é mais
+    claro que o vizinho à direita. Frames quase idênticos geram hashes com
+    distância de Hamming pequena.
+
+    Args:
+        image_data: Bytes da imagem (JPEG)
+        hash_size: Lado do hash em bits (8 gera um hash de 64 bits)
+
+    Returns:
+        Hash como inteiro, ou None se a imagem não puder ser decodificada
+    """
+    gray = cv2.imdecode(
+        np.frombuffer(image_data, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_4
+    )
+    if gray is None:
+        return None
+
+    resized = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (resized[:, 1:] > resized[:, :-1]).flatten()
+
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Distância de Hamming entre dois hashes."""
+    return (a ^ b).bit_count()
+
+
+@dataclass
+class _CacheEntry:
+    """Entrada do cache de uma câmera."""
+
+    phash: int
+    result: AnalysisResult
+    created_at: float
+
+
+class PerceptualHashCache:
+    """Reaproveita resultados de análise para frames quase idênticos.
+
+    Mantém, por câmera, os últimos frames analisados em ordem LRU. Um frame
+    novo cujo hash está a até ``max_distance`` bits de uma entrada ainda
+    válida (dentro do TTL) reutiliza o ``AnalysisResult`` dela em vez de
+    chamar o LLM.
+    """
+
+    def __init__(
+        self,
+        max_distance: int = 6,
+        ttl_seconds: float = 300.0,
+        max_entries_per_camera: int = 16,
+    ):
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_camera = max_entries_per_camera
+        self._entries: Dict[uuid.UUID, "OrderedDict[int, _CacheEntry]"] = {}
+        self._hits: Dict[uuid.UUID, int] = {}
+        self._misses: Dict[uuid.UUID, int] = {}
+        self._evictions = 0
+        self._expirations = 0
+
+    def lookup(
+        self, camera_id: uuid.UUID, phash: int, now: Optional[float] = None
+    ) -> Optional[AnalysisResult]:
+        """Busca um resultado para um frame parecido da mesma câmera.
+
+        Returns:
+            Cópia do resultado em cache marcada como ``cached``, ou None
+        """
+        now = now if now is not None else time.time()
+        entries = self._entries.get(camera_id)
+
+        best: Optional[_CacheEntry] = None
+        best_distance = self.max_distance + 1
+        if entries:
+            for key in list(entries.keys()):
+                entry = entries[key]
+                if now - entry.created_at > self.ttl_seconds:
+                    del entries[key]
+                    self._expirations += 1
+                    continue
+                distance = hamming_distance(phash, entry.phash)
+                if distance < best_distance:
+                    best, best_distance = entry, distance
+
+        if best is None:
+            self._misses[camera_id] = self._misses.get(camera_id, 0) + 1
+            return None
+
+        entries.move_to_end(best.phash)
+        self._hits[camera_id] = self._hits.get(camera_id, 0) + 1
+        logger.debug(
+            f"Cache perceptual hit: câmera={camera_id}, distância={best_distance}"
+        )
+        return dataclasses.replace(best.result, cached=True, processing_time_ms=0)
+
+    def store(
+        self,
+        camera_id: uuid.UUID,
+        phash: int,
+        result: AnalysisResult,
+        now: Optional[float] = None,
+    ):
+        """Guarda o resultado de um frame analisado."""
+        entries = self._entries.setdefault(camera_id, OrderedDict())
+        entries[phash] = _CacheEntry(
+            phash=phash,
+            result=result,
+            created_at=now if now is not None else time.time(),
+        )
+        entries.move_to_end(phash)
+
+        while len(entries) > self.max_entries_per_camera:
+            entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self, camera_id: Optional[uuid.UUID] = None):
+        """Remove as entradas de uma câmera (ou de todas)."""
+        if camera_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(camera_id, None)
+
+    def get_camera_stats(self, camera_id: uuid.UUID) -> dict:
+        """Retorna hits, misses e taxa de acerto de uma câmera."""
+        hits = self._hits.get(camera_id, 0)
+        misses = self._misses.get(camera_id, 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / total * 100) if total else 0.0,
+            "entries": len(self._entries.get(camera_id, ())),
+        }
+
+    def get_stats(self) -> dict:
+        """Retorna estatísticas agregadas do cache."""
+        hits = sum(self._hits.values())
+        misses = sum(self._misses.values())
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / total * 100) if total else 0.0,
+            "entries": sum(len(e) for e in self._entries.values()),
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+        }
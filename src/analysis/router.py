@@ -0,0 +1,411 @@
+"""Roteador entre vários provedores LLM com balanceamento por latência."""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Deque, List, Optional
+
+from .base import AnalysisResult, BaseLLMVision, KeywordsCallback
+from .image_prep import ImageProfile
+from .metrics import provider_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BackendStats:
+    """Estatísticas de roteamento de um backend."""
+
+    ewma_latency_ms: Optional[float] = None
+    ewma_error_rate: float = 0.0
+    in_flight: int = 0
+    calls: int = 0
+    errors: int = 0
+    hedges_won: int = 0
+    last_error_at: Optional[float] = None
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=100))
+
+    def p95_latency_ms(self, min_samples: int) -> Optional[float]:
+        """Percentil 95 das latências recentes (None com poucas amostras)."""
+        if len(self.latencies) < min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[math.ceil(len(ordered) * 0.95) - 1]
+
+
+def _first_keywords(on_keywords: KeywordsCallback) -> KeywordsCallback:
+    """Repassa apenas as primeiras keywords entregues (requisições duplicadas)."""
+    delivered = False
+
+    async def callback(keywords: List[str]):
+        nonlocal delivered
+        if delivered:
+            return
+        delivered = True
+        await on_keywords(keywords)
+
+    return callback
+
+
+class RouterVision(BaseLLMVision):
+    """Distribui as análises entre vários provedores/modelos.
+
+    Para cada backend mantém a latência e a taxa de erro em média móvel
+    exponencial (EWMA) e envia cada frame ao backend saudável de menor custo
+    (latência ponderada pelas requisições em andamento e pela taxa de erro).
+    Se o backend escolhido falhar, o frame segue para o próximo (failover).
+
+    Backends com taxa de erro acima de ``error_threshold`` ficam fora da
+    rotação por ``eject_seconds``; backends envolvidos por ``ResilientVision``
+    também ficam fora enquanto o circuit breaker estiver aberto ou testando a
+    recuperação (half-open com a chamada de teste em andamento).
+
+    ``analyze_frame_hedged`` (câmeras de prioridade alta) envia uma segunda
+    requisição a outro backend se a primeira não responder dentro do p95 de
+    latência do backend escolhido, e usa a resposta que chegar primeiro.
+    """
+
+    MIN_P95_SAMPLES = 10
+    DEFAULT_HEDGE_DELAY_MS = 5000.0
+    # Latência somada ao custo para que requisições em andamento pesem mesmo
+    # em backends ainda sem medições
+    BASE_COST_MS = 100.0
+
+    def __init__(
+        self,
+        backends: List[BaseLLMVision],
+        alpha: float = 0.2,
+        error_threshold: float = 0.5,
+        eject_seconds: float = 30.0,
+        hedge_min_delay_ms: float = 500.0,
+    ):
+        if not backends:
+            raise ValueError("RouterVision precisa de ao menos um backend")
+        super().__init__(
+            api_key="", model=",".join(self.backend_name(b) for b in backends)
+        )
+        self.backends = backends
+        self.alpha = alpha
+        self.error_threshold = error_threshold
+        self.eject_seconds = eject_seconds
+        self.hedge_min_delay_ms = hedge_min_delay_ms
+        self._stats = {id(b): BackendStats() for b in backends}
+        self._hedge_count = 0
+
+    @staticmethod
+    def backend_name(backend: BaseLLMVision) -> str:
+        """Identificador de um backend no formato provedor:modelo."""
+        return f"{backend.provider_name}:{backend.model}"
+
+    @property
+    def provider_name(self) -> str:
+        return "router"
+
+    @property
+    def image_profile(self) -> ImageProfile:
+        """Perfil que atende o backend mais exigente do pool."""
+        profiles = [b.image_profile for b in self.backends]
+        return ImageProfile(
+            max_side=max(p.max_side for p in profiles),
+            jpeg_quality=max(p.jpeg_quality for p in profiles),
+        )
+
+    @property
+    def can_hedge(self) -> bool:
+        return len(self.backends) > 1
+
+    def stats_for(self, backend: BaseLLMVision) -> BackendStats:
+        """Estatísticas de roteamento de um backend."""
+        return self._stats[id(backend)]
+
+    def is_healthy(self, backend: BaseLLMVision, now: Optional[float] = None) -> bool:
+        """Verifica se o backend está na rotação."""
+        # Circuito aberto ou half-open com a chamada de teste em andamento:
+        # o backend recusaria o frame na hora
+        breaker = getattr(backend, "circuit_breaker", None)
+        if breaker is not None and not breaker.accepting_calls:
+            return False
+
+        stats = self.stats_for(backend)
+        if stats.ewma_error_rate >= self.error_threshold and stats.last_error_at:
+            now = now if now is not None else time.monotonic()
+            return now - stats.last_error_at >= self.eject_seconds
+        return True
+
+    def _cost(self, backend: BaseLLMVision) -> float:
+        stats = self.stats_for(backend)
+        latency = stats.ewma_latency_ms or 0.0
+        return (
+            (latency + self.BASE_COST_MS)
+            * (1 + stats.in_flight)
+            / max(0.05, 1.0 - stats.ewma_error_rate)
+        )
+
+    def rank_backends(self) -> List[BaseLLMVision]:
+        """Backends em ordem de preferência: saudáveis primeiro, menor custo."""
+        now = time.monotonic()
+        return sorted(
+            self.backends,
+            key=lambda b: (not self.is_healthy(b, now), self._cost(b)),
+        )
+
+    def _record_success(self, backend: BaseLLMVision, latency_ms: float):
+        stats = self.stats_for(backend)
+        stats.calls += 1
+        stats.latencies.append(latency_ms)
+        if stats.ewma_latency_ms is None:
+            stats.ewma_latency_ms = latency_ms
+        else:
+            stats.ewma_latency_ms += self.alpha * (latency_ms - stats.ewma_latency_ms)
+        stats.ewma_error_rate *= 1 - self.alpha
+
+    def _record_error(self, backend: BaseLLMVision):
+        stats = self.stats_for(backend)
+        stats.calls += 1
+        stats.errors += 1
+        stats.last_error_at = time.monotonic()
+        stats.ewma_error_rate += self.alpha * (1.0 - stats.ewma_error_rate)
+        provider_metrics.record_error(backend.provider_name)
+
+    async def _call(
+        self,
+        backend: BaseLLMVision,
+        image_data: bytes,
+        prompt: Optional[str],
+        stream: bool = False,
+        on_keywords: Optional[KeywordsCallback] = None,
+    ) -> AnalysisResult:
+        """Chama um backend registrando latência, erros e carga."""
+        stats = self.stats_for(backend)
+        stats.in_flight += 1
+        start = time.perf_counter()
+        try:
+            if stream:
+                result = await backend.analyze_frame_stream(
+                    image_data, prompt, on_keywords
+                )
+            else:
+                result = await backend.analyze_frame(image_data, prompt)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._record_error(backend)
+            raise
+        finally:
+            stats.in_flight -= 1
+
+        self._record_success(backend, (time.perf_counter() - start) * 1000)
+        return result
+
+    async def analyze_frame(
+        self,
+        image_data: bytes,
+        prompt: Optional[str] = None,
+    ) -> AnalysisResult:
+        """Analisa o frame no melhor backend, com failover para os demais."""
+        last_error: Optional[Exception] = None
+        for backend in self.rank_backends():
+            try:
+                return await self._call(backend, image_data, prompt)
+            except Exception as e:
+                last_error = e
+                logger.warning(
+                    f"Backend {self.backend_name(backend)} falhou, "
+                    f"tentando o próximo: {e}"
+                )
+        raise last_error
+
+    async def analyze_frame_stream(
+        self,
+        image_data: bytes,
+        prompt: Optional[str] = None,
+        on_keywords: Optional[KeywordsCallback] = None,
+    ) -> AnalysisResult:
+        """Analisa o frame em streaming no melhor backend, com failover."""
+        last_error: Optional[Exception] = None
+        for backend in self.rank_backends():
+            try:
+                return await self._call(
+                    backend, image_data, prompt, stream=True, on_keywords=on_keywords
+                )
+            except Exception as e:
+                last_error = e
+                logger.warning(
+                    f"Backend {self.backend_name(backend)} falhou, "
+                    f"tentando o próximo: {e}"
+                )
+        raise last_error
+
+    async def analyze_batch(
+        self,
+        images: List[bytes],
+        prompt: Optional[str] = None,
+    ) -> List[AnalysisResult]:
+        """Analisa um lote no melhor backend, com failover para os demais."""
+        last_error: Optional[Exception] = None
+        for backend in self.rank_backends():
+            stats = self.stats_for(backend)
+            stats.in_flight += 1
+            start = time.perf_counter()
+            try:
+                results = await backend.analyze_batch(images, prompt)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._record_error(backend)
+                last_error = e
+                logger.warning(
+                    f"Backend {self.backend_name(backend)} falhou no lote, "
+                    f"tentando o próximo: {e}"
+                )
+                continue
+            finally:
+                stats.in_flight -= 1
+
+            # A latência do lote é dividida entre os frames para não
+            # penalizar o backend em relação às chamadas individuais
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._record_success(backend, elapsed_ms / len(images))
+            return results
+        raise last_error
+
+    def hedge_delay(self, backend: BaseLLMVision) -> float:
+        """Segundos de espera antes de enviar a requisição duplicada."""
+        p95 = self.stats_for(backend).p95_latency_ms(self.MIN_P95_SAMPLES)
+        delay_ms = p95 if p95 is not None else self.DEFAULT_HEDGE_DELAY_MS
+        return max(delay_ms, self.hedge_min_delay_ms) / 1000
+
+    async def analyze_frame_hedged(
+        self,
+        image_data: bytes,
+        prompt: Optional[str] = None,
+        on_keywords: Optional[KeywordsCallback] = None,
+    ) -> AnalysisResult:
+        """Analisa o frame com requisição duplicada após o p95 de latência.
+
+        Com ``on_keywords`` as duas requisições são feitas em streaming e o
+        callback recebe as keywords da primeira que as entregar, uma vez só.
+        Esse backend pode não ser o que conclui primeiro: o alerta antecipado
+        usa as keywords mais rápidas e o evento usa a resposta vencedora.
+
+        A requisição duplicada é contada em ``llm_calls`` do resultado.
+        """
+        ranked = self.rank_backends()
+        if len(ranked) < 2:
+            if on_keywords:
+                return await self.analyze_frame_stream(image_data, prompt, on_keywords)
+            return await self.analyze_frame(image_data, prompt)
+
+        stream = on_keywords is not None
+        if stream:
+            on_keywords = _first_keywords(on_keywords)
+
+        def call(backend: BaseLLMVision) -> "asyncio.Task[AnalysisResult]":
+            return asyncio.create_task(
+                self._call(
+                    backend, image_data, prompt, stream=stream, on_keywords=on_keywords
+                )
+            )
+
+        primary, secondary = ranked[0], ranked[1]
+        tasks = {call(primary): primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(primary))
+
+            if not done:
+                self._hedge_count += 1
+                logger.info(
+                    f"Hedge: {self.backend_name(primary)} acima do p95, "
+                    f"enviando também para {self.backend_name(secondary)}"
+                )
+                tasks[call(secondary)] = secondary
+
+            pending = set(tasks)
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if tasks[task] is not primary:
+                            self.stats_for(tasks[task]).hedges_won += 1
+                        return self._count_hedge(task.result(), len(tasks))
+                    last_error = task.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        # Todos os backends tentados falharam: failover para os demais
+        remaining = [b for b in ranked if b not in tasks.values()]
+        for backend in remaining:
+            try:
+                result = await self._call(
+                    backend, image_data, prompt, stream=stream, on_keywords=on_keywords
+                )
+            except Exception as e:
+                last_error = e
+                continue
+            return self._count_hedge(result, len(tasks) + 1)
+        raise last_error
+
+    @staticmethod
+    def _count_hedge(result: AnalysisResult, requests: int) -> AnalysisResult:
+        """Soma ao resultado as requisições extras enviadas pelo hedge."""
+        if requests <= 1:
+            return result
+        return replace(result, llm_calls=result.llm_calls + requests - 1)
+
+    async def health_check(self) -> bool:
+        """Saudável se ao menos um backend responder."""
+        results = await asyncio.gather(
+            *(b.health_check() for b in self.backends), return_exceptions=True
+        )
+        return any(r is True for r in results)
+
+    async def health_report(self) -> dict:
+        """Saúde de cada backend do pool; saudável se algum estiver."""
+        reports = await asyncio.gather(*(b.health_report() for b in self.backends))
+        now = time.monotonic()
+        for backend, report in zip(self.backends, reports):
+            report["in_rotation"] = self.is_healthy(backend, now)
+        healthy = any(r["healthy"] and r["in_rotation"] for r in reports)
+        return {
+            "provider": self.provider_name,
+            "model": self.model,
+            "healthy": healthy,
+            "error": None if healthy else "Nenhum backend do pool disponível",
+            "backends": list(reports),
+        }
+
+    def get_stats(self) -> dict:
+        """Retorna o estado de roteamento de cada backend."""
+        now = time.monotonic()
+        backends = []
+        for backend in self.backends:
+            stats = self.stats_for(backend)
+            entry = {
+                "backend": self.backend_name(backend),
+                "healthy": self.is_healthy(backend, now),
+                "ewma_latency_ms": stats.ewma_latency_ms,
+                "p95_latency_ms": stats.p95_latency_ms(self.MIN_P95_SAMPLES),
+                "ewma_error_rate": stats.ewma_error_rate,
+                "in_flight": stats.in_flight,
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "hedges_won": stats.hedges_won,
+            }
+            if hasattr(backend, "get_stats"):
+                entry["resilience"] = backend.get_stats()
+            backends.append(entry)
+
+        return {
+            "provider": self.provider_name,
+            "degraded": not all(b["healthy"] for b in backends),
+            "hedges": self._hedge_count,
+            "backends": backends,
+        }
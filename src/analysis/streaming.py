@@ -0,0 +1,87 @@
+"""Leitura incremental de respostas em streaming dos provedores LLM."""
+
+import json
+import re
+from typing import List, Optional
+
+# Início do campo de keywords (formato compacto "k" ou completo "keywords")
+_KEYWORDS_FIELD = re.compile(r'"(?:k|keywords)"\s*:\s*\[')
+
+
+class KeywordStreamParser:
+    """Extrai as keywords de uma resposta JSON enquanto ela é gerada.
+
+    Recebe os pedaços de texto do stream em ``feed`` e devolve a lista de
+    keywords assim que o array do campo ``k``/``keywords`` é fechado, sem
+    esperar o restante do JSON (ex.: a descrição). A lista é devolvida uma
+    única vez; as chamadas seguintes retornam None.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._array_start: Optional[int] = None
+        self._scan_pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.keywords: Optional[List[str]] = None
+
+    @property
+    def done(self) -> bool:
+        """Verifica se as keywords já foram extraídas."""
+        return self.keywords is not None
+
+    def feed(self, chunk: str) -> Optional[List[str]]:
+        """Adiciona um pedaço do stream.
+
+        Returns:
+            As keywords na primeira vez que o array estiver completo,
+            senão None
+        """
+        if self.done or not chunk:
+            return None
+        self._buffer += chunk
+
+        if self._array_start is None:
+            # O nome do campo pode ter chegado dividido entre pedaços
+            match = _KEYWORDS_FIELD.search(self._buffer)
+            if match is None:
+                return None
+            self._array_start = match.end() - 1
+            self._scan_pos = self._array_start
+
+        end = self._scan_array()
+        if end is None:
+            return None
+
+        try:
+            values = json.loads(self._buffer[self._array_start : end + 1])
+        except ValueError:
+            # Array malformado: desiste e deixa a resposta completa decidir
+            self.keywords = []
+            return None
+        self.keywords = [str(v) for v in values if v]
+        return self.keywords
+
+    def _scan_array(self) -> Optional[int]:
+        """Avança no buffer até o ``]`` que fecha o array de keywords."""
+        buffer = self._buffer
+        for pos in range(self._scan_pos, len(buffer)):
+            char = buffer[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "[":
+                self._depth += 1
+            elif char == "]":
+                self._depth -= 1
+                if self._depth == 0:
+                    return pos
+        self._scan_pos = len(buffer)
+        return None
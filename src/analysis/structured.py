@@ -0,0 +1,95 @@
+"""Formato compacto de resposta e extração tolerante de JSON."""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+_decoder = json.JSONDecoder()
+_JSON_START = re.compile(r"[{\[]")
+
+# Tentativas de decodificação antes de desistir de um texto sem JSON
+MAX_DECODE_ATTEMPTS = 20
+
+
+def response_schema(max_keywords: int) -> dict:
+    """JSON schema da resposta compacta (k = keywords, c = confiança, d = descrição).
+
+    As keywords vêm primeiro para que o streaming as entregue antes da
+    descrição.
+    """
+    return {
+        "type": "object",
+        "properties": {
+            "k": {
+                "type": "array",
+                "items": {"type": "string"},
+                "maxItems": max_keywords,
+            },
+            "c": {"type": "number"},
+            "d": {"type": "string"},
+        },
+        "required": ["k", "c", "d"],
+        "additionalProperties": False,
+    }
+
+
+def gemini_response_schema() -> dict:
+    """Schema da resposta compacta no subconjunto OpenAPI aceito pelo Gemini.
+
+    O Gemini ordena as propriedades alfabeticamente, então no streaming as
+    keywords chegam depois da descrição.
+    """
+    return {
+        "type": "OBJECT",
+        "properties": {
+            "d": {"type": "STRING"},
+            "k": {"type": "ARRAY", "items": {"type": "STRING"}},
+            "c": {"type": "NUMBER"},
+        },
+        "required": ["d", "k", "c"],
+    }
+
+
+def extract_json(text: Optional[str]) -> Optional[Any]:
+    """Extrai o primeiro objeto (ou lista) JSON de uma resposta.
+
+    Aceita JSON puro, dentro de blocos de código ou cercado de texto: cada
+    ``{``/``[`` é tentado com ``raw_decode``, que para no fim do valor e
+    ignora o que vier depois.
+
+    Returns:
+        O valor decodificado, ou None se não houver JSON válido
+    """
+    if not text:
+        return None
+    text = text.strip()
+
+    for attempt, match in enumerate(_JSON_START.finditer(text)):
+        if attempt >= MAX_DECODE_ATTEMPTS:
+            break
+        try:
+            value, _ = _decoder.raw_decode(text, match.start())
+        except ValueError:
+            continue
+        return value
+    return None
+
+
+def normalize_analysis(
+    data: dict, max_keywords: int
+) -> Tuple[Optional[str], List[str], Optional[float]]:
+    """Lê descrição, keywords e confiança nos formatos compacto ou completo."""
+    description = data.get("d", data.get("description"))
+
+    keywords = data.get("k", data.get("keywords")) or []
+    if isinstance(keywords, str):
+        keywords = [k.strip() for k in keywords.split(",")]
+    keywords = [str(k) for k in keywords if k][:max_keywords]
+
+    confidence = data.get("c", data.get("confidence"))
+    try:
+        confidence = float(confidence) if confidence is not None else None
+    except (TypeError, ValueError):
+        confidence = None
+
+    return description, keywords, confidence
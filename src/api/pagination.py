@@ -0,0 +1,61 @@
+"""Cursores de paginação por keyset e modos de contagem das listagens."""
+
+import base64
+import binascii
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query, status
+
+from src.storage.repository import Cursor
+
+# Modos do parâmetro ``count`` das listagens
+COUNT_EXACT = "exact"
+COUNT_ESTIMATE = "estimate"
+COUNT_NONE = "none"
+
+
+def encode_cursor(timestamp: datetime, item_id: uuid.UUID) -> str:
+    """Cursor opaco com o (timestamp, id) do último item da página."""
+    raw = f"{timestamp.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Decodifica um cursor gerado por ``encode_cursor``.
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, item_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), uuid.UUID(item_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+
+def cursor_param(
+    cursor: Optional[str] = Query(
+        None, description="next_cursor da página anterior (substitui page)"
+    ),
+) -> Optional[Cursor]:
+    """Dependency que converte o parâmetro ``cursor`` (400 se inválido)."""
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def count_param(
+    count: str = Query(
+        COUNT_ESTIMATE,
+        pattern=f"^({COUNT_EXACT}|{COUNT_ESTIMATE}|{COUNT_NONE})$",
+        description="Total exato (count), estimado pelo planejador ou sem total",
+    ),
+) -> str:
+    """Dependency do modo de contagem do total."""
+    return count
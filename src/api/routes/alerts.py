@@ -7,6 +7,14 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.storage import get_db, AlertRepository
+from src.storage.repository import Cursor
+from src.api.pagination import (
+    COUNT_ESTIMATE,
+    COUNT_NONE,
+    count_param,
+    cursor_param,
+    encode_cursor,
+)
 from src.api.schemas import (
     AlertRuleCreate,
     AlertRuleUpdate,
@@ -158,24 +166,40 @@ async def list_alert_logs(
     status_filter: Optional[str] = Query(None, alias="status"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    before: Optional[Cursor] = Depends(cursor_param),
+    count: str = Depends(count_param),
     db: AsyncSession = Depends(get_db),
 ):
-    """Lista histórico de alertas enviados."""
+    """Lista histórico de alertas enviados (paginação por ``next_cursor``)."""
     repo = AlertRepository(db)
-    offset = (page - 1) * page_size
 
+    # Um a mais para saber se existe próxima página
     logs = await repo.get_logs(
         rule_id=rule_id,
         status=status_filter,
-        limit=page_size,
-        offset=offset,
+        limit=page_size + 1,
+        offset=0 if before else (page - 1) * page_size,
+        before=before,
     )
+    next_cursor = None
+    if len(logs) > page_size:
+        logs = logs[:page_size]
+        next_cursor = encode_cursor(logs[-1].sent_at, logs[-1].id)
+
+    total = None
+    if count != COUNT_NONE:
+        total = await repo.count_logs(
+            repo.log_conditions(rule_id=rule_id, status=status_filter),
+            estimate=count == COUNT_ESTIMATE,
+        )
 
     return AlertLogListResponse(
         logs=logs,
-        total=len(logs),  # TODO: implementar contagem real
+        total=total,
+        total_is_estimate=count == COUNT_ESTIMATE,
         page=page,
         page_size=page_size,
+        next_cursor=next_cursor,
     )
 
 
@@ -14,6 +14,10 @@ Camera Status includes:
 - frames_filtered: Frames dropped (no motion)
 - detection_rate: % of frames sent (sent/captured * 100)
 - avg_motion_score: Average motion score of sent frames
+- frames_filtered_objects: Motion frames dropped by the object detector
+- frames_filtered_budget: Frames dropped because the LLM call budget ran short
+- motion_filter_rate / object_filter_rate: % of frames dropped at each stage
+- stage_timings_ms: Average time per pipeline stage (motion, detector, encode)
 
 Stats Endpoint (/api/v1/stats):
 - Aggregates motion metrics across all cameras
@@ -133,6 +137,7 @@ async def create_camera(
         motion_detection_enabled=camera.motion_detection_enabled,
         motion_threshold=camera.motion_threshold,
         motion_sensitivity=camera.motion_sensitivity,
+        priority=camera.priority,
     )
     return new_camera
 
@@ -185,6 +190,7 @@ async def update_camera(
         motion_detection_enabled=camera.motion_detection_enabled,
         motion_threshold=camera.motion_threshold,
         motion_sensitivity=camera.motion_sensitivity,
+        priority=camera.priority,
     )
     if not updated:
         raise HTTPException(
@@ -241,6 +247,7 @@ async def start_camera(
             motion_sensitivity=camera.motion_sensitivity
             if hasattr(camera, "motion_sensitivity")
             else "medium",
+            priority=getattr(camera, "priority", None) or "normal",
         )
         await camera_manager.add_camera(config)
 
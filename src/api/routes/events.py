@@ -8,8 +8,23 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.storage import get_db, EventRepository
-from src.api.schemas import EventResponse, EventListResponse, TimelineResponse
+from src.storage import get_db, EventRepository, annotated_frame_store, frame_store
+from src.storage.repository import KEYWORD_MATCH_ANY, Cursor
+from src.api.pagination import (
+    COUNT_ESTIMATE,
+    COUNT_NONE,
+    count_param,
+    cursor_param,
+    encode_cursor,
+)
+from src.api.schemas import (
+    EventResponse,
+    EventListResponse,
+    EventSearchResponse,
+    EventSearchResult,
+    KeywordSearchResponse,
+    TimelineResponse,
+)
 
 router = APIRouter(prefix="/events", tags=["Eventos"])
 
@@ -22,39 +37,46 @@ async def list_events(
     end_date: Optional[datetime] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    before: Optional[Cursor] = Depends(cursor_param),
+    count: str = Depends(count_param),
     db: AsyncSession = Depends(get_db),
 ):
-    """Lista eventos com filtros."""
+    """Lista eventos com filtros.
+
+    Para percorrer o histórico use ``next_cursor`` (keyset em timestamp,
+    id): o custo não cresce com a profundidade como em ``page`` (OFFSET).
+    """
     repo = EventRepository(db)
-    offset = (page - 1) * page_size
+    conditions = repo.event_conditions(
+        camera_id=camera_id,
+        keyword=keyword,
+        start_date=start_date,
+        end_date=end_date,
+    )
 
-    if keyword:
-        events = await repo.search_by_keyword(
-            keyword=keyword,
-            camera_id=camera_id,
-            limit=page_size,
-        )
-    elif camera_id:
-        events = await repo.get_by_camera(
-            camera_id=camera_id,
-            start_date=start_date,
-            end_date=end_date,
-            limit=page_size,
-            offset=offset,
-        )
-    else:
-        events = await repo.get_timeline(
-            start_date=start_date,
-            end_date=end_date,
-            limit=page_size,
-            offset=offset,
-        )
+    # Um a mais para saber se existe próxima página
+    events = await repo.find(
+        conditions,
+        limit=page_size + 1,
+        offset=0 if before else (page - 1) * page_size,
+        before=before,
+    )
+    next_cursor = None
+    if len(events) > page_size:
+        events = events[:page_size]
+        next_cursor = encode_cursor(events[-1].timestamp, events[-1].id)
+
+    total = None
+    if count != COUNT_NONE:
+        total = await repo.count(conditions, estimate=count == COUNT_ESTIMATE)
 
     return EventListResponse(
         events=events,
-        total=len(events),  # TODO: implementar contagem real
+        total=total,
+        total_is_estimate=count == COUNT_ESTIMATE,
         page=page,
         page_size=page_size,
+        next_cursor=next_cursor,
     )
 
 
@@ -112,14 +134,15 @@ async def get_event_frame(
             detail="Evento não encontrado",
         )
 
-    if not event.frame_path:
+    path = frame_store.resolve(event.frame_path)
+    if not path:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Frame não disponível para este evento",
         )
 
     return FileResponse(
-        event.frame_path,
+        path,
         media_type="image/jpeg",
         filename=f"frame_{event_id}.jpg",
     )
@@ -139,47 +162,100 @@ async def get_event_annotated_frame(
             detail="Evento não encontrado",
         )
 
-    if not event.annotated_frame_path:
+    path = annotated_frame_store.resolve(event.annotated_frame_path)
+    if not path:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Annotated frame not found",
         )
 
     return FileResponse(
-        event.annotated_frame_path,
+        path,
         media_type="image/jpeg",
         filename=f"frame_{event_id}_annotated.jpg",
     )
 
 
-@router.get("/search/keywords")
+@router.get("/search/text", response_model=EventSearchResponse)
+async def search_text(
+    q: str = Query(..., min_length=1, max_length=200),
+    camera_id: Optional[uuid.UUID] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """Busca textual nas descrições dos eventos, ordenada por relevância."""
+    repo = EventRepository(db)
+    # Um a mais para saber se existe próxima página sem contar tudo
+    rows = await repo.search_text(
+        query=q,
+        camera_id=camera_id,
+        start_date=start_date,
+        end_date=end_date,
+        limit=page_size + 1,
+        offset=(page - 1) * page_size,
+    )
+
+    return EventSearchResponse(
+        results=[
+            EventSearchResult(event=event, rank=rank, headline=headline)
+            for event, rank, headline in rows[:page_size]
+        ],
+        query=q,
+        page=page,
+        page_size=page_size,
+        has_more=len(rows) > page_size,
+    )
+
+
+@router.get("/search/keywords", response_model=KeywordSearchResponse)
 async def search_by_keywords(
     keywords: List[str] = Query(..., min_length=1),
+    match: str = Query(KEYWORD_MATCH_ANY, pattern="^(any|all)$"),
     camera_id: Optional[uuid.UUID] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
     limit: int = Query(50, ge=1, le=200),
+    before: Optional[Cursor] = Depends(cursor_param),
     db: AsyncSession = Depends(get_db),
 ):
-    """Busca eventos por múltiplas palavras-chave."""
-    repo = EventRepository(db)
-    all_events = []
+    """Busca eventos por múltiplas palavras-chave.
 
-    for keyword in keywords:
-        events = await repo.search_by_keyword(
-            keyword=keyword,
-            camera_id=camera_id,
-            limit=limit,
+    ``match=any`` retorna eventos com qualquer uma das keywords e
+    ``match=all`` apenas os que têm todas. Aceita ``keywords`` repetido ou
+    separado por vírgulas.
+    """
+    terms = [
+        term.strip() for value in keywords for term in value.split(",") if term.strip()
+    ]
+    terms = list(dict.fromkeys(terms))
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe ao menos uma keyword",
         )
-        all_events.extend(events)
-
-    # Remove duplicatas mantendo ordem
-    seen = set()
-    unique_events = []
-    for event in all_events:
-        if event.id not in seen:
-            seen.add(event.id)
-            unique_events.append(event)
 
-    # Ordena por timestamp
-    unique_events.sort(key=lambda e: e.timestamp, reverse=True)
+    repo = EventRepository(db)
+    # Um a mais para saber se existe próxima página
+    events = await repo.search_by_keywords(
+        terms,
+        match=match,
+        camera_id=camera_id,
+        start_date=start_date,
+        end_date=end_date,
+        limit=limit + 1,
+        before=before,
+    )
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1].timestamp, events[-1].id)
 
-    return {"events": unique_events[:limit], "keywords_searched": keywords}
+    return KeywordSearchResponse(
+        events=events,
+        keywords_searched=terms,
+        match=match,
+        next_cursor=next_cursor,
+    )
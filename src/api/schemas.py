@@ -2,7 +2,7 @@
 
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -31,6 +31,7 @@ class CameraBase(BaseModel):
     motion_sensitivity: str = Field(
         default="medium", pattern="^(low|medium|high|custom)$"
     )
+    priority: str = Field(default="normal", pattern="^(low|normal|high)$")
 
 
 class CameraCreate(CameraBase):
@@ -52,6 +53,7 @@ class CameraUpdate(BaseModel):
     motion_sensitivity: Optional[str] = Field(
         None, pattern="^(low|medium|high|custom)$"
     )
+    priority: Optional[str] = Field(None, pattern="^(low|normal|high)$")
 
 
 class CameraResponse(CameraBase):
@@ -74,6 +76,16 @@ class CameraStatusResponse(BaseModel):
     frames_captured: int
     frames_sent: int
     frames_filtered: int
+    frames_filtered_objects: int = 0
+    frames_filtered_budget: int = 0
+    motion_filter_rate: float = 0.0
+    object_filter_rate: float = 0.0
+    stage_timings_ms: Dict[str, float] = {}
+    frames_skipped_budget: int = 0
+    frames_skipped_pressure: int = 0
+    effective_interval: Optional[float] = None
+    llm_cache_hit_rate: float = 0.0
+    bytes_in_flight: int = 0
     detection_rate: float
     avg_motion_score: float
     last_frame_at: Optional[datetime]
@@ -109,6 +121,8 @@ class EventCreate(EventBase):
     llm_provider: Optional[str] = None
     llm_model: Optional[str] = None
     processing_time_ms: Optional[int] = None
+    triage_result: Optional[dict] = None
+    escalated: bool = False
 
 
 class EventResponse(EventBase):
@@ -122,6 +136,8 @@ class EventResponse(EventBase):
     llm_provider: Optional[str]
     llm_model: Optional[str]
     processing_time_ms: Optional[int]
+    triage_result: Optional[dict] = None
+    escalated: bool = False
 
     class Config:
         from_attributes = True
@@ -131,9 +147,43 @@ class EventListResponse(BaseModel):
     """Schema para listagem de eventos."""
 
     events: List[EventResponse]
-    total: int
+    # None com count=none; aproximado quando total_is_estimate
+    total: Optional[int] = None
+    total_is_estimate: bool = False
     page: int
     page_size: int
+    # Cursor para a próxima página (None na última)
+    next_cursor: Optional[str] = None
+
+
+class EventSearchResult(BaseModel):
+    """Evento encontrado na busca textual."""
+
+    event: EventResponse
+    rank: float
+    # Trecho da descrição com os termos entre <mark>...</mark>
+    headline: str
+
+
+class EventSearchResponse(BaseModel):
+    """Schema para busca textual de eventos."""
+
+    results: List[EventSearchResult]
+    query: str
+    page: int
+    page_size: int
+    has_more: bool
+
+
+class KeywordSearchResponse(BaseModel):
+    """Schema para busca de eventos por keywords."""
+
+    events: List[EventResponse]
+    keywords_searched: List[str]
+    # any: qualquer uma das keywords; all: todas
+    match: str
+    # Cursor para a próxima página (None na última)
+    next_cursor: Optional[str] = None
 
 
 class TimelineResponse(BaseModel):
@@ -208,9 +258,13 @@ class AlertLogListResponse(BaseModel):
     """Schema para listagem de logs de alerta."""
 
     logs: List[AlertLogResponse]
-    total: int
+    # None com count=none; aproximado quando total_is_estimate
+    total: Optional[int] = None
+    total_is_estimate: bool = False
     page: int
     page_size: int
+    # Cursor para a próxima página (None na última)
+    next_cursor: Optional[str] = None
 
 
 # ==================== System Schemas ====================
@@ -222,7 +276,10 @@ class HealthResponse(BaseModel):
     status: str
     database: bool
     llm_provider: Optional[dict]
+    llm_resilience: Optional[dict] = None
     whatsapp: bool
+    # Resultado em cache de cada dependência (healthy, checked_at, age_seconds...)
+    checks: Dict[str, Optional[dict]] = {}
     version: str
 
 
@@ -235,19 +292,69 @@ class StatsResponse(BaseModel):
     events_today: int
     alerts_sent_total: int
     alerts_sent_today: int
+    alerts_failed_total: int = 0
+    avg_confidence: Optional[float] = None
+    avg_processing_time_ms: Optional[float] = None
     queue_size: int
     queue_processed: int
     queue_dropped: int
+    queue_spooled: int = 0
+    spool_pending: int = 0
+    queue_pressure: str = "normal"
+    bytes_in_flight: int = 0
+    max_bytes_in_flight: int = 0
     # Motion detection metrics
     motion_frames_total: int = 0
     motion_frames_sent: int = 0
     motion_frames_filtered: int = 0
     motion_detection_rate: float = 0.0
+    # Frames with motion dropped by the object detector
+    object_frames_filtered: int = 0
+    # Frames dropped because the LLM call budget ran short
+    budget_frames_filtered: int = 0
+    llm_budget: Optional[dict] = None
+    # Gravação em lote: pending, avg_batch_size, avg_flush_ms, max_flush_ms...
+    event_persister: Optional[dict] = None
+    # Partições mensais: runs, created, removed, retention_cutoff...
+    partitions: Optional[dict] = None
+    # Frames em disco: writes, dedup_hits, bytes_saved, purged...
+    frame_store: Optional[dict] = None
 
     # Decoder health metrics
     decoder_total_errors: int = 0
     decoder_avg_error_rate: float = 0.0
 
+    # Perceptual-hash result cache metrics
+    llm_cache_hits: int = 0
+    llm_cache_misses: int = 0
+    llm_cache_hit_rate: float = 0.0
+
+    # Per-provider LLM call metrics (bytes sent, latency)
+    llm_providers: Dict[str, dict] = {}
+    # Routing/resilience state of the active provider (backends, endpoints)
+    llm_backend: Optional[dict] = None
+
+
+class TimeSeriesPoint(BaseModel):
+    """Um intervalo da série temporal de estatísticas."""
+
+    bucket: datetime
+    events: int
+    alerts_sent: int
+    alerts_failed: int
+    avg_confidence: Optional[float] = None
+    avg_processing_time_ms: Optional[float] = None
+
+
+class TimeSeriesResponse(BaseModel):
+    """Schema para a série temporal de estatísticas."""
+
+    points: List[TimeSeriesPoint]
+    bucket: str
+    start_date: datetime
+    end_date: Optional[datetime] = None
+    camera_id: Optional[uuid.UUID] = None
+
 
 class ErrorResponse(BaseModel):
     """Schema para resposta de erro."""
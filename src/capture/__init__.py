@@ -1,5 +1,31 @@
 from .camera import CameraConfig, CameraState, CameraStatus
 from .frame_grabber import FrameGrabber
-from .queue import FrameQueue, FrameItem
+from .llm_budget import LLMBudget
+from .object_detector import (
+    Detection,
+    DNNObjectDetector,
+    HOGPersonDetector,
+    ObjectDetector,
+    create_configured_object_detector,
+    create_object_detector,
+)
+from .queue import FrameQueue, FrameItem, QueuePressure
+from .spool import FrameSpool
 
-__all__ = ["CameraConfig", "CameraState", "CameraStatus", "FrameGrabber", "FrameQueue", "FrameItem"]
+__all__ = [
+    "CameraConfig",
+    "CameraState",
+    "CameraStatus",
+    "FrameGrabber",
+    "LLMBudget",
+    "Detection",
+    "DNNObjectDetector",
+    "HOGPersonDetector",
+    "ObjectDetector",
+    "create_configured_object_detector",
+    "create_object_detector",
+    "FrameQueue",
+    "FrameItem",
+    "QueuePressure",
+    "FrameSpool",
+]
@@ -3,7 +3,7 @@
 import uuid
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional
+from typing import Dict, Optional
 
 from src.config import settings
 
@@ -37,6 +37,9 @@ class CameraConfig:
     motion_detection_enabled: bool = True
     motion_threshold: float = 10.0
     motion_sensitivity: str = "medium"
+    # Prioridade da câmera na análise (low, normal, high). Câmeras de
+    # prioridade alta usam requisições com hedge quando há um pool de LLMs.
+    priority: str = "normal"
 
     def __post_init__(self):
         if self.frame_interval is None:
@@ -63,6 +66,12 @@ class CameraState:
     frames_captured: int = 0
     frames_sent: int = 0
     frames_filtered: int = 0
+    # Frames com movimento descartados pelo detector de objetos
+    frames_filtered_objects: int = 0
+    # Frames que não couberam no orçamento de chamadas ao LLM
+    frames_filtered_budget: int = 0
+    frames_skipped_budget: int = 0
+    frames_skipped_pressure: int = 0
     errors_count: int = 0
     last_error: Optional[str] = None
     avg_motion_score: float = 0.0
@@ -74,6 +83,9 @@ class CameraState:
     current_frame_number: int = 0
     total_frames: int = 0
     duration_seconds: float = 0.0
+    # Tempo acumulado e contagem por etapa do pipeline (motion, detector, encode)
+    stage_time_ms: Dict[str, float] = field(default_factory=dict)
+    stage_count: Dict[str, int] = field(default_factory=dict)
 
     @property
     def detection_rate(self) -> float:
@@ -82,6 +94,30 @@ class CameraState:
             return 0.0
         return (self.frames_sent / self.frames_captured) * 100
 
+    @property
+    def motion_filter_rate(self) -> float:
+        """Percentual de frames capturados descartados por falta de movimento."""
+        if self.frames_captured == 0:
+            return 0.0
+        return (self.frames_filtered / self.frames_captured) * 100
+
+    @property
+    def object_filter_rate(self) -> float:
+        """Percentual de frames com movimento descartados pelo detector de objetos."""
+        checked = self.stage_count.get("detector", 0)
+        if checked == 0:
+            return 0.0
+        return (self.frames_filtered_objects / checked) * 100
+
+    @property
+    def stage_timings(self) -> Dict[str, float]:
+        """Tempo médio (ms) de cada etapa do pipeline de captura."""
+        return {
+            stage: total / self.stage_count[stage]
+            for stage, total in self.stage_time_ms.items()
+            if self.stage_count.get(stage)
+        }
+
     @property
     def progress_percentage(self) -> float:
         """Calcula progresso percentual para arquivos de vídeo."""
@@ -94,12 +130,18 @@ class CameraState:
         self.frames_captured = 0
         self.frames_sent = 0
         self.frames_filtered = 0
+        self.frames_filtered_objects = 0
+        self.frames_filtered_budget = 0
+        self.frames_skipped_budget = 0
+        self.frames_skipped_pressure = 0
         self.errors_count = 0
         self.last_error = None
         self.avg_motion_score = 0.0
         self.motion_score_sum = 0.0
         self.initial_frames_discarded = 0
         self.current_frame_number = 0
+        self.stage_time_ms.clear()
+        self.stage_count.clear()
 
     def record_frame(self, timestamp: float):
         """Registra captura de um frame."""
@@ -116,6 +158,27 @@ class CameraState:
         """Registra frame filtrado."""
         self.frames_filtered += 1
 
+    def record_object_filtered(self):
+        """Registra frame com movimento descartado pelo detector de objetos."""
+        self.frames_filtered_objects += 1
+
+    def record_llm_budget_filtered(self):
+        """Registra frame não enviado por falta de orçamento de chamadas ao LLM."""
+        self.frames_filtered_budget += 1
+
+    def record_stage_time(self, stage: str, elapsed_ms: float):
+        """Registra o tempo gasto em uma etapa do pipeline."""
+        self.stage_time_ms[stage] = self.stage_time_ms.get(stage, 0.0) + elapsed_ms
+        self.stage_count[stage] = self.stage_count.get(stage, 0) + 1
+
+    def record_budget_skip(self):
+        """Registra frame pulado por falta de orçamento de memória."""
+        self.frames_skipped_budget += 1
+
+    def record_pressure_skip(self):
+        """Registra frame não enviado por pressão na fila de análise."""
+        self.frames_skipped_pressure += 1
+
     def record_error(self, error: str):
         """Registra um erro."""
         self.errors_count += 1
@@ -8,6 +8,8 @@ import cv2
 import numpy as np
 import platform
 
+from .object_detector import Detection
+
 logger = logging.getLogger(__name__)
 
 
@@ -97,6 +99,7 @@ class FrameAnnotation:
         llm_provider: Optional[str],
         llm_model: Optional[str],
         motion_status: str = "UNKNOWN",
+        detections: Optional[List[Detection]] = None,
     ):
         """Initialize frame annotator.
 
@@ -109,6 +112,7 @@ class FrameAnnotation:
             llm_provider: LLM provider name
             llm_model: LLM model name
             motion_status: "MOTION", "NO MOTION", or "UNKNOWN"
+            detections: Objects found by the object detector
         """
         from src.config import settings
 
@@ -120,6 +124,7 @@ class FrameAnnotation:
         self.llm_provider = llm_provider
         self.llm_model = llm_model
         self.motion_status = motion_status
+        self.detections = detections or []
 
         # Parse RGB colors from settings
         self.mask_color = tuple(map(int, settings.annotation_mask_color.split(",")))  # type: ignore
@@ -151,6 +156,9 @@ class FrameAnnotation:
             # Add motion overlay
             frame = self._add_motion_overlay(frame)
 
+            # Add object detection boxes
+            frame = self._add_detection_overlay(frame)
+
             # Add LLM overlay
             frame = self._add_llm_overlay(frame)
 
@@ -224,6 +232,32 @@ class FrameAnnotation:
 
         return frame
 
+    def _add_detection_overlay(self, frame: np.ndarray) -> np.ndarray:
+        """Draw object detector boxes and labels.
+
+        Args:
+            frame: Frame with motion overlay
+
+        Returns:
+            Frame with detection boxes
+        """
+        for detection in self.detections:
+            x, y, w, h = detection.box
+            cv2.rectangle(
+                frame, (x, y), (x + w, y + h), (255, 128, 0), self.thickness
+            )
+            label = normalize_text(f"{detection.label} {detection.confidence:.0%}")
+            cv2.putText(
+                frame,
+                label,
+                (x, max(y - 6, 12)),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                self.font_scale,
+                (255, 128, 0),
+                self.thickness,
+            )
+        return frame
+
     def _add_llm_overlay(self, frame: np.ndarray) -> np.ndarray:
         """Add LLM analysis results overlay.
 
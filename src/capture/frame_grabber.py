@@ -6,15 +6,23 @@ import os
 import sys
 import time
 import uuid
-from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, List, Optional, Tuple
 
 import cv2
 import numpy as np
 
 from src.config import settings
+from src.storage.frames import frame_store
 from .camera import CameraConfig, CameraState, CameraStatus
+from .llm_budget import LLMBudget, frame_score
+from .memory_budget import InFlightBudget
 from .motion_detector import MotionDetector
+from .object_detector import (
+    Detection,
+    ObjectDetector,
+    create_configured_object_detector,
+)
+from .queue import QueuePressure
 
 logger = logging.getLogger(__name__)
 
@@ -25,14 +33,37 @@ os.environ["OPENCV_FFMPEG_LOGLEVEL"] = "-8"  # Quiet mode
 class FrameGrabber:
     """Captura frames de uma câmera RTSP."""
 
+    JPEG_QUALITY = 85
+    MAX_BUDGET_BACKOFF = 8
+    # Multiplicador do intervalo de captura para cada nível de pressão da fila
+    PRESSURE_INTERVAL_FACTOR = {
+        QueuePressure.NORMAL: 1,
+        QueuePressure.ELEVATED: 2,
+        QueuePressure.CRITICAL: 4,
+    }
+
     def __init__(
         self,
         camera_config: CameraConfig,
         on_frame: Optional[Callable[[uuid.UUID, bytes, float], None]] = None,
+        memory_budget: Optional[InFlightBudget] = None,
+        pressure_source: Optional[Callable[[], QueuePressure]] = None,
+        llm_budget: Optional[LLMBudget] = None,
     ):
         self.config = camera_config
         self.state = CameraState(config=camera_config)
         self.on_frame = on_frame
+        self.memory_budget = memory_budget
+        self.pressure_source = pressure_source
+        self.llm_budget = llm_budget
+        self._budget_backoff = 1
+        self._last_pressure = QueuePressure.NORMAL
+        # Caixas de movimento (x, y, w, h) do último frame capturado, lidas
+        # pelo callback on_frame para recortar a imagem enviada ao LLM
+        self.last_motion_boxes: Optional[List[Tuple[int, int, int, int]]] = None
+        # Objetos encontrados pelo detector no último frame enviado
+        self.last_detections: Optional[List[Detection]] = None
+        self.last_motion_score: Optional[float] = None
         self._capture: Optional[cv2.VideoCapture] = None
         self._running = False
         self._task: Optional[asyncio.Task] = None
@@ -55,6 +86,11 @@ class FrameGrabber:
         else:
             self._motion_detector = None
 
+        # Detector de objetos aplicado aos frames com movimento
+        self._object_detector: Optional[ObjectDetector] = (
+            create_configured_object_detector()
+        )
+
     @property
     def is_running(self) -> bool:
         """Verifica se está capturando."""
@@ -206,7 +242,7 @@ class FrameGrabber:
         )
 
         for i in range(discard_count):
-            frame = await self._grab_frame()
+            frame = await self._read_frame()
             if frame is not None:
                 self.state.initial_frames_discarded += 1
                 logger.debug(
@@ -215,20 +251,11 @@ class FrameGrabber:
 
                 if self._motion_detector:
                     try:
-                        loop = asyncio.get_event_loop()
-                        frame_data = frame
-                        if frame_data is not None:
-                            buffer_data = np.frombuffer(frame_data, dtype=np.uint8)
-                            decoded_frame = await loop.run_in_executor(
-                                None, cv2.imdecode, buffer_data, cv2.IMREAD_COLOR
-                            )
-
-                            if decoded_frame is not None:
-                                self._motion_detector.detect_motion(decoded_frame)
-                                logger.debug(
-                                    f"Stabilized motion detector with frame {i + 1}/{discard_count} "
-                                    f"for camera {self.config.name}"
-                                )
+                        self._motion_detector.detect_motion(frame)
+                        logger.debug(
+                            f"Stabilized motion detector with frame {i + 1}/{discard_count} "
+                            f"for camera {self.config.name}"
+                        )
                     except Exception as e:
                         logger.debug(
                             f"Failed to stabilize motion detector from discarded frame {i + 1}/{discard_count}: {e}"
@@ -322,15 +349,44 @@ class FrameGrabber:
 
         logger.info(f"Captura parada para câmera {self.config.name}")
 
+    @property
+    def pressure(self) -> QueuePressure:
+        """Pressão atual da fila de análise (NORMAL sem fonte configurada)."""
+        if not self.pressure_source:
+            return QueuePressure.NORMAL
+        try:
+            return self.pressure_source()
+        except Exception as e:
+            logger.debug(f"Falha ao consultar pressão da fila: {e}")
+            return QueuePressure.NORMAL
+
+    @property
+    def effective_interval(self) -> float:
+        """Intervalo de captura considerando orçamento de memória e pressão da fila."""
+        factor = max(self._budget_backoff, self.PRESSURE_INTERVAL_FACTOR[self.pressure])
+        return self.config.frame_interval * factor
+
+    def _observe_pressure(self) -> QueuePressure:
+        """Lê a pressão da fila e registra mudanças de nível."""
+        pressure = self.pressure
+        if pressure != self._last_pressure:
+            logger.info(
+                f"Câmera {self.config.name}: pressão da fila "
+                f"{self._last_pressure.name} -> {pressure.name} "
+                f"(intervalo efetivo: {self.effective_interval}s)"
+            )
+            self._last_pressure = pressure
+        return pressure
+
     async def _capture_loop(self):
         """Loop principal de captura."""
-        interval = self.config.frame_interval
         last_capture = 0
         consecutive_errors = 0
 
         while self._running:
             try:
                 current_time = time.time()
+                interval = self.effective_interval
 
                 # Verifica se é hora de capturar
                 if current_time - last_capture >= interval:
@@ -338,28 +394,52 @@ class FrameGrabber:
                         f"📸 Capturing frame for camera {self.config.name} "
                         f"(interval: {interval}s, time since last: {current_time - last_capture:.1f}s)"
                     )
-                    frame = await self._grab_frame()
+                    raw_frame = await self._read_frame()
 
-                    if frame is not None:
+                    if raw_frame is not None:
                         self.state.record_frame(current_time)
                         self.state.current_frame_number += 1
+                        height, width = raw_frame.shape[:2]
                         logger.info(
                             f"✅ Frame captured: camera={self.config.name}, "
-                            f"size={len(frame)} bytes, "
+                            f"resolution={width}x{height}, "
                             f"total_frames={self.state.frames_captured}, "
                             f"frame_number={self.state.current_frame_number}"
                         )
 
-                        # Check motion before sending frame
+                        # Check motion before encoding/sending frame
+                        self.last_motion_boxes = None
+                        self.last_detections = None
+                        self.last_motion_score = None
                         if self._motion_detector:
-                            should_send = await self._check_motion(frame)
+                            stage_start = time.perf_counter()
+                            should_send = await self._check_motion_array(raw_frame)
+                            self.state.record_stage_time(
+                                "motion", (time.perf_counter() - stage_start) * 1000
+                            )
                         else:
                             should_send = True
 
-                        if should_send:
-                            # Callback para processar o frame
-                            if self.on_frame:
-                                self.on_frame(self.config.id, frame, current_time)
+                        if should_send and self.on_frame:
+                            if self._observe_pressure() >= QueuePressure.CRITICAL:
+                                # Fila saturada: mantém só a detecção de
+                                # movimento, sem detector, encode nem envio
+                                self.state.record_pressure_skip()
+                                logger.debug(
+                                    f"Fila sob pressão crítica, frame não enviado "
+                                    f"para câmera {self.config.name}"
+                                )
+                            else:
+                                # Only motion-positive frames go through the detector
+                                if self._object_detector:
+                                    should_send = await self._check_objects(raw_frame)
+                                if should_send and self._within_llm_budget():
+                                    sent = await self._dispatch_frame(
+                                        raw_frame, current_time
+                                    )
+                                    if not sent and self.llm_budget:
+                                        # Frame não saiu: a chamada volta à cota
+                                        self.llm_budget.refund(self.config.id)
 
                         last_capture = current_time
                         consecutive_errors = 0
@@ -413,8 +493,94 @@ class FrameGrabber:
                 logger.error(error_msg)
                 await asyncio.sleep(5)  # Pausa antes de tentar novamente
 
+    async def _dispatch_frame(self, raw_frame: np.ndarray, timestamp: float) -> bool:
+        """Codifica o frame e o entrega ao callback respeitando o orçamento.
+
+        Com o orçamento de memória esgotado o encode JPEG é pulado e o
+        intervalo de captura é dobrado (até MAX_BUDGET_BACKOFF vezes); ele
+        volta ao normal assim que um frame é aceito.
+
+        Returns:
+            True se o frame foi entregue ao callback
+        """
+        budget = self.memory_budget
+        if budget and budget.exhausted:
+            self._skip_for_budget()
+            return False
+
+        stage_start = time.perf_counter()
+        frame = await self._encode_frame(raw_frame)
+        self.state.record_stage_time(
+            "encode", (time.perf_counter() - stage_start) * 1000
+        )
+        if frame is None:
+            return False
+
+        if budget and not budget.try_acquire(self.config.id, len(frame)):
+            self._skip_for_budget()
+            return False
+
+        if self._budget_backoff > 1:
+            logger.info(
+                f"Orçamento de memória liberado, intervalo normal para câmera "
+                f"{self.config.name}"
+            )
+        self._budget_backoff = 1
+        self.on_frame(self.config.id, frame, timestamp)
+        return True
+
+    def _within_llm_budget(self) -> bool:
+        """Verifica se o frame cabe no orçamento de chamadas ao LLM."""
+        if not self.llm_budget or not self.llm_budget.enabled:
+            return True
+        boxes = self.last_detections or self.last_motion_boxes or []
+        score = frame_score(self.last_motion_score, len(boxes), self.config.priority)
+        if self.llm_budget.should_dispatch(self.config.id, score):
+            return True
+        self.state.record_llm_budget_filtered()
+        logger.debug(
+            f"Orçamento de chamadas ao LLM esgotado, frame não enviado para "
+            f"câmera {self.config.name} (score={score:.2f})"
+        )
+        return False
+
+    def _skip_for_budget(self):
+        """Registra frame pulado por falta de orçamento e aumenta o intervalo."""
+        self.state.record_budget_skip()
+        self._budget_backoff = min(self._budget_backoff * 2, self.MAX_BUDGET_BACKOFF)
+        logger.warning(
+            f"Orçamento de memória esgotado, frame pulado para câmera "
+            f"{self.config.name} (intervalo efetivo: {self.effective_interval}s)"
+        )
+
     async def _grab_frame(self) -> Optional[bytes]:
-        """Captura um frame da câmera."""
+        """Captura um frame da câmera e o codifica em JPEG."""
+        frame = await self._read_frame()
+        if frame is None:
+            return None
+        return await self._encode_frame(frame)
+
+    async def _encode_frame(self, frame: np.ndarray) -> Optional[bytes]:
+        """Codifica um frame em JPEG (executado em thread)."""
+        try:
+            loop = asyncio.get_event_loop()
+            ok, buffer = await loop.run_in_executor(
+                None,
+                cv2.imencode,
+                ".jpg",
+                frame,
+                [cv2.IMWRITE_JPEG_QUALITY, self.JPEG_QUALITY],
+            )
+            if not ok:
+                logger.warning(f"Falha no encode JPEG para câmera {self.config.name}")
+                return None
+            return buffer.tobytes()
+        except cv2.error as e:
+            logger.error(f"CV2 error encoding frame for camera {self.config.name}: {e}")
+            return None
+
+    async def _read_frame(self) -> Optional[np.ndarray]:
+        """Lê e valida um frame decodificado da câmera."""
         if not self._capture or not self._capture.isOpened():
             logger.debug(f"Capture not available for camera {self.config.name}")
             return None
@@ -437,9 +603,7 @@ class FrameGrabber:
                 logger.warning(f"Frame validation failed for camera {self.config.name}")
                 return None
 
-            # Converte para JPEG
-            _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            return buffer.tobytes()
+            return frame
 
         except cv2.error as e:
             error_str = str(e).lower()
@@ -491,25 +655,48 @@ class FrameGrabber:
                 logger.warning("Failed to decode frame, sending to LLM anyway")
                 return True
 
+            return await self._check_motion_array(frame)
+
+        except Exception as e:
+            logger.error(f"Error checking motion: {e}, sending frame to LLM")
+            # Fail-safe: send frame if motion detection fails
+            return True
+
+    async def _check_motion_array(self, frame: np.ndarray) -> bool:
+        """Check if a decoded frame has motion and log results.
+
+        Args:
+            frame: Decoded BGR frame
+
+        Returns:
+            True if frame should be sent, False if filtered
+        """
+        if not self._motion_detector:
+            return True
+
+        try:
             # Detect motion
             motion_score, has_motion = self._motion_detector.detect_motion(frame)
+            self.last_motion_score = motion_score
 
             # Log and update statistics
             if has_motion:
                 self.state.record_sent_frame(motion_score)
+                height, width = frame.shape[:2]
+                self.last_motion_boxes = self._motion_detector.get_motion_boxes(
+                    width, height
+                )
                 logger.info(
                     f"✅ MOTION DETECTED - camera={self.config.name}, "
                     f"motion_score={motion_score:.2f}%, "
-                    f"threshold={self.config.motion_threshold}%, "
-                    f"frame_size={len(frame_bytes)} bytes"
+                    f"threshold={self.config.motion_threshold}%"
                 )
             else:
                 self.state.record_filtered_frame()
                 logger.info(
                     f"⏸️ NO MOTION - camera={self.config.name}, "
                     f"motion_score={motion_score:.2f}%, "
-                    f"threshold={self.config.motion_threshold}%, "
-                    f"frame_size={len(frame_bytes)} bytes"
+                    f"threshold={self.config.motion_threshold}%"
                 )
 
             # Check for abnormal detection rates
@@ -522,6 +709,46 @@ class FrameGrabber:
             # Fail-safe: send frame if motion detection fails
             return True
 
+    async def _check_objects(self, frame: np.ndarray) -> bool:
+        """Run the object detector on a motion-positive frame.
+
+        The frame is forwarded only when an object of a configured class is
+        found; the detections are kept in ``last_detections`` for cropping
+        and annotation.
+
+        Returns:
+            True if frame should be sent, False if filtered
+        """
+        stage_start = time.perf_counter()
+        try:
+            loop = asyncio.get_event_loop()
+            detections = await loop.run_in_executor(
+                None, self._object_detector.find, frame
+            )
+        except Exception as e:
+            logger.error(f"Error running object detector: {e}, sending frame to LLM")
+            # Fail-safe: send frame if object detection fails
+            return True
+        finally:
+            self.state.record_stage_time(
+                "detector", (time.perf_counter() - stage_start) * 1000
+            )
+
+        if not detections:
+            self.state.record_object_filtered()
+            logger.info(
+                f"⏸️ NO OBJECTS - camera={self.config.name}, "
+                f"classes={sorted(self._object_detector.classes)}"
+            )
+            return False
+
+        self.last_detections = detections
+        logger.info(
+            f"✅ OBJECTS DETECTED - camera={self.config.name}, "
+            f"objects={[f'{d.label}:{d.confidence:.2f}' for d in detections]}"
+        )
+        return True
+
     def _check_detection_rate(self):
         """Check if detection rate is abnormal and log warning."""
         if self.state.frames_captured < 100:
@@ -599,15 +826,5 @@ class FrameGrabber:
         return frame
 
     def save_frame(self, frame_bytes: bytes, camera_id: uuid.UUID) -> str:
-        """Salva um frame em disco e retorna o caminho."""
-        storage_path = Path(settings.frames_storage_path)
-        storage_path.mkdir(parents=True, exist_ok=True)
-
-        timestamp = int(time.time() * 1000)
-        filename = f"{camera_id}_{timestamp}.jpg"
-        filepath = storage_path / filename
-
-        with open(filepath, "wb") as f:
-            f.write(frame_bytes)
-
-        return str(filepath)
+        """Salva um frame no frame store e retorna a chave (relativa à raiz)."""
+        return frame_store.save(camera_id, frame_bytes, time.time())
@@ -0,0 +1,249 @@
+"""Orçamento global de chamadas ao LLM dividido entre as câmeras."""
+
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Peso de cada prioridade na divisão do orçamento e na pontuação dos frames
+PRIORITY_WEIGHTS = {"low": 0.5, "normal": 1.0, "high": 2.0}
+
+
+def frame_score(motion_score: Optional[float], blob_count: int, priority: str) -> float:
+    """Pontua um frame candidato à análise.
+
+    Combina a intensidade do movimento (0-100), a quantidade de regiões em
+    movimento (até 5) e a prioridade da câmera.
+    """
+    motion = (motion_score if motion_score is not None else 100.0) / 100
+    blobs = 0.1 * min(blob_count, 5)
+    return (motion + blobs) * PRIORITY_WEIGHTS.get(priority, 1.0)
+
+
+@dataclass
+class _CameraBudget:
+    """Cota e candidatos de uma câmera na janela atual."""
+
+    weight: float
+    allowance: float = 0.0
+    # Chamadas disponíveis; frações de cota acumulam entre janelas
+    credit: float = 0.0
+    spent: int = 0
+    threshold: float = 0.0
+    scores: List[float] = field(default_factory=list)
+    last_scores: List[float] = field(default_factory=list)
+    dispatched: int = 0
+    filtered: int = 0
+    refunded: int = 0
+    extra_calls: int = 0
+
+
+class LLMBudget:
+    """Divide um limite de chamadas por hora entre as câmeras por peso.
+
+    O tempo é dividido em janelas de ``window_seconds``. A cada janela, as
+    chamadas disponíveis são repartidas entre as câmeras ativas (com frames
+    candidatos na janela anterior) proporcionalmente ao peso; cotas
+    fracionárias acumulam até completar uma chamada. Dentro da janela, cada
+    câmera só envia frames com pontuação acima do limiar que teria
+    selecionado os melhores frames da janela anterior dentro da cota, e
+    nunca passa da cota. Assim o orçamento é gasto nos frames de maior
+    movimento quando ele é curto, sem reter frames esperando o fim da janela.
+
+    Um frame liberado que acaba não chegando ao LLM (descartado antes da
+    fila, fila cheia, resposta do cache de resultados) devolve a chamada
+    com ``refund``. Um frame que gasta mais de uma chamada (escalada na
+    cascata, hedge) paga as extras com ``charge``.
+
+    Usado apenas a partir do event loop, portanto não precisa de lock.
+    """
+
+    def __init__(
+        self,
+        calls_per_hour: float,
+        window_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.calls_per_hour = calls_per_hour
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._cameras: Dict[uuid.UUID, _CameraBudget] = {}
+        self._window_start = clock()
+        self._windows = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Verifica se o orçamento está ativo (calls_per_hour > 0)."""
+        return self.calls_per_hour > 0
+
+    @property
+    def calls_per_window(self) -> float:
+        """Chamadas disponíveis em cada janela."""
+        return self.calls_per_hour * self.window_seconds / 3600
+
+    def register_camera(self, camera_id: uuid.UUID, priority: str = "normal"):
+        """Registra (ou atualiza o peso de) uma câmera."""
+        weight = PRIORITY_WEIGHTS.get(priority, 1.0)
+        camera = self._cameras.get(camera_id)
+        if camera:
+            camera.weight = weight
+            self._allocate()
+            return
+
+        camera = _CameraBudget(weight=weight)
+        self._cameras[camera_id] = camera
+        self._allocate()
+        camera.credit = camera.allowance
+
+    def unregister_camera(self, camera_id: uuid.UUID):
+        """Remove uma câmera e redistribui a cota dela."""
+        if self._cameras.pop(camera_id, None) is not None:
+            self._allocate()
+
+    def should_dispatch(self, camera_id: uuid.UUID, score: float) -> bool:
+        """Decide se um frame da câmera cabe no orçamento.
+
+        Args:
+            camera_id: Câmera de origem
+            score: Pontuação do frame (ver ``frame_score``)
+
+        Returns:
+            True se o frame pode ser enviado ao LLM
+        """
+        if not self.enabled:
+            return True
+
+        self._roll_window()
+        camera = self._cameras.get(camera_id)
+        if camera is None:
+            self.register_camera(camera_id)
+            camera = self._cameras[camera_id]
+
+        camera.scores.append(score)
+        if camera.credit < 1 or score < camera.threshold:
+            camera.filtered += 1
+            return False
+
+        camera.credit -= 1
+        camera.spent += 1
+        camera.dispatched += 1
+        return True
+
+    def refund(self, camera_id: uuid.UUID):
+        """Devolve a chamada de um frame liberado que não foi ao LLM."""
+        if not self.enabled:
+            return
+        camera = self._cameras.get(camera_id)
+        if camera is None:
+            return
+        # Respeita o mesmo teto de crédito da virada de janela
+        camera.credit = min(camera.credit + 1, max(camera.allowance, 1.0))
+        camera.spent = max(0, camera.spent - 1)
+        camera.dispatched = max(0, camera.dispatched - 1)
+        camera.refunded += 1
+
+    def charge(self, camera_id: uuid.UUID, calls: int):
+        """Cobra as chamadas extras de um frame já liberado.
+
+        O crédito pode ficar negativo; a dívida é abatida da cota das
+        próximas janelas.
+        """
+        if not self.enabled or calls <= 0:
+            return
+        camera = self._cameras.get(camera_id)
+        if camera is None:
+            return
+        camera.credit -= calls
+        camera.spent += calls
+        camera.extra_calls += calls
+
+    def _roll_window(self):
+        """Abre uma nova janela quando a atual termina."""
+        now = self._clock()
+        if now - self._window_start < self.window_seconds:
+            return
+        self._window_start = now
+        self._windows += 1
+        for camera in self._cameras.values():
+            camera.last_scores = camera.scores
+            camera.scores = []
+            camera.spent = 0
+        self._allocate()
+        for camera in self._cameras.values():
+            # Sobra de cota não vira rajada: no máximo uma janela (ou 1 chamada)
+            camera.credit = min(
+                camera.credit + camera.allowance, max(camera.allowance, 1.0)
+            )
+
+    def _allocate(self):
+        """Reparte as chamadas da janela entre as câmeras por peso."""
+        if not self._cameras:
+            return
+        # Câmeras sem candidatos na janela anterior não consomem cota
+        active = {
+            camera_id: camera
+            for camera_id, camera in self._cameras.items()
+            if camera.last_scores or camera.scores
+        } or self._cameras
+        total_weight = sum(c.weight for c in active.values())
+
+        for camera_id, camera in self._cameras.items():
+            if camera_id not in active:
+                camera.allowance = 0.0
+                camera.threshold = 0.0
+                continue
+            camera.allowance = self.calls_per_window * camera.weight / total_weight
+            camera.threshold = self._threshold(camera)
+
+    @staticmethod
+    def _threshold(camera: _CameraBudget) -> float:
+        """Menor pontuação que entraria na cota entre os candidatos anteriores."""
+        quota = max(1, round(camera.allowance))
+        scores = sorted(camera.last_scores, reverse=True)
+        if len(scores) <= quota:
+            return 0.0
+        return scores[quota - 1]
+
+    def get_camera_stats(self, camera_id: uuid.UUID) -> dict:
+        """Retorna cota, gasto e frames filtrados de uma câmera."""
+        camera = self._cameras.get(camera_id)
+        if camera is None:
+            return {
+                "allowance": 0.0,
+                "credit": 0.0,
+                "spent": 0,
+                "threshold": 0.0,
+                "filtered": 0,
+                "refunded": 0,
+                "extra_calls": 0,
+            }
+        return {
+            "allowance": round(camera.allowance, 2),
+            "credit": round(camera.credit, 2),
+            "spent": camera.spent,
+            "threshold": round(camera.threshold, 3),
+            "filtered": camera.filtered,
+            "refunded": camera.refunded,
+            "extra_calls": camera.extra_calls,
+        }
+
+    def get_stats(self) -> dict:
+        """Retorna estatísticas do orçamento."""
+        return {
+            "enabled": self.enabled,
+            "calls_per_hour": self.calls_per_hour,
+            "window_seconds": self.window_seconds,
+            "calls_per_window": round(self.calls_per_window, 2),
+            "windows": self._windows,
+            "dispatched": sum(c.dispatched for c in self._cameras.values()),
+            "filtered": sum(c.filtered for c in self._cameras.values()),
+            "refunded": sum(c.refunded for c in self._cameras.values()),
+            "extra_calls": sum(c.extra_calls for c in self._cameras.values()),
+            "per_camera": {
+                str(camera_id): self.get_camera_stats(camera_id)
+                for camera_id in self._cameras
+            },
+        }
@@ -0,0 +1,83 @@
+"""Orçamento global de memória para frames em processamento."""
+
+import logging
+import uuid
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class InFlightBudget:
+    """Contabiliza os bytes de frames em trânsito entre captura e análise.
+
+    Os bytes são reservados pelo ``FrameGrabber`` logo após o encode JPEG e
+    liberados pela ``FrameQueue`` quando o frame termina de ser processado,
+    é descartado ou vai para o spool em disco. Assim a fila, as tarefas de
+    inserção pendentes e os buffers do processamento compartilham um único
+    limite, independente da resolução de cada câmera.
+
+    Usado apenas a partir do event loop, portanto não precisa de lock.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._used_bytes = 0
+        self._per_camera: Dict[uuid.UUID, int] = {}
+        self._rejected_count = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Verifica se o orçamento está ativo (max_bytes > 0)."""
+        return self.max_bytes > 0
+
+    @property
+    def used_bytes(self) -> int:
+        """Bytes atualmente em trânsito."""
+        return self._used_bytes
+
+    @property
+    def exhausted(self) -> bool:
+        """Verifica se não há mais espaço no orçamento."""
+        return self.enabled and self._used_bytes >= self.max_bytes
+
+    def bytes_for(self, camera_id: uuid.UUID) -> int:
+        """Bytes em trânsito de uma câmera."""
+        return self._per_camera.get(camera_id, 0)
+
+    def try_acquire(self, camera_id: uuid.UUID, nbytes: int) -> bool:
+        """Reserva nbytes se couberem no orçamento.
+
+        Returns:
+            True se reservado, False se o orçamento estourou
+        """
+        if self.enabled and self._used_bytes + nbytes > self.max_bytes:
+            self._rejected_count += 1
+            return False
+        self.acquire(camera_id, nbytes)
+        return True
+
+    def acquire(self, camera_id: uuid.UUID, nbytes: int):
+        """Reserva nbytes incondicionalmente."""
+        self._used_bytes += nbytes
+        self._per_camera[camera_id] = self._per_camera.get(camera_id, 0) + nbytes
+
+    def release(self, camera_id: uuid.UUID, nbytes: int):
+        """Libera nbytes reservados anteriormente."""
+        self._used_bytes = max(0, self._used_bytes - nbytes)
+        remaining = self._per_camera.get(camera_id, 0) - nbytes
+        if remaining > 0:
+            self._per_camera[camera_id] = remaining
+        else:
+            self._per_camera.pop(camera_id, None)
+
+    def get_stats(self) -> dict:
+        """Retorna estatísticas do orçamento."""
+        return {
+            "max_bytes": self.max_bytes,
+            "used_bytes": self._used_bytes,
+            "utilization": (
+                self._used_bytes / self.max_bytes if self.max_bytes > 0 else 0.0
+            ),
+            "rejected": self._rejected_count,
+            "per_camera": {str(k): v for k, v in self._per_camera.items()},
+        }
@@ -5,7 +5,7 @@ import os
 import shutil
 import time
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List
 
 import cv2
 import numpy as np
@@ -80,6 +80,8 @@ class MotionDetector:
         self._frame_count = 0
         self._previous_frame: Optional[np.ndarray] = None
         self._last_mask: Optional[np.ndarray] = None
+        self._pixel_mask: Optional[np.ndarray] = None
+        self._bg_mask: Optional[np.ndarray] = None
 
         # Create background subtractor with configured parameters
         self._background_subtractor = cv2.createBackgroundSubtractorMOG2(
@@ -192,6 +194,8 @@ class MotionDetector:
         """Reset detector state (clear previous frame and background model)."""
         self._previous_frame = None
         self._last_mask = None
+        self._pixel_mask = None
+        self._bg_mask = None
         self._background_subtractor = cv2.createBackgroundSubtractorMOG2(
             detectShadows=True,
             history=self.bg_history,
@@ -207,6 +211,45 @@ class MotionDetector:
         """
         return self._last_mask
 
+    def get_motion_boxes(
+        self, frame_width: int, frame_height: int, min_area_ratio: float = 0.001
+    ) -> List[Tuple[int, int, int, int]]:
+        """Return bounding boxes of the last motion mask in frame coordinates.
+
+        Args:
+            frame_width: Width of the original frame
+            frame_height: Height of the original frame
+            min_area_ratio: Ignore blobs smaller than this fraction of the mask
+
+        Returns:
+            List of (x, y, w, h) boxes scaled to the original frame
+        """
+        if self._last_mask is None:
+            return []
+
+        mask_h, mask_w = self._last_mask.shape[:2]
+        min_area = mask_w * mask_h * min_area_ratio
+        contours, _ = cv2.findContours(
+            self._last_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+        )
+
+        scale_x = frame_width / mask_w
+        scale_y = frame_height / mask_h
+        boxes = []
+        for contour in contours:
+            if cv2.contourArea(contour) < min_area:
+                continue
+            x, y, w, h = cv2.boundingRect(contour)
+            boxes.append(
+                (
+                    int(x * scale_x),
+                    int(y * scale_y),
+                    int(w * scale_x),
+                    int(h * scale_y),
+                )
+            )
+        return boxes
+
     def detect_motion(self, frame: np.ndarray) -> Tuple[float, bool]:
         """Detect motion in frame.
 
@@ -249,7 +292,7 @@ class MotionDetector:
             has_motion = motion_score >= self.threshold
 
             # Generate and store motion mask for annotation
-            self._last_mask = self._generate_motion_mask(processed)
+            self._last_mask = self._generate_motion_mask()
 
             # Log motion detection result
             log_msg = (
@@ -312,6 +355,7 @@ class MotionDetector:
         if self._previous_frame is None:
             # First frame, store as baseline
             self._previous_frame = frame.copy()
+            self._pixel_mask = None
             return 100.0  # Always send first frame
 
         # Calculate absolute difference
@@ -323,6 +367,7 @@ class MotionDetector:
 
         # Apply configurable threshold for pixel difference detection
         _, thresh = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        self._pixel_mask = thresh
 
         # Debug: save thresholded mask
         if self.debug:
@@ -357,6 +402,7 @@ class MotionDetector:
 
         # Remove shadows (gray pixels in mask)
         _, thresh = cv2.threshold(fg_mask, 127, 255, cv2.THRESH_BINARY)
+        self._bg_mask = thresh
 
         # Debug: save thresholded background mask
         if self.debug:
@@ -370,33 +416,22 @@ class MotionDetector:
         # Scale to 0-100
         return min(fg_percentage * 3, 100.0)
 
-    def _generate_motion_mask(self, frame: np.ndarray) -> Optional[np.ndarray]:
-        """Generate motion mask visualization.
+    def _generate_motion_mask(self) -> Optional[np.ndarray]:
+        """Combine the masks computed while scoring the current frame.
 
-        Args:
-            frame: Preprocessed frame
+        Reuses the thresholded masks from pixel difference and background
+        subtraction instead of recomputing them, so the background model is
+        updated only once per frame.
 
         Returns:
             Motion mask as numpy array, or None if cannot generate
         """
         try:
-            if self._previous_frame is None:
+            if self._pixel_mask is None or self._bg_mask is None:
                 return None
 
-            # Calculate pixel difference mask
-            diff = cv2.absdiff(self._previous_frame, frame)
-            _, diff_thresh = cv2.threshold(
-                diff, self.pixel_threshold, 255, cv2.THRESH_BINARY
-            )
-
-            # Calculate background subtraction mask
-            fg_mask = self._background_subtractor.apply(frame)
-            _, bg_thresh = cv2.threshold(fg_mask, 127, 255, cv2.THRESH_BINARY)
-
             # Combine masks (use maximum of both)
-            combined_mask = cv2.max(diff_thresh, bg_thresh)
-
-            return combined_mask
+            return cv2.max(self._pixel_mask, self._bg_mask)
 
         except Exception as e:
             logger.warning(f"Failed to generate motion mask: {e}")
@@ -0,0 +1,285 @@
+"""CPU object detection used to gate motion-positive frames before the LLM."""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import cv2
+import numpy as np
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[int, int, int, int]
+
+# Labels of the PASCAL VOC MobileNet-SSD model (index = class id)
+VOC_LABELS = [
+    "background",
+    "aeroplane",
+    "bicycle",
+    "bird",
+    "boat",
+    "bottle",
+    "bus",
+    "car",
+    "cat",
+    "chair",
+    "cow",
+    "diningtable",
+    "dog",
+    "horse",
+    "motorbike",
+    "person",
+    "pottedplant",
+    "sheep",
+    "sofa",
+    "train",
+    "tvmonitor",
+]
+
+# Detector labels grouped into the classes used in the configuration
+CLASS_GROUPS = {
+    "person": {"person"},
+    "vehicle": {"bicycle", "bus", "car", "motorbike", "truck", "train"},
+    "animal": {"bird", "cat", "cow", "dog", "horse", "sheep"},
+}
+
+
+def normalize_label(label: str) -> str:
+    """Map a detector label to its configured class (e.g. car -> vehicle)."""
+    for group, labels in CLASS_GROUPS.items():
+        if label in labels:
+            return group
+    return label
+
+
+@dataclass
+class Detection:
+    """An object found in a frame."""
+
+    label: str
+    confidence: float
+    box: Box  # (x, y, w, h) in original frame coordinates
+
+
+class ObjectDetector:
+    """Base class for CPU object detectors.
+
+    Subclasses implement ``detect``; ``find`` keeps only the detections of
+    the configured classes, which is what the frame gate uses. Subclasses
+    that can only find some classes declare them in ``supported_classes``
+    so that a misconfigured gate fails at startup instead of dropping every
+    frame of an unsupported class.
+    """
+
+    name = "base"
+    supported_classes: Optional[FrozenSet[str]] = None
+
+    def __init__(self, classes: Iterable[str], min_confidence: float = 0.5):
+        """Initialize detector.
+
+        Args:
+            classes: Classes that let a frame through (e.g. person, vehicle)
+            min_confidence: Minimum detection confidence (0-1)
+
+        Raises:
+            ValueError: If a class is not supported by this detector
+        """
+        self.classes: Set[str] = {c.strip().lower() for c in classes if c.strip()}
+        self.min_confidence = min_confidence
+        supported = self.get_supported_classes()
+        if supported is not None:
+            unsupported = self.classes - supported
+            if unsupported:
+                raise ValueError(
+                    f"Object detector '{self.name}' cannot detect classes "
+                    f"{sorted(unsupported)} (supported: {sorted(supported)})"
+                )
+
+    def get_supported_classes(self) -> Optional[FrozenSet[str]]:
+        """Classes this detector can find (None if not restricted)."""
+        return self.supported_classes
+
+    def detect(self, frame: np.ndarray) -> List[Detection]:
+        """Detect objects in a BGR frame (labels already normalized)."""
+        raise NotImplementedError
+
+    def find(self, frame: np.ndarray) -> List[Detection]:
+        """Detect objects and keep only the configured classes."""
+        return [d for d in self.detect(frame) if d.label in self.classes]
+
+
+class HOGPersonDetector(ObjectDetector):
+    """Person detector using OpenCV's built-in HOG + linear SVM.
+
+    Needs no model files. Frames are downscaled to ``process_width`` before
+    detection to keep it within tens of milliseconds on a CPU. Requires an
+    OpenCV build that ships ``cv2.HOGDescriptor`` (4.x).
+    """
+
+    name = "hog"
+    supported_classes = frozenset({"person"})
+
+    def __init__(
+        self,
+        classes: Iterable[str] = ("person",),
+        min_confidence: float = 0.5,
+        process_width: int = 640,
+    ):
+        if not hasattr(cv2, "HOGDescriptor"):
+            raise RuntimeError("cv2.HOGDescriptor is not available in this OpenCV build")
+        super().__init__(classes, min_confidence)
+        self.process_width = process_width
+        self._hog = cv2.HOGDescriptor()
+        self._hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+
+    def detect(self, frame: np.ndarray) -> List[Detection]:
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.process_width / width) if width else 1.0
+        image = (
+            cv2.resize(frame, (int(width * scale), int(height * scale)))
+            if scale < 1.0
+            else frame
+        )
+
+        rects, weights = self._hog.detectMultiScale(
+            image, winStride=(8, 8), padding=(8, 8), scale=1.05
+        )
+
+        detections = []
+        for (x, y, w, h), weight in zip(rects, np.ravel(weights)):
+            # SVM margin, squashed to 0-1 to be comparable with DNN scores
+            confidence = float(1.0 / (1.0 + np.exp(-weight)))
+            if confidence < self.min_confidence:
+                continue
+            detections.append(
+                Detection(
+                    label="person",
+                    confidence=confidence,
+                    box=(
+                        int(x / scale),
+                        int(y / scale),
+                        int(w / scale),
+                        int(h / scale),
+                    ),
+                )
+            )
+        return detections
+
+
+class DNNObjectDetector(ObjectDetector):
+    """SSD detector run with OpenCV DNN (e.g. MobileNet-SSD, Caffe or TF).
+
+    The model must produce the standard SSD output ``[1, 1, N, 7]``
+    (image_id, class_id, confidence, x1, y1, x2, y2 normalized).
+    """
+
+    name = "dnn"
+
+    def __init__(
+        self,
+        model_path: str,
+        config_path: Optional[str] = None,
+        classes: Iterable[str] = ("person", "vehicle"),
+        min_confidence: float = 0.5,
+        labels: Optional[List[str]] = None,
+        input_size: int = 300,
+        mean: float = 127.5,
+        scale: float = 1 / 127.5,
+    ):
+        self.labels = labels or VOC_LABELS
+        super().__init__(classes, min_confidence)
+        self.input_size = input_size
+        self.mean = mean
+        self.scale = scale
+        self._net = cv2.dnn.readNet(model_path, config_path or "")
+        self._net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self._net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+    def detect(self, frame: np.ndarray) -> List[Detection]:
+        height, width = frame.shape[:2]
+        blob = cv2.dnn.blobFromImage(
+            cv2.resize(frame, (self.input_size, self.input_size)),
+            self.scale,
+            (self.input_size, self.input_size),
+            self.mean,
+        )
+        self._net.setInput(blob)
+        output = self._net.forward()
+
+        detections = []
+        for row in output.reshape(-1, 7):
+            confidence = float(row[2])
+            class_id = int(row[1])
+            if confidence < self.min_confidence or not 0 <= class_id < len(self.labels):
+                continue
+            x1, y1 = max(0, int(row[3] * width)), max(0, int(row[4] * height))
+            x2, y2 = min(width, int(row[5] * width)), min(height, int(row[6] * height))
+            if x2 <= x1 or y2 <= y1:
+                continue
+            detections.append(
+                Detection(
+                    label=normalize_label(self.labels[class_id]),
+                    confidence=confidence,
+                    box=(x1, y1, x2 - x1, y2 - y1),
+                )
+            )
+        return detections
+
+    def get_supported_classes(self) -> Optional[FrozenSet[str]]:
+        """Configurable classes covered by the model labels."""
+        return frozenset(normalize_label(label) for label in self.labels[1:])
+
+
+def create_object_detector(
+    backend: str,
+    classes: Iterable[str],
+    min_confidence: float = 0.5,
+    model_path: Optional[str] = None,
+    config_path: Optional[str] = None,
+) -> Optional[ObjectDetector]:
+    """Create the configured detector.
+
+    Returns None (gate disabled, logged as an error) when this OpenCV build
+    has no HOG detector.
+
+    Raises:
+        ValueError: If the DNN model cannot be loaded or a configured class
+            cannot be detected by the backend (HOG only finds people)
+    """
+    classes = list(classes)
+    if backend == "dnn":
+        if not model_path or not Path(model_path).exists():
+            raise ValueError(
+                f"DNN detector model not found: {model_path} "
+                "(set OBJECT_DETECTOR_MODEL_PATH or use the hog backend)"
+            )
+        try:
+            return DNNObjectDetector(
+                model_path,
+                config_path,
+                classes=classes,
+                min_confidence=min_confidence,
+            )
+        except cv2.error as e:
+            raise ValueError(f"Failed to load DNN detector model {model_path}: {e}") from e
+    try:
+        return HOGPersonDetector(classes=classes, min_confidence=min_confidence)
+    except RuntimeError as e:
+        logger.error(f"Object detector disabled: {e}")
+        return None
+
+
+def create_configured_object_detector() -> Optional[ObjectDetector]:
+    """Create the detector described by the settings (None if disabled)."""
+    if not settings.object_detector_enabled:
+        return None
+    return create_object_detector(
+        settings.object_detector_backend,
+        settings.get_object_detector_classes(),
+        min_confidence=settings.object_detector_min_confidence,
+        model_path=settings.object_detector_model_path,
+        config_path=settings.object_detector_config_path,
+    )
@@ -3,14 +3,32 @@
 import asyncio
 import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Callable, Awaitable, Optional
+from enum import IntEnum
+from typing import Callable, Awaitable, List, Optional, Tuple
 
 from src.config import settings
+from .memory_budget import InFlightBudget
+from .object_detector import Detection
+from .spool import FrameSpool
 
 logger = logging.getLogger(__name__)
 
 
+class QueuePressure(IntEnum):
+    """Nível de pressão da fila, publicado para os frame grabbers.
+
+    - NORMAL: captura no ritmo configurado
+    - ELEVATED: grabbers aumentam o intervalo de captura
+    - CRITICAL: grabbers rodam apenas a detecção de movimento, sem encode
+    """
+
+    NORMAL = 0
+    ELEVATED = 1
+    CRITICAL = 2
+
+
 @dataclass
 class FrameItem:
     """Item da fila de frames."""
@@ -18,6 +36,24 @@ class FrameItem:
     camera_id: uuid.UUID
     frame_data: bytes
     timestamp: float
+    # Caixas de movimento (x, y, w, h) usadas para recortar a imagem enviada
+    # ao LLM. Não são persistidas no spool.
+    motion_boxes: Optional[List[Tuple[int, int, int, int]]] = None
+    # Objetos encontrados pelo detector (recorte e anotação). Também não vão
+    # para o spool.
+    detections: Optional[List[Detection]] = None
+
+    @property
+    def crop_boxes(self) -> Optional[List[Tuple[int, int, int, int]]]:
+        """Caixas usadas no recorte: objetos detectados ou, sem eles, movimento."""
+        if self.detections:
+            return [d.box for d in self.detections]
+        return self.motion_boxes
+
+    @property
+    def size(self) -> int:
+        """Tamanho do frame em bytes."""
+        return len(self.frame_data)
 
 
 class FrameQueue:
@@ -25,13 +61,40 @@ class FrameQueue:
 
     Gerencia o processamento de frames através de múltiplos workers assíncronos.
     Rastreia estatísticas de frames processados e descartados.
+
+    Se um ``FrameSpool`` for informado, frames que não cabem na fila em memória
+    são gravados em disco e drenados pelos workers, na ordem de chegada, assim
+    que houver espaço.
+
+    Se um ``InFlightBudget`` for informado, a fila libera os bytes reservados
+    pelo grabber quando o frame é processado, descartado ou enviado ao spool.
+
+    A fila publica um sinal de pressão (``QueuePressure``) calculado a partir
+    da ocupação (ou, com spool, da folga do spool) e do orçamento de memória,
+    com histerese para não oscilar entre níveis. Os grabbers consultam ``pressure`` para reduzir o
+    trabalho de captura enquanto a fila não dá vazão.
+
+    Com ``batch_processor`` e ``batch_size > 1`` cada worker junta até
+    ``batch_size`` frames, esperando no máximo ``batch_wait`` segundos após o
+    primeiro, e os processa juntos (análise em lote no LLM).
     """
 
+    ELEVATED_WATERMARK = 0.5
+    CRITICAL_WATERMARK = 0.9
+    PRESSURE_HYSTERESIS = 0.2
+
     def __init__(
         self,
         processor: Optional[Callable[[FrameItem], Awaitable[None]]] = None,
         max_size: Optional[int] = None,
         num_workers: int = 2,
+        spool: Optional[FrameSpool] = None,
+        budget: Optional[InFlightBudget] = None,
+        batch_processor: Optional[
+            Callable[[List[FrameItem]], Awaitable[None]]
+        ] = None,
+        batch_size: int = 1,
+        batch_wait: float = 0.5,
     ):
         self.max_size = max_size or settings.max_queue_size
         self._queue: asyncio.Queue[FrameItem] = asyncio.Queue(maxsize=self.max_size)
@@ -41,6 +104,23 @@ class FrameQueue:
         self._running = False
         self._processed_count = 0
         self._dropped_count = 0
+        self._spool = spool
+        # Uma única thread para o spool: gravações e leituras saem na ordem
+        # em que foram pedidas e não disputam o executor padrão
+        self._spool_executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="frame-spool")
+            if spool
+            else None
+        )
+        self._spooled_count = 0
+        self._refilling = False
+        self._budget = budget
+        self._pressure = QueuePressure.NORMAL
+        self._pressure_listeners: List[Callable[[QueuePressure], None]] = []
+        self._batch_processor = batch_processor
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._batch_count = 0
 
     @property
     def size(self) -> int:
@@ -62,26 +142,146 @@ class FrameQueue:
         """Retorna quantidade de frames descartados."""
         return self._dropped_count
 
+    @property
+    def spooled_count(self) -> int:
+        """Retorna quantidade de frames enviados ao spool em disco."""
+        return self._spooled_count
+
+    @property
+    def spool_pending(self) -> int:
+        """Retorna quantidade de frames aguardando no spool."""
+        return self._spool.pending if self._spool else 0
+
+    @property
+    def pressure(self) -> QueuePressure:
+        """Nível de pressão atual da fila."""
+        return self._pressure
+
+    def add_pressure_listener(self, listener: Callable[[QueuePressure], None]):
+        """Registra um callback chamado quando o nível de pressão muda."""
+        self._pressure_listeners.append(listener)
+
+    def _compute_pressure(self) -> QueuePressure:
+        """Calcula o nível de pressão aplicando histerese na descida.
+
+        Com spool, a fila em memória cheia não é crítica (o excedente vai
+        para o disco): o nível crítico vem da folga do spool (``usage``, em
+        bytes e idade). Enquanto o spool drena a pressão fica elevada e os
+        frames ao vivo continuam entrando no fim dele.
+        """
+        if self._budget and self._budget.exhausted:
+            return QueuePressure.CRITICAL
+
+        if self._spool and self._spool.pending > 0:
+            return max(QueuePressure.ELEVATED, self._level(self._spool.usage))
+
+        fill = self.size / self.max_size if self.max_size else 0.0
+        level = self._level(fill)
+        if self._spool:
+            return min(level, QueuePressure.ELEVATED)
+        return level
+
+    def _level(self, fill: float) -> QueuePressure:
+        """Nível para uma ocupação (0 a 1), com histerese em relação ao atual."""
+        current = self._pressure
+
+        if fill >= self.CRITICAL_WATERMARK:
+            return QueuePressure.CRITICAL
+        if (
+            current == QueuePressure.CRITICAL
+            and fill > self.CRITICAL_WATERMARK - self.PRESSURE_HYSTERESIS
+        ):
+            return QueuePressure.CRITICAL
+        if fill >= self.ELEVATED_WATERMARK:
+            return QueuePressure.ELEVATED
+        if (
+            current >= QueuePressure.ELEVATED
+            and fill > self.ELEVATED_WATERMARK - self.PRESSURE_HYSTERESIS
+        ):
+            return QueuePressure.ELEVATED
+        return QueuePressure.NORMAL
+
+    def _update_pressure(self):
+        """Recalcula a pressão e notifica os listeners se ela mudou."""
+        new_pressure = self._compute_pressure()
+        if new_pressure == self._pressure:
+            return
+
+        logger.info(
+            f"Pressão da fila: {self._pressure.name} -> {new_pressure.name} "
+            f"(tamanho={self.size}/{self.max_size})"
+        )
+        self._pressure = new_pressure
+        for listener in self._pressure_listeners:
+            try:
+                listener(new_pressure)
+            except Exception as e:
+                logger.error(f"Erro no listener de pressão da fila: {e}")
+
     def set_processor(self, processor: Callable[[FrameItem], Awaitable[None]]):
         """Define o processador de frames."""
         self._processor = processor
 
+    def set_batch_processor(
+        self,
+        processor: Callable[[List[FrameItem]], Awaitable[None]],
+        batch_size: int,
+        batch_wait: float,
+    ):
+        """Define o processador de lotes de frames."""
+        self._batch_processor = processor
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+
+    @property
+    def batching(self) -> bool:
+        """Verifica se os workers processam frames em lote."""
+        return self._batch_processor is not None and self.batch_size > 1
+
+    def _release(self, item: FrameItem):
+        """Libera os bytes do frame no orçamento de memória."""
+        if self._budget:
+            self._budget.release(item.camera_id, item.size)
+
     async def put(
-        self, camera_id: uuid.UUID, frame_data: bytes, timestamp: float
+        self,
+        camera_id: uuid.UUID,
+        frame_data: bytes,
+        timestamp: float,
+        motion_boxes: Optional[List[Tuple[int, int, int, int]]] = None,
+        detections: Optional[List[Detection]] = None,
     ) -> bool:
         """Adiciona um frame na fila."""
         item = FrameItem(
             camera_id=camera_id,
             frame_data=frame_data,
             timestamp=timestamp,
+            motion_boxes=motion_boxes,
+            detections=detections,
         )
 
+        try:
+            return await self._put(item)
+        finally:
+            self._update_pressure()
+
+    async def _put(self, item: FrameItem) -> bool:
+        """Insere o frame na fila em memória, no spool ou o descarta."""
+        # Enquanto houver frames no spool, novos frames vão para o fim dele
+        # para que a ordem de processamento seja preservada
+        if self._spool and (self._spool.pending > 0 or self._refilling):
+            return await self._put_spool(item)
+
         try:
             # Tenta adicionar sem bloquear
             self._queue.put_nowait(item)
             return True
         except asyncio.QueueFull:
+            if self._spool:
+                return await self._put_spool(item)
+
             # Fila cheia, descarta o frame mais antigo se necessário
+            self._release(item)
             self._dropped_count += 1
             logger.warning(
                 f"Fila cheia, frame descartado. "
@@ -89,9 +289,108 @@ class FrameQueue:
             )
             return False
 
+    async def _put_spool(self, item: FrameItem) -> bool:
+        """Grava um frame no spool em disco."""
+        loop = asyncio.get_event_loop()
+        try:
+            stored = await loop.run_in_executor(
+                self._spool_executor,
+                self._spool.append,
+                item.camera_id,
+                item.frame_data,
+                item.timestamp,
+            )
+        except OSError as e:
+            logger.error(f"Erro ao gravar frame no spool: {e}")
+            stored = False
+
+        # Frame foi para o disco (ou descartado): deixa de ocupar memória
+        self._release(item)
+
+        if stored:
+            self._spooled_count += 1
+            return True
+
+        self._dropped_count += 1
+        logger.warning(
+            f"Spool sem espaço, frame descartado. "
+            f"Total descartados: {self._dropped_count}"
+        )
+        return False
+
+    async def _refill_from_spool(self):
+        """Move frames do spool para a fila em memória enquanto houver espaço."""
+        if not self._spool or self._refilling or self._spool.pending == 0:
+            return
+
+        self._refilling = True
+        loop = asyncio.get_event_loop()
+        try:
+            while not self._queue.full() and self._spool.pending > 0:
+                if self._budget and self._budget.exhausted:
+                    break
+                record = await loop.run_in_executor(
+                    self._spool_executor, self._spool.pop
+                )
+                if record is None:
+                    break
+                camera_id, frame_data, timestamp = record
+                if self._budget:
+                    self._budget.acquire(camera_id, len(frame_data))
+                self._queue.put_nowait(
+                    FrameItem(
+                        camera_id=camera_id,
+                        frame_data=frame_data,
+                        timestamp=timestamp,
+                    )
+                )
+        except OSError as e:
+            logger.error(f"Erro ao ler frames do spool: {e}")
+        finally:
+            self._refilling = False
+
+    async def flush_to_spool(self) -> int:
+        """Grava no spool os frames ainda pendentes na fila em memória.
+
+        Deve ser chamado no shutdown, depois de parar os workers, para que os
+        frames sejam processados no próximo start em vez de descartados. Os
+        frames que estavam em processamento quando os workers pararam já
+        voltaram à fila e também são gravados.
+
+        Returns:
+            Quantidade de frames gravados no spool
+        """
+        if not self._spool:
+            return 0
+
+        records = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            self._queue.task_done()
+            self._release(item)
+            records.append((item.camera_id, item.frame_data, item.timestamp))
+
+        if not records:
+            return 0
+
+        loop = asyncio.get_event_loop()
+        written = await loop.run_in_executor(
+            self._spool_executor, self._spool.prepend, records
+        )
+        logger.info(f"{written} frames pendentes gravados no spool")
+        return written
+
+    def close(self):
+        """Encerra a thread do spool (chamado no shutdown, após o flush)."""
+        if self._spool_executor:
+            self._spool_executor.shutdown(wait=True)
+            self._spool_executor = None
+
     async def get(self) -> FrameItem:
         """Obtém o próximo frame da fila."""
-        return await self._queue.get()
+        item = await self._queue.get()
+        self._update_pressure()
+        return item
 
     def task_done(self):
         """Marca uma tarefa como concluída."""
@@ -102,7 +401,7 @@ class FrameQueue:
         if self._running:
             return
 
-        if not self._processor:
+        if not self._processor and not self.batching:
             raise ValueError("Processador não definido")
 
         self._running = True
@@ -112,7 +411,11 @@ class FrameQueue:
         logger.info(f"Iniciados {self._num_workers} workers de processamento")
 
     async def stop_workers(self):
-        """Para os workers de processamento."""
+        """Para os workers de processamento.
+
+        Frames em processamento no momento da parada voltam à fila (ou ao
+        spool) e são processados de novo no próximo start.
+        """
         self._running = False
 
         for worker in self._workers:
@@ -128,17 +431,33 @@ class FrameQueue:
 
         while self._running:
             try:
+                await self._refill_from_spool()
+
                 # Aguarda um frame da fila
                 item = await asyncio.wait_for(self.get(), timeout=1.0)
 
+                if self.batching:
+                    await self._process_batch(worker_id, item)
+                    continue
+
+                cancelled = False
                 try:
                     # Processa o frame
                     await self._processor(item)
                     self._processed_count += 1
+                except asyncio.CancelledError:
+                    cancelled = True
+                    raise
                 except Exception as e:
                     logger.error(f"Worker {worker_id} erro ao processar frame: {e}")
                 finally:
-                    self.task_done()
+                    if cancelled:
+                        # Parada durante o processamento: o frame não se perde
+                        await self._requeue([item])
+                    else:
+                        self._release(item)
+                        self.task_done()
+                    self._update_pressure()
 
             except asyncio.TimeoutError:
                 # Timeout normal, continua esperando
@@ -150,6 +469,71 @@ class FrameQueue:
 
         logger.info(f"Worker {worker_id} finalizado")
 
+    async def _gather_batch(self, batch: List[FrameItem]):
+        """Junta frames ao lote até o tamanho ou o tempo limite do lote.
+
+        Os frames são adicionados em ``batch`` à medida que saem da fila, para
+        que o chamador os devolva se o worker for cancelado durante a espera.
+        """
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.batch_wait
+
+        while len(batch) < self.batch_size:
+            try:
+                # Frames já na fila entram sem esperar
+                batch.append(self._queue.get_nowait())
+                self._update_pressure()
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _requeue(self, items: List[FrameItem]):
+        """Devolve à fila (ou ao spool) frames retirados e não processados."""
+        for item in items:
+            self.task_done()
+            await self._put(item)
+
+    async def _process_batch(self, worker_id: int, first: FrameItem):
+        """Processa um lote de frames iniciado por ``first``."""
+        batch = [first]
+        try:
+            await self._gather_batch(batch)
+        except asyncio.CancelledError:
+            # Cancelado antes de processar: nenhum frame do lote se perde
+            await self._requeue(batch)
+            self._update_pressure()
+            raise
+
+        cancelled = False
+        try:
+            await self._batch_processor(batch)
+            self._processed_count += len(batch)
+            self._batch_count += 1
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except Exception as e:
+            logger.error(
+                f"Worker {worker_id} erro ao processar lote de {len(batch)} frames: {e}"
+            )
+        finally:
+            if cancelled:
+                # Parada durante o processamento: o lote volta para a fila
+                await self._requeue(batch)
+            else:
+                for item in batch:
+                    self._release(item)
+                    self.task_done()
+            self._update_pressure()
+
     async def wait_empty(self, timeout: Optional[float] = None):
         """Aguarda a fila esvaziar."""
         try:
@@ -164,11 +548,23 @@ class FrameQueue:
             "max_size": self.max_size,
             "processed": self._processed_count,
             "dropped": self._dropped_count,
+            "spooled": self._spooled_count,
+            "spool": self._spool.get_stats() if self._spool else None,
+            "pressure": self._pressure.name.lower(),
             "workers": len(self._workers),
             "running": self._running,
+            "batch_size": self.batch_size if self.batching else 1,
+            "batches": self._batch_count,
+            "avg_batch_size": (
+                self._processed_count / self._batch_count
+                if self._batch_count
+                else None
+            ),
         }
 
     def clear(self):
         """Reseta os contadores da fila de processamento."""
         self._processed_count = 0
         self._dropped_count = 0
+        self._spooled_count = 0
+        self._batch_count = 0
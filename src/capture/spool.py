@@ -0,0 +1,425 @@
+"""Spool em disco para frames pendentes da fila de processamento.
+
+O spool é um log append-only dividido em segmentos. Cada registro guarda o
+ID da câmera, o timestamp e os bytes JPEG do frame. Um pequeno índice
+(``index.json``) guarda a posição de leitura, permitindo retomar o consumo
+na ordem original após um restart.
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# magic (4) + camera_id (16) + timestamp (8) + tamanho dos dados (4)
+RECORD_HEADER = struct.Struct("<4s16sdI")
+RECORD_MAGIC = b"CFS1"
+SEGMENT_SUFFIX = ".seg"
+INDEX_FILENAME = "index.json"
+
+
+class FrameSpool:
+    """Spool append-only em disco, usado quando a fila em memória enche.
+
+    Os frames são lidos na mesma ordem em que foram gravados. Segmentos
+    totalmente consumidos são removidos; o orçamento de retenção (bytes e
+    idade) descarta os segmentos mais antigos primeiro.
+
+    Todos os métodos são síncronos e thread-safe; a ``FrameQueue`` os executa
+    numa thread dedicada, fora do event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int,
+        segment_bytes: int,
+        retention_seconds: Optional[float] = None,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._segments: List[int] = []
+        self._read_segment: Optional[int] = None
+        self._read_offset = 0
+        self._pending = 0
+        self._total_bytes = 0
+        self._opened = False
+        self._written_count = 0
+        self._read_count = 0
+        self._expired_count = 0
+        self._rejected_count = 0
+
+    @property
+    def pending(self) -> int:
+        """Quantidade de frames aguardando no spool."""
+        return self._pending
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes ocupados em disco pelos segmentos."""
+        return self._total_bytes
+
+    @property
+    def usage(self) -> float:
+        """Fração do orçamento de retenção em uso (0 a 1).
+
+        É a maior entre a ocupação de ``max_bytes`` e a idade do segmento mais
+        antigo em relação a ``retention_seconds``: perto de 1, os próximos
+        frames passam a descartar os mais antigos.
+        """
+        if not self._pending:
+            return 0.0
+        usage = self._total_bytes / self.max_bytes if self.max_bytes else 0.0
+        if self.retention_seconds:
+            try:
+                mtime = self._segment_path(self._segments[0]).stat().st_mtime
+            except (IndexError, OSError):
+                # Segmento removido por outra thread durante a leitura
+                mtime = None
+            if mtime is not None:
+                usage = max(usage, (time.time() - mtime) / self.retention_seconds)
+        return min(usage, 1.0)
+
+    def open(self):
+        """Carrega segmentos e índice existentes (recuperação após restart)."""
+        with self._lock:
+            if self._opened:
+                return
+
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._segments = sorted(
+                int(p.stem) for p in self.path.glob(f"*{SEGMENT_SUFFIX}")
+            )
+            self._load_index()
+
+            if self._segments:
+                # Um crash durante a escrita pode deixar um registro parcial
+                self._truncate_invalid_tail(self._segments[-1])
+
+            self._total_bytes = sum(
+                self._segment_path(seq).stat().st_size for seq in self._segments
+            )
+            self._pending = sum(
+                self._count_records(seq, self._start_offset(seq))
+                for seq in self._segments
+            )
+            self._opened = True
+            self._expire_old_segments()
+
+            if self._pending:
+                logger.info(
+                    f"Spool recuperado: {self._pending} frames pendentes "
+                    f"({self._total_bytes / (1024 * 1024):.2f} MB)"
+                )
+
+    def close(self):
+        """Persiste o índice."""
+        with self._lock:
+            if self._opened:
+                self._save_index()
+                self._opened = False
+
+    def append(self, camera_id: uuid.UUID, frame_data: bytes, timestamp: float) -> bool:
+        """Grava um frame no fim do spool.
+
+        Returns:
+            True se o frame foi gravado, False se o orçamento não permitiu
+        """
+        with self._lock:
+            record_size = RECORD_HEADER.size + len(frame_data)
+            if not self._make_room(record_size):
+                self._rejected_count += 1
+                return False
+
+            if (
+                not self._segments
+                or self._segment_size(self._segments[-1]) + record_size
+                > self.segment_bytes
+            ):
+                self._new_segment(self._segments[-1] + 1 if self._segments else 1)
+
+            self._write_records(self._segments[-1], [(camera_id, frame_data, timestamp)])
+            self._pending += 1
+            self._written_count += 1
+            return True
+
+    def prepend(self, records: List[Tuple[uuid.UUID, bytes, float]]) -> int:
+        """Grava frames antes de todos os pendentes (usado no shutdown).
+
+        Os frames da fila em memória são mais antigos que os do spool, então
+        são gravados em um novo segmento de cabeça. O restante não lido do
+        segmento de leitura atual é copiado logo atrás deles para manter a
+        ordem de consumo.
+
+        O orçamento de bytes vale também aqui: se os frames não couberem, os
+        mais antigos (os primeiros de ``records``) são descartados e contados
+        em ``expired``.
+
+        Returns:
+            Quantidade de frames gravados
+        """
+        if not records:
+            return 0
+
+        with self._lock:
+            tail = b""
+            old_read = self._read_segment if self._segments else None
+
+            if old_read is not None:
+                with open(self._segment_path(old_read), "rb") as f:
+                    f.seek(self._read_offset)
+                    tail = f.read()
+
+            # Bytes após a cópia: o trecho já lido do segmento de leitura sai
+            used = self._total_bytes
+            if old_read is not None:
+                used -= self._segment_size(old_read) - len(tail)
+            records = self._fit_budget(records, self.max_bytes - used)
+            if not records:
+                return 0
+
+            head_seq = (self._segments[0] - 1) if self._segments else 1
+
+            self._new_segment(head_seq)
+            written = self._write_records(head_seq, records)
+
+            if old_read is not None:
+                with open(self._segment_path(head_seq), "ab") as f:
+                    f.write(tail)
+                self._remove_segment(old_read)
+                self._total_bytes += len(tail)
+
+            self._read_segment = head_seq
+            self._read_offset = 0
+            self._pending += written
+            self._written_count += written
+            self._save_index()
+            return written
+
+    def pop(self) -> Optional[Tuple[uuid.UUID, bytes, float]]:
+        """Lê o próximo frame pendente, na ordem de gravação."""
+        with self._lock:
+            self._expire_old_segments()
+
+            while self._segments:
+                seq = self._read_segment
+                if seq is None or seq not in self._segments:
+                    seq = self._segments[0]
+                    self._read_segment = seq
+                    self._read_offset = 0
+
+                record, next_offset = self._read_record(seq, self._read_offset)
+                if record is not None:
+                    self._read_offset = next_offset
+                    self._pending -= 1
+                    self._read_count += 1
+                    self._save_index()
+                    return record
+
+                # Fim do segmento: descarta se não for o segmento de escrita
+                if seq == self._segments[-1]:
+                    return None
+                self._remove_segment(seq)
+                self._read_segment = self._segments[0] if self._segments else None
+                self._read_offset = 0
+
+            return None
+
+    def get_stats(self) -> dict:
+        """Retorna estatísticas do spool."""
+        return {
+            "pending": self._pending,
+            "bytes": self._total_bytes,
+            "usage": round(self.usage, 3),
+            "segments": len(self._segments),
+            "written": self._written_count,
+            "read": self._read_count,
+            "expired": self._expired_count,
+            "rejected": self._rejected_count,
+        }
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.path / f"{seq:010d}{SEGMENT_SUFFIX}"
+
+    def _segment_size(self, seq: int) -> int:
+        try:
+            return self._segment_path(seq).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _start_offset(self, seq: int) -> int:
+        return self._read_offset if seq == self._read_segment else 0
+
+    def _new_segment(self, seq: int):
+        self._segment_path(seq).touch()
+        self._segments.append(seq)
+        self._segments.sort()
+
+    def _remove_segment(self, seq: int):
+        path = self._segment_path(seq)
+        try:
+            self._total_bytes -= path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        if seq in self._segments:
+            self._segments.remove(seq)
+
+    def _write_records(
+        self, seq: int, records: List[Tuple[uuid.UUID, bytes, float]]
+    ) -> int:
+        with open(self._segment_path(seq), "ab") as f:
+            for camera_id, frame_data, timestamp in records:
+                header = RECORD_HEADER.pack(
+                    RECORD_MAGIC, camera_id.bytes, timestamp, len(frame_data)
+                )
+                f.write(header)
+                f.write(frame_data)
+                self._total_bytes += len(header) + len(frame_data)
+        return len(records)
+
+    def _read_record(
+        self, seq: int, offset: int
+    ) -> Tuple[Optional[Tuple[uuid.UUID, bytes, float]], int]:
+        try:
+            with open(self._segment_path(seq), "rb") as f:
+                f.seek(offset)
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return None, offset
+                magic, camera_bytes, timestamp, length = RECORD_HEADER.unpack(header)
+                if magic != RECORD_MAGIC:
+                    logger.warning(f"Registro inválido no segmento {seq}, ignorando resto")
+                    return None, offset
+                data = f.read(length)
+                if len(data) < length:
+                    return None, offset
+        except FileNotFoundError:
+            return None, offset
+
+        next_offset = offset + RECORD_HEADER.size + length
+        return (uuid.UUID(bytes=camera_bytes), data, timestamp), next_offset
+
+    def _scan(self, seq: int, offset: int) -> Tuple[int, int]:
+        """Percorre os cabeçalhos a partir de offset.
+
+        Returns:
+            (quantidade de registros válidos, offset final do último válido)
+        """
+        count = 0
+        path = self._segment_path(seq)
+        size = path.stat().st_size
+        with open(path, "rb") as f:
+            while True:
+                f.seek(offset)
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                magic, _, _, length = RECORD_HEADER.unpack(header)
+                end = offset + RECORD_HEADER.size + length
+                if magic != RECORD_MAGIC or end > size:
+                    break
+                count += 1
+                offset = end
+        return count, offset
+
+    def _count_records(self, seq: int, offset: int) -> int:
+        return self._scan(seq, offset)[0]
+
+    def _truncate_invalid_tail(self, seq: int):
+        _, valid_end = self._scan(seq, 0)
+        path = self._segment_path(seq)
+        if path.stat().st_size > valid_end:
+            logger.warning(f"Truncando registro parcial no segmento de spool {seq}")
+            with open(path, "r+b") as f:
+                f.truncate(valid_end)
+
+    def _fit_budget(
+        self, records: List[Tuple[uuid.UUID, bytes, float]], available: int
+    ) -> List[Tuple[uuid.UUID, bytes, float]]:
+        """Mantém os frames mais recentes de records que cabem em available."""
+        kept = 0
+        size = 0
+        for _, frame_data, _ in reversed(records):
+            record_size = RECORD_HEADER.size + len(frame_data)
+            if size + record_size > available:
+                break
+            size += record_size
+            kept += 1
+
+        dropped = len(records) - kept
+        if dropped:
+            self._expired_count += dropped
+            logger.warning(
+                f"Spool sem espaço no shutdown: {dropped} frames mais antigos "
+                f"descartados"
+            )
+        return records[dropped:]
+
+    def _make_room(self, record_size: int) -> bool:
+        """Descarta segmentos antigos até caber record_size no orçamento."""
+        self._expire_old_segments()
+
+        while self._total_bytes + record_size > self.max_bytes:
+            # Nunca descarta o segmento de escrita
+            if len(self._segments) <= 1:
+                return False
+            self._drop_oldest_segment()
+        return True
+
+    def _expire_old_segments(self):
+        if not self.retention_seconds:
+            return
+        cutoff = time.time() - self.retention_seconds
+        while self._segments:
+            seq = self._segments[0]
+            if self._segment_path(seq).stat().st_mtime >= cutoff:
+                break
+            self._drop_oldest_segment()
+
+    def _drop_oldest_segment(self):
+        seq = self._segments[0]
+        dropped = self._count_records(seq, self._start_offset(seq))
+        self._remove_segment(seq)
+        self._pending -= dropped
+        self._expired_count += dropped
+        if seq == self._read_segment:
+            self._read_segment = self._segments[0] if self._segments else None
+            self._read_offset = 0
+        logger.warning(
+            f"Segmento de spool {seq} descartado pela retenção ({dropped} frames)"
+        )
+
+    def _load_index(self):
+        index_path = self.path / INDEX_FILENAME
+        self._read_segment = self._segments[0] if self._segments else None
+        self._read_offset = 0
+        if not index_path.exists():
+            return
+        try:
+            data = json.loads(index_path.read_text())
+            if data.get("read_segment") in self._segments:
+                self._read_segment = data["read_segment"]
+                self._read_offset = int(data.get("read_offset", 0))
+        except (ValueError, OSError) as e:
+            logger.warning(f"Índice do spool inválido, relendo do início: {e}")
+
+    def _save_index(self):
+        index_path = self.path / INDEX_FILENAME
+        tmp_path = index_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {"read_segment": self._read_segment, "read_offset": self._read_offset}
+            )
+        )
+        os.replace(tmp_path, index_path)
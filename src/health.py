@@ -0,0 +1,194 @@
+"""Verificação de saúde das dependências em segundo plano."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Verificação de uma dependência: retorna bool ou um dict com "healthy"
+HealthCheck = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class ProbeResult:
+    """Último resultado da verificação de uma dependência."""
+
+    healthy: bool
+    checked_at: datetime
+    latency_ms: float
+    detail: Optional[dict] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """Converte para dicionário (com a idade do resultado)."""
+        return {
+            "healthy": self.healthy,
+            "checked_at": self.checked_at.isoformat(),
+            "age_seconds": round(
+                (datetime.utcnow() - self.checked_at).total_seconds(), 1
+            ),
+            "latency_ms": round(self.latency_ms, 1),
+            "detail": self.detail,
+            "error": self.error,
+        }
+
+
+@dataclass
+class _Probe:
+    check: HealthCheck
+    interval: float
+    timeout: float
+    result: Optional[ProbeResult] = None
+    task: Optional[asyncio.Task] = None
+    runs: int = 0
+    failures: int = 0
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class HealthProber:
+    """Atualiza a saúde de cada dependência no seu próprio intervalo.
+
+    As verificações (LLM, WhatsApp, banco) rodam em tarefas de fundo e o
+    resultado fica em cache com o horário da verificação. O endpoint de
+    health apenas lê o cache, então balanceadores consultando a cada poucos
+    segundos não geram tráfego para as dependências.
+    """
+
+    def __init__(self):
+        self._probes: Dict[str, _Probe] = {}
+        self._running = False
+
+    def register(
+        self,
+        name: str,
+        check: HealthCheck,
+        interval: float,
+        timeout: float = 10.0,
+    ):
+        """Registra uma dependência.
+
+        Args:
+            name: Nome da dependência (ex.: "llm")
+            check: Função assíncrona de verificação
+            interval: Segundos entre verificações
+            timeout: Tempo máximo de cada verificação
+        """
+        self._probes[name] = _Probe(check=check, interval=interval, timeout=timeout)
+        if self._running:
+            self._start_probe(name)
+
+    def get(self, name: str) -> Optional[ProbeResult]:
+        """Retorna o último resultado de uma dependência (None se nunca verificada)."""
+        probe = self._probes.get(name)
+        return probe.result if probe else None
+
+    def is_healthy(self, name: str) -> bool:
+        """Verifica se a última verificação da dependência foi saudável."""
+        result = self.get(name)
+        return result is not None and result.healthy
+
+    async def refresh(self, name: str) -> ProbeResult:
+        """Verifica uma dependência agora e atualiza o cache."""
+        probe = self._probes[name]
+        async with probe._lock:
+            start = time.perf_counter()
+            try:
+                value = await asyncio.wait_for(probe.check(), timeout=probe.timeout)
+                healthy, detail, error = self._interpret(value)
+            except asyncio.TimeoutError:
+                healthy, detail = False, None
+                error = f"Timeout após {probe.timeout}s"
+            except Exception as e:
+                healthy, detail, error = False, None, str(e)
+
+            probe.runs += 1
+            if not healthy:
+                probe.failures += 1
+            previous = probe.result
+            probe.result = ProbeResult(
+                healthy=healthy,
+                checked_at=datetime.utcnow(),
+                latency_ms=(time.perf_counter() - start) * 1000,
+                detail=detail,
+                error=error,
+            )
+            if previous is None or previous.healthy != healthy:
+                log = logger.info if healthy else logger.warning
+                log(
+                    f"Saúde de {name}: {'ok' if healthy else 'falhando'}"
+                    + (f" ({error})" if error else "")
+                )
+            return probe.result
+
+    async def refresh_all(self):
+        """Verifica todas as dependências em paralelo."""
+        await asyncio.gather(*(self.refresh(name) for name in self._probes))
+
+    @staticmethod
+    def _interpret(value: Any):
+        """Normaliza o retorno de uma verificação em (healthy, detail, error)."""
+        if isinstance(value, dict):
+            healthy = value.get("healthy")
+            if healthy is None:
+                healthy = value.get("status") == "healthy"
+            return bool(healthy), value, value.get("error")
+        return bool(value), None, None
+
+    async def start(self):
+        """Inicia as tarefas de fundo sem esperar a primeira verificação.
+
+        Até a primeira rodada terminar, ``get`` retorna None para a
+        dependência (ainda não verificada).
+        """
+        self._running = True
+        for name in self._probes:
+            self._start_probe(name)
+
+    def _start_probe(self, name: str):
+        probe = self._probes[name]
+        if probe.task is None or probe.task.done():
+            probe.task = asyncio.create_task(self._loop(name))
+
+    async def _loop(self, name: str):
+        probe = self._probes[name]
+        try:
+            while True:
+                try:
+                    await self.refresh(name)
+                except Exception as e:
+                    logger.error(f"Erro na verificação de saúde de {name}: {e}")
+                await asyncio.sleep(probe.interval)
+        except asyncio.CancelledError:
+            pass
+
+    async def stop(self):
+        """Cancela as tarefas de fundo."""
+        self._running = False
+        tasks = [p.task for p in self._probes.values() if p.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for probe in self._probes.values():
+            probe.task = None
+
+    def snapshot(self) -> Dict[str, Optional[dict]]:
+        """Resultados em cache de todas as dependências."""
+        return {
+            name: probe.result.to_dict() if probe.result else None
+            for name, probe in self._probes.items()
+        }
+
+    def get_stats(self) -> dict:
+        """Retorna quantas verificações e falhas cada dependência teve."""
+        return {
+            name: {
+                "interval": probe.interval,
+                "runs": probe.runs,
+                "failures": probe.failures,
+            }
+            for name, probe in self._probes.items()
+        }
@@ -21,26 +21,57 @@ import asyncio
 import logging
 import uuid
 from contextlib import asynccontextmanager
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 
 from src import __version__
 from src.config import settings
 from src.storage.database import init_db, close_db, AsyncSessionLocal
-from src.storage.repository import CameraRepository, EventRepository, AlertRepository
+from src.storage.frames import annotated_frame_store, frame_store
+from src.storage.partitions import PartitionManager
+from src.storage.persister import EventPersister
+from src.storage.repository import (
+    CameraRepository,
+    AlertRepository,
+    StatsRepository,
+)
 from src.capture.camera import CameraConfig, CameraState, CameraStatus
 from src.capture.frame_grabber import FrameGrabber
-from src.capture.queue import FrameQueue, FrameItem
+from src.capture.llm_budget import LLMBudget
+from src.capture.memory_budget import InFlightBudget
+from src.capture.object_detector import create_configured_object_detector
+from src.capture.queue import FrameQueue, FrameItem, QueuePressure
+from src.capture.spool import FrameSpool
 from src.capture.frame_annotation import FrameAnnotation
-from src.analysis import LLMVisionFactory, AnalysisResult
-from src.alerts.detector import KeywordDetector, AlertRule as DetectorAlertRule
+from src.analysis import (
+    LLMVisionFactory,
+    AnalysisResult,
+    PerceptualHashCache,
+    dhash,
+    ImagePreparer,
+    provider_metrics,
+    run_blocking,
+    shutdown_executor,
+)
+from src.alerts.detector import (
+    AlertMatch,
+    KeywordDetector,
+    AlertRule as DetectorAlertRule,
+)
 from src.alerts.factory import create_whatsapp_client
 from src.api.routes import cameras, events, alerts
-from src.api.schemas import HealthResponse, StatsResponse
+from src.api.schemas import (
+    HealthResponse,
+    StatsResponse,
+    TimeSeriesPoint,
+    TimeSeriesResponse,
+)
+from src.health import HealthProber
 
 # Configuração de logging
 logging.basicConfig(
@@ -50,51 +81,37 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def cleanup_annotated_frames():
-    """Remove annotated frames older than retention period.
+def cleanup_frames():
+    """Remove frames older than the retention period.
 
-    This function deletes annotated frame files that are older than
-    settings.annotation_retention_days to prevent disk space issues.
+    Frames are sharded by camera and hour, so whole directories are deleted
+    instead of scanning every file: annotated frames after
+    settings.annotation_retention_days and original frames after
+    settings.frame_retention_days (0 keeps them).
     """
-    if not settings.annotation_enabled:
-        return
-
+    now = datetime.utcnow()
     try:
-        annotated_path = Path(settings.annotated_frames_storage_path)
-        if not annotated_path.exists():
-            return
-
-        cutoff_time = time.time() - (settings.annotation_retention_days * 24 * 60 * 60)
-        deleted_count = 0
-        total_size_freed = 0
-
-        for file_path in annotated_path.glob("*_annotated.jpg"):
-            if file_path.is_file() and file_path.stat().st_mtime < cutoff_time:
-                file_size = file_path.stat().st_size
-                file_path.unlink()
-                deleted_count += 1
-                total_size_freed += file_size
-
-        if deleted_count > 0:
-            size_mb = total_size_freed / (1024 * 1024)
-            logger.info(
-                f"Cleaned up {deleted_count} old annotated frames, "
-                f"freed {size_mb:.2f} MB"
+        if settings.annotation_enabled:
+            annotated_frame_store.purge_before(
+                now - timedelta(days=settings.annotation_retention_days)
+            )
+        if settings.frame_retention_days > 0:
+            frame_store.purge_before(
+                now - timedelta(days=settings.frame_retention_days)
             )
-
     except Exception as e:
-        logger.error(f"Error cleaning up annotated frames: {e}")
+        logger.error(f"Error cleaning up frames: {e}")
 
 
 async def periodic_cleanup_task():
-    """Periodically cleanup old annotated frames.
+    """Periodically cleanup old frames.
 
     Runs cleanup every 24 hours.
     """
     while True:
         try:
             await asyncio.sleep(24 * 60 * 60)  # 24 hours
-            cleanup_annotated_frames()
+            await run_blocking(cleanup_frames)
         except asyncio.CancelledError:
             break
         except Exception as e:
@@ -104,9 +121,16 @@ async def periodic_cleanup_task():
 class CameraManager:
     """Gerenciador de câmeras e captura."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        memory_budget: Optional[InFlightBudget] = None,
+        llm_budget: Optional[LLMBudget] = None,
+    ):
         self._grabbers: Dict[uuid.UUID, FrameGrabber] = {}
         self._frame_queue: Optional[FrameQueue] = None
+        self._memory_budget = memory_budget
+        self._llm_budget = llm_budget
+        self._pending_puts: set[asyncio.Task] = set()
 
     def set_frame_queue(self, queue: FrameQueue):
         """Define a fila de processamento."""
@@ -120,8 +144,13 @@ class CameraManager:
         grabber = FrameGrabber(
             camera_config=config,
             on_frame=self._on_frame_captured,
+            memory_budget=self._memory_budget,
+            pressure_source=self._queue_pressure,
+            llm_budget=self._llm_budget,
         )
         self._grabbers[config.id] = grabber
+        if self._llm_budget:
+            self._llm_budget.register_camera(config.id, config.priority)
         logger.info(f"Câmera adicionada: {config.name} ({config.id})")
         return True
 
@@ -129,6 +158,8 @@ class CameraManager:
         """Remove uma câmera do gerenciador."""
         if camera_id in self._grabbers:
             del self._grabbers[camera_id]
+            if self._llm_budget:
+                self._llm_budget.unregister_camera(camera_id)
             logger.info(f"Câmera removida: {camera_id}")
 
     async def start_camera(self, camera_id: uuid.UUID):
@@ -168,6 +199,22 @@ class CameraManager:
             "frames_captured": state.frames_captured,
             "frames_sent": state.frames_sent,
             "frames_filtered": state.frames_filtered,
+            "frames_filtered_objects": state.frames_filtered_objects,
+            "frames_filtered_budget": state.frames_filtered_budget,
+            "motion_filter_rate": state.motion_filter_rate,
+            "object_filter_rate": state.object_filter_rate,
+            "stage_timings_ms": state.stage_timings,
+            "frames_skipped_budget": state.frames_skipped_budget,
+            "frames_skipped_pressure": state.frames_skipped_pressure,
+            "effective_interval": grabber.effective_interval,
+            "llm_cache_hit_rate": (
+                result_cache.get_camera_stats(camera_id)["hit_rate"]
+                if result_cache
+                else 0.0
+            ),
+            "bytes_in_flight": (
+                self._memory_budget.bytes_for(camera_id) if self._memory_budget else 0
+            ),
             "detection_rate": state.detection_rate,
             "avg_motion_score": state.avg_motion_score,
             "last_frame_at": (
@@ -219,10 +266,13 @@ class CameraManager:
                 motion_detection_enabled=camera.motion_detection_enabled,
                 motion_threshold=camera.motion_threshold,
                 motion_sensitivity=getattr(camera, "motion_sensitivity", "medium"),
+                priority=getattr(camera, "priority", None) or "normal",
             )
 
             # Atualiza o grabber com nova configuração
             updated = await grabber.update_config(config)
+            if updated and self._llm_budget:
+                self._llm_budget.register_camera(camera_id, config.priority)
             if updated:
                 logger.info(f"Configuração atualizada para câmera: {camera.name}")
                 return True
@@ -232,157 +282,483 @@ class CameraManager:
                 )
                 return False
 
+    def _queue_pressure(self) -> QueuePressure:
+        """Pressão atual da fila de processamento, consultada pelos grabbers."""
+        if not self._frame_queue:
+            return QueuePressure.NORMAL
+        return self._frame_queue.pressure
+
     def _on_frame_captured(
         self, camera_id: uuid.UUID, frame_data: bytes, timestamp: float
     ):
-        """Callback quando um frame é capturado."""
-        if self._frame_queue:
-            asyncio.create_task(self._frame_queue.put(camera_id, frame_data, timestamp))
+        """Callback quando um frame é capturado.
+
+        Os bytes do frame já foram reservados no orçamento de memória pelo
+        grabber; a fila os libera quando o frame sai dela.
+        """
+        if not self._frame_queue:
+            if self._memory_budget:
+                self._memory_budget.release(camera_id, len(frame_data))
+            if self._llm_budget:
+                self._llm_budget.refund(camera_id)
+            return
+
+        grabber = self._grabbers.get(camera_id)
+        motion_boxes = grabber.last_motion_boxes if grabber else None
+        detections = grabber.last_detections if grabber else None
+
+        task = asyncio.create_task(
+            self._enqueue(
+                camera_id,
+                frame_data,
+                timestamp,
+                motion_boxes=motion_boxes,
+                detections=detections,
+            )
+        )
+        self._pending_puts.add(task)
+        task.add_done_callback(self._pending_puts.discard)
+
+    async def _enqueue(
+        self, camera_id: uuid.UUID, frame_data: bytes, timestamp: float, **kwargs
+    ):
+        """Insere o frame na fila; se ele for descartado, devolve a chamada ao LLM."""
+        queued = await self._frame_queue.put(camera_id, frame_data, timestamp, **kwargs)
+        if not queued and self._llm_budget:
+            self._llm_budget.refund(camera_id)
+
+    @property
+    def pending_puts(self) -> int:
+        """Quantidade de inserções na fila ainda em andamento."""
+        return len(self._pending_puts)
 
 
 # Instâncias globais
-camera_manager = CameraManager()
+inflight_budget = InFlightBudget(max_bytes=settings.max_inflight_mb * 1024 * 1024)
+llm_budget = LLMBudget(
+    calls_per_hour=settings.get_llm_budget_calls_per_hour(),
+    window_seconds=settings.llm_budget_window_seconds,
+)
+camera_manager = CameraManager(memory_budget=inflight_budget, llm_budget=llm_budget)
+health_prober = HealthProber()
+event_persister = EventPersister(
+    AsyncSessionLocal,
+    max_rows=settings.event_flush_rows,
+    max_delay_ms=settings.event_flush_interval_ms,
+    max_pending=settings.event_max_pending,
+)
+partition_manager = PartitionManager(
+    AsyncSessionLocal,
+    months_ahead=settings.partition_months_ahead,
+    retention_months=settings.event_retention_months,
+    drop=settings.event_retention_drop,
+    interval_seconds=settings.partition_maintenance_interval_hours * 60 * 60,
+)
 alert_detector = KeywordDetector()
+# A análise em cascata escala frames cujas keywords estejam em regras ativas
+LLMVisionFactory.set_alert_matcher(alert_detector.match_keywords)
 whatsapp_client = None  # Inicializado no lifespan
+result_cache: Optional[PerceptualHashCache] = (
+    PerceptualHashCache(
+        max_distance=settings.llm_cache_max_distance,
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+        max_entries_per_camera=settings.llm_cache_max_entries,
+    )
+    if settings.llm_cache_enabled
+    else None
+)
+image_preparer: Optional[ImagePreparer] = (
+    ImagePreparer(
+        crop_to_motion=settings.llm_crop_to_motion,
+        crop_margin=settings.llm_crop_margin,
+        max_side=settings.llm_image_max_side or None,
+        jpeg_quality=settings.llm_image_jpeg_quality or None,
+    )
+    if settings.llm_image_prep_enabled
+    else None
+)
 frame_queue: Optional[FrameQueue] = None
 
 
-async def process_frame(item: FrameItem):
-    """Processa um frame capturado."""
-    try:
-        # Obtém o provedor LLM
-        llm = LLMVisionFactory.get_instance()
+async def _lookup_cache(item: FrameItem) -> Tuple[Optional[int], Optional[AnalysisResult]]:
+    """Busca a análise de um frame quase idêntico da mesma câmera.
 
-        # Analisa o frame
-        result: AnalysisResult = await llm.analyze_frame(item.frame_data)
+    Um acerto não chama o LLM, então a chamada reservada no orçamento volta
+    para a câmera.
+    """
+    if not result_cache:
+        return None, None
+    phash = await run_blocking(dhash, item.frame_data)
+    if phash is None:
+        return None, None
+    result = result_cache.lookup(item.camera_id, phash)
+    if result is not None:
+        llm_budget.refund(item.camera_id)
+    return phash, result
+
+
+async def _prepare_image(llm, item: FrameItem) -> Tuple[bytes, float]:
+    """Reduz/recorta o frame para o tamanho usado pelo provedor."""
+    if not image_preparer:
+        return item.frame_data, 0.0
+    prep_start = time.perf_counter()
+    prepared = await run_blocking(
+        image_preparer.prepare,
+        item.frame_data,
+        llm.image_profile,
+        item.crop_boxes,
+    )
+    return prepared.data, (time.perf_counter() - prep_start) * 1000
 
-        # Get motion data for annotation
-        grabber = camera_manager._grabbers.get(item.camera_id)
-        motion_score = None
-        motion_threshold = None
-        motion_mask = None
-        motion_status = "UNKNOWN"
 
-        if grabber:
-            motion_threshold = grabber.config.motion_threshold
-            if grabber._motion_detector:
-                motion_score = grabber.state.avg_motion_score
-                motion_mask = grabber._motion_detector.get_last_mask()
-                if motion_score is not None and motion_threshold is not None:
-                    motion_status = (
-                        "MOTION" if motion_score >= motion_threshold else "NO MOTION"
-                    )
-
-        # Generate annotated frame if enabled
-        annotated_path = None
-        if settings.annotation_enabled:
-            try:
-                annotator = FrameAnnotation(
-                    motion_score=motion_score,
-                    motion_threshold=motion_threshold,
-                    motion_mask=motion_mask,
-                    llm_keywords=result.keywords,
-                    llm_confidence=result.confidence,
-                    llm_provider=result.provider,
-                    llm_model=result.model,
-                    motion_status=motion_status,
+def _is_high_priority(item: FrameItem) -> bool:
+    """Verifica se o frame é de uma câmera de prioridade alta."""
+    grabber = camera_manager._grabbers.get(item.camera_id)
+    return grabber is not None and grabber.config.priority == "high"
+
+
+def _uses_hedge(llm, item: FrameItem) -> bool:
+    """Câmeras de prioridade alta usam hedge quando há outro backend no pool.
+
+    Sem pool (provedor único) o hedge não teria para onde duplicar a
+    requisição. Com streaming habilitado o hedge também é feito em streaming,
+    então essas câmeras mantêm os alertas antecipados.
+    """
+    return settings.llm_hedge_enabled and llm.can_hedge and _is_high_priority(item)
+
+
+def _record_analysis(
+    llm,
+    item: FrameItem,
+    result: AnalysisResult,
+    image_data: bytes,
+    prep_ms: float,
+    phash: Optional[int],
+):
+    """Registra métricas do provedor, cobra chamadas extras e guarda no cache."""
+    # Escalada na cascata e hedge fazem mais de uma chamada para o frame
+    llm_budget.charge(item.camera_id, result.llm_calls - 1)
+
+    provider_metrics.record(
+        result.provider or llm.provider_name,
+        bytes_sent=len(image_data),
+        latency_ms=result.processing_time_ms,
+        original_bytes=item.size,
+        prep_ms=prep_ms,
+        tokens_in=result.tokens_in,
+        tokens_out=result.tokens_out,
+        cached_tokens=result.cached_tokens,
+        parse_failed=result.parse_failed,
+        first_keyword_ms=result.first_keyword_ms,
+    )
+
+    if result_cache and phash is not None:
+        result_cache.store(item.camera_id, phash, result)
+
+
+# Alertas enviados durante o streaming, registrados quando o evento é salvo
+EarlyAlerts = List[Tuple[AlertMatch, "asyncio.Task[dict]"]]
+
+# Prioridades de regra que disparam antes da resposta completa do LLM
+EARLY_ALERT_PRIORITIES = {"high"}
+EARLY_ALERT_DESCRIPTION = "Alerta antecipado: a descrição completa ainda está sendo gerada."
+
+
+def _early_alert_callback(item: FrameItem, early_alerts: EarlyAlerts):
+    """Cria o callback que envia alertas de prioridade alta no streaming.
+
+    Roda assim que as keywords chegam, antes da descrição. O cooldown das
+    regras impede que a detecção normal reenvie os mesmos alertas; os envios
+    ficam em ``early_alerts`` para serem registrados junto com o evento.
+    """
+
+    async def on_keywords(keywords: List[str]):
+        if not whatsapp_client or not whatsapp_client.is_configured:
+            return
+        matches = alert_detector.detect(
+            description="",
+            keywords=keywords,
+            camera_id=item.camera_id,
+            priorities=EARLY_ALERT_PRIORITIES,
+        )
+        if not matches:
+            return
+
+        grabber = camera_manager._grabbers.get(item.camera_id)
+        camera_name = grabber.config.name if grabber else str(item.camera_id)
+        for match in matches:
+            task = asyncio.create_task(
+                whatsapp_client.send_alert(
+                    to_numbers=match.phone_numbers,
+                    camera_name=camera_name,
+                    description=EARLY_ALERT_DESCRIPTION,
+                    keywords_matched=match.keywords_matched,
+                    priority=match.priority,
                 )
+            )
+            early_alerts.append((match, task))
+        logger.info(
+            f"Alertas antecipados no streaming: câmera={item.camera_id}, "
+            f"regras={[m.rule_name for m in matches]}"
+        )
 
-                annotated_bytes = annotator.annotate_frame(item.frame_data)
-                if annotated_bytes:
-                    storage_path = Path(settings.annotated_frames_storage_path)
-                    storage_path.mkdir(parents=True, exist_ok=True)
-                    timestamp_ms = int(item.timestamp * 1000)
-                    annotated_filename = (
-                        f"{item.camera_id}_{timestamp_ms}_annotated.jpg"
-                    )
-                    annotated_path = storage_path / annotated_filename
-
-                    with open(annotated_path, "wb") as f:
-                        f.write(annotated_bytes)
-                    logger.info(
-                        f"Annotated frame saved: {annotated_path} ({len(annotated_bytes)} bytes)"
-                    )
-            except Exception as e:
-                logger.warning(f"Failed to generate annotated frame: {e}")
+    return on_keywords
 
-        # Salva o frame original
-        storage_path = Path(settings.frames_storage_path)
-        storage_path.mkdir(parents=True, exist_ok=True)
-        timestamp_ms = int(item.timestamp * 1000)
-        frame_filename = f"{item.camera_id}_{timestamp_ms}.jpg"
-        frame_path = storage_path / frame_filename
 
-        with open(frame_path, "wb") as f:
-            f.write(item.frame_data)
+async def _analyze_item(
+    item: FrameItem, early_alerts: Optional[EarlyAlerts] = None
+) -> AnalysisResult:
+    """Analisa um frame individualmente (cache, preparação e LLM).
 
-        # Salva o evento no banco de dados
-        async with AsyncSessionLocal() as session:
-            event_repo = EventRepository(session)
-            event = await event_repo.create(
-                camera_id=item.camera_id,
-                description=result.description,
-                keywords=result.keywords,
-                frame_path=str(frame_path),
-                annotated_frame_path=str(annotated_path) if annotated_path else None,
-                confidence=result.confidence,
+    Com streaming habilitado, alertas de prioridade alta são enviados assim
+    que as keywords chegam e acumulados em ``early_alerts``.
+    """
+    # Reutiliza a análise de um frame quase idêntico da mesma câmera
+    phash, result = await _lookup_cache(item)
+    if result is not None:
+        return result
+
+    # Obtém o provedor LLM
+    llm = LLMVisionFactory.get_instance()
+    image_data, prep_ms = await _prepare_image(llm, item)
+
+    on_keywords = None
+    if settings.llm_streaming_enabled and early_alerts is not None:
+        on_keywords = _early_alert_callback(item, early_alerts)
+
+    # Analisa o frame (câmeras de prioridade alta usam hedge no pool)
+    try:
+        if _uses_hedge(llm, item):
+            result = await llm.analyze_frame_hedged(image_data, on_keywords=on_keywords)
+        elif on_keywords:
+            result = await llm.analyze_frame_stream(image_data, on_keywords=on_keywords)
+        else:
+            result = await llm.analyze_frame(image_data)
+    except Exception:
+        provider_metrics.record_error(llm.provider_name)
+        raise
+
+    _record_analysis(llm, item, result, image_data, prep_ms, phash)
+    return result
+
+
+async def _log_alert(
+    event_id: uuid.UUID,
+    camera_id: uuid.UUID,
+    match: AlertMatch,
+    send_result: dict,
+):
+    """Registra o envio de um alerta."""
+    status = "sent" if send_result["success"] else "failed"
+    error_msg = None
+    if send_result["failed"]:
+        error_msg = str(send_result["failed"])
+
+    await event_persister.add_alert_log(
+        event_id=event_id,
+        alert_rule_id=match.rule_id,
+        keywords_matched=match.keywords_matched,
+        sent_to=match.phone_numbers,
+        status=status,
+        error_message=error_msg,
+        camera_id=camera_id,
+    )
+
+
+async def _camera_name(camera_id: uuid.UUID) -> str:
+    """Nome da câmera para os alertas (da configuração em memória, se houver)."""
+    grabber = camera_manager._grabbers.get(camera_id)
+    if grabber:
+        return grabber.config.name
+    async with AsyncSessionLocal() as session:
+        camera = await CameraRepository(session).get_by_id(camera_id)
+    return camera.name if camera else str(camera_id)
+
+
+async def _store_result(
+    item: FrameItem,
+    result: AnalysisResult,
+    early_alerts: Optional[EarlyAlerts] = None,
+):
+    """Salva o frame e o evento e dispara os alertas de uma análise."""
+    early_alerts = early_alerts or []
+    # Get motion data for annotation
+    grabber = camera_manager._grabbers.get(item.camera_id)
+    motion_score = None
+    motion_threshold = None
+    motion_mask = None
+    motion_status = "UNKNOWN"
+
+    if grabber:
+        motion_threshold = grabber.config.motion_threshold
+        if grabber._motion_detector:
+            motion_score = grabber.state.avg_motion_score
+            motion_mask = grabber._motion_detector.get_last_mask()
+            if motion_score is not None and motion_threshold is not None:
+                motion_status = (
+                    "MOTION" if motion_score >= motion_threshold else "NO MOTION"
+                )
+
+    # Generate annotated frame if enabled
+    annotated_path = None
+    if settings.annotation_enabled:
+        try:
+            annotator = FrameAnnotation(
+                motion_score=motion_score,
+                motion_threshold=motion_threshold,
+                motion_mask=motion_mask,
+                llm_keywords=result.keywords,
+                llm_confidence=result.confidence,
                 llm_provider=result.provider,
                 llm_model=result.model,
-                processing_time_ms=result.processing_time_ms,
+                motion_status=motion_status,
+                detections=item.detections,
             )
-            await session.commit()
 
-            # Verifica alertas
-            matches = alert_detector.detect(
+            annotated_bytes = annotator.annotate_frame(item.frame_data)
+            if annotated_bytes:
+                annotated_path = annotated_frame_store.save(
+                    item.camera_id, annotated_bytes, item.timestamp
+                )
+                logger.info(
+                    f"Annotated frame saved: {annotated_path} ({len(annotated_bytes)} bytes)"
+                )
+        except Exception as e:
+            logger.warning(f"Failed to generate annotated frame: {e}")
+
+    # Salva o frame original (chave relativa à raiz do frame store)
+    frame_path = frame_store.save(item.camera_id, item.frame_data, item.timestamp)
+
+    # Enfileira o evento para gravação em lote (ID gerado no cliente)
+    event_id = await event_persister.add_event(
+        camera_id=item.camera_id,
+        description=result.description,
+        keywords=result.keywords,
+        frame_path=frame_path,
+        annotated_frame_path=annotated_path,
+        confidence=result.confidence,
+        llm_provider=result.provider,
+        llm_model=result.model,
+        processing_time_ms=result.processing_time_ms,
+        triage_result=result.triage.to_dict() if result.triage else None,
+        escalated=result.escalated,
+    )
+
+    # Verifica alertas
+    matches = alert_detector.detect(
+        description=result.description,
+        keywords=result.keywords,
+        camera_id=item.camera_id,
+    )
+
+    # Envia alertas via WhatsApp
+    has_alerts = bool(matches or early_alerts)
+    if has_alerts and whatsapp_client and whatsapp_client.is_configured:
+        camera_name = await _camera_name(item.camera_id)
+
+        # Alertas já enviados durante o streaming
+        for match, task in early_alerts:
+            try:
+                send_result = await task
+            except Exception as e:
+                send_result = {"success": False, "failed": [str(e)]}
+            await _log_alert(event_id, item.camera_id, match, send_result)
+
+        for match in matches:
+            # Envia alerta
+            send_result = await whatsapp_client.send_alert(
+                to_numbers=match.phone_numbers,
+                camera_name=camera_name,
                 description=result.description,
-                keywords=result.keywords,
-                camera_id=item.camera_id,
+                keywords_matched=match.keywords_matched,
+                priority=match.priority,
             )
 
-            # Envia alertas via WhatsApp
-            if matches and whatsapp_client and whatsapp_client.is_configured:
-                alert_repo = AlertRepository(session)
-                camera_repo = CameraRepository(session)
-                camera = await camera_repo.get_by_id(item.camera_id)
-                camera_name = camera.name if camera else str(item.camera_id)
-
-                for match in matches:
-                    # Envia alerta
-                    send_result = await whatsapp_client.send_alert(
-                        to_numbers=match.phone_numbers,
-                        camera_name=camera_name,
-                        description=result.description,
-                        keywords_matched=match.keywords_matched,
-                        priority=match.priority,
-                    )
-
-                    # Registra log
-                    status = "sent" if send_result["success"] else "failed"
-                    error_msg = None
-                    if send_result["failed"]:
-                        error_msg = str(send_result["failed"])
-
-                    await alert_repo.create_log(
-                        event_id=event.id,
-                        alert_rule_id=match.rule_id,
-                        keywords_matched=match.keywords_matched,
-                        sent_to=match.phone_numbers,
-                        status=status,
-                        error_message=error_msg,
-                    )
-
-                await session.commit()
+            # Registra log
+            await _log_alert(event_id, item.camera_id, match, send_result)
+
+    logger.info(
+        f"Frame processado: câmera={item.camera_id}, "
+        f"keywords={result.keywords}, "
+        f"cache={'hit' if result.cached else 'miss'}, "
+        f"alertas={len(matches) + len(early_alerts)}"
+    )
 
-        logger.info(
-            f"Frame processado: câmera={item.camera_id}, "
-            f"keywords={result.keywords}, "
-            f"alertas={len(matches)}"
-        )
 
+async def process_frame(item: FrameItem):
+    """Processa um frame capturado."""
+    early_alerts: EarlyAlerts = []
+    try:
+        result = await _analyze_item(item, early_alerts)
+        await _store_result(item, result, early_alerts)
     except Exception as e:
         logger.error(f"Erro ao processar frame: {e}")
 
 
+async def process_batch(items: List[FrameItem]):
+    """Processa um lote de frames com uma única análise no LLM.
+
+    Frames com resultado em cache não vão ao LLM; frames de câmeras de
+    prioridade alta seguem a análise individual (com hedge ou streaming).
+    Os demais são enviados juntos em ``analyze_batch`` e cada resultado gera
+    seu evento.
+    """
+    results: Dict[int, AnalysisResult] = {}
+    early_alerts: Dict[int, EarlyAlerts] = {}
+    hashes: Dict[int, Optional[int]] = {}
+    batch: List[int] = []
+    individual: List[int] = []
+
+    try:
+        for index, item in enumerate(items):
+            hashes[index], cached = await _lookup_cache(item)
+            if cached is not None:
+                results[index] = cached
+            elif _is_high_priority(item):
+                individual.append(index)
+            else:
+                batch.append(index)
+
+        if len(batch) == 1:
+            individual.extend(batch)
+            batch = []
+
+        if batch:
+            llm = LLMVisionFactory.get_instance()
+            prepared = [await _prepare_image(llm, items[i]) for i in batch]
+            try:
+                batch_results = await llm.analyze_batch([data for data, _ in prepared])
+            except Exception:
+                provider_metrics.record_error(llm.provider_name)
+                raise
+
+            for index, (image_data, prep_ms), result in zip(
+                batch, prepared, batch_results
+            ):
+                _record_analysis(
+                    llm, items[index], result, image_data, prep_ms, hashes[index]
+                )
+                results[index] = result
+    except Exception as e:
+        logger.error(f"Erro ao analisar lote de {len(items)} frames: {e}")
+
+    for index in individual:
+        try:
+            early_alerts[index] = []
+            results[index] = await _analyze_item(items[index], early_alerts[index])
+        except Exception as e:
+            logger.error(f"Erro ao processar frame: {e}")
+
+    # Um frame com erro não impede que os demais gerem eventos
+    for index, item in enumerate(items):
+        if index not in results:
+            continue
+        try:
+            await _store_result(item, results[index], early_alerts.get(index))
+        except Exception as e:
+            logger.error(f"Erro ao processar frame: {e}")
+
+
 async def load_cameras_from_db():
     """Carrega câmeras do banco de dados."""
     async with AsyncSessionLocal() as session:
@@ -400,6 +776,7 @@ async def load_cameras_from_db():
                 motion_detection_enabled=cam.motion_detection_enabled,
                 motion_threshold=cam.motion_threshold,
                 motion_sensitivity=getattr(cam, "motion_sensitivity", "medium"),
+                priority=getattr(cam, "priority", None) or "normal",
             )
             await camera_manager.add_camera(config)
 
@@ -425,6 +802,54 @@ async def load_alert_rules_from_db():
             )
 
 
+async def check_llm_health() -> dict:
+    """Verifica o provedor LLM em uso, com cada backend do pool."""
+    return await LLMVisionFactory.check_instance_health()
+
+
+async def check_whatsapp_health() -> dict:
+    """Verifica o cliente WhatsApp (API ou Web)."""
+    if not whatsapp_client:
+        return {"healthy": False, "error": "Cliente WhatsApp não inicializado"}
+    if hasattr(whatsapp_client, "health_check"):
+        whatsapp_check = await whatsapp_client.health_check()
+        # Web client returns dict, API client returns bool
+        if isinstance(whatsapp_check, dict):
+            return {
+                **whatsapp_check,
+                "healthy": whatsapp_check.get("status") == "healthy",
+            }
+        return {"healthy": bool(whatsapp_check)}
+    return {"healthy": bool(getattr(whatsapp_client, "is_configured", False))}
+
+
+async def check_database_health() -> bool:
+    """Verifica a conexão com o banco de dados."""
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("SELECT 1"))
+    return True
+
+
+def register_health_checks():
+    """Registra as dependências verificadas em segundo plano."""
+    timeout = settings.health_check_timeout_seconds
+    health_prober.register(
+        "llm", check_llm_health, settings.health_llm_interval_seconds, timeout
+    )
+    health_prober.register(
+        "whatsapp",
+        check_whatsapp_health,
+        settings.health_whatsapp_interval_seconds,
+        timeout,
+    )
+    health_prober.register(
+        "database",
+        check_database_health,
+        settings.health_database_interval_seconds,
+        timeout,
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gerencia o ciclo de vida da aplicação."""
@@ -442,6 +867,15 @@ async def lifespan(app: FastAPI):
     # Cria diretório de frames anotados
     Path(settings.annotated_frames_storage_path).mkdir(parents=True, exist_ok=True)
 
+    # Valida o detector de objetos antes de carregar as câmeras: modelo ausente
+    # ou classe não suportada pelo backend impedem a inicialização
+    detector = create_configured_object_detector()
+    if detector:
+        logger.info(
+            f"Detector de objetos {detector.name} habilitado "
+            f"(classes: {sorted(detector.classes)})"
+        )
+
     # Inicializa cliente WhatsApp
     try:
         whatsapp_client = await create_whatsapp_client()
@@ -458,8 +892,32 @@ async def lifespan(app: FastAPI):
         logger.warning(f"Não foi possível inicializar cliente WhatsApp: {e}")
         whatsapp_client = None
 
+    # Inicializa spool em disco (frames pendentes de execuções anteriores
+    # são drenados pelos workers)
+    frame_spool = None
+    if settings.frame_spool_enabled:
+        frame_spool = FrameSpool(
+            path=settings.frame_spool_path,
+            max_bytes=settings.frame_spool_max_mb * 1024 * 1024,
+            segment_bytes=settings.frame_spool_segment_mb * 1024 * 1024,
+            retention_seconds=settings.frame_spool_retention_hours * 60 * 60,
+        )
+        frame_spool.open()
+        logger.info(
+            f"Spool de frames habilitado em {settings.frame_spool_path} "
+            f"({frame_spool.pending} frames pendentes)"
+        )
+
     # Inicializa fila de processamento
-    frame_queue = FrameQueue(processor=process_frame, num_workers=2)
+    frame_queue = FrameQueue(
+        processor=process_frame,
+        num_workers=2,
+        spool=frame_spool,
+        budget=inflight_budget,
+        batch_processor=process_batch if settings.llm_batch_size > 1 else None,
+        batch_size=settings.llm_batch_size,
+        batch_wait=settings.llm_batch_wait_ms / 1000,
+    )
     frame_queue.clear()
     camera_manager.set_frame_queue(frame_queue)
 
@@ -473,12 +931,23 @@ async def lifespan(app: FastAPI):
     # Inicia câmeras habilitadas
     await camera_manager.start_all()
 
-    # Cleanup old annotated frames on startup
-    cleanup_annotated_frames()
+    # Cleanup old frames on startup
+    await run_blocking(cleanup_frames)
 
     # Start periodic cleanup task
     cleanup_task = asyncio.create_task(periodic_cleanup_task())
 
+    # Verificação de saúde em segundo plano (o endpoint lê o cache); a
+    # primeira rodada não atrasa o startup
+    register_health_checks()
+    await health_prober.start()
+
+    # Partições mensais futuras e retenção por partição
+    await partition_manager.start()
+
+    # Gravação em lote de eventos e logs de alerta
+    await event_persister.start()
+
     logger.info("CamOpsAI iniciado com sucesso")
 
     yield
@@ -486,6 +955,8 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Encerrando CamOpsAI...")
 
+    await health_prober.stop()
+
     # Cancel periodic cleanup task
     cleanup_task.cancel()
     try:
@@ -496,6 +967,22 @@ async def lifespan(app: FastAPI):
     await camera_manager.stop_all()
     await frame_queue.stop_workers()
 
+    # Grava os eventos que ainda estão no buffer
+    await event_persister.stop()
+    await partition_manager.stop()
+
+    # Preserva frames pendentes no spool em vez de descartá-los
+    if frame_spool:
+        try:
+            await frame_queue.flush_to_spool()
+        except Exception as e:
+            logger.error(f"Erro ao gravar frames pendentes no spool: {e}")
+        frame_queue.close()
+        frame_spool.close()
+
+    # Encerra o pool de threads da análise
+    shutdown_executor(wait=False)
+
     if whatsapp_client:
         try:
             if hasattr(whatsapp_client, "close"):
@@ -533,61 +1020,67 @@ app.include_router(alerts.router, prefix="/api/v1")
 
 @app.get("/api/v1/health", response_model=HealthResponse)
 async def health_check():
-    """Verifica a saúde do sistema."""
-    # Verifica LLM
-    llm_health = await LLMVisionFactory.check_provider_health()
+    """Verifica a saúde do sistema.
 
-    # Verifica WhatsApp
-    whatsapp_health = False
-    if whatsapp_client:
-        try:
-            if hasattr(whatsapp_client, "health_check"):
-                whatsapp_check = await whatsapp_client.health_check()
-                # Web client returns dict, API client returns bool
-                if isinstance(whatsapp_check, dict):
-                    whatsapp_health = whatsapp_check.get("status") == "healthy"
-                else:
-                    whatsapp_health = whatsapp_check
-            elif hasattr(whatsapp_client, "is_configured"):
-                whatsapp_health = whatsapp_client.is_configured
-        except Exception as e:
-            logger.error(f"Erro ao verificar saúde do WhatsApp: {e}")
-            whatsapp_health = False
+    Lê os resultados em cache do ``health_prober``; nenhuma dependência é
+    consultada durante a requisição.
+    """
+    llm_check = health_prober.get("llm")
+    llm_health = llm_check.detail if llm_check else None
+
+    # Estado do rate limiter/circuit breaker do provedor em uso
+    llm_resilience = LLMVisionFactory.get_resilience_stats()
+    status = "healthy"
+    if llm_resilience and llm_resilience.get("degraded"):
+        status = "degraded"
+    if health_prober.get("database") and not health_prober.is_healthy("database"):
+        status = "unhealthy"
 
     return HealthResponse(
-        status="healthy",
-        database=True,  # Se chegou aqui, o banco está OK
+        status=status,
+        database=health_prober.get("database") is None
+        or health_prober.is_healthy("database"),
         llm_provider=llm_health,
-        whatsapp=whatsapp_health,
+        llm_resilience=llm_resilience,
+        whatsapp=health_prober.is_healthy("whatsapp"),
+        checks=health_prober.snapshot(),
         version=__version__,
     )
 
 
 @app.get("/api/v1/stats", response_model=StatsResponse)
 async def get_stats():
-    """Retorna estatísticas do sistema."""
+    """Retorna estatísticas do sistema.
+
+    Totais de eventos e alertas vêm dos agregados por hora, sem ler os
+    eventos. "Hoje" é o dia corrente em UTC, como os timestamps gravados.
+    """
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     async with AsyncSessionLocal() as session:
         camera_repo = CameraRepository(session)
-        cameras_all = await camera_repo.get_all()
-        cameras_active = await camera_repo.get_all(enabled_only=True)
+        cameras_total = await camera_repo.count()
+        cameras_active = await camera_repo.count(enabled_only=True)
 
-        event_repo = EventRepository(session)
-        events_all = await event_repo.get_timeline(limit=1000)
-
-        alert_repo = AlertRepository(session)
-        alerts_all = await alert_repo.get_logs(limit=1000)
+        stats_repo = StatsRepository(session)
+        totals = await stats_repo.totals()
+        totals_today = await stats_repo.totals(start_date=today)
 
     queue_stats = frame_queue.get_stats() if frame_queue else {}
+    cache_stats = result_cache.get_stats() if result_cache else {}
 
     # Aggregate motion detection stats from all cameras
     motion_total = 0
     motion_sent = 0
     motion_filtered = 0
+    objects_filtered = 0
+    budget_filtered = 0
     for grabber in camera_manager._grabbers.values():
         state = grabber.state
         motion_total += state.frames_captured
         motion_sent += state.frames_sent
         motion_filtered += state.frames_filtered
+        objects_filtered += state.frames_filtered_objects
+        budget_filtered += state.frames_filtered_budget
 
     motion_rate = (motion_sent / motion_total * 100) if motion_total > 0 else 0.0
 
@@ -603,21 +1096,69 @@ async def get_stats():
     decoder_avg_rate = sum(decoder_rates) / len(decoder_rates) if decoder_rates else 0.0
 
     return StatsResponse(
-        cameras_total=len(cameras_all),
-        cameras_active=len(cameras_active),
-        events_total=len(events_all),
-        events_today=0,  # TODO: implementar filtro por data
-        alerts_sent_total=len(alerts_all),
-        alerts_sent_today=0,  # TODO: implementar filtro por data
+        cameras_total=cameras_total,
+        cameras_active=cameras_active,
+        events_total=totals["events"],
+        events_today=totals_today["events"],
+        alerts_sent_total=totals["alerts_sent"],
+        alerts_sent_today=totals_today["alerts_sent"],
+        alerts_failed_total=totals["alerts_failed"],
+        avg_confidence=totals["avg_confidence"],
+        avg_processing_time_ms=totals["avg_processing_time_ms"],
         queue_size=queue_stats.get("queue_size", 0),
         queue_processed=queue_stats.get("processed", 0),
         queue_dropped=queue_stats.get("dropped", 0),
+        queue_spooled=queue_stats.get("spooled", 0),
+        spool_pending=frame_queue.spool_pending if frame_queue else 0,
+        queue_pressure=queue_stats.get("pressure", "normal"),
+        bytes_in_flight=inflight_budget.used_bytes,
+        max_bytes_in_flight=inflight_budget.max_bytes,
         motion_frames_total=motion_total,
         motion_frames_sent=motion_sent,
         motion_frames_filtered=motion_filtered,
         motion_detection_rate=motion_rate,
+        object_frames_filtered=objects_filtered,
+        budget_frames_filtered=budget_filtered,
+        llm_budget=llm_budget.get_stats(),
+        event_persister=event_persister.get_stats(),
+        partitions=partition_manager.get_stats(),
+        frame_store=frame_store.get_stats(),
         decoder_total_errors=decoder_total_errors,
         decoder_avg_error_rate=decoder_avg_rate,
+        llm_cache_hits=cache_stats.get("hits", 0),
+        llm_cache_misses=cache_stats.get("misses", 0),
+        llm_cache_hit_rate=cache_stats.get("hit_rate", 0.0),
+        llm_providers=provider_metrics.get_stats(),
+        llm_backend=LLMVisionFactory.get_resilience_stats(),
+    )
+
+
+@app.get("/api/v1/stats/timeseries", response_model=TimeSeriesResponse)
+async def get_stats_timeseries(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    camera_id: Optional[uuid.UUID] = None,
+    bucket: str = Query("hour", pattern="^(hour|day|week|month)$"),
+):
+    """Série temporal de eventos, alertas, confiança e latência do LLM.
+
+    Lida dos agregados por câmera e hora; sem ``start_date``, últimas 24h.
+    """
+    start_date = start_date or datetime.utcnow() - timedelta(hours=24)
+    async with AsyncSessionLocal() as session:
+        points = await StatsRepository(session).timeseries(
+            start_date=start_date,
+            end_date=end_date,
+            camera_id=camera_id,
+            bucket=bucket,
+        )
+
+    return TimeSeriesResponse(
+        points=[TimeSeriesPoint(**point) for point in points],
+        bucket=bucket,
+        start_date=start_date,
+        end_date=end_date,
+        camera_id=camera_id,
     )
 
 
@@ -1,6 +1,14 @@
 from .database import get_db, engine, AsyncSessionLocal
-from .models import Camera, Event, AlertRule, AlertLog
-from .repository import CameraRepository, EventRepository, AlertRepository
+from .models import Camera, Event, AlertRule, AlertLog, EventRollup
+from .repository import (
+    CameraRepository,
+    EventRepository,
+    AlertRepository,
+    StatsRepository,
+)
+from .persister import EventPersister
+from .partitions import PartitionManager
+from .frames import FrameStore, frame_store, annotated_frame_store
 
 __all__ = [
     "get_db",
@@ -10,7 +18,14 @@ __all__ = [
     "Event",
     "AlertRule",
     "AlertLog",
+    "EventRollup",
     "CameraRepository",
     "EventRepository",
     "AlertRepository",
+    "StatsRepository",
+    "EventPersister",
+    "PartitionManager",
+    "FrameStore",
+    "frame_store",
+    "annotated_frame_store",
 ]
@@ -1,10 +1,27 @@
 """Configuração da conexão com o banco de dados PostgreSQL."""
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import logging
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
 
 from src.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Diretório das migrações Alembic (raiz do repositório)
+MIGRATIONS_PATH = Path(__file__).resolve().parents[2] / "alembic"
+# Esquema que create_all gerava antes das migrações
+BASELINE_REVISION = "0001"
 
 engine = create_async_engine(
     settings.database_url,
@@ -40,10 +57,40 @@ async def get_db():
             await session.close()
 
 
+def alembic_config(connection=None) -> Config:
+    """Configuração do Alembic apontando para o banco da aplicação."""
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_PATH))
+    # "%" é interpolação do configparser (senhas codificadas na URL)
+    config.set_main_option("sqlalchemy.url", settings.database_url.replace("%", "%%"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def _upgrade(connection, revision: str):
+    tables = set(inspect(connection).get_table_names())
+    config = alembic_config(connection)
+    if "cameras" in tables and "alembic_version" not in tables:
+        logger.info(
+            f"Banco criado sem migrações, marcando como revisão {BASELINE_REVISION}"
+        )
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, revision)
+
+
+async def run_migrations(bind: AsyncEngine = engine, revision: str = "head"):
+    """Aplica as migrações pendentes (equivale a ``alembic upgrade head``)."""
+    async with bind.begin() as conn:
+        await conn.run_sync(_upgrade, revision)
+
+
 async def init_db():
-    """Inicializa o banco de dados criando todas as tabelas."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """Inicializa o banco de dados aplicando as migrações pendentes."""
+    if settings.database_auto_migrate:
+        await run_migrations()
+    else:
+        logger.info("Migrações automáticas desativadas (use: alembic upgrade head)")
 
 
 async def close_db():
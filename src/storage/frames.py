@@ -0,0 +1,186 @@
+"""Armazenamento dos frames em disco, particionado por câmera e hora."""
+
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Níveis de data abaixo do diretório da câmera: YYYY/MM/DD/HH
+SHARD_LEVELS = ("year", "month", "day", "hour")
+SHARD_DIGITS = (4, 2, 2, 2)
+
+
+def _shard_end(parts: List[int]) -> datetime:
+    """Fim (exclusivo) do período de um diretório YYYY[/MM[/DD[/HH]]]."""
+    year = parts[0]
+    if len(parts) == 1:
+        return datetime(year + 1, 1, 1)
+    month = parts[1]
+    if len(parts) == 2:
+        return datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    start = datetime(year, month, *parts[2:])
+    return start + (timedelta(days=1) if len(parts) == 3 else timedelta(hours=1))
+
+
+class FrameStore:
+    """Grava frames em ``<raiz>/<câmera>/YYYY/MM/DD/HH/<nome>.jpg``.
+
+    O caminho gravado nos eventos é a chave relativa à raiz, resolvida de
+    volta por ``resolve``; caminhos antigos (absolutos ou do layout plano
+    ``{camera_id}_{ms}.jpg``) continuam sendo servidos.
+
+    Com ``dedup=True`` o nome do arquivo é o hash do conteúdo, então frames
+    idênticos (cena parada) da mesma câmera na mesma hora são gravados uma
+    vez só. A deduplicação fica restrita ao diretório da hora para que a
+    retenção continue apagando diretórios inteiros sem quebrar referências
+    de outras horas.
+
+    A retenção (``purge_before``) remove os diretórios de hora, dia, mês ou
+    ano que terminaram antes do corte, sem listar arquivo por arquivo.
+    """
+
+    def __init__(self, root: str, dedup: bool = False, suffix: str = ""):
+        self.root = Path(root)
+        self.dedup = dedup
+        self.suffix = suffix
+
+        self._writes = 0
+        self._dedup_hits = 0
+        self._bytes_written = 0
+        self._bytes_saved = 0
+        self._purged = 0
+
+    def shard(self, camera_id: uuid.UUID, when: datetime) -> str:
+        """Diretório relativo de uma câmera numa hora."""
+        return f"{camera_id}/{when:%Y/%m/%d/%H}"
+
+    def save(self, camera_id: uuid.UUID, data: bytes, timestamp: float) -> str:
+        """Grava um frame e retorna a chave a guardar no evento.
+
+        Args:
+            camera_id: Câmera de origem
+            data: JPEG do frame
+            timestamp: Momento da captura (epoch, usado no diretório e no nome)
+        """
+        when = datetime.utcfromtimestamp(timestamp)
+        if self.dedup:
+            name = hashlib.blake2b(data, digest_size=16).hexdigest()
+        else:
+            name = str(int(timestamp * 1000))
+        key = f"{self.shard(camera_id, when)}/{name}{self.suffix}.jpg"
+        path = self.root / key
+
+        if self.dedup and path.exists():
+            self._dedup_hits += 1
+            self._bytes_saved += len(data)
+            return key
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Grava num temporário e renomeia: leitores nunca veem arquivo parcial
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._writes += 1
+        self._bytes_written += len(data)
+        return key
+
+    def resolve(self, key: Optional[str]) -> Optional[Path]:
+        """Caminho do arquivo de uma chave (None se não existir).
+
+        Eventos gravados antes do store guardavam o caminho completo do
+        frame: absoluto ou ``<frames_storage_path>/<arquivo>``. Caminhos
+        relativos só são aceitos nesse formato, para que uma chave não leia
+        arquivos fora da raiz a partir do diretório de trabalho.
+        """
+        if not key:
+            return None
+        path = Path(key)
+        if path.is_absolute():
+            return path if path.is_file() else None
+
+        root = self.root.resolve()
+        stored = (root / path).resolve()
+        if stored.is_relative_to(root) and stored.is_file():
+            return stored
+        if path.parent.resolve() == root and path.is_file():
+            return path.resolve()
+        return None
+
+    def purge_before(self, cutoff: datetime) -> int:
+        """Remove os diretórios de períodos que terminaram antes de ``cutoff``.
+
+        Arquivos soltos na raiz (layout plano antigo) mais velhos que o corte
+        também são removidos.
+
+        Returns:
+            Quantidade de diretórios e arquivos removidos
+        """
+        if not self.root.exists():
+            return 0
+
+        removed = 0
+        cutoff_epoch = cutoff.replace(tzinfo=timezone.utc).timestamp()
+        for entry in self.root.iterdir():
+            if entry.is_dir():
+                removed += self._purge_shards(entry, [], cutoff)
+            elif entry.suffix == ".jpg" and entry.stat().st_mtime < cutoff_epoch:
+                entry.unlink()
+                removed += 1
+
+        if removed:
+            logger.info(
+                f"Retenção de frames em {self.root}: {removed} diretórios/arquivos "
+                f"anteriores a {cutoff:%Y-%m-%d %H:00} removidos"
+            )
+        self._purged += removed
+        return removed
+
+    def _purge_shards(self, directory: Path, parts: List[int], cutoff: datetime) -> int:
+        """Desce YYYY/MM/DD/HH removendo os períodos inteiros antes do corte."""
+        level = len(parts)
+        removed = 0
+        for entry in directory.iterdir():
+            name = entry.name
+            if not entry.is_dir() or not name.isdigit():
+                continue
+            if len(name) != SHARD_DIGITS[level]:
+                continue
+            shard = parts + [int(name)]
+            try:
+                end = _shard_end(shard)
+            except ValueError:
+                continue
+            if end <= cutoff:
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+            elif level + 1 < len(SHARD_LEVELS):
+                removed += self._purge_shards(entry, shard, cutoff)
+        return removed
+
+    def get_stats(self) -> dict:
+        """Retorna gravações, deduplicações e diretórios removidos."""
+        return {
+            "root": str(self.root),
+            "dedup": self.dedup,
+            "writes": self._writes,
+            "dedup_hits": self._dedup_hits,
+            "bytes_written": self._bytes_written,
+            "bytes_saved": self._bytes_saved,
+            "purged": self._purged,
+        }
+
+
+# Frames originais e anotados dos eventos
+frame_store = FrameStore(settings.frames_storage_path, dedup=settings.frame_store_dedup)
+annotated_frame_store = FrameStore(
+    settings.annotated_frames_storage_path, suffix="_annotated"
+)
@@ -4,12 +4,27 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, String, Text, Integer
-from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Computed,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    String,
+    Text,
+    Integer,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
 
+# Configuração de busca textual do PostgreSQL usada nas descrições
+TEXT_SEARCH_CONFIG = "portuguese"
+
 
 class Camera(Base):
     """Modelo para câmeras IP."""
@@ -27,6 +42,7 @@ class Camera(Base):
     motion_detection_enabled: Mapped[bool] = mapped_column(Boolean, default=True)
     motion_threshold: Mapped[float] = mapped_column(Float, default=10.0)
     motion_sensitivity: Mapped[str] = mapped_column(String(20), default="medium")
+    priority: Mapped[str] = mapped_column(String(10), default="normal")
     decoder_error_count: Mapped[int] = mapped_column(Integer, default=0)
     decoder_error_rate: Mapped[float] = mapped_column(Float, default=0.0)
     last_decoder_error: Mapped[Optional[str]] = mapped_column(
@@ -47,9 +63,14 @@ class Camera(Base):
 
 
 class Event(Base):
-    """Modelo para eventos detectados."""
+    """Modelo para eventos detectados.
+
+    Particionada por mês em ``timestamp`` (ver ``partitions.py``); por isso a
+    chave primária é (id, timestamp).
+    """
 
     __tablename__ = "events"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -57,7 +78,9 @@ class Event(Base):
     camera_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("cameras.id"), nullable=False
     )
-    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    timestamp: Mapped[datetime] = mapped_column(
+        DateTime, primary_key=True, default=datetime.utcnow
+    )
     description: Mapped[str] = mapped_column(Text, nullable=False)
     keywords: Mapped[Optional[List[str]]] = mapped_column(ARRAY(String), nullable=True)
     frame_path: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
@@ -68,11 +91,27 @@ class Event(Base):
     llm_provider: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     llm_model: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     processing_time_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Análise em cascata: resultado do modelo de triagem quando escalado
+    triage_result: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    escalated: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Busca textual: gerada pelo banco a partir da descrição (não carregada por padrão)
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(description, ''))",
+            persisted=True,
+        ),
+        nullable=True,
+        deferred=True,
+    )
 
     # Relacionamentos
     camera: Mapped["Camera"] = relationship("Camera", back_populates="events")
     alert_logs: Mapped[List["AlertLog"]] = relationship(
-        "AlertLog", back_populates="event", cascade="all, delete-orphan"
+        "AlertLog",
+        back_populates="event",
+        cascade="all, delete-orphan",
+        primaryjoin="Event.id == foreign(AlertLog.event_id)",
     )
 
     @property
@@ -86,6 +125,21 @@ class Event(Base):
         return f"<Event(id={self.id}, camera_id={self.camera_id})>"
 
 
+# Índices das consultas por câmera/período (get_by_camera, get_timeline) e
+# por keyword (search_by_keyword usa keywords @> ARRAY[...], atendido pelo GIN).
+# O id nos índices de período atende a paginação por keyset (timestamp, id).
+# Mantidos em sincronia com as migrações em alembic/versions.
+Index(
+    "ix_events_camera_id_timestamp_id",
+    Event.camera_id,
+    Event.timestamp.desc(),
+    Event.id.desc(),
+)
+Index("ix_events_timestamp_id", Event.timestamp.desc(), Event.id.desc())
+Index("ix_events_keywords", Event.keywords, postgresql_using="gin")
+Index("ix_events_search_vector", Event.search_vector, postgresql_using="gin")
+
+
 class AlertRule(Base):
     """Modelo para regras de alerta."""
 
@@ -120,30 +174,82 @@ class AlertRule(Base):
 
 
 class AlertLog(Base):
-    """Modelo para histórico de alertas enviados."""
+    """Modelo para histórico de alertas enviados.
+
+    Particionada por mês em ``sent_at``, como ``events``. Sem FK no banco
+    para ``events`` (exigiria a chave (id, timestamp)); o relacionamento
+    existe apenas no ORM.
+    """
 
     __tablename__ = "alert_logs"
+    __table_args__ = {"postgresql_partition_by": "RANGE (sent_at)"}
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
-    event_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("events.id"), nullable=False
-    )
+    event_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
     alert_rule_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("alert_rules.id"), nullable=False
     )
     keywords_matched: Mapped[List[str]] = mapped_column(ARRAY(String), nullable=False)
     sent_to: Mapped[List[str]] = mapped_column(ARRAY(String), nullable=False)
-    sent_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[datetime] = mapped_column(
+        DateTime, primary_key=True, default=datetime.utcnow
+    )
     status: Mapped[str] = mapped_column(String(20), default="pending")
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     # Relacionamentos
-    event: Mapped["Event"] = relationship("Event", back_populates="alert_logs")
+    event: Mapped["Event"] = relationship(
+        "Event",
+        back_populates="alert_logs",
+        primaryjoin="Event.id == foreign(AlertLog.event_id)",
+    )
     alert_rule: Mapped["AlertRule"] = relationship(
         "AlertRule", back_populates="alert_logs"
     )
 
     def __repr__(self) -> str:
         return f"<AlertLog(id={self.id}, status={self.status})>"
+
+
+class EventRollup(Base):
+    """Agregados de eventos e alertas por câmera e hora.
+
+    Mantidos de forma incremental pelo ``EventPersister`` na mesma transação
+    que grava os eventos, para que estatísticas e séries temporais não
+    dependam do tamanho do histórico. As médias são soma/quantidade.
+    """
+
+    __tablename__ = "event_rollups_hourly"
+
+    camera_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("cameras.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    hour: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    events: Mapped[int] = mapped_column(Integer, default=0)
+    alerts_sent: Mapped[int] = mapped_column(Integer, default=0)
+    alerts_failed: Mapped[int] = mapped_column(Integer, default=0)
+    confidence_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    confidence_count: Mapped[int] = mapped_column(Integer, default=0)
+    processing_time_sum: Mapped[int] = mapped_column(BigInteger, default=0)
+    processing_time_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    def __repr__(self) -> str:
+        return f"<EventRollup(camera_id={self.camera_id}, hour={self.hour})>"
+
+
+# Séries de todas as câmeras por período
+Index("ix_event_rollups_hourly_hour", EventRollup.hour)
+
+
+# Histórico de alertas (get_logs ordena por (sent_at, id) e filtra por regra)
+Index("ix_alert_logs_sent_at_id", AlertLog.sent_at.desc(), AlertLog.id.desc())
+Index(
+    "ix_alert_logs_alert_rule_id_sent_at_id",
+    AlertLog.alert_rule_id,
+    AlertLog.sent_at.desc(),
+    AlertLog.id.desc(),
+)
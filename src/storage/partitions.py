@@ -0,0 +1,252 @@
+"""Manutenção das partições mensais de eventos e logs de alerta."""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Tabela particionada -> coluna de partição (ver migração 0007)
+PARTITIONED_TABLES = {"events": "timestamp", "alert_logs": "sent_at"}
+
+# Partições mensais: events_p2025_01, alert_logs_p2025_01, ...
+PARTITION_NAME = re.compile(r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+LIST_PARTITIONS_SQL = """
+SELECT child.relname
+FROM pg_inherits
+JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+WHERE parent.relname = :table
+"""
+
+
+def month_start(value: datetime) -> datetime:
+    """Primeiro instante do mês de ``value``."""
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Início do mês ``months`` meses depois (ou antes, se negativo)."""
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    """Nome da partição de ``table`` para o mês dado."""
+    return f"{table}_p{month:%Y_%m}"
+
+
+@dataclass(frozen=True)
+class Partition:
+    """Partição mensal de uma tabela."""
+
+    table: str
+    name: str
+    month: datetime
+
+    @property
+    def end(self) -> datetime:
+        """Limite superior (exclusivo) da partição."""
+        return add_months(self.month, 1)
+
+    @classmethod
+    def parse(cls, table: str, name: str) -> Optional["Partition"]:
+        """Reconhece o nome de uma partição mensal (None para a DEFAULT)."""
+        match = PARTITION_NAME.match(name)
+        if not match or match["table"] != table:
+            return None
+        month = datetime(int(match["year"]), int(match["month"]), 1)
+        return cls(table=table, name=name, month=month)
+
+
+class PartitionManager:
+    """Cria partições futuras e aplica a retenção removendo meses inteiros.
+
+    ``events`` e ``alert_logs`` são particionadas por mês. Para que as
+    gravações nunca caiam na partição DEFAULT, as partições do mês atual e
+    dos próximos ``months_ahead`` meses são criadas com antecedência.
+
+    Com ``retention_months > 0``, partições que terminaram antes do início
+    do mês atual menos ``retention_months`` são desanexadas (DETACH) e, com
+    ``drop=True``, removidas: a retenção custa um DROP TABLE por mês, sem
+    DELETEs grandes nem VACUUM. Os agregados por hora
+    (``event_rollups_hourly``) são mantidos.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        months_ahead: int = 3,
+        retention_months: int = 0,
+        drop: bool = True,
+        interval_seconds: float = 6 * 60 * 60,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self._session_factory = session_factory
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.drop = drop
+        self.interval_seconds = interval_seconds
+        self._clock = clock
+        self._task: Optional[asyncio.Task] = None
+
+        self._runs = 0
+        self._failures = 0
+        self._created: List[str] = []
+        self._removed: List[str] = []
+        self._last_run: Optional[datetime] = None
+
+    async def list_partitions(self, table: str) -> List[Partition]:
+        """Partições mensais anexadas a ``table``, da mais antiga à mais nova."""
+        async with self._session_factory() as session:
+            result = await session.execute(text(LIST_PARTITIONS_SQL), {"table": table})
+            names = result.scalars().all()
+        partitions = [Partition.parse(table, name) for name in names]
+        return sorted((p for p in partitions if p), key=lambda p: p.month)
+
+    async def _execute(self, *statements: str) -> bool:
+        """Executa DDL numa transação; falhas são registradas e contadas."""
+        try:
+            async with self._session_factory() as session:
+                for statement in statements:
+                    await session.execute(text(statement))
+                await session.commit()
+            return True
+        except Exception as e:
+            self._failures += 1
+            logger.error(f"Erro na manutenção de partições ({statements[0]}): {e}")
+            return False
+
+    async def ensure_partitions(self, since: Optional[datetime] = None) -> List[str]:
+        """Cria as partições que faltam até ``months_ahead`` meses à frente.
+
+        Args:
+            since: Primeiro mês a garantir (padrão: mês atual), para cargas
+                de dados antigos
+
+        Returns:
+            Nomes das partições criadas
+        """
+        current = month_start(self._clock())
+        first = month_start(since) if since else current
+        last = add_months(current, self.months_ahead)
+
+        created = []
+        for table in PARTITIONED_TABLES:
+            existing = {p.month for p in await self.list_partitions(table)}
+            month = first
+            while month <= last:
+                if month not in existing:
+                    name = partition_name(table, month)
+                    # Falha se a DEFAULT já tiver linhas do mês
+                    statement = (
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{month:%Y-%m-%d}') "
+                        f"TO ('{add_months(month, 1):%Y-%m-%d}')"
+                    )
+                    if await self._execute(statement):
+                        created.append(name)
+                month = add_months(month, 1)
+
+        if created:
+            logger.info(f"Partições criadas: {', '.join(created)}")
+        self._created.extend(created)
+        return created
+
+    def retention_cutoff(self) -> Optional[datetime]:
+        """Início do período mantido (None sem retenção)."""
+        if self.retention_months <= 0:
+            return None
+        return add_months(month_start(self._clock()), -self.retention_months)
+
+    async def apply_retention(self) -> List[str]:
+        """Desanexa (e remove, com ``drop``) as partições fora da retenção.
+
+        Returns:
+            Nomes das partições desanexadas/removidas
+        """
+        cutoff = self.retention_cutoff()
+        if cutoff is None:
+            return []
+
+        removed = []
+        for table in PARTITIONED_TABLES:
+            for partition in await self.list_partitions(table):
+                if partition.end > cutoff:
+                    continue
+                statements = [f"ALTER TABLE {table} DETACH PARTITION {partition.name}"]
+                if self.drop:
+                    statements.append(f"DROP TABLE {partition.name}")
+                if await self._execute(*statements):
+                    removed.append(partition.name)
+
+        if removed:
+            action = "removidas" if self.drop else "desanexadas"
+            logger.info(
+                f"Retenção de {self.retention_months} meses: partições {action}: "
+                f"{', '.join(removed)}"
+            )
+        self._removed.extend(removed)
+        return removed
+
+    async def run_once(self) -> Dict[str, List[str]]:
+        """Garante as partições futuras e aplica a retenção."""
+        created = await self.ensure_partitions()
+        removed = await self.apply_retention()
+        self._runs += 1
+        self._last_run = self._clock()
+        return {"created": created, "removed": removed}
+
+    async def start(self):
+        """Faz a primeira manutenção e inicia o loop periódico."""
+        try:
+            await self.run_once()
+        except Exception as e:
+            self._failures += 1
+            logger.error(f"Erro na manutenção de partições: {e}")
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.sleep(self.interval_seconds)
+                await self.run_once()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self._failures += 1
+                logger.error(f"Erro na manutenção de partições: {e}")
+
+    async def stop(self):
+        """Cancela o loop periódico."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> dict:
+        """Retorna execuções, partições criadas/removidas e falhas."""
+        return {
+            "runs": self._runs,
+            "last_run": self._last_run.isoformat() if self._last_run else None,
+            "months_ahead": self.months_ahead,
+            "retention_months": self.retention_months,
+            "retention_cutoff": (
+                cutoff.isoformat() if (cutoff := self.retention_cutoff()) else None
+            ),
+            "drop": self.drop,
+            "created": len(self._created),
+            "removed": len(self._removed),
+            "failures": self._failures,
+        }
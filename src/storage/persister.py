@@ -0,0 +1,489 @@
+"""Gravação em lote (write-behind) de eventos e logs de alerta."""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import AlertLog, Event, EventRollup
+
+logger = logging.getLogger(__name__)
+
+RollupKey = Tuple[uuid.UUID, datetime]
+
+# Erros causados pelo conteúdo de uma linha (FK para câmera ou regra
+# removida, valor inválido): regravar o mesmo lote falharia para sempre
+ROW_ERRORS = (IntegrityError, DataError)
+
+
+@dataclass
+class RollupDelta:
+    """Incremento de uma linha de ``event_rollups_hourly``."""
+
+    events: int = 0
+    alerts_sent: int = 0
+    alerts_failed: int = 0
+    confidence_sum: float = 0.0
+    confidence_count: int = 0
+    processing_time_sum: int = 0
+    processing_time_count: int = 0
+
+    def merge(self, other: "RollupDelta"):
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+def _hour(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def _rollup_upsert(rollups: Dict[RollupKey, RollupDelta]):
+    """INSERT ... ON CONFLICT que soma os incrementos às linhas existentes."""
+    table = EventRollup.__table__
+    rows = [
+        {"camera_id": camera_id, "hour": hour, **delta.__dict__}
+        for (camera_id, hour), delta in rollups.items()
+    ]
+    statement = pg_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.camera_id, table.c.hour],
+        set_={
+            f.name: table.c[f.name] + statement.excluded[f.name]
+            for f in fields(RollupDelta)
+        },
+    )
+    return statement, rows
+
+
+def _split(
+    events: List[dict], alert_logs: List[dict]
+) -> List[Tuple[List[dict], List[dict]]]:
+    """Divide um lote em dois: eventos e logs, ou cada tabela ao meio."""
+    if events and alert_logs:
+        return [(events, []), ([], alert_logs)]
+    rows = events or alert_logs
+    middle = len(rows) // 2
+    if events:
+        return [(rows[:middle], []), (rows[middle:], [])]
+    return [([], rows[:middle]), ([], rows[middle:])]
+
+
+class EventPersister:
+    """Acumula linhas de ``Event`` e ``AlertLog`` e grava em lote.
+
+    Os IDs são gerados no cliente, então o evento pode ser referenciado
+    (logs de alerta, resposta ao chamador) antes de chegar ao banco. O lote
+    é gravado numa única transação com INSERTs de várias linhas quando
+    acumula ``max_rows`` linhas ou quando a linha mais antiga espera
+    ``max_delay_ms``. Com ``max_delay_ms=0`` cada linha é gravada na hora.
+
+    Na mesma transação, os agregados por câmera e hora
+    (``event_rollups_hourly``) recebem os incrementos do lote, então nunca
+    divergem dos eventos gravados.
+
+    Se o banco rejeitar o lote por causa de uma linha (``IntegrityError``
+    ou ``DataError``), o lote é dividido ao meio até isolar as linhas com
+    erro, que vão para ``dead_letters`` em vez de bloquear as demais. Em
+    outros erros (conexão, banco fora) as linhas voltam para o buffer e são
+    tentadas de novo no próximo lote; acima de ``max_pending`` as mais
+    antigas são descartadas (e contadas) para não crescer sem limite.
+
+    Depois de uma gravação com erro, as novas tentativas automáticas esperam
+    ``retry_base_ms``, dobrando a cada falha seguida até ``max_retry_ms``,
+    para não martelar o banco durante a queda; a primeira gravação bem
+    sucedida zera a espera. ``flush`` chamado diretamente sempre tenta.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        max_rows: int = 100,
+        max_delay_ms: float = 200.0,
+        max_pending: int = 10000,
+        max_dead_letters: int = 1000,
+        retry_base_ms: float = 500.0,
+        max_retry_ms: float = 30000.0,
+    ):
+        self._session_factory = session_factory
+        self.max_rows = max_rows
+        self.max_delay_ms = max_delay_ms
+        self.max_pending = max_pending
+        self.retry_base_ms = retry_base_ms
+        self.max_retry_ms = max_retry_ms
+
+        self._events: Deque[dict] = deque()
+        self._alert_logs: Deque[dict] = deque()
+        # Câmera de cada log de alerta pendente (não é coluna de alert_logs)
+        self._alert_cameras: Dict[uuid.UUID, uuid.UUID] = {}
+        self._oldest: Optional[float] = None
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Linhas recusadas pelo banco, com a tabela e o erro
+        self._dead_letters: Deque[dict] = deque(maxlen=max_dead_letters)
+
+        self._flushes = 0
+        self._rows_written = 0
+        self._failures = 0
+        # Falhas seguidas e momento da próxima tentativa automática
+        self._consecutive_failures = 0
+        self._retry_at: Optional[float] = None
+        self._dropped = 0
+        self._dead_lettered = 0
+        self._flush_time_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._last_batch_size = 0
+
+    @property
+    def pending(self) -> int:
+        """Linhas aguardando gravação."""
+        return len(self._events) + len(self._alert_logs)
+
+    @property
+    def dead_letters(self) -> List[dict]:
+        """Linhas recusadas pelo banco (as mais recentes)."""
+        return list(self._dead_letters)
+
+    async def add_event(
+        self,
+        camera_id: uuid.UUID,
+        description: str,
+        keywords: Optional[List[str]] = None,
+        frame_path: Optional[str] = None,
+        annotated_frame_path: Optional[str] = None,
+        confidence: Optional[float] = None,
+        llm_provider: Optional[str] = None,
+        llm_model: Optional[str] = None,
+        processing_time_ms: Optional[int] = None,
+        triage_result: Optional[dict] = None,
+        escalated: bool = False,
+    ) -> uuid.UUID:
+        """Enfileira um evento e retorna o ID gerado no cliente."""
+        event_id = uuid.uuid4()
+        self._events.append(
+            {
+                "id": event_id,
+                "camera_id": camera_id,
+                "timestamp": datetime.utcnow(),
+                "description": description,
+                "keywords": keywords,
+                "frame_path": frame_path,
+                "annotated_frame_path": annotated_frame_path,
+                "confidence": confidence,
+                "llm_provider": llm_provider,
+                "llm_model": llm_model,
+                "processing_time_ms": processing_time_ms,
+                "triage_result": triage_result,
+                "escalated": escalated,
+            }
+        )
+        await self._added()
+        return event_id
+
+    async def add_alert_log(
+        self,
+        event_id: uuid.UUID,
+        alert_rule_id: uuid.UUID,
+        keywords_matched: List[str],
+        sent_to: List[str],
+        status: str = "pending",
+        error_message: Optional[str] = None,
+        camera_id: Optional[uuid.UUID] = None,
+    ) -> uuid.UUID:
+        """Enfileira um log de alerta e retorna o ID gerado no cliente.
+
+        Args:
+            camera_id: Câmera do evento, para os agregados por hora
+                (sem ela o alerta não entra nos agregados)
+        """
+        log_id = uuid.uuid4()
+        if camera_id is not None:
+            self._alert_cameras[log_id] = camera_id
+        self._alert_logs.append(
+            {
+                "id": log_id,
+                "event_id": event_id,
+                "alert_rule_id": alert_rule_id,
+                "keywords_matched": keywords_matched,
+                "sent_to": sent_to,
+                "sent_at": datetime.utcnow(),
+                "status": status,
+                "error_message": error_message,
+            }
+        )
+        await self._added()
+        return log_id
+
+    def _rollups(
+        self, events: List[dict], alert_logs: List[dict]
+    ) -> Dict[RollupKey, RollupDelta]:
+        """Incrementos dos agregados por câmera e hora para um lote."""
+        rollups: Dict[RollupKey, RollupDelta] = {}
+
+        def add(camera_id: uuid.UUID, timestamp: datetime, delta: RollupDelta):
+            key = (camera_id, _hour(timestamp))
+            rollups.setdefault(key, RollupDelta()).merge(delta)
+
+        for row in events:
+            confidence = row["confidence"]
+            processing_time = row["processing_time_ms"]
+            add(
+                row["camera_id"],
+                row["timestamp"],
+                RollupDelta(
+                    events=1,
+                    confidence_sum=confidence or 0.0,
+                    confidence_count=int(confidence is not None),
+                    processing_time_sum=processing_time or 0,
+                    processing_time_count=int(processing_time is not None),
+                ),
+            )
+        for row in alert_logs:
+            camera_id = self._alert_cameras.get(row["id"])
+            if camera_id is None:
+                continue
+            add(
+                camera_id,
+                row["sent_at"],
+                RollupDelta(
+                    alerts_sent=int(row["status"] == "sent"),
+                    alerts_failed=int(row["status"] == "failed"),
+                ),
+            )
+        return rollups
+
+    async def _added(self):
+        """Grava na hora ou acorda o loop conforme o tamanho do buffer."""
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        self._trim()
+        if self._retry_in() > 0:
+            # Banco fora: o loop tenta de novo ao fim da espera
+            self._wakeup.set()
+        elif self.max_delay_ms <= 0 or self.pending >= self.max_rows:
+            await self.flush()
+        else:
+            self._wakeup.set()
+
+    def _retry_in(self) -> float:
+        """Segundos até a próxima tentativa após falhas (0 sem espera)."""
+        if self._retry_at is None:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def _record_failure(self):
+        """Conta a falha e adia a próxima tentativa (backoff exponencial)."""
+        self._failures += 1
+        self._consecutive_failures += 1
+        delay_ms = min(
+            self.max_retry_ms,
+            self.retry_base_ms * 2 ** (self._consecutive_failures - 1),
+        )
+        self._retry_at = time.monotonic() + delay_ms / 1000
+
+    def _trim(self):
+        """Descarta as linhas mais antigas acima de ``max_pending``.
+
+        Compara o evento e o log de alerta mais antigos do buffer; um evento
+        descartado leva junto os logs dele, que ficariam órfãos.
+        """
+        while self.pending > self.max_pending:
+            if self._events and (
+                not self._alert_logs
+                or self._events[0]["timestamp"] <= self._alert_logs[0]["sent_at"]
+            ):
+                event_id = self._events.popleft()["id"]
+                self._dropped += 1
+                if any(row["event_id"] == event_id for row in self._alert_logs):
+                    kept = deque()
+                    for row in self._alert_logs:
+                        if row["event_id"] == event_id:
+                            self._alert_cameras.pop(row["id"], None)
+                            self._dropped += 1
+                        else:
+                            kept.append(row)
+                    self._alert_logs = kept
+            else:
+                row = self._alert_logs.popleft()
+                self._alert_cameras.pop(row["id"], None)
+                self._dropped += 1
+
+    async def flush(self) -> int:
+        """Grava tudo o que está no buffer numa transação.
+
+        Returns:
+            Quantidade de linhas gravadas (0 se vazio ou em caso de erro)
+        """
+        async with self._flush_lock:
+            if not self.pending:
+                return 0
+
+            events, alert_logs = self._take()
+            start = time.perf_counter()
+            rows = await self._write_isolating(events, alert_logs)
+            if not rows:
+                return 0
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._flushes += 1
+            self._rows_written += rows
+            self._last_batch_size = rows
+            self._flush_time_ms += elapsed_ms
+            self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+            logger.debug(f"Lote gravado: {rows} linhas em {elapsed_ms:.1f}ms")
+            return rows
+
+    async def _write(self, events: List[dict], alert_logs: List[dict]):
+        """Grava linhas e agregados numa transação."""
+        rollups = self._rollups(events, alert_logs)
+        async with self._session_factory() as session:
+            # Eventos primeiro: os logs referenciam events.id
+            if events:
+                await session.execute(insert(Event.__table__), events)
+            if alert_logs:
+                await session.execute(insert(AlertLog.__table__), alert_logs)
+            if rollups:
+                await session.execute(*_rollup_upsert(rollups))
+            await session.commit()
+        for row in alert_logs:
+            self._alert_cameras.pop(row["id"], None)
+
+    async def _write_isolating(self, events: List[dict], alert_logs: List[dict]) -> int:
+        """Grava o lote, dividindo-o ao meio quando o banco recusa alguma linha.
+
+        Returns:
+            Quantidade de linhas gravadas
+        """
+        written = 0
+        isolating = False
+        # Pilha de sub-lotes; o topo é o mais antigo
+        batches = [(events, alert_logs)]
+        while batches:
+            events, alert_logs = batches.pop()
+            size = len(events) + len(alert_logs)
+            try:
+                await self._write(events, alert_logs)
+            except ROW_ERRORS as e:
+                if size == 1:
+                    self._dead_letter(events, alert_logs, e)
+                    continue
+                if not isolating:
+                    isolating = True
+                    logger.warning(
+                        f"Lote de {size} linhas recusado pelo banco, "
+                        f"isolando as linhas com erro: {e}"
+                    )
+                batches.extend(reversed(_split(events, alert_logs)))
+                continue
+            except Exception as e:
+                self._record_failure()
+                remaining = [(events, alert_logs)] + batches[::-1]
+                logger.error(
+                    f"Erro ao gravar lote de "
+                    f"{sum(len(ev) + len(lg) for ev, lg in remaining)} "
+                    f"linhas, tentando novamente em {self._retry_in():.1f}s: {e}"
+                )
+                self._restore(
+                    [row for ev, _ in remaining for row in ev],
+                    [row for _, lg in remaining for row in lg],
+                )
+                return written
+            written += size
+
+        self._consecutive_failures = 0
+        self._retry_at = None
+        return written
+
+    def _dead_letter(self, events: List[dict], alert_logs: List[dict], error: Exception):
+        """Separa uma linha que o banco recusa para não bloquear as demais."""
+        table = Event.__tablename__ if events else AlertLog.__tablename__
+        (row,) = events or alert_logs
+        self._alert_cameras.pop(row["id"], None)
+        self._dead_letters.append({"table": table, "row": row, "error": str(error)})
+        self._dead_lettered += 1
+        logger.error(f"Linha {row['id']} de {table} recusada pelo banco e descartada: {error}")
+
+    def _take(self) -> Tuple[List[dict], List[dict]]:
+        """Retira o conteúdo do buffer para gravação."""
+        events, alert_logs = list(self._events), list(self._alert_logs)
+        self._events.clear()
+        self._alert_logs.clear()
+        self._oldest = None
+        return events, alert_logs
+
+    def _restore(self, events: List[dict], alert_logs: List[dict]):
+        """Devolve um lote que falhou para a frente do buffer."""
+        self._events.extendleft(reversed(events))
+        self._alert_logs.extendleft(reversed(alert_logs))
+        self._oldest = time.monotonic()
+        self._trim()
+
+    async def start(self):
+        """Inicia o loop que grava o buffer a cada ``max_delay_ms``."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self):
+        while True:
+            try:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                delay = self._retry_in()
+                if self._oldest is not None:
+                    waited_ms = (time.monotonic() - self._oldest) * 1000
+                    delay = max(delay, (self.max_delay_ms - waited_ms) / 1000)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self.flush()
+                if self.pending:
+                    # Lote falhou (ou chegaram linhas durante a gravação)
+                    self._wakeup.set()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Erro no loop de gravação de eventos: {e}")
+
+    async def stop(self):
+        """Para o loop e grava o que ainda estiver no buffer."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self.pending:
+            logger.error(f"{self.pending} linhas não gravadas ao encerrar")
+
+    def get_stats(self) -> dict:
+        """Retorna tamanho dos lotes, latência de gravação e pendências."""
+        return {
+            "pending": self.pending,
+            "flushes": self._flushes,
+            "rows_written": self._rows_written,
+            "avg_batch_size": (
+                round(self._rows_written / self._flushes, 1) if self._flushes else 0.0
+            ),
+            "last_batch_size": self._last_batch_size,
+            "avg_flush_ms": (
+                round(self._flush_time_ms / self._flushes, 1) if self._flushes else 0.0
+            ),
+            "max_flush_ms": round(self._max_flush_ms, 1),
+            "failures": self._failures,
+            "consecutive_failures": self._consecutive_failures,
+            "retry_in_ms": round(self._retry_in() * 1000),
+            "dropped": self._dropped,
+            "dead_lettered": self._dead_lettered,
+            "max_rows": self.max_rows,
+            "max_delay_ms": self.max_delay_ms,
+        }
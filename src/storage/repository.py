@@ -1,15 +1,90 @@
 """Repositórios para operações CRUD no banco de dados."""
 
+import json
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, func, or_, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-
-from .models import Camera, Event, AlertRule, AlertLog
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from .models import (
+    Camera,
+    Event,
+    AlertRule,
+    AlertLog,
+    EventRollup,
+    TEXT_SEARCH_CONFIG,
+)
 from src.config import settings
 
+# Posição na paginação por keyset: (timestamp, id) do último item da página
+Cursor = Tuple[datetime, uuid.UUID]
+
+# Busca por várias keywords: qualquer uma (&&) ou todas (@>)
+KEYWORD_MATCH_ANY = "any"
+KEYWORD_MATCH_ALL = "all"
+KEYWORD_MATCHES = (KEYWORD_MATCH_ANY, KEYWORD_MATCH_ALL)
+
+
+def _keyset(query, time_column, id_column, before: Optional[Cursor]):
+    """Ordena do mais recente para o mais antigo e continua após ``before``.
+
+    O id desempata timestamps iguais, então nenhum item é repetido ou pulado
+    entre páginas, e a condição usa o índice (time, id) em vez de OFFSET.
+    O ``time <= cursor`` redundante permite ao PostgreSQL descartar as
+    partições mensais posteriores ao cursor (a comparação de tuplas não
+    participa da poda de partições).
+    """
+    if before:
+        query = query.where(
+            time_column <= before[0],
+            tuple_(time_column, id_column) < tuple_(*before),
+        )
+    return query.order_by(time_column.desc(), id_column.desc())
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` de uma consulta, executado com os parâmetros.
+
+    Os valores seguem como parâmetros do driver, com os tipos das colunas
+    (ex.: ``VARCHAR[]`` das keywords), em vez de literais formatados no SQL.
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def _count(session: AsyncSession, model, conditions: list, estimate: bool) -> int:
+    """Conta as linhas que atendem às condições.
+
+    Args:
+        estimate: Usa a estimativa do planejador (EXPLAIN), em tempo
+            constante; senão ``count(*)``, que com os índices compostos
+            vira index-only scan quando os filtros são câmera/período.
+    """
+    query = select(model.id).where(*conditions)
+    if not estimate:
+        result = await session.execute(
+            select(func.count()).select_from(query.subquery())
+        )
+        return result.scalar_one()
+
+    result = await session.execute(Explain(query))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
 
 class CameraRepository:
     """Repositório para operações com câmeras."""
@@ -27,6 +102,7 @@ class CameraRepository:
         motion_detection_enabled: Optional[bool] = None,
         motion_threshold: Optional[float] = None,
         motion_sensitivity: Optional[str] = None,
+        priority: str = "normal",
     ) -> Camera:
         """Cria uma nova câmera.
 
@@ -53,6 +129,7 @@ class CameraRepository:
             motion_detection_enabled=motion_detection_enabled,
             motion_threshold=motion_threshold,
             motion_sensitivity=motion_sensitivity,
+            priority=priority,
         )
         self.session.add(camera)
         await self.session.commit()
@@ -74,6 +151,14 @@ class CameraRepository:
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
+    async def count(self, enabled_only: bool = False) -> int:
+        """Conta câmeras."""
+        query = select(func.count()).select_from(Camera)
+        if enabled_only:
+            query = query.where(Camera.enabled == True)
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
     async def update(
         self,
         camera_id: uuid.UUID,
@@ -85,6 +170,7 @@ class CameraRepository:
         motion_detection_enabled: Optional[bool] = None,
         motion_threshold: Optional[float] = None,
         motion_sensitivity: Optional[str] = None,
+        priority: Optional[str] = None,
     ) -> Optional[Camera]:
         """Atualiza uma câmera."""
         camera = await self.get_by_id(camera_id)
@@ -107,6 +193,8 @@ class CameraRepository:
             camera.motion_threshold = motion_threshold
         if motion_sensitivity is not None:
             camera.motion_sensitivity = motion_sensitivity
+        if priority is not None:
+            camera.priority = priority
 
         await self.session.commit()
         return camera
@@ -157,6 +245,8 @@ class EventRepository:
         llm_provider: Optional[str] = None,
         llm_model: Optional[str] = None,
         processing_time_ms: Optional[int] = None,
+        triage_result: Optional[dict] = None,
+        escalated: bool = False,
     ) -> Event:
         """Cria um novo evento."""
         event = Event(
@@ -169,6 +259,8 @@ class EventRepository:
             llm_provider=llm_provider,
             llm_model=llm_model,
             processing_time_ms=processing_time_ms,
+            triage_result=triage_result,
+            escalated=escalated,
         )
         self.session.add(event)
         await self.session.commit()
@@ -186,34 +278,118 @@ class EventRepository:
         end_date: Optional[datetime] = None,
         limit: int = 100,
         offset: int = 0,
+        before: Optional[Cursor] = None,
     ) -> List[Event]:
-        """Lista eventos de uma câmera."""
-        query = select(Event).where(Event.camera_id == camera_id)
-
-        if start_date:
-            query = query.where(Event.timestamp >= start_date)
-        if end_date:
-            query = query.where(Event.timestamp <= end_date)
-
-        query = query.order_by(Event.timestamp.desc()).limit(limit).offset(offset)
-        result = await self.session.execute(query)
-        return list(result.scalars().all())
+        """Lista eventos de uma câmera (após o cursor ``before``, se dado)."""
+        return await self.find(
+            self.event_conditions(
+                camera_id=camera_id, start_date=start_date, end_date=end_date
+            ),
+            limit,
+            offset,
+            before,
+        )
 
     async def search_by_keyword(
         self,
         keyword: str,
         camera_id: Optional[uuid.UUID] = None,
         limit: int = 100,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        offset: int = 0,
+        before: Optional[Cursor] = None,
     ) -> List[Event]:
         """Busca eventos por palavra-chave."""
-        query = select(Event).where(Event.keywords.contains([keyword]))
+        return await self.find(
+            self.event_conditions(
+                camera_id=camera_id,
+                keyword=keyword,
+                start_date=start_date,
+                end_date=end_date,
+            ),
+            limit,
+            offset,
+            before,
+        )
+
+    async def search_by_keywords(
+        self,
+        keywords: List[str],
+        match: str = KEYWORD_MATCH_ANY,
+        camera_id: Optional[uuid.UUID] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        offset: int = 0,
+        before: Optional[Cursor] = None,
+    ) -> List[Event]:
+        """Busca eventos com qualquer uma (``any``) ou todas (``all``) as keywords.
+
+        Uma única consulta ordenada por (timestamp, id), então o limite e a
+        paginação valem para o resultado combinado.
+        """
+        return await self.find(
+            self.event_conditions(
+                camera_id=camera_id,
+                keywords=keywords,
+                match=match,
+                start_date=start_date,
+                end_date=end_date,
+            ),
+            limit,
+            offset,
+            before,
+        )
+
+    async def search_text(
+        self,
+        query: str,
+        camera_id: Optional[uuid.UUID] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[Tuple[Event, float, str]]:
+        """Busca textual nas descrições, ordenada por relevância.
 
+        Aceita a sintaxe de ``websearch_to_tsquery`` ("homem de capacete",
+        frases entre aspas, ``-palavra``, ``or``). O trecho destacado
+        (``ts_headline``) só é calculado para os eventos da página.
+
+        Returns:
+            Lista de (evento, relevância, trecho com <mark>...</mark>)
+        """
+        tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+        rank = func.ts_rank_cd(Event.search_vector, tsquery).label("rank")
+
+        page = select(Event.id, rank).where(Event.search_vector.op("@@")(tsquery))
         if camera_id:
-            query = query.where(Event.camera_id == camera_id)
+            page = page.where(Event.camera_id == camera_id)
+        if start_date:
+            page = page.where(Event.timestamp >= start_date)
+        if end_date:
+            page = page.where(Event.timestamp <= end_date)
+        page = (
+            page.order_by(rank.desc(), Event.timestamp.desc(), Event.id)
+            .limit(limit)
+            .offset(offset)
+            .subquery()
+        )
 
-        query = query.order_by(Event.timestamp.desc()).limit(limit)
-        result = await self.session.execute(query)
-        return list(result.scalars().all())
+        headline = func.ts_headline(
+            TEXT_SEARCH_CONFIG,
+            Event.description,
+            tsquery,
+            "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5",
+        )
+        query_stmt = (
+            select(Event, page.c.rank, headline)
+            .join(page, Event.id == page.c.id)
+            .order_by(page.c.rank.desc(), Event.timestamp.desc(), Event.id)
+        )
+        result = await self.session.execute(query_stmt)
+        return [(event, float(rank), snippet) for event, rank, snippet in result.all()]
 
     async def get_timeline(
         self,
@@ -222,25 +398,76 @@ class EventRepository:
         camera_ids: Optional[List[uuid.UUID]] = None,
         limit: int = 100,
         offset: int = 0,
+        before: Optional[Cursor] = None,
     ) -> List[Event]:
         """Retorna timeline de eventos."""
-        query = select(Event)
+        return await self.find(
+            self.event_conditions(
+                camera_ids=camera_ids, start_date=start_date, end_date=end_date
+            ),
+            limit,
+            offset,
+            before,
+        )
 
+    @staticmethod
+    def event_conditions(
+        camera_id: Optional[uuid.UUID] = None,
+        camera_ids: Optional[List[uuid.UUID]] = None,
+        keyword: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        keywords: Optional[List[str]] = None,
+        match: str = KEYWORD_MATCH_ANY,
+    ) -> list:
+        """Condições de filtro das listagens (também usadas na contagem).
+
+        Args:
+            keywords: Eventos com qualquer uma (``match="any"``, operador
+                ``&&``) ou todas (``match="all"``, ``@>``) as keywords; os
+                dois operadores usam o índice GIN de ``keywords``
+        """
+        if match not in KEYWORD_MATCHES:
+            raise ValueError(f"Modo de busca por keywords inválido: {match}")
         conditions = []
+        if camera_id:
+            conditions.append(Event.camera_id == camera_id)
+        if camera_ids:
+            conditions.append(Event.camera_id.in_(camera_ids))
+        if keyword:
+            conditions.append(Event.keywords.contains([keyword]))
+        if keywords:
+            if match == KEYWORD_MATCH_ALL:
+                conditions.append(Event.keywords.contains(keywords))
+            else:
+                conditions.append(Event.keywords.overlap(keywords))
         if start_date:
             conditions.append(Event.timestamp >= start_date)
         if end_date:
             conditions.append(Event.timestamp <= end_date)
-        if camera_ids:
-            conditions.append(Event.camera_id.in_(camera_ids))
+        return conditions
 
+    async def find(
+        self,
+        conditions: list,
+        limit: int,
+        offset: int = 0,
+        before: Optional[Cursor] = None,
+    ) -> List[Event]:
+        """Lista eventos com as condições de ``event_conditions``."""
+        query = select(Event)
         if conditions:
             query = query.where(and_(*conditions))
-
-        query = query.order_by(Event.timestamp.desc()).limit(limit).offset(offset)
+        query = _keyset(query, Event.timestamp, Event.id, before).limit(limit)
+        if offset:
+            query = query.offset(offset)
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
+    async def count(self, conditions: list, estimate: bool = False) -> int:
+        """Conta eventos com as condições de ``event_conditions``."""
+        return await _count(self.session, Event, conditions, estimate)
+
 
 class AlertRepository:
     """Repositório para operações com alertas."""
@@ -374,22 +601,37 @@ class AlertRepository:
         status: Optional[str] = None,
         limit: int = 100,
         offset: int = 0,
+        before: Optional[Cursor] = None,
     ) -> List[AlertLog]:
-        """Lista histórico de alertas."""
+        """Lista histórico de alertas (após o cursor ``before``, se dado)."""
         query = select(AlertLog)
 
+        conditions = self.log_conditions(rule_id=rule_id, status=status)
+        if conditions:
+            query = query.where(and_(*conditions))
+
+        query = _keyset(query, AlertLog.sent_at, AlertLog.id, before).limit(limit)
+        if offset:
+            query = query.offset(offset)
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    @staticmethod
+    def log_conditions(
+        rule_id: Optional[uuid.UUID] = None,
+        status: Optional[str] = None,
+    ) -> list:
+        """Condições de filtro do histórico (também usadas na contagem)."""
         conditions = []
         if rule_id:
             conditions.append(AlertLog.alert_rule_id == rule_id)
         if status:
             conditions.append(AlertLog.status == status)
+        return conditions
 
-        if conditions:
-            query = query.where(and_(*conditions))
-
-        query = query.order_by(AlertLog.sent_at.desc()).limit(limit).offset(offset)
-        result = await self.session.execute(query)
-        return list(result.scalars().all())
+    async def count_logs(self, conditions: list, estimate: bool = False) -> int:
+        """Conta logs de alerta com as condições de ``log_conditions``."""
+        return await _count(self.session, AlertLog, conditions, estimate)
 
     async def update_log_status(
         self,
@@ -411,3 +653,102 @@ class AlertRepository:
 
         await self.session.commit()
         return log
+
+
+class StatsRepository:
+    """Consultas aos agregados por câmera e hora (``event_rollups_hourly``).
+
+    O custo depende do número de horas e câmeras consultadas, não da
+    quantidade de eventos no histórico.
+    """
+
+    # Granularidades aceitas por date_trunc nas séries temporais
+    BUCKETS = ("hour", "day", "week", "month")
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @staticmethod
+    def _conditions(
+        camera_id: Optional[uuid.UUID] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> list:
+        conditions = []
+        if camera_id:
+            conditions.append(EventRollup.camera_id == camera_id)
+        if start_date:
+            conditions.append(EventRollup.hour >= start_date)
+        if end_date:
+            conditions.append(EventRollup.hour <= end_date)
+        return conditions
+
+    @staticmethod
+    def _aggregates() -> list:
+        return [
+            func.coalesce(func.sum(EventRollup.events), 0).label("events"),
+            func.coalesce(func.sum(EventRollup.alerts_sent), 0).label("alerts_sent"),
+            func.coalesce(func.sum(EventRollup.alerts_failed), 0).label("alerts_failed"),
+            (
+                func.sum(EventRollup.confidence_sum)
+                / func.nullif(func.sum(EventRollup.confidence_count), 0)
+            ).label("avg_confidence"),
+            (
+                func.sum(EventRollup.processing_time_sum)
+                / func.nullif(func.sum(EventRollup.processing_time_count), 0)
+            ).label("avg_processing_time_ms"),
+        ]
+
+    @staticmethod
+    def _row_to_dict(row) -> dict:
+        return {
+            "events": int(row.events),
+            "alerts_sent": int(row.alerts_sent),
+            "alerts_failed": int(row.alerts_failed),
+            "avg_confidence": (
+                float(row.avg_confidence) if row.avg_confidence is not None else None
+            ),
+            "avg_processing_time_ms": (
+                float(row.avg_processing_time_ms)
+                if row.avg_processing_time_ms is not None
+                else None
+            ),
+        }
+
+    async def totals(
+        self,
+        camera_id: Optional[uuid.UUID] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> dict:
+        """Totais de eventos e alertas (e médias) no período."""
+        query = select(*self._aggregates()).where(
+            *self._conditions(camera_id, start_date, end_date)
+        )
+        result = await self.session.execute(query)
+        return self._row_to_dict(result.one())
+
+    async def timeseries(
+        self,
+        start_date: datetime,
+        end_date: Optional[datetime] = None,
+        camera_id: Optional[uuid.UUID] = None,
+        bucket: str = "hour",
+    ) -> List[dict]:
+        """Série temporal agregada em ``bucket`` (hour, day, week ou month).
+
+        Períodos sem eventos não aparecem na série.
+        """
+        if bucket not in self.BUCKETS:
+            raise ValueError(f"Granularidade inválida: {bucket}")
+        bucket_start = func.date_trunc(bucket, EventRollup.hour).label("bucket")
+        query = (
+            select(bucket_start, *self._aggregates())
+            .where(*self._conditions(camera_id, start_date, end_date))
+            .group_by(bucket_start)
+            .order_by(bucket_start)
+        )
+        result = await self.session.execute(query)
+        return [
+            {"bucket": row.bucket, **self._row_to_dict(row)} for row in result.all()
+        ]
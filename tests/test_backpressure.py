@@ -0,0 +1,172 @@
+"""Testes para o sinal de pressão entre a fila e os frame grabbers."""
+
+import uuid
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+
+from src.capture.camera import CameraConfig
+from src.capture.frame_grabber import FrameGrabber
+from src.capture.queue import FrameQueue, QueuePressure
+from src.capture.spool import FrameSpool
+
+
+@pytest.mark.asyncio
+async def test_pressure_rises_with_queue_fill():
+    """A pressão sobe conforme a fila enche e notifica os listeners."""
+    queue = FrameQueue(processor=AsyncMock(), max_size=10, num_workers=0)
+    changes = []
+    queue.add_pressure_listener(changes.append)
+    camera_id = uuid.uuid4()
+
+    for i in range(5):
+        await queue.put(camera_id, b"frame", float(i))
+    assert queue.pressure == QueuePressure.ELEVATED
+
+    for i in range(4):
+        await queue.put(camera_id, b"frame", float(i))
+    assert queue.pressure == QueuePressure.CRITICAL
+    assert changes == [QueuePressure.ELEVATED, QueuePressure.CRITICAL]
+    assert queue.get_stats()["pressure"] == "critical"
+
+
+@pytest.mark.asyncio
+async def test_pressure_drops_with_hysteresis():
+    """A pressão só cai depois de descer abaixo da marca com histerese."""
+    queue = FrameQueue(processor=AsyncMock(), max_size=10, num_workers=0)
+    camera_id = uuid.uuid4()
+    for i in range(9):
+        await queue.put(camera_id, b"frame", float(i))
+    assert queue.pressure == QueuePressure.CRITICAL
+
+    # 8/10 ainda está acima de 0.9 - 0.2
+    await queue.get()
+    assert queue.pressure == QueuePressure.CRITICAL
+
+    # 7/10 sai do nível crítico
+    await queue.get()
+    assert queue.pressure == QueuePressure.ELEVATED
+
+    for _ in range(4):
+        await queue.get()
+    # 3/10 não está acima de 0.5 - 0.2
+    assert queue.pressure == QueuePressure.NORMAL
+
+
+def make_spool(path, max_bytes):
+    spool = FrameSpool(path=str(path), max_bytes=max_bytes, segment_bytes=256)
+    spool.open()
+    return spool
+
+
+@pytest.mark.asyncio
+async def test_spool_backlog_is_elevated_not_critical(tmp_path):
+    """Com folga no spool, o excedente é gravado e a captura não para."""
+    spool = make_spool(tmp_path, max_bytes=1024 * 1024)
+    queue = FrameQueue(processor=AsyncMock(), max_size=2, num_workers=0, spool=spool)
+    camera_id = uuid.uuid4()
+
+    for i in range(2):
+        await queue.put(camera_id, b"frame", float(i))
+    # Fila em memória cheia, mas o excedente tem para onde ir
+    assert queue.pressure == QueuePressure.ELEVATED
+
+    for i in range(5):
+        assert await queue.put(camera_id, b"frame", float(i))
+    assert spool.pending == 5
+    assert queue.pressure == QueuePressure.ELEVATED
+    assert queue.get_stats()["dropped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_spool_backlog_after_restart_keeps_live_frames(tmp_path):
+    """Um backlog recuperado no start não bloqueia os frames ao vivo."""
+    spool = make_spool(tmp_path, max_bytes=1024 * 1024)
+    camera_id = uuid.uuid4()
+    for i in range(20):
+        spool.append(camera_id, b"antigo", float(i))
+    spool.close()
+
+    queue = FrameQueue(
+        processor=AsyncMock(),
+        max_size=2,
+        num_workers=0,
+        spool=make_spool(tmp_path, max_bytes=1024 * 1024),
+    )
+    assert await queue.put(camera_id, b"ao vivo", 100.0)
+    assert queue.pressure == QueuePressure.ELEVATED
+
+
+@pytest.mark.asyncio
+async def test_spool_near_budget_is_critical(tmp_path):
+    """Perto do limite de bytes do spool a pressão fica crítica."""
+    spool = make_spool(tmp_path, max_bytes=1000)
+    queue = FrameQueue(processor=AsyncMock(), max_size=1, num_workers=0, spool=spool)
+    camera_id = uuid.uuid4()
+
+    await queue.put(camera_id, b"x" * 100, 0.0)
+    await queue.put(camera_id, b"x" * 100, 1.0)
+    assert queue.pressure == QueuePressure.ELEVATED
+
+    for i in range(6):
+        await queue.put(camera_id, b"x" * 100, float(i))
+    assert spool.usage >= FrameQueue.CRITICAL_WATERMARK
+    assert queue.pressure == QueuePressure.CRITICAL
+
+
+def make_grabber(pressure, on_frame=None):
+    config = CameraConfig(
+        id=uuid.uuid4(),
+        name="Test Camera",
+        url="rtsp://test.com/stream",
+        frame_interval=3,
+        motion_detection_enabled=False,
+    )
+    return FrameGrabber(
+        camera_config=config,
+        on_frame=on_frame,
+        pressure_source=lambda: pressure[0],
+    )
+
+
+def test_grabber_interval_follows_pressure():
+    """O intervalo efetivo aumenta com a pressão e volta ao normal."""
+    pressure = [QueuePressure.NORMAL]
+    grabber = make_grabber(pressure)
+    assert grabber.effective_interval == 3
+
+    pressure[0] = QueuePressure.ELEVATED
+    assert grabber.effective_interval == 6
+
+    pressure[0] = QueuePressure.CRITICAL
+    assert grabber.effective_interval == 12
+
+    pressure[0] = QueuePressure.NORMAL
+    assert grabber.effective_interval == 3
+
+
+@pytest.mark.asyncio
+async def test_grabber_runs_motion_only_under_critical_pressure():
+    """Sob pressão crítica o grabber não codifica nem envia frames."""
+    sent = []
+    pressure = [QueuePressure.CRITICAL]
+    grabber = make_grabber(pressure, on_frame=lambda *args: sent.append(args))
+
+    frame = np.random.randint(0, 255, (240, 320, 3), dtype=np.uint8)
+
+    class FakeCapture:
+        def isOpened(self):
+            return True
+
+        def read(self):
+            grabber._running = False
+            return True, frame
+
+    grabber._capture = FakeCapture()
+    grabber._running = True
+    await grabber._capture_loop()
+
+    assert sent == []
+    assert grabber.state.frames_captured == 1
+    assert grabber.state.frames_skipped_pressure == 1
@@ -0,0 +1,230 @@
+"""Testes para a análise de frames em lote e o mosaico."""
+
+import asyncio
+import json
+import uuid
+from typing import List, Optional
+
+import cv2
+import numpy as np
+import pytest
+
+from src.analysis.base import AnalysisResult, BaseLLMVision
+from src.analysis.mosaic import build_mosaic, mosaic_grid
+from src.analysis.resilience import ResilientVision
+from src.capture.memory_budget import InFlightBudget
+from src.capture.queue import FrameQueue
+
+
+def encode(frame: np.ndarray) -> bytes:
+    _, buffer = cv2.imencode(".jpg", frame)
+    return buffer.tobytes()
+
+
+def frames_response(ids: List[int]) -> str:
+    return json.dumps(
+        {
+            "frames": [
+                {"id": i, "description": f"frame {i}", "keywords": [f"k{i}"]}
+                for i in ids
+            ]
+        }
+    )
+
+
+class BatchVision(BaseLLMVision):
+    """Provedor falso que responde lotes com os ids informados."""
+
+    def __init__(self, batch_mode: Optional[str], response_ids: List[int]):
+        super().__init__(api_key="test", model="batch-model")
+        self.batch_mode = batch_mode
+        self.response_ids = response_ids
+        self.batch_requests: List[List[bytes]] = []
+        self.frame_requests: List[bytes] = []
+        self.prompts: List[str] = []
+
+    @property
+    def provider_name(self) -> str:
+        return "fake"
+
+    async def analyze_frame(self, image_data, prompt=None) -> AnalysisResult:
+        self.frame_requests.append(image_data)
+        self.prompts.append(prompt)
+        if prompt and "mosaico" in prompt:
+            return AnalysisResult(
+                description="mosaico", raw_response=frames_response(self.response_ids)
+            )
+        return AnalysisResult(description="individual", provider=self.provider_name)
+
+    async def _request_images(self, images, prompt) -> str:
+        self.batch_requests.append(images)
+        self.prompts.append(prompt)
+        return "```json\n" + frames_response(self.response_ids) + "\n```"
+
+
+@pytest.mark.asyncio
+async def test_multi_image_batch_is_split_by_id():
+    """Um lote vira uma requisição; os resultados voltam na ordem das imagens."""
+    vision = BatchVision("multi_image", response_ids=[3, 1, 2])
+
+    results = await vision.analyze_batch([b"a", b"b", b"c"])
+
+    assert len(vision.batch_requests) == 1
+    assert "3 imagens" in vision.prompts[0]
+    assert [r.description for r in results] == ["frame 1", "frame 2", "frame 3"]
+    assert results[1].keywords == ["k2"]
+    assert vision.frame_requests == []
+
+
+@pytest.mark.asyncio
+async def test_missing_frames_are_analyzed_individually():
+    """Frames ausentes na resposta do lote são reanalisados um a um."""
+    vision = BatchVision("multi_image", response_ids=[1])
+
+    results = await vision.analyze_batch([b"a", b"b"])
+
+    assert results[0].description == "frame 1"
+    assert results[1].description == "individual"
+    assert vision.frame_requests == [b"b"]
+
+
+@pytest.mark.asyncio
+async def test_multi_image_without_override_requests_each_image():
+    """Sem _request_images próprio, cada imagem do lote vira uma requisição."""
+
+    class PlainVision(BaseLLMVision):
+        batch_mode = "multi_image"
+
+        @property
+        def provider_name(self) -> str:
+            return "fake"
+
+        async def analyze_frame(self, image_data, prompt=None) -> AnalysisResult:
+            return AnalysisResult(
+                description=f"frame {image_data.decode()}", keywords=["k"]
+            )
+
+    vision = PlainVision(api_key="test", model="plain-model")
+
+    results = await vision.analyze_batch([b"a", b"b"])
+
+    assert [r.description for r in results] == ["frame a", "frame b"]
+    assert results[1].keywords == ["k"]
+
+
+@pytest.mark.asyncio
+async def test_mosaic_batch_sends_single_image():
+    """Provedores com batch_mode='mosaic' recebem uma única imagem em grade."""
+    frame = encode(np.full((120, 160, 3), 128, dtype=np.uint8))
+    vision = BatchVision("mosaic", response_ids=[1, 2, 3])
+
+    results = await vision.analyze_batch([frame, frame, frame])
+
+    assert len(vision.frame_requests) == 1
+    mosaic = cv2.imdecode(
+        np.frombuffer(vision.frame_requests[0], dtype=np.uint8), cv2.IMREAD_COLOR
+    )
+    assert mosaic is not None
+    assert [r.description for r in results] == ["frame 1", "frame 2", "frame 3"]
+
+
+@pytest.mark.asyncio
+async def test_without_batch_mode_frames_are_analyzed_separately():
+    """Sem suporte a lote, cada frame é analisado individualmente."""
+    vision = BatchVision(None, response_ids=[])
+    results = await vision.analyze_batch([b"a", b"b"])
+    assert [r.description for r in results] == ["individual", "individual"]
+
+
+@pytest.mark.asyncio
+async def test_resilient_wrapper_forwards_batches():
+    """ResilientVision repassa o lote ao provedor interno."""
+    inner = BatchVision("multi_image", response_ids=[1, 2])
+    results = await ResilientVision(inner).analyze_batch([b"a", b"b"])
+    assert len(inner.batch_requests) == 1
+    assert len(results) == 2
+
+
+def test_build_mosaic_grid():
+    """O mosaico usa a grade mais quadrada e ignora frames inválidos."""
+    assert mosaic_grid(1) == (1, 1)
+    assert mosaic_grid(4) == (2, 2)
+    assert mosaic_grid(5) == (2, 3)
+
+    frame = encode(np.zeros((480, 640, 3), dtype=np.uint8))
+    data = build_mosaic([frame, frame, b"invalido", frame], max_side=1024)
+    mosaic = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert mosaic.shape[:2] == (2 * 384, 2 * 512)
+
+
+@pytest.mark.asyncio
+async def test_queue_gathers_batches_by_size_and_wait():
+    """Os workers juntam frames até o tamanho do lote ou o tempo limite."""
+    batches: List[int] = []
+    done = asyncio.Event()
+
+    async def process_batch(items):
+        batches.append(len(items))
+        if sum(batches) == 5:
+            done.set()
+
+    queue = FrameQueue(
+        max_size=10,
+        num_workers=1,
+        batch_processor=process_batch,
+        batch_size=3,
+        batch_wait=0.05,
+    )
+    camera_id = uuid.uuid4()
+    for i in range(5):
+        await queue.put(camera_id, b"frame", float(i))
+
+    await queue.start_workers()
+    await asyncio.wait_for(done.wait(), timeout=3)
+    await queue.stop_workers()
+
+    assert batches == [3, 2]
+    stats = queue.get_stats()
+    assert stats["processed"] == 5
+    assert stats["batches"] == 2
+    assert queue.size == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_worker_returns_gathered_frames_to_queue():
+    """Frames já juntados ao lote voltam à fila quando o worker é cancelado."""
+    batches: List[int] = []
+
+    async def process_batch(items):
+        batches.append(len(items))
+
+    budget = InFlightBudget(max_bytes=1024)
+    queue = FrameQueue(
+        max_size=10,
+        num_workers=1,
+        budget=budget,
+        batch_processor=process_batch,
+        batch_size=3,
+        batch_wait=5.0,
+    )
+    camera_id = uuid.uuid4()
+    for i in range(2):
+        budget.acquire(camera_id, len(b"frame"))
+        await queue.put(camera_id, b"frame", float(i))
+
+    # O worker junta os dois frames e fica esperando o terceiro
+    await queue.start_workers()
+    await asyncio.sleep(0.1)
+    await queue.stop_workers()
+
+    assert batches == []
+    assert queue.size == 2
+    assert budget.used_bytes == 2 * len(b"frame")
+
+    queue.batch_wait = 0.01
+    await queue.start_workers()
+    await queue.wait_empty(timeout=3)
+    await queue.stop_workers()
+
+    assert batches == [2]
+    assert budget.used_bytes == 0
@@ -0,0 +1,157 @@
+"""Testes para a análise em cascata (triagem + modelo principal)."""
+
+import uuid
+from typing import List, Optional
+
+import pytest
+
+from src.alerts.detector import AlertRule, KeywordDetector
+from src.analysis.base import AnalysisResult, BaseLLMVision
+from src.analysis.cascade import CascadeVision
+
+
+class FakeVision(BaseLLMVision):
+    """Provedor falso com resultado fixo."""
+
+    def __init__(
+        self,
+        provider: str,
+        keywords: Optional[List[str]] = None,
+        confidence: Optional[float] = 0.9,
+        error: Optional[Exception] = None,
+    ):
+        super().__init__(api_key="test", model=f"{provider}-model")
+        self._provider = provider
+        self.keywords = keywords or []
+        self.confidence = confidence
+        self.error = error
+        self.calls = 0
+
+    @property
+    def provider_name(self) -> str:
+        return self._provider
+
+    async def analyze_frame(self, image_data, prompt=None) -> AnalysisResult:
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return AnalysisResult(
+            description=f"cena vista por {self._provider}",
+            keywords=self.keywords,
+            confidence=self.confidence,
+            provider=self._provider,
+            model=self.model,
+            processing_time_ms=10,
+        )
+
+
+def make_detector(*keywords: str) -> KeywordDetector:
+    detector = KeywordDetector()
+    detector.add_rule(
+        AlertRule(
+            id=uuid.uuid4(),
+            name="Intrusão",
+            keywords=list(keywords),
+            phone_numbers=["+5511999999999"],
+        )
+    )
+    return detector
+
+
+@pytest.mark.asyncio
+async def test_confident_triage_is_not_escalated():
+    """Triagem confiante e sem keywords de alerta não chama o modelo principal."""
+    triage = FakeVision("lmstudio", keywords=["carro", "rua"], confidence=0.9)
+    premium = FakeVision("openai")
+    cascade = CascadeVision(
+        triage, premium, alert_matcher=make_detector("pessoa").match_keywords
+    )
+
+    result = await cascade.analyze_frame(b"frame")
+
+    assert result.provider == "lmstudio"
+    assert not result.escalated
+    assert premium.calls == 0
+    assert cascade.get_stats()["escalation_rate"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_alert_keywords_escalate():
+    """Keywords de regras ativas levam o frame ao modelo principal."""
+    triage = FakeVision("lmstudio", keywords=["Pessoa", "portão"], confidence=0.95)
+    premium = FakeVision("openai", keywords=["pessoa", "pulando", "portão"])
+    cascade = CascadeVision(
+        triage, premium, alert_matcher=make_detector("pessoa").match_keywords
+    )
+
+    result = await cascade.analyze_frame(b"frame")
+
+    assert result.provider == "openai"
+    assert result.escalated
+    assert result.triage.provider == "lmstudio"
+    assert result.to_dict()["triage"]["keywords"] == ["Pessoa", "portão"]
+    assert result.llm_calls == 2
+    stats = cascade.get_stats()
+    assert stats["escalation_reasons"]["alert_keywords"] == 1
+
+
+@pytest.mark.asyncio
+async def test_low_confidence_escalates():
+    """Confiança abaixo do limite (ou ausente) também escala."""
+    premium = FakeVision("openai")
+    for confidence in (0.3, None):
+        cascade = CascadeVision(
+            FakeVision("lmstudio", confidence=confidence), premium, min_confidence=0.6
+        )
+        result = await cascade.analyze_frame(b"frame")
+        assert result.escalated
+        assert cascade.get_stats()["escalation_reasons"]["low_confidence"] == 1
+
+
+@pytest.mark.asyncio
+async def test_triage_failure_uses_premium():
+    """Se a triagem falhar, o modelo principal analisa o frame."""
+    cascade = CascadeVision(
+        FakeVision("lmstudio", error=ConnectionError("offline")), FakeVision("openai")
+    )
+
+    result = await cascade.analyze_frame(b"frame")
+
+    assert result.provider == "openai"
+    assert result.triage is None
+    assert cascade.get_stats()["escalation_reasons"]["triage_error"] == 1
+
+
+@pytest.mark.asyncio
+async def test_premium_failure_keeps_triage_result():
+    """Se o modelo principal falhar, o evento usa o resultado da triagem."""
+    cascade = CascadeVision(
+        FakeVision("lmstudio", confidence=0.1),
+        FakeVision("openai", error=RuntimeError("503")),
+    )
+
+    result = await cascade.analyze_frame(b"frame")
+
+    assert result.provider == "lmstudio"
+    assert not result.escalated
+    assert result.llm_calls == 2
+    assert cascade.get_stats()["premium_failures"] == 1
+
+
+def test_match_keywords_ignores_cooldown_and_disabled_rules():
+    """match_keywords não registra alertas e ignora regras desativadas."""
+    detector = make_detector("pessoa", "arma")
+    detector.add_rule(
+        AlertRule(
+            id=uuid.uuid4(),
+            name="Desativada",
+            keywords=["carro"],
+            phone_numbers=[],
+            enabled=False,
+        )
+    )
+
+    assert detector.match_keywords("Uma pessoa perto do carro") == ["pessoa"]
+    assert detector.match_keywords("cena", ["arma", "pessoa"]) == ["pessoa", "arma"]
+    # Sem efeito colateral: detect ainda dispara normalmente
+    assert detector.detect("uma pessoa")
@@ -0,0 +1,196 @@
+"""Testes para o spool em disco de frames."""
+
+import asyncio
+import uuid
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.capture.queue import FrameQueue
+from src.capture.spool import FrameSpool
+
+
+def make_spool(path, max_bytes=1024 * 1024, segment_bytes=256):
+    spool = FrameSpool(
+        path=str(path), max_bytes=max_bytes, segment_bytes=segment_bytes
+    )
+    spool.open()
+    return spool
+
+
+def test_append_and_pop_preserve_order(tmp_path):
+    """Frames são lidos na ordem em que foram gravados, entre segmentos."""
+    spool = make_spool(tmp_path)
+    camera_id = uuid.uuid4()
+
+    for i in range(10):
+        assert spool.append(camera_id, f"frame_{i}".encode() * 10, float(i))
+
+    assert spool.pending == 10
+    assert spool.get_stats()["segments"] > 1
+
+    timestamps = []
+    while (record := spool.pop()) is not None:
+        assert record[0] == camera_id
+        timestamps.append(record[2])
+
+    assert timestamps == [float(i) for i in range(10)]
+    assert spool.pending == 0
+
+
+def test_spool_survives_restart(tmp_path):
+    """Frames pendentes e posição de leitura sobrevivem a um restart."""
+    spool = make_spool(tmp_path)
+    camera_id = uuid.uuid4()
+    for i in range(5):
+        spool.append(camera_id, b"x" * 50, float(i))
+
+    assert spool.pop()[2] == 0.0
+    assert spool.pop()[2] == 1.0
+    spool.close()
+
+    reopened = make_spool(tmp_path)
+    assert reopened.pending == 3
+    assert reopened.pop()[2] == 2.0
+
+
+def test_partial_record_is_truncated_on_open(tmp_path):
+    """Registro parcial (crash durante a escrita) é descartado na recuperação."""
+    spool = make_spool(tmp_path, segment_bytes=1024 * 1024)
+    spool.append(uuid.uuid4(), b"a" * 100, 1.0)
+    spool.close()
+
+    segment = next(tmp_path.glob("*.seg"))
+    with open(segment, "ab") as f:
+        f.write(b"CFS1garbage")
+
+    reopened = make_spool(tmp_path)
+    assert reopened.pending == 1
+    assert reopened.pop()[2] == 1.0
+    assert reopened.pop() is None
+
+
+def test_retention_budget_drops_oldest_segments(tmp_path):
+    """Quando o orçamento de bytes estoura, os segmentos mais antigos saem."""
+    spool = make_spool(tmp_path, max_bytes=600, segment_bytes=200)
+    camera_id = uuid.uuid4()
+
+    for i in range(20):
+        spool.append(camera_id, b"y" * 100, float(i))
+
+    assert spool.total_bytes <= 600
+    assert spool.get_stats()["expired"] > 0
+    # O frame mais recente continua disponível
+    last = None
+    while (record := spool.pop()) is not None:
+        last = record
+    assert last[2] == 19.0
+
+
+def test_prepend_places_frames_before_pending(tmp_path):
+    """Frames gravados no shutdown são lidos antes dos já enviados ao spool."""
+    spool = make_spool(tmp_path)
+    camera_id = uuid.uuid4()
+    for i in range(3, 6):
+        spool.append(camera_id, b"z" * 40, float(i))
+    assert spool.pop()[2] == 3.0
+
+    spool.prepend([(camera_id, b"m" * 40, 1.0), (camera_id, b"m" * 40, 2.0)])
+
+    assert [spool.pop()[2] for _ in range(4)] == [1.0, 2.0, 4.0, 5.0]
+    assert spool.pop() is None
+
+
+@pytest.mark.asyncio
+async def test_queue_overflow_goes_to_spool_and_is_drained(tmp_path):
+    """Frames que não cabem na fila vão para o spool e voltam em ordem."""
+    processed = []
+
+    async def processor(item):
+        processed.append(item.timestamp)
+
+    spool = make_spool(tmp_path)
+    queue = FrameQueue(processor=processor, max_size=2, num_workers=1, spool=spool)
+    camera_id = uuid.uuid4()
+
+    for i in range(6):
+        assert await queue.put(camera_id, b"frame", float(i))
+
+    assert queue.size == 2
+    assert queue.spool_pending == 4
+    assert queue.dropped_count == 0
+
+    await queue.start_workers()
+    for _ in range(10):
+        await queue.wait_empty(timeout=2.0)
+        if len(processed) == 6:
+            break
+    await queue.stop_workers()
+
+    assert processed == [float(i) for i in range(6)]
+
+
+@pytest.mark.asyncio
+async def test_flush_to_spool_on_shutdown(tmp_path):
+    """flush_to_spool preserva os frames da fila em memória."""
+    spool = make_spool(tmp_path)
+    queue = FrameQueue(processor=AsyncMock(), max_size=10, num_workers=0, spool=spool)
+    camera_id = uuid.uuid4()
+
+    await queue.put(camera_id, b"frame_1", 1.0)
+    await queue.put(camera_id, b"frame_2", 2.0)
+
+    written = await queue.flush_to_spool()
+    spool.close()
+
+    assert written == 2
+    assert queue.size == 0
+
+    reopened = make_spool(tmp_path)
+    assert reopened.pop()[1] == b"frame_1"
+    assert reopened.pop()[1] == b"frame_2"
+
+
+def test_prepend_respects_byte_budget(tmp_path):
+    """O prepend descarta os frames mais antigos que não cabem no orçamento."""
+    spool = make_spool(tmp_path, max_bytes=300)
+    camera_id = uuid.uuid4()
+    spool.append(camera_id, b"z" * 60, 10.0)
+
+    records = [(camera_id, b"m" * 60, float(i)) for i in range(5)]
+    written = spool.prepend(records)
+
+    assert written == 2
+    assert spool.total_bytes <= 300
+    assert spool.get_stats()["expired"] == 3
+    assert [spool.pop()[2] for _ in range(3)] == [3.0, 4.0, 10.0]
+    assert spool.pop() is None
+
+
+@pytest.mark.asyncio
+async def test_frame_in_flight_at_shutdown_is_flushed_to_spool(tmp_path):
+    """O frame em processamento quando os workers param vai para o spool."""
+    started = asyncio.Event()
+
+    async def processor(item):
+        started.set()
+        await asyncio.sleep(10)
+
+    spool = make_spool(tmp_path)
+    queue = FrameQueue(processor=processor, max_size=10, num_workers=1, spool=spool)
+    camera_id = uuid.uuid4()
+    await queue.put(camera_id, b"frame_1", 1.0)
+    await queue.put(camera_id, b"frame_2", 2.0)
+
+    await queue.start_workers()
+    await asyncio.wait_for(started.wait(), timeout=2)
+    await queue.stop_workers()
+
+    written = await queue.flush_to_spool()
+    queue.close()
+    spool.close()
+
+    assert written == 2
+    reopened = make_spool(tmp_path)
+    assert sorted(reopened.pop()[2] for _ in range(2)) == [1.0, 2.0]
+    assert reopened.pop() is None
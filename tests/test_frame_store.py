@@ -0,0 +1,149 @@
+"""Testes do armazenamento de frames particionado por câmera e hora."""
+
+import os
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.routes import events as events_routes
+from src.storage import get_db
+from src.storage.frames import FrameStore, frame_store
+from src.storage.repository import EventRepository
+
+CAMERA_ID = uuid.UUID("6f1c1a52-0000-4000-8000-000000000001")
+
+
+def epoch(*args) -> float:
+    """Epoch de uma data UTC."""
+    return (datetime(*args) - datetime(1970, 1, 1)).total_seconds()
+
+
+def test_save_shards_by_camera_and_hour(tmp_path):
+    """O frame vai para <câmera>/AAAA/MM/DD/HH e a chave é relativa à raiz."""
+    store = FrameStore(str(tmp_path))
+
+    key = store.save(CAMERA_ID, b"jpeg", epoch(2025, 3, 7, 14, 5, 30))
+
+    assert key == f"{CAMERA_ID}/2025/03/07/14/1741356330000.jpg"
+    assert (tmp_path / key).read_bytes() == b"jpeg"
+    assert store.resolve(key) == (tmp_path / key).resolve()
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_dedup_writes_identical_frames_once_per_hour(tmp_path):
+    """Frames idênticos na mesma hora compartilham o arquivo."""
+    store = FrameStore(str(tmp_path), dedup=True)
+
+    first = store.save(CAMERA_ID, b"cena parada", epoch(2025, 3, 7, 14, 0, 1))
+    second = store.save(CAMERA_ID, b"cena parada", epoch(2025, 3, 7, 14, 59, 0))
+    other = store.save(CAMERA_ID, b"movimento", epoch(2025, 3, 7, 14, 59, 1))
+    next_hour = store.save(CAMERA_ID, b"cena parada", epoch(2025, 3, 7, 15, 0, 0))
+
+    assert first == second
+    assert other != first
+    assert next_hour.startswith(f"{CAMERA_ID}/2025/03/07/15/")
+    assert len(list(tmp_path.rglob("*.jpg"))) == 3
+    stats = store.get_stats()
+    assert stats["writes"] == 3
+    assert stats["dedup_hits"] == 1
+    assert stats["bytes_saved"] == len(b"cena parada")
+
+
+def test_resolve_legacy_paths_and_rejects_escape(tmp_path, monkeypatch):
+    """Caminhos completos antigos resolvem; chaves fora da raiz não."""
+    root = tmp_path / "frames"
+    root.mkdir()
+    legacy = tmp_path / f"{CAMERA_ID}_1700000000000.jpg"
+    legacy.write_bytes(b"antigo")
+    store = FrameStore(str(root))
+
+    assert store.resolve(str(legacy)) == legacy
+    assert store.resolve(f"../{legacy.name}") is None
+    assert store.resolve(None) is None
+    assert store.resolve(f"{CAMERA_ID}/2025/01/01/00/nao-existe.jpg") is None
+
+    # A chave de fuga existe a partir do diretório de trabalho, mas não é servida
+    monkeypatch.chdir(root)
+    assert store.resolve(f"../{legacy.name}") is None
+
+
+def test_resolve_legacy_relative_paths_only_under_root(tmp_path, monkeypatch):
+    """Caminhos relativos antigos só resolvem no formato <raiz>/<arquivo>."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "frames").mkdir()
+    (tmp_path / "frames" / "cam_1.jpg").write_bytes(b"antigo")
+    (tmp_path / "segredo.jpg").write_bytes(b"fora da raiz")
+    store = FrameStore("frames")
+
+    expected = (tmp_path / "frames" / "cam_1.jpg").resolve()
+    assert store.resolve("frames/cam_1.jpg") == expected
+    assert store.resolve("./frames/cam_1.jpg") == expected
+    assert store.resolve("cam_1.jpg") == expected
+    assert store.resolve("segredo.jpg") is None
+    assert store.resolve("frames/../segredo.jpg") is None
+
+
+def test_purge_removes_whole_directories(tmp_path):
+    """A retenção apaga dias e horas inteiros antes do corte."""
+    store = FrameStore(str(tmp_path))
+    old_day = store.save(CAMERA_ID, b"a", epoch(2025, 3, 5, 10))
+    old_hour = store.save(CAMERA_ID, b"b", epoch(2025, 3, 7, 9, 30))
+    kept_hour = store.save(CAMERA_ID, b"c", epoch(2025, 3, 7, 12, 10))
+    kept_day = store.save(CAMERA_ID, b"d", epoch(2025, 3, 8, 1))
+
+    # Layout plano antigo e diretórios que não são datas
+    legacy = tmp_path / f"{CAMERA_ID}_1.jpg"
+    legacy.write_bytes(b"antigo")
+    os.utime(legacy, (epoch(2025, 1, 1), epoch(2025, 1, 1)))
+    other = tmp_path / "annotated" / str(CAMERA_ID) / "2020"
+    other.mkdir(parents=True)
+
+    removed = store.purge_before(datetime(2025, 3, 7, 12))
+
+    # Dia 05 inteiro, hora 09 do dia 07 e o arquivo antigo
+    assert removed == 3
+    assert not (tmp_path / old_day).exists()
+    assert not (tmp_path / f"{CAMERA_ID}/2025/03/05").exists()
+    assert not (tmp_path / old_hour).exists()
+    assert (tmp_path / kept_hour).exists()
+    assert (tmp_path / kept_day).exists()
+    assert not legacy.exists()
+    assert other.exists()
+
+
+def test_event_frame_route_reads_through_store(tmp_path, monkeypatch):
+    """A rota do frame resolve a chave do evento no frame store."""
+    monkeypatch.setattr(frame_store, "root", tmp_path)
+    key = frame_store.save(CAMERA_ID, b"jpeg-bytes", epoch(2025, 3, 7, 14))
+    events = {
+        "ok": SimpleNamespace(frame_path=key),
+        "missing": SimpleNamespace(frame_path=f"{CAMERA_ID}/2025/03/07/14/x.jpg"),
+    }
+    ids = {name: uuid.uuid4() for name in events}
+
+    async def get_by_id(self, event_id):
+        for name, value in ids.items():
+            if value == event_id:
+                return events[name]
+        return None
+
+    monkeypatch.setattr(EventRepository, "get_by_id", get_by_id)
+    app = FastAPI()
+    app.include_router(events_routes.router)
+
+    async def no_db():
+        yield None
+
+    app.dependency_overrides[get_db] = no_db
+    client = TestClient(app)
+
+    response = client.get(f"/events/{ids['ok']}/frame")
+    assert response.status_code == 200
+    assert response.content == b"jpeg-bytes"
+
+    response = client.get(f"/events/{ids['missing']}/frame")
+    assert response.status_code == 404
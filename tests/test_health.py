@@ -0,0 +1,171 @@
+"""Testes da verificação de saúde em segundo plano."""
+
+import asyncio
+
+import pytest
+
+from src.analysis.cascade import CascadeVision
+from src.analysis.factory import LLMVisionFactory
+from src.analysis.mock_vision import MockVision
+from src.analysis.resilience import CircuitBreaker, ResilientVision
+from src.analysis.router import RouterVision
+from src.health import HealthProber
+
+
+class CountingCheck:
+    """Verificação que conta as chamadas e retorna um valor fixo."""
+
+    def __init__(self, value=True, delay: float = 0.0, error: Exception = None):
+        self.value = value
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.value
+
+
+@pytest.mark.asyncio
+async def test_reads_use_cache_without_calling_check():
+    """Ler o resultado não dispara a verificação."""
+    prober = HealthProber()
+    check = CountingCheck(True)
+    prober.register("llm", check, interval=60)
+
+    await prober.start()
+    await asyncio.sleep(0.01)
+    try:
+        for _ in range(100):
+            assert prober.is_healthy("llm")
+            prober.snapshot()
+        assert check.calls == 1
+        snapshot = prober.snapshot()["llm"]
+        assert snapshot["healthy"] is True
+        assert snapshot["checked_at"]
+        assert snapshot["age_seconds"] >= 0
+    finally:
+        await prober.stop()
+
+
+@pytest.mark.asyncio
+async def test_background_loop_refreshes_on_its_own_interval():
+    """Cada dependência é verificada no seu próprio intervalo."""
+    prober = HealthProber()
+    fast = CountingCheck(True)
+    slow = CountingCheck(True)
+    prober.register("database", fast, interval=0.01)
+    prober.register("whatsapp", slow, interval=60)
+
+    await prober.start()
+    await asyncio.sleep(0.1)
+    await prober.stop()
+
+    assert fast.calls > 3
+    assert slow.calls == 1
+    stats = prober.get_stats()
+    assert stats["database"]["runs"] == fast.calls
+
+
+@pytest.mark.asyncio
+async def test_timeout_and_error_mark_unhealthy():
+    """Verificações lentas ou com erro ficam como não saudáveis."""
+    prober = HealthProber()
+    prober.register("llm", CountingCheck(True, delay=1.0), interval=60, timeout=0.01)
+    prober.register("whatsapp", CountingCheck(error=RuntimeError("offline")), interval=60)
+
+    await prober.refresh_all()
+
+    llm = prober.get("llm")
+    assert llm.healthy is False
+    assert "Timeout" in llm.error
+    whatsapp = prober.get("whatsapp")
+    assert whatsapp.healthy is False
+    assert whatsapp.error == "offline"
+    assert prober.get_stats()["whatsapp"]["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dict_results_are_interpreted():
+    """Retornos em dict usam "healthy" ou "status" e ficam em detail."""
+    prober = HealthProber()
+    prober.register("llm", CountingCheck({"healthy": True, "model": "x"}), interval=60)
+    prober.register("whatsapp", CountingCheck({"status": "disconnected"}), interval=60)
+
+    await prober.refresh_all()
+
+    assert prober.is_healthy("llm")
+    assert prober.get("llm").detail["model"] == "x"
+    assert not prober.is_healthy("whatsapp")
+    assert prober.get("unknown") is None
+    assert not prober.is_healthy("unknown")
+
+
+@pytest.mark.asyncio
+async def test_start_does_not_wait_for_first_check():
+    """A primeira verificação roda em segundo plano, sem segurar o startup."""
+    prober = HealthProber()
+    check = CountingCheck(True, delay=0.2)
+    prober.register("llm", check, interval=60)
+
+    started = asyncio.get_running_loop().time()
+    await prober.start()
+    try:
+        assert asyncio.get_running_loop().time() - started < 0.1
+        assert prober.get("llm") is None
+        await asyncio.sleep(0.3)
+        assert prober.is_healthy("llm")
+        assert check.calls == 1
+    finally:
+        await prober.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_background_tasks():
+    """stop() encerra as tarefas e novas verificações não acontecem."""
+    prober = HealthProber()
+    check = CountingCheck(True)
+    prober.register("database", check, interval=0.01)
+
+    await prober.start()
+    await prober.stop()
+    calls = check.calls
+    await asyncio.sleep(0.05)
+
+    assert check.calls == calls
+
+
+@pytest.mark.asyncio
+async def test_llm_health_reports_every_backend_of_the_instance(monkeypatch):
+    """A verificação do LLM usa a instância em uso e reporta pool, triagem e circuito."""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    broken = ResilientVision(MockVision(), circuit_breaker=breaker)
+    breaker.record_failure()
+    router = RouterVision([broken, MockVision()])
+    cascade = CascadeVision(MockVision(), router)
+    monkeypatch.setattr(LLMVisionFactory, "_instance", cascade)
+
+    report = await LLMVisionFactory.check_instance_health()
+
+    assert LLMVisionFactory._instance is cascade
+    assert report["provider"] == "cascade" and report["healthy"] is True
+    assert report["triage"]["healthy"] is True
+    backends = report["premium"]["backends"]
+    assert backends[0]["circuit"] == "open"
+    assert backends[0]["healthy"] is False and not backends[0]["in_rotation"]
+    assert backends[1]["healthy"] is True
+
+    breaker_two = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    breaker_two.record_failure()
+    monkeypatch.setattr(
+        LLMVisionFactory,
+        "_instance",
+        RouterVision([broken, ResilientVision(MockVision(), circuit_breaker=breaker_two)]),
+    )
+    report = await LLMVisionFactory.check_instance_health()
+    assert report["healthy"] is False
+    assert report["error"]
@@ -0,0 +1,144 @@
+"""Testes para a preparação de imagens enviadas ao LLM."""
+
+import cv2
+import numpy as np
+
+from src.analysis.image_prep import (
+    ImagePreparer,
+    ImageProfile,
+    get_profile,
+    motion_crop_region,
+)
+from src.analysis.metrics import ProviderMetrics
+from src.capture.motion_detector import MotionDetector
+
+
+def encode(frame: np.ndarray, quality: int = 85) -> bytes:
+    _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+
+def decode(data: bytes) -> np.ndarray:
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def make_frame(width: int = 1920, height: int = 1080) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+
+def test_downscale_to_provider_profile():
+    """Frame Full HD é reduzido para o maior lado do perfil do provedor."""
+    original = encode(make_frame())
+    prepared = ImagePreparer().prepare(original, get_profile("openai"))
+
+    image = decode(prepared.data)
+    assert max(image.shape[:2]) == 512
+    assert (prepared.width, prepared.height) == (512, 288)
+    assert prepared.size < len(original)
+    assert prepared.original_bytes == len(original)
+
+
+def test_small_frame_is_sent_unchanged():
+    """Frame menor que o perfil não é recodificado."""
+    original = encode(make_frame(320, 240))
+    prepared = ImagePreparer().prepare(original, get_profile("anthropic"))
+
+    assert prepared.data is original
+    assert not prepared.cropped
+
+
+def test_overrides_take_precedence_over_profile():
+    """max_side/jpeg_quality configurados sobrescrevem o perfil."""
+    preparer = ImagePreparer(max_side=256, jpeg_quality=50)
+    profile = preparer.resolve_profile(get_profile("gemini"))
+    assert profile == ImageProfile(max_side=256, jpeg_quality=50)
+
+    prepared = preparer.prepare(encode(make_frame()), get_profile("gemini"))
+    assert max(decode(prepared.data).shape[:2]) == 256
+
+
+def test_crop_to_motion_region():
+    """Com crop habilitado a imagem é recortada para a região com movimento."""
+    original = encode(make_frame())
+    preparer = ImagePreparer(crop_to_motion=True, crop_margin=0.1)
+
+    prepared = preparer.prepare(
+        original, ImageProfile(max_side=4096, jpeg_quality=80), [(800, 400, 200, 200)]
+    )
+
+    assert prepared.cropped
+    # Região mínima de 25% do frame em cada lado
+    assert prepared.width == 480
+    assert prepared.height == 270
+
+
+def test_crop_ignored_when_disabled_or_without_boxes():
+    """Sem crop habilitado ou sem caixas, o frame inteiro é mantido."""
+    original = encode(make_frame())
+    profile = ImageProfile(max_side=1024, jpeg_quality=80)
+
+    assert not ImagePreparer().prepare(original, profile, [(0, 0, 10, 10)]).cropped
+    assert not ImagePreparer(crop_to_motion=True).prepare(original, profile).cropped
+
+
+def test_motion_crop_region_union_and_clamp():
+    """A região é a união das caixas com margem, limitada ao frame."""
+    region = motion_crop_region(
+        [(100, 100, 200, 200), (500, 300, 100, 100)],
+        1280,
+        720,
+        margin=0.1,
+        min_fraction=0.0,
+    )
+    assert region == (50, 70, 600, 360)
+
+    # Caixa na borda: a região é deslocada para dentro do frame
+    x, y, w, h = motion_crop_region([(1200, 650, 80, 70)], 1280, 720)
+    assert x + w <= 1280 and y + h <= 720
+    assert x >= 0 and y >= 0
+
+    # Movimento no frame inteiro: sem recorte
+    assert motion_crop_region([(0, 0, 1280, 720)], 1280, 720) is None
+
+
+def test_invalid_image_is_passed_through():
+    """Bytes que não decodificam são enviados como estão."""
+    prepared = ImagePreparer().prepare(b"not a jpeg", get_profile("openai"))
+    assert prepared.data == b"not a jpeg"
+
+
+def test_motion_detector_boxes_scaled_to_frame():
+    """As caixas de movimento vêm em coordenadas do frame original."""
+    detector = MotionDetector(threshold=0.1)
+    background = np.zeros((720, 1280, 3), dtype=np.uint8)
+    for _ in range(3):
+        detector.detect_motion(background)
+
+    moved = background.copy()
+    cv2.rectangle(moved, (640, 360), (840, 560), (255, 255, 255), -1)
+    detector.detect_motion(moved)
+
+    boxes = detector.get_motion_boxes(1280, 720)
+    assert boxes
+    x, y, w, h = boxes[0]
+    assert 600 <= x <= 680 and 320 <= y <= 400
+    assert 150 <= w <= 260 and 150 <= h <= 260
+
+
+def test_provider_metrics():
+    """Métricas acumulam bytes enviados, economia e latência por provedor."""
+    metrics = ProviderMetrics()
+    metrics.record("openai", bytes_sent=30_000, latency_ms=1000, original_bytes=200_000)
+    metrics.record("openai", bytes_sent=20_000, latency_ms=3000, original_bytes=200_000)
+    metrics.record_error("openai")
+    metrics.record("gemini", bytes_sent=50_000, latency_ms=800)
+
+    stats = metrics.get_stats()
+    assert stats["openai"]["calls"] == 2
+    assert stats["openai"]["errors"] == 1
+    assert stats["openai"]["avg_bytes_sent"] == 25_000
+    assert stats["openai"]["bytes_saved"] == 350_000
+    assert stats["openai"]["avg_latency_ms"] == 2000
+    assert stats["openai"]["p95_latency_ms"] == 3000
+    assert stats["gemini"]["bytes_saved"] == 0
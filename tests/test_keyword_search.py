@@ -0,0 +1,165 @@
+"""Testes da busca de eventos por várias keywords."""
+
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from src.api.routes import events as events_routes
+from src.storage import get_db
+from src.storage.repository import EventRepository
+
+
+class CapturingSession:
+    """Sessão que guarda o SQL gerado e retorna uma lista vazia."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: []))
+
+
+@pytest.mark.asyncio
+async def test_any_keywords_is_one_overlap_query():
+    """match=any gera uma única consulta com && ordenada e limitada."""
+    session = CapturingSession()
+    repo = EventRepository(session)
+
+    await repo.search_by_keywords(
+        ["pessoa", "carro"],
+        camera_id=uuid.uuid4(),
+        start_date=datetime(2025, 1, 1),
+        end_date=datetime(2025, 2, 1),
+        limit=50,
+    )
+
+    assert len(session.statements) == 1
+    sql = session.statements[0]
+    assert "events.keywords && " in sql
+    assert "events.camera_id = " in sql
+    assert "events.timestamp >= " in sql
+    assert "events.timestamp <= " in sql
+    assert "ORDER BY events.timestamp DESC, events.id DESC" in sql
+    assert "LIMIT " in sql
+
+
+@pytest.mark.asyncio
+async def test_all_keywords_uses_containment():
+    """match=all exige todas as keywords com @>."""
+    session = CapturingSession()
+    repo = EventRepository(session)
+
+    await repo.search_by_keywords(["pessoa", "capacete"], match="all")
+
+    sql = session.statements[0]
+    assert "events.keywords @> " in sql
+    assert "&&" not in sql
+
+    with pytest.raises(ValueError):
+        await repo.search_by_keywords(["pessoa"], match="some")
+
+
+def make_event(timestamp: datetime, keywords) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        camera_id=uuid.uuid4(),
+        timestamp=timestamp,
+        description="evento",
+        keywords=keywords,
+        confidence=0.9,
+        frame_path=None,
+        annotated_frame_path=None,
+        annotated_frame_url=None,
+        llm_provider="mock",
+        llm_model="mock-vision",
+        processing_time_ms=10,
+        triage_result=None,
+        escalated=False,
+    )
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """API de eventos com ``find`` substituído por uma lista em memória."""
+    start = datetime(2025, 1, 1)
+    events = [
+        make_event(start + timedelta(minutes=i), kw)
+        for i, kw in enumerate(
+            [["pessoa"], ["carro"], ["pessoa", "carro"], ["moto"], ["carro"]]
+        )
+    ]
+    events.sort(key=lambda e: (e.timestamp, e.id), reverse=True)
+    calls = []
+
+    async def find(self, conditions, limit, offset=0, before=None):
+        calls.append(conditions)
+        (condition,) = conditions
+        wanted = set(condition.right.value)
+        match_all = "@>" in str(condition.compile(dialect=postgresql.dialect()))
+        rows = [
+            e
+            for e in events
+            if (wanted <= set(e.keywords) if match_all else wanted & set(e.keywords))
+            and (before is None or (e.timestamp, e.id) < before)
+        ]
+        return rows[offset : offset + limit]
+
+    monkeypatch.setattr(EventRepository, "find", find)
+
+    app = FastAPI()
+    app.include_router(events_routes.router)
+
+    async def no_db():
+        yield None
+
+    app.dependency_overrides[get_db] = no_db
+    test_client = TestClient(app)
+    test_client.events = events
+    test_client.calls = calls
+    return test_client
+
+
+def test_search_keywords_pages_combined_results(client):
+    """O limite vale para o resultado combinado e o cursor continua a busca."""
+    params = {"keywords": ["pessoa,carro", "carro"], "limit": 2}
+    body = client.get("/events/search/keywords", params=params).json()
+
+    assert body["keywords_searched"] == ["pessoa", "carro"]
+    assert body["match"] == "any"
+    assert len(body["events"]) == 2
+    assert body["next_cursor"]
+    assert len(client.calls) == 1
+
+    params["cursor"] = body["next_cursor"]
+    rest = client.get("/events/search/keywords", params=params).json()
+    found = [e["id"] for e in body["events"] + rest["events"]]
+    expected = [str(e.id) for e in client.events if {"pessoa", "carro"} & set(e.keywords)]
+    assert found == expected
+    assert rest["next_cursor"] is None
+
+
+def test_search_keywords_match_all(client):
+    """match=all retorna só eventos com todas as keywords."""
+    body = client.get(
+        "/events/search/keywords",
+        params={"keywords": "pessoa,carro", "match": "all"},
+    ).json()
+
+    assert [e["keywords"] for e in body["events"]] == [["pessoa", "carro"]]
+
+
+def test_search_keywords_validates_input(client):
+    """Modo inválido retorna 422 e keywords vazias retornam 400."""
+    response = client.get(
+        "/events/search/keywords", params={"keywords": "pessoa", "match": "some"}
+    )
+    assert response.status_code == 422
+
+    response = client.get("/events/search/keywords", params={"keywords": " , "})
+    assert response.status_code == 400
@@ -0,0 +1,210 @@
+"""Testes para o orçamento de chamadas ao LLM por câmera."""
+
+import uuid
+
+import numpy as np
+import pytest
+
+from src.capture.camera import CameraConfig
+from src.capture.frame_grabber import FrameGrabber
+from src.capture.llm_budget import LLMBudget, frame_score
+from src.capture.memory_budget import InFlightBudget
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_budget(calls_per_hour: float, clock: FakeClock) -> LLMBudget:
+    return LLMBudget(calls_per_hour=calls_per_hour, window_seconds=60, clock=clock)
+
+
+def test_disabled_budget_lets_everything_through():
+    """Sem orçamento configurado nenhum frame é filtrado."""
+    budget = LLMBudget(calls_per_hour=0)
+    assert all(budget.should_dispatch(uuid.uuid4(), 0.1) for _ in range(100))
+
+
+def test_budget_is_split_by_priority_weight():
+    """Câmeras de prioridade alta recebem mais cota por janela."""
+    clock = FakeClock()
+    budget = make_budget(calls_per_hour=360, clock=clock)  # 6 por janela
+    high, normal = uuid.uuid4(), uuid.uuid4()
+    budget.register_camera(high, "high")
+    budget.register_camera(normal, "normal")
+
+    # Ambas ativas na janela seguinte
+    budget.should_dispatch(high, 1.0)
+    budget.should_dispatch(normal, 1.0)
+    clock.now = 60
+
+    sent_high = sum(budget.should_dispatch(high, 1.0) for _ in range(10))
+    sent_normal = sum(budget.should_dispatch(normal, 1.0) for _ in range(10))
+    assert (sent_high, sent_normal) == (4, 2)
+    assert budget.get_camera_stats(normal)["filtered"] == 8
+
+
+def test_short_budget_prefers_high_scoring_frames():
+    """Com orçamento curto a câmera envia só os frames de maior pontuação."""
+    clock = FakeClock()
+    budget = make_budget(calls_per_hour=120, clock=clock)  # 2 por janela
+    camera = uuid.uuid4()
+    budget.register_camera(camera)
+
+    scores = [0.1, 0.9, 0.2, 0.8, 0.3, 0.7]
+    for score in scores:
+        budget.should_dispatch(camera, score)
+
+    # Na janela seguinte o limiar vem dos candidatos anteriores (2º maior)
+    clock.now = 60
+    sent = [score for score in scores if budget.should_dispatch(camera, score)]
+    assert sent == [0.9, 0.8]
+    assert budget.get_camera_stats(camera)["threshold"] == 0.8
+
+
+def test_fractional_quota_accumulates_across_windows():
+    """Cotas menores que uma chamada acumulam entre janelas."""
+    clock = FakeClock()
+    budget = make_budget(calls_per_hour=30, clock=clock)  # 0,5 por janela
+    camera = uuid.uuid4()
+    budget.register_camera(camera)
+
+    sent = 0
+    for window in range(4):
+        clock.now = window * 60
+        sent += sum(budget.should_dispatch(camera, 1.0) for _ in range(3))
+    assert sent == 2
+
+
+def test_frame_score_combines_motion_blobs_and_priority():
+    """Pontuação cresce com movimento, regiões e prioridade da câmera."""
+    assert frame_score(50, 0, "normal") == pytest.approx(0.5)
+    assert frame_score(50, 2, "normal") == pytest.approx(0.7)
+    assert frame_score(50, 2, "high") == pytest.approx(1.4)
+
+
+@pytest.mark.asyncio
+async def test_grabber_counts_frames_filtered_by_budget():
+    """Frames fora do orçamento não são enviados e são contados na câmera."""
+    clock = FakeClock()
+    budget = make_budget(calls_per_hour=60, clock=clock)  # 1 por janela
+    sent = []
+    config = CameraConfig(
+        id=uuid.uuid4(),
+        name="Garagem",
+        url="rtsp://test.com/stream",
+        frame_interval=1,
+        motion_detection_enabled=False,
+    )
+    grabber = FrameGrabber(
+        camera_config=config,
+        on_frame=lambda *args: sent.append(args),
+        llm_budget=budget,
+    )
+    budget.register_camera(config.id)
+    frame = np.random.randint(0, 255, (240, 320, 3), dtype=np.uint8)
+
+    class FakeCapture:
+        def isOpened(self):
+            return True
+
+        def read(self):
+            grabber._running = False
+            return True, frame
+
+    grabber._capture = FakeCapture()
+    for _ in range(3):
+        grabber._running = True
+        await grabber._capture_loop()
+
+    assert len(sent) == 1
+    assert grabber.state.frames_filtered_budget == 2
+
+
+def test_refund_returns_the_call_to_the_camera():
+    """Um frame liberado que não chega ao LLM devolve a chamada à cota."""
+    clock = FakeClock()
+    budget = make_budget(calls_per_hour=60, clock=clock)  # 1 por janela
+    camera = uuid.uuid4()
+    budget.register_camera(camera)
+
+    assert budget.should_dispatch(camera, 1.0)
+    assert not budget.should_dispatch(camera, 1.0)
+    budget.refund(camera)
+    assert budget.should_dispatch(camera, 1.0)
+
+    stats = budget.get_camera_stats(camera)
+    assert stats["spent"] == 1 and stats["refunded"] == 1
+    assert budget.get_stats()["dispatched"] == 1
+
+    # A devolução não passa do teto de crédito da janela
+    budget.refund(camera)
+    budget.refund(camera)
+    assert budget.get_camera_stats(camera)["credit"] == 1.0
+
+
+def test_extra_calls_are_charged_to_the_camera():
+    """Escaladas e hedges cobram as chamadas extras, abatidas nas janelas seguintes."""
+    clock = FakeClock()
+    budget = make_budget(calls_per_hour=120, clock=clock)  # 2 por janela
+    camera = uuid.uuid4()
+    budget.register_camera(camera)
+
+    assert budget.should_dispatch(camera, 1.0)
+    budget.charge(camera, 2)
+
+    # O frame custou 3 chamadas: a cota da janela acabou e sobrou dívida
+    assert not budget.should_dispatch(camera, 1.0)
+    stats = budget.get_camera_stats(camera)
+    assert stats["spent"] == 3 and stats["extra_calls"] == 2
+    assert stats["credit"] == -1.0
+
+    clock.now += 60
+    assert budget.should_dispatch(camera, 1.0)
+    assert not budget.should_dispatch(camera, 1.0)
+    assert budget.get_stats()["extra_calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_grabber_refunds_frames_skipped_after_the_budget_check():
+    """Frames pulados pelo orçamento de memória não gastam chamadas ao LLM."""
+    clock = FakeClock()
+    budget = make_budget(calls_per_hour=60, clock=clock)  # 1 por janela
+    memory = InFlightBudget(max_bytes=1)
+    config = CameraConfig(
+        id=uuid.uuid4(),
+        name="Garagem",
+        url="rtsp://test.com/stream",
+        frame_interval=1,
+        motion_detection_enabled=False,
+    )
+    grabber = FrameGrabber(
+        camera_config=config,
+        on_frame=lambda *args: None,
+        memory_budget=memory,
+        llm_budget=budget,
+    )
+    budget.register_camera(config.id)
+    frame = np.random.randint(0, 255, (240, 320, 3), dtype=np.uint8)
+
+    class FakeCapture:
+        def isOpened(self):
+            return True
+
+        def read(self):
+            grabber._running = False
+            return True, frame
+
+    grabber._capture = FakeCapture()
+    for _ in range(3):
+        grabber._running = True
+        await grabber._capture_loop()
+
+    # O JPEG não cabe no orçamento de memória: nenhum frame sai e nada é gasto
+    assert grabber.state.frames_filtered_budget == 0
+    assert budget.get_camera_stats(config.id)["refunded"] == 3
+    assert budget.get_camera_stats(config.id)["credit"] == 1.0
@@ -0,0 +1,136 @@
+"""Testes para o pool de endpoints do LM Studio."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.analysis.lmstudio_vision import LMStudioVision, parse_endpoints
+
+
+class ServerError(Exception):
+    def __init__(self, status_code: int = 503):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def fake_create(latency: float = 0.0, error: Exception = None, log: list = None):
+    """Substitui chat.completions.create de um endpoint."""
+
+    async def create(**kwargs):
+        if log is not None:
+            log.append(asyncio.current_task())
+        await asyncio.sleep(latency)
+        if error:
+            raise error
+        message = SimpleNamespace(
+            content='{"description": "pátio", "keywords": ["pátio"], "confidence": 0.8}'
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    return create
+
+
+def make_pool(*urls, **kwargs) -> LMStudioVision:
+    return LMStudioVision(model="qwen2-vl", base_urls=list(urls), **kwargs)
+
+
+def test_parse_endpoints_with_limits():
+    """Cada URL aceita um limite de concorrência com '#N'."""
+    assert parse_endpoints(
+        ["http://gpu1:1234/v1#4", " http://gpu2:1234/v1 ", ""], default_concurrency=2
+    ) == [("http://gpu1:1234/v1", 4), ("http://gpu2:1234/v1", 2)]
+
+
+@pytest.mark.asyncio
+async def test_least_outstanding_balancing():
+    """Requisições simultâneas se distribuem entre os endpoints."""
+    vision = make_pool("http://gpu1/v1", "http://gpu2/v1", max_concurrency=2)
+    calls = {e.url: [] for e in vision.endpoints}
+    for endpoint in vision.endpoints:
+        endpoint.client.chat.completions.create = fake_create(
+            latency=0.05, log=calls[endpoint.url]
+        )
+
+    results = await asyncio.gather(*(vision.analyze_frame(b"jpg") for _ in range(4)))
+
+    assert all(r.keywords == ["pátio"] for r in results)
+    assert [len(c) for c in calls.values()] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_endpoint_concurrency_limit():
+    """O semáforo limita as requisições simultâneas por endpoint."""
+    vision = make_pool("http://gpu1/v1#1")
+    endpoint = vision.endpoints[0]
+    active = 0
+    peak = 0
+
+    async def create(**kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        message = SimpleNamespace(content='{"description": "x", "keywords": []}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    endpoint.client.chat.completions.create = create
+    await asyncio.gather(*(vision.analyze_frame(b"jpg") for _ in range(3)))
+
+    assert peak == 1
+    assert endpoint.completed == 3
+
+
+@pytest.mark.asyncio
+async def test_failover_and_ejection():
+    """Endpoint com falhas seguidas é ejetado e os frames vão para outro."""
+    vision = make_pool(
+        "http://down/v1", "http://up/v1", eject_failures=2, eject_seconds=60
+    )
+    down, up = vision.endpoints
+    down.client.chat.completions.create = fake_create(error=ServerError(503))
+    up.client.chat.completions.create = fake_create()
+    # Força o endpoint com falha a ser escolhido primeiro
+    up.outstanding = 1
+
+    for _ in range(2):
+        result = await vision.analyze_frame(b"jpg")
+        assert result.description == "pátio"
+
+    stats = vision.get_stats()["endpoints"]
+    assert stats[0]["ejected"] and stats[0]["errors"] == 2
+    assert vision.pick_endpoint() is up
+
+
+@pytest.mark.asyncio
+async def test_readmission_after_ejection():
+    """Depois do tempo de ejeção o endpoint volta e é readmitido ao responder."""
+    vision = make_pool("http://gpu1/v1", eject_failures=1, eject_seconds=0.05)
+    endpoint = vision.endpoints[0]
+    endpoint.client.chat.completions.create = fake_create(error=ServerError(502))
+
+    with pytest.raises(ServerError):
+        await vision.analyze_frame(b"jpg")
+    assert vision.get_stats()["endpoints"][0]["ejected"]
+
+    await asyncio.sleep(0.06)
+    endpoint.client.chat.completions.create = fake_create()
+    await vision.analyze_frame(b"jpg")
+
+    stats = vision.get_stats()["endpoints"][0]
+    assert not stats["ejected"]
+    assert stats["ejections"] == 1
+    assert stats["throughput_per_minute"] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_eject():
+    """Erros 4xx são propagados sem contar para a ejeção."""
+    vision = make_pool("http://gpu1/v1", "http://gpu2/v1", eject_failures=1)
+    for endpoint in vision.endpoints:
+        endpoint.client.chat.completions.create = fake_create(error=ServerError(400))
+
+    with pytest.raises(ServerError):
+        await vision.analyze_frame(b"jpg")
+    assert not any(e["ejected"] for e in vision.get_stats()["endpoints"])
@@ -0,0 +1,103 @@
+"""Testes para o orçamento de memória de frames em trânsito."""
+
+import uuid
+
+import numpy as np
+import pytest
+
+from src.capture.camera import CameraConfig
+from src.capture.frame_grabber import FrameGrabber
+from src.capture.memory_budget import InFlightBudget
+from src.capture.queue import FrameQueue
+
+
+def make_grabber(budget, on_frame):
+    config = CameraConfig(
+        id=uuid.uuid4(),
+        name="Test Camera",
+        url="rtsp://test.com/stream",
+        frame_interval=2,
+        motion_detection_enabled=False,
+    )
+    return FrameGrabber(camera_config=config, on_frame=on_frame, memory_budget=budget)
+
+
+def test_budget_tracks_bytes_per_camera():
+    """Reservas e liberações são contabilizadas por câmera."""
+    budget = InFlightBudget(max_bytes=100)
+    cam_a, cam_b = uuid.uuid4(), uuid.uuid4()
+
+    assert budget.try_acquire(cam_a, 60)
+    assert budget.try_acquire(cam_b, 30)
+    assert not budget.try_acquire(cam_b, 20)
+    assert budget.bytes_for(cam_a) == 60
+    assert budget.bytes_for(cam_b) == 30
+
+    budget.release(cam_a, 60)
+    assert budget.used_bytes == 30
+    assert budget.bytes_for(cam_a) == 0
+    assert budget.get_stats()["rejected"] == 1
+
+
+def test_zero_budget_is_unlimited():
+    """max_bytes=0 desativa o limite."""
+    budget = InFlightBudget(max_bytes=0)
+    assert budget.try_acquire(uuid.uuid4(), 10**9)
+    assert not budget.exhausted
+
+
+@pytest.mark.asyncio
+async def test_grabber_skips_encoding_when_budget_exhausted():
+    """Com o orçamento esgotado o grabber não codifica e aumenta o intervalo."""
+    sent = []
+    budget = InFlightBudget(max_bytes=10)
+    budget.acquire(uuid.uuid4(), 10)
+    grabber = make_grabber(budget, lambda *args: sent.append(args))
+
+    frame = np.random.randint(0, 255, (240, 320, 3), dtype=np.uint8)
+    await grabber._dispatch_frame(frame, 1.0)
+    await grabber._dispatch_frame(frame, 2.0)
+
+    assert sent == []
+    assert grabber.state.frames_skipped_budget == 2
+    assert grabber.effective_interval == 2 * 4
+
+
+@pytest.mark.asyncio
+async def test_grabber_resets_interval_once_budget_frees():
+    """O intervalo volta ao normal quando um frame é aceito."""
+    sent = []
+    budget = InFlightBudget(max_bytes=10 * 1024 * 1024)
+    grabber = make_grabber(budget, lambda *args: sent.append(args))
+    grabber._budget_backoff = 4
+
+    frame = np.random.randint(0, 255, (240, 320, 3), dtype=np.uint8)
+    await grabber._dispatch_frame(frame, 1.0)
+
+    assert len(sent) == 1
+    assert budget.bytes_for(grabber.config.id) == len(sent[0][1])
+    assert grabber.effective_interval == grabber.config.frame_interval
+
+
+@pytest.mark.asyncio
+async def test_queue_releases_bytes_after_processing():
+    """A fila libera os bytes quando o frame é processado ou descartado."""
+    budget = InFlightBudget(max_bytes=1000)
+    processed = []
+
+    async def processor(item):
+        processed.append(item)
+
+    queue = FrameQueue(processor=processor, max_size=10, num_workers=1, budget=budget)
+    camera_id = uuid.uuid4()
+
+    budget.acquire(camera_id, 5)
+    await queue.put(camera_id, b"12345", 1.0)
+    assert budget.bytes_for(camera_id) == 5
+
+    await queue.start_workers()
+    await queue.wait_empty(timeout=2.0)
+    await queue.stop_workers()
+
+    assert len(processed) == 1
+    assert budget.used_bytes == 0
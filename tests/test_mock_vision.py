@@ -0,0 +1,114 @@
+"""Testes para o provedor simulado."""
+
+import asyncio
+
+import pytest
+
+from src.analysis.factory import LLMVisionFactory
+from src.analysis.mock_vision import MockVision, MockVisionError
+from src.analysis.resilience import ResilientVision, is_transient, retry_after
+from src.config import LLMProvider
+
+
+def make_mock(**kwargs) -> MockVision:
+    defaults = dict(latency_ms=0, latency_std_ms=0, error_rate=0.0, rate_limit_rate=0.0)
+    defaults.update(kwargs)
+    return MockVision(**defaults)
+
+
+def test_factory_creates_mock_provider():
+    """O provedor mock é registrado na factory e não precisa de API key."""
+    vision = LLMVisionFactory.create(provider=LLMProvider.MOCK)
+    assert isinstance(vision, MockVision)
+    assert "mock" in LLMVisionFactory.get_available_providers()
+
+
+@pytest.mark.asyncio
+async def test_same_seed_gives_same_results():
+    """Com a mesma semente as keywords sorteadas se repetem."""
+    first = make_mock(seed=7, keywords=[])
+    second = make_mock(seed=7, keywords=[])
+
+    a = [(await first.analyze_frame(b"jpg")).keywords for _ in range(5)]
+    b = [(await second.analyze_frame(b"jpg")).keywords for _ in range(5)]
+    assert a == b
+    assert all(a)
+
+
+@pytest.mark.asyncio
+async def test_canned_keywords():
+    """Keywords fixas são devolvidas em todas as chamadas."""
+    vision = make_mock(keywords=["pessoa", "arma"])
+    result = await vision.analyze_frame(b"jpg")
+    assert result.keywords == ["pessoa", "arma"]
+    assert result.provider == "mock"
+    assert not result.parse_failed
+
+
+@pytest.mark.parametrize("distribution", ["fixed", "normal", "lognormal"])
+def test_latency_distributions(distribution):
+    """As latências sorteadas seguem a média configurada."""
+    vision = make_mock(
+        latency_distribution=distribution, latency_ms=200, latency_std_ms=50, seed=1
+    )
+    samples = [vision.sample_latency_ms() for _ in range(2000)]
+    assert min(samples) >= 0
+    assert abs(sum(samples) / len(samples) - 200) < 10
+    if distribution == "fixed":
+        assert set(samples) == {200}
+
+
+@pytest.mark.asyncio
+async def test_errors_and_rate_limits_are_transient():
+    """Erros simulados carregam status HTTP e Retry-After."""
+    vision = make_mock(rate_limit_rate=1.0)
+    with pytest.raises(MockVisionError) as exc_info:
+        await vision.analyze_frame(b"jpg")
+    assert exc_info.value.status_code == 429
+    assert is_transient(exc_info.value)
+    assert retry_after(exc_info.value) == 1
+
+    vision = make_mock(error_rate=1.0)
+    with pytest.raises(MockVisionError) as exc_info:
+        await vision.analyze_frame(b"jpg")
+    assert exc_info.value.status_code == 500
+    assert vision.get_stats()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_resilience_retries_simulated_failures():
+    """A camada de resiliência repete os erros simulados até o sucesso."""
+    vision = make_mock(error_rate=0.5, seed=3)
+    resilient = ResilientVision(vision, max_retries=10, base_delay=0, max_delay=0)
+    for _ in range(5):
+        await resilient.analyze_frame(b"jpg")
+    assert vision.calls > 5
+
+
+@pytest.mark.asyncio
+async def test_counts_concurrent_calls():
+    """Chamadas simultâneas são contadas em max_in_flight."""
+    vision = make_mock(latency_ms=20)
+    await asyncio.gather(*(vision.analyze_frame(b"jpg") for _ in range(4)))
+    stats = vision.get_stats()
+    assert stats["max_in_flight"] == 4
+    assert stats["in_flight"] == 0
+    assert stats["calls"] == 4
+
+
+@pytest.mark.asyncio
+async def test_streaming_and_batches():
+    """O mock também atende streaming e lotes."""
+    vision = make_mock(keywords=["carro"])
+    received = []
+
+    async def on_keywords(keywords):
+        received.append(keywords)
+
+    result = await vision.analyze_frame_stream(b"jpg", on_keywords=on_keywords)
+    assert received == [["carro"]]
+    assert result.description.startswith("Cena simulada")
+
+    results = await vision.analyze_batch([b"a", b"b", b"c"])
+    assert [r.keywords for r in results] == [["carro"]] * 3
+    assert vision.calls == 2
@@ -0,0 +1,210 @@
+"""Testes para o detector de objetos aplicado antes do LLM."""
+
+import uuid
+from typing import List
+
+import cv2
+import numpy as np
+import pytest
+
+from src.capture.camera import CameraConfig
+from src.capture.frame_annotation import FrameAnnotation
+from src.capture.frame_grabber import FrameGrabber
+from src.capture.object_detector import (
+    Detection,
+    DNNObjectDetector,
+    HOGPersonDetector,
+    ObjectDetector,
+    create_object_detector,
+    normalize_label,
+)
+from src.capture.queue import FrameItem, QueuePressure
+
+
+class FakeDetector(ObjectDetector):
+    """Detector falso que devolve detecções fixas."""
+
+    name = "fake"
+
+    def __init__(self, detections: List[Detection], classes=("person", "vehicle")):
+        super().__init__(classes)
+        self.detections = detections
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        return self.detections
+
+
+def make_grabber(detector: ObjectDetector, sent: list) -> FrameGrabber:
+    config = CameraConfig(
+        id=uuid.uuid4(),
+        name="Portão",
+        url="rtsp://test.com/stream",
+        frame_interval=1,
+        motion_detection_enabled=False,
+    )
+    grabber = FrameGrabber(
+        camera_config=config, on_frame=lambda *args: sent.append(args)
+    )
+    grabber._object_detector = detector
+    return grabber
+
+
+async def capture_once(grabber: FrameGrabber):
+    frame = np.random.randint(0, 255, (240, 320, 3), dtype=np.uint8)
+
+    class FakeCapture:
+        def isOpened(self):
+            return True
+
+        def read(self):
+            grabber._running = False
+            return True, frame
+
+    grabber._capture = FakeCapture()
+    grabber._running = True
+    await grabber._capture_loop()
+
+
+def test_labels_are_grouped_into_classes():
+    """Rótulos do modelo são agrupados nas classes configuráveis."""
+    assert normalize_label("car") == "vehicle"
+    assert normalize_label("motorbike") == "vehicle"
+    assert normalize_label("person") == "person"
+    assert normalize_label("dog") == "animal"
+
+
+def test_find_keeps_only_configured_classes():
+    """Só detecções das classes configuradas liberam o frame."""
+    detector = FakeDetector(
+        [
+            Detection("animal", 0.9, (0, 0, 10, 10)),
+            Detection("vehicle", 0.8, (5, 5, 20, 20)),
+        ]
+    )
+    found = detector.find(np.zeros((10, 10, 3), dtype=np.uint8))
+    assert [d.label for d in found] == ["vehicle"]
+
+
+requires_hog = pytest.mark.skipif(
+    not hasattr(cv2, "HOGDescriptor"), reason="OpenCV sem HOGDescriptor"
+)
+
+
+def test_missing_dnn_model_refuses_to_start():
+    """Sem o arquivo do modelo o backend dnn falha em vez de trocar de detector."""
+    with pytest.raises(ValueError, match="model not found"):
+        create_object_detector(
+            "dnn", ["person"], model_path="/nao/existe/modelo.caffemodel"
+        )
+    with pytest.raises(ValueError, match="model not found"):
+        create_object_detector("dnn", ["person"])
+
+
+@requires_hog
+def test_hog_refuses_classes_it_cannot_detect():
+    """O HOG só detecta pessoas: vehicle na configuração é um erro."""
+    with pytest.raises(ValueError, match="vehicle"):
+        create_object_detector("hog", ["person", "vehicle"])
+    assert isinstance(create_object_detector("hog", ["person"]), HOGPersonDetector)
+
+
+def test_dnn_refuses_classes_outside_model_labels():
+    """Classes sem rótulo no modelo são recusadas antes de carregar os pesos."""
+    with pytest.raises(ValueError, match="furniture"):
+        DNNObjectDetector("/nao/existe/modelo.caffemodel", classes=["furniture"])
+
+
+@pytest.mark.skipif(hasattr(cv2, "HOGDescriptor"), reason="OpenCV com HOGDescriptor")
+def test_gate_is_disabled_without_any_detector():
+    """Sem modelo DNN e sem HOG no OpenCV, nenhum detector é criado."""
+    assert create_object_detector("hog", ["person"]) is None
+
+
+@requires_hog
+def test_hog_finds_nothing_in_empty_scene():
+    """Uma cena vazia não tem pessoas."""
+    detector = HOGPersonDetector()
+    assert detector.find(np.zeros((480, 640, 3), dtype=np.uint8)) == []
+
+
+@pytest.mark.asyncio
+async def test_grabber_drops_frames_without_objects():
+    """Frames sem objetos não são enviados e entram na taxa de filtro."""
+    sent = []
+    grabber = make_grabber(FakeDetector([]), sent)
+
+    await capture_once(grabber)
+
+    assert sent == []
+    assert grabber.state.frames_filtered_objects == 1
+    assert grabber.state.object_filter_rate == 100.0
+    assert "detector" in grabber.state.stage_timings
+
+
+@pytest.mark.asyncio
+async def test_grabber_forwards_frames_with_objects_and_boxes():
+    """Frames com objetos seguem com as caixas detectadas."""
+    sent = []
+    person = Detection("person", 0.9, (10, 20, 50, 100))
+    grabber = make_grabber(FakeDetector([person]), sent)
+
+    await capture_once(grabber)
+
+    assert len(sent) == 1
+    assert grabber.last_detections == [person]
+    assert grabber.state.frames_filtered_objects == 0
+    assert set(grabber.state.stage_timings) == {"detector", "encode"}
+
+
+@pytest.mark.asyncio
+async def test_critical_pressure_skips_detector():
+    """Com a fila em pressão crítica o detector não roda e o frame não sai."""
+    sent = []
+    detector = FakeDetector([Detection("person", 0.9, (10, 20, 50, 100))])
+    grabber = make_grabber(detector, sent)
+    grabber.pressure_source = lambda: QueuePressure.CRITICAL
+
+    await capture_once(grabber)
+
+    assert sent == []
+    assert detector.calls == 0
+    assert grabber.state.frames_skipped_pressure == 1
+    assert "detector" not in grabber.state.stage_timings
+
+
+def test_crop_prefers_detected_objects():
+    """O recorte usa as caixas dos objetos e, sem elas, as de movimento."""
+    item = FrameItem(
+        camera_id=uuid.uuid4(),
+        frame_data=b"jpg",
+        timestamp=0.0,
+        motion_boxes=[(0, 0, 100, 100)],
+    )
+    assert item.crop_boxes == [(0, 0, 100, 100)]
+
+    item.detections = [Detection("person", 0.9, (10, 20, 30, 40))]
+    assert item.crop_boxes == [(10, 20, 30, 40)]
+
+
+def test_annotation_draws_detection_boxes():
+    """A anotação desenha as caixas do detector."""
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    _, buffer = cv2.imencode(".jpg", frame)
+    annotator = FrameAnnotation(
+        motion_score=None,
+        motion_threshold=None,
+        motion_mask=None,
+        llm_keywords=[],
+        llm_confidence=None,
+        llm_provider=None,
+        llm_model=None,
+        detections=[Detection("person", 0.9, (100, 100, 60, 100))],
+    )
+
+    annotated = cv2.imdecode(
+        np.frombuffer(annotator.annotate_frame(buffer.tobytes()), dtype=np.uint8),
+        cv2.IMREAD_COLOR,
+    )
+    assert annotated[150, 100].sum() > 100
@@ -0,0 +1,246 @@
+"""Testes da paginação por keyset e da contagem das listagens."""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.api.pagination import decode_cursor, encode_cursor
+from src.api.routes import events as events_routes
+from src.storage import get_db
+from src.storage.database import run_migrations
+from src.storage.repository import AlertRepository, EventRepository
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+class CapturingSession:
+    """Sessão que guarda o SQL gerado e retorna resultados fixos."""
+
+    def __init__(self, scalar=None):
+        self.statements = []
+        self.scalar_value = scalar
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        scalar_value = self.scalar_value
+
+        class Result:
+            def scalars(self):
+                return SimpleNamespace(all=lambda: [])
+
+            def scalar_one(self):
+                return scalar_value
+
+            def scalar(self):
+                return scalar_value
+
+        return Result()
+
+
+def make_event(timestamp: datetime) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        camera_id=uuid.uuid4(),
+        timestamp=timestamp,
+        description="evento",
+        keywords=["pessoa"],
+        confidence=0.9,
+        frame_path=None,
+        annotated_frame_path=None,
+        annotated_frame_url=None,
+        llm_provider="mock",
+        llm_model="mock-vision",
+        processing_time_ms=10,
+        triage_result=None,
+        escalated=False,
+    )
+
+
+def test_cursor_round_trip():
+    """O cursor codifica e recupera (timestamp, id)."""
+    timestamp = datetime(2025, 3, 1, 12, 30, 15, 123456)
+    item_id = uuid.uuid4()
+
+    cursor = encode_cursor(timestamp, item_id)
+
+    assert decode_cursor(cursor) == (timestamp, item_id)
+    assert "=" not in cursor
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["", "!!!", "bm9wZQ", encode_cursor(datetime.now(), uuid.uuid4())[:-4]],
+)
+def test_invalid_cursor_raises(cursor):
+    """Cursores corrompidos geram ValueError."""
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.asyncio
+async def test_keyset_query_uses_tuple_comparison():
+    """A página seguinte filtra por (timestamp, id) em vez de OFFSET."""
+    session = CapturingSession()
+    repo = EventRepository(session)
+    before = (datetime(2025, 1, 1), uuid.uuid4())
+
+    await repo.get_by_camera(uuid.uuid4(), limit=21, before=before)
+
+    sql = session.statements[0]
+    assert "(events.timestamp, events.id) < (" in sql
+    assert "ORDER BY events.timestamp DESC, events.id DESC" in sql
+    assert "OFFSET" not in sql
+
+
+@pytest.mark.asyncio
+async def test_count_exact_and_estimate():
+    """Contagem exata usa count(*); a estimada lê o EXPLAIN."""
+    session = CapturingSession(scalar=42)
+    repo = EventRepository(session)
+    conditions = repo.event_conditions(camera_id=uuid.uuid4(), keyword="pessoa")
+
+    assert await repo.count(conditions) == 42
+    assert "count(*)" in session.statements[0]
+
+    session.scalar_value = [{"Plan": {"Plan Rows": 1234}}]
+    assert await repo.count(conditions, estimate=True) == 1234
+    assert session.statements[1].startswith("EXPLAIN (FORMAT JSON) SELECT events.id")
+    # Valores vão como parâmetros tipados, não como literais no SQL
+    assert "events.keywords @> %(keywords_1)s::VARCHAR[]" in session.statements[1]
+    assert "pessoa" not in session.statements[1]
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL não configurada")
+@pytest.mark.asyncio
+async def test_estimate_count_with_keyword_and_text_filters():
+    """O EXPLAIN da estimativa roda no PostgreSQL com filtros de keywords e texto."""
+    engine = create_async_engine(POSTGRES_URL, poolclass=NullPool)
+    await run_migrations(engine)
+    camera_id = uuid.uuid4()
+    now = datetime.utcnow()
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "INSERT INTO cameras (id, name, url, source_type, enabled, "
+                    "frame_interval, motion_detection_enabled, motion_threshold, "
+                    "motion_sensitivity, priority, decoder_error_count, "
+                    "decoder_error_rate, created_at, updated_at) VALUES (:id, 'contagem', "
+                    "'rtsp://x', 'rtsp', true, 10, true, 10, 'medium', 'normal', 0, 0, "
+                    "now(), now())"
+                ),
+                {"id": camera_id},
+            )
+            for keywords in (["pessoa", "carro"], ["carro"], ["moto"]):
+                await conn.execute(
+                    text(
+                        "INSERT INTO events (id, camera_id, timestamp, description, "
+                        "keywords, escalated) VALUES (gen_random_uuid(), :camera_id, "
+                        ":ts, 'evento', :keywords, false)"
+                    ),
+                    {"camera_id": camera_id, "ts": now, "keywords": keywords},
+                )
+
+        session_factory = async_sessionmaker(engine, class_=AsyncSession)
+        async with session_factory() as session:
+            events = EventRepository(session)
+            conditions = events.event_conditions(
+                camera_ids=[camera_id],
+                keyword="carro",
+                keywords=["pessoa", "carro"],
+                start_date=now - timedelta(hours=1),
+            )
+            assert await events.count(conditions) == 2
+            assert await events.count(conditions, estimate=True) >= 0
+
+            alerts = AlertRepository(session)
+            log_conditions = alerts.log_conditions(rule_id=uuid.uuid4(), status="sent")
+            assert await alerts.count_logs(log_conditions, estimate=True) >= 0
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("DELETE FROM events WHERE camera_id = :id"), {"id": camera_id}
+            )
+            await conn.execute(text("DELETE FROM cameras WHERE id = :id"), {"id": camera_id})
+        await engine.dispose()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """API de eventos com o repositório substituído por uma lista em memória."""
+    start = datetime(2025, 1, 1)
+    # Timestamps repetidos para exercitar o desempate por id
+    events = sorted(
+        (make_event(start + timedelta(minutes=i // 2)) for i in range(7)),
+        key=lambda e: (e.timestamp, e.id),
+        reverse=True,
+    )
+    calls = {}
+
+    async def find(self, conditions, limit, offset=0, before=None):
+        calls["offset"] = offset
+        rows = [e for e in events if before is None or (e.timestamp, e.id) < before]
+        return rows[offset : offset + limit]
+
+    async def count(self, conditions, estimate=False):
+        calls["estimate"] = estimate
+        return len(events)
+
+    monkeypatch.setattr(EventRepository, "find", find)
+    monkeypatch.setattr(EventRepository, "count", count)
+
+    app = FastAPI()
+    app.include_router(events_routes.router)
+
+    async def no_db():
+        yield None
+
+    app.dependency_overrides[get_db] = no_db
+    test_client = TestClient(app)
+    test_client.events = events
+    test_client.calls = calls
+    return test_client
+
+
+def test_list_events_walks_pages_with_cursor(client):
+    """Seguindo next_cursor todos os eventos aparecem uma única vez."""
+    seen = []
+    params = {"page_size": 3, "count": "exact"}
+    while True:
+        body = client.get("/events", params=params).json()
+        if "cursor" in params:
+            assert client.calls["offset"] == 0
+        seen.extend(event["id"] for event in body["events"])
+        assert body["total"] == 7
+        assert body["total_is_estimate"] is False
+        if not body["next_cursor"]:
+            break
+        params["cursor"] = body["next_cursor"]
+
+    assert seen == [str(e.id) for e in client.events]
+
+
+def test_list_events_count_modes(client):
+    """count=estimate marca o total como estimado; count=none omite."""
+    body = client.get("/events").json()
+    assert body["total"] == 7
+    assert body["total_is_estimate"] is True
+    assert client.calls["estimate"] is True
+
+    body = client.get("/events", params={"count": "none"}).json()
+    assert body["total"] is None
+
+
+def test_list_events_rejects_invalid_cursor(client):
+    """Cursor inválido retorna 400."""
+    response = client.get("/events", params={"cursor": "!!!"})
+    assert response.status_code == 400
@@ -0,0 +1,304 @@
+"""Testes das partições mensais de eventos e da retenção por partição."""
+
+import io
+import os
+import uuid
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+import pytest
+from alembic import command
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.storage.database import alembic_config, run_migrations
+from src.storage.partitions import (
+    Partition,
+    PartitionManager,
+    add_months,
+    month_start,
+    partition_name,
+)
+from src.storage.repository import EventRepository
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+class FakeSession:
+    """Sessão que lista partições de um dicionário e registra o DDL."""
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        if "pg_inherits" in sql:
+            names = self.factory.partitions.get(params["table"], [])
+
+            class Result:
+                def scalars(self):
+                    return self
+
+                def all(self):
+                    return list(names)
+
+            return Result()
+        if any(fail in sql for fail in self.factory.fail_on):
+            raise RuntimeError("linhas do mês na partição DEFAULT")
+        self.factory.statements.append(sql)
+
+    async def commit(self):
+        pass
+
+
+class FakeSessionFactory:
+    def __init__(self, partitions=None):
+        self.partitions = partitions or {}
+        self.statements = []
+        self.fail_on = []
+
+    def __call__(self):
+        return FakeSession(self)
+
+
+def clock():
+    return datetime(2025, 11, 15, 10, 30)
+
+
+def test_offline_upgrade_partitions_tables():
+    """A migração recria events e alert_logs particionadas por mês."""
+    config = alembic_config()
+    output = io.StringIO()
+    config.output_buffer = output
+    with redirect_stdout(io.StringIO()):
+        command.upgrade(config, "0006:0007", sql=True)
+    sql = output.getvalue()
+
+    assert "PARTITION BY RANGE (timestamp)" in sql
+    assert "PARTITION BY RANGE (sent_at)" in sql
+    assert "PRIMARY KEY (id, timestamp)" in sql
+    assert "CREATE TABLE events_default PARTITION OF events DEFAULT" in sql
+    assert "DROP CONSTRAINT alert_logs_event_id_fkey" in sql
+
+
+def test_month_helpers():
+    """Meses atravessam a virada do ano e nomeiam as partições."""
+    assert month_start(clock()) == datetime(2025, 11, 1)
+    assert add_months(datetime(2025, 11, 1), 3) == datetime(2026, 2, 1)
+    assert add_months(datetime(2025, 1, 1), -1) == datetime(2024, 12, 1)
+    assert partition_name("events", datetime(2026, 2, 1)) == "events_p2026_02"
+
+    partition = Partition.parse("events", "events_p2025_12")
+    assert partition.month == datetime(2025, 12, 1)
+    assert partition.end == datetime(2026, 1, 1)
+    assert Partition.parse("events", "events_default") is None
+    assert Partition.parse("events", "alert_logs_p2025_12") is None
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_creates_missing_months():
+    """Cria o mês atual e os próximos que ainda não existem, nas duas tabelas."""
+    factory = FakeSessionFactory(
+        {"events": ["events_p2025_11", "events_default"], "alert_logs": []}
+    )
+    manager = PartitionManager(factory, months_ahead=2, clock=clock)
+
+    created = await manager.ensure_partitions()
+
+    assert created == [
+        "events_p2025_12",
+        "events_p2026_01",
+        "alert_logs_p2025_11",
+        "alert_logs_p2025_12",
+        "alert_logs_p2026_01",
+    ]
+    assert (
+        "CREATE TABLE IF NOT EXISTS events_p2026_01 PARTITION OF events "
+        "FOR VALUES FROM ('2026-01-01') TO ('2026-02-01')"
+    ) in factory.statements
+    assert manager.get_stats()["created"] == 5
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_since_backfills_past_months():
+    """``since`` garante também os meses anteriores (cargas de histórico)."""
+    factory = FakeSessionFactory()
+    manager = PartitionManager(factory, months_ahead=0, clock=clock)
+
+    created = await manager.ensure_partitions(since=datetime(2025, 9, 20))
+
+    assert [name for name in created if name.startswith("events")] == [
+        "events_p2025_09",
+        "events_p2025_10",
+        "events_p2025_11",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failed_partition_does_not_stop_the_others():
+    """Uma partição que falha é contada e as seguintes ainda são criadas."""
+    factory = FakeSessionFactory()
+    factory.fail_on = ["events_p2025_12"]
+    manager = PartitionManager(factory, months_ahead=2, clock=clock)
+
+    created = await manager.ensure_partitions()
+
+    assert "events_p2025_12" not in created
+    assert "events_p2026_01" in created
+    assert manager.get_stats()["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retention_drops_whole_months():
+    """Meses que terminaram antes do corte são desanexados e removidos."""
+    factory = FakeSessionFactory(
+        {
+            "events": [
+                "events_p2025_07",
+                "events_p2025_08",
+                "events_p2025_09",
+                "events_p2025_11",
+                "events_default",
+            ],
+            "alert_logs": ["alert_logs_p2025_08", "alert_logs_p2025_09"],
+        }
+    )
+    manager = PartitionManager(factory, retention_months=2, clock=clock)
+
+    removed = await manager.apply_retention()
+
+    assert manager.retention_cutoff() == datetime(2025, 9, 1)
+    assert removed == ["events_p2025_07", "events_p2025_08", "alert_logs_p2025_08"]
+    assert factory.statements[:2] == [
+        "ALTER TABLE events DETACH PARTITION events_p2025_07",
+        "DROP TABLE events_p2025_07",
+    ]
+    assert not any("DELETE" in sql for sql in factory.statements)
+
+
+@pytest.mark.asyncio
+async def test_retention_detach_only_and_disabled():
+    """Com ``drop=False`` só desanexa; sem retenção não remove nada."""
+    partitions = {"events": ["events_p2024_01"], "alert_logs": []}
+
+    factory = FakeSessionFactory(partitions)
+    manager = PartitionManager(factory, retention_months=1, drop=False, clock=clock)
+    assert await manager.apply_retention() == ["events_p2024_01"]
+    assert factory.statements == ["ALTER TABLE events DETACH PARTITION events_p2024_01"]
+
+    factory = FakeSessionFactory(partitions)
+    manager = PartitionManager(factory, retention_months=0, clock=clock)
+    assert await manager.apply_retention() == []
+    assert factory.statements == []
+
+
+class CapturingSession:
+    """Sessão que guarda o SQL gerado e retorna uma lista vazia."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(
+            str(
+                statement.compile(
+                    dialect=postgresql.dialect(),
+                    compile_kwargs={"literal_binds": True},
+                )
+            )
+        )
+
+        class Result:
+            def scalars(self):
+                return self
+
+            def all(self):
+                return []
+
+        return Result()
+
+
+@pytest.mark.asyncio
+async def test_keyset_cursor_bounds_timestamp_for_pruning():
+    """A página seguinte limita o timestamp para descartar partições novas."""
+    session = CapturingSession()
+    before = (datetime(2025, 1, 1), uuid.uuid4())
+
+    await EventRepository(session).get_by_camera(uuid.uuid4(), before=before)
+
+    assert "events.timestamp <= '2025-01-01 00:00:00'" in session.statements[0]
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL não configurada")
+@pytest.mark.asyncio
+async def test_partition_pruning_and_retention():
+    """Consultas por período leem só os meses do período; a retenção remove o mês."""
+    engine = create_async_engine(POSTGRES_URL, poolclass=NullPool)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession)
+    await run_migrations(engine)
+    now = datetime.utcnow()
+    manager = PartitionManager(session_factory, months_ahead=1, retention_months=3)
+    await manager.ensure_partitions(since=add_months(month_start(now), -6))
+
+    camera_id = uuid.uuid4()
+    old = add_months(month_start(now), -5) + timedelta(days=2)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "INSERT INTO cameras (id, name, url, source_type, enabled, "
+                    "frame_interval, motion_detection_enabled, motion_threshold, "
+                    "motion_sensitivity, priority, decoder_error_count, "
+                    "decoder_error_rate, created_at, updated_at) VALUES (:id, 'p', "
+                    "'rtsp://p', 'rtsp', true, 10, true, 10.0, 'medium', 'normal', "
+                    "0, 0.0, now(), now())"
+                ),
+                {"id": camera_id},
+            )
+            for timestamp in (old, now):
+                await conn.execute(
+                    text(
+                        "INSERT INTO events (id, camera_id, timestamp, description, "
+                        "escalated) VALUES (gen_random_uuid(), :camera_id, :ts, "
+                        "'evento', false)"
+                    ),
+                    {"camera_id": camera_id, "ts": timestamp},
+                )
+            plan = (
+                await conn.execute(
+                    text(
+                        "EXPLAIN SELECT * FROM events WHERE camera_id = :camera_id "
+                        "AND timestamp >= :start"
+                    ),
+                    {"camera_id": camera_id, "start": month_start(now)},
+                )
+            ).scalars().all()
+        scanned = " ".join(plan)
+        assert partition_name("events", month_start(now)) in scanned
+        assert partition_name("events", month_start(old)) not in scanned
+
+        removed = await manager.apply_retention()
+        assert partition_name("events", month_start(old)) in removed
+        async with engine.connect() as conn:
+            remaining = (
+                await conn.execute(
+                    text("SELECT count(*) FROM events WHERE camera_id = :camera_id"),
+                    {"camera_id": camera_id},
+                )
+            ).scalar()
+        assert remaining == 1
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("DELETE FROM events WHERE camera_id = :id"), {"id": camera_id}
+            )
+            await conn.execute(text("DELETE FROM cameras WHERE id = :id"), {"id": camera_id})
+        await engine.dispose()
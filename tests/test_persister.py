@@ -0,0 +1,334 @@
+"""Testes da gravação em lote de eventos."""
+
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.storage.persister import EventPersister
+
+
+class FakeSession:
+    """Sessão que registra os INSERTs executados."""
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        # Sem commit, o que foi executado é descartado (rollback)
+        self.factory.pending = []
+        return False
+
+    async def execute(self, statement, rows):
+        if self.factory.fail:
+            raise RuntimeError("banco indisponível")
+        if any(row.get("id") in self.factory.rejected for row in rows):
+            raise IntegrityError("INSERT", None, Exception("viola chave estrangeira"))
+        self.factory.pending.append((statement.table.name, list(rows)))
+
+    async def commit(self):
+        self.factory.commits.append(self.factory.pending)
+        self.factory.pending = []
+
+
+class FakeSessionFactory:
+    def __init__(self):
+        self.fail = False
+        self.rejected = set()
+        self.pending = []
+        self.commits = []
+
+    def __call__(self):
+        return FakeSession(self)
+
+
+async def add_events(persister, count):
+    return [
+        await persister.add_event(camera_id=uuid.uuid4(), description=f"evento {i}")
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_flushes_when_batch_is_full():
+    """Ao completar max_rows linhas o lote é gravado numa transação."""
+    factory = FakeSessionFactory()
+    persister = EventPersister(factory, max_rows=5, max_delay_ms=10000)
+
+    ids = await add_events(persister, 4)
+    assert factory.commits == []
+    assert persister.pending == 4
+
+    await persister.add_alert_log(
+        event_id=ids[0],
+        alert_rule_id=uuid.uuid4(),
+        keywords_matched=["pessoa"],
+        sent_to=["+5511999999999"],
+        status="sent",
+    )
+
+    assert len(factory.commits) == 1
+    tables = [table for table, _ in factory.commits[0]]
+    assert tables == ["events", "alert_logs", "event_rollups_hourly"]
+    events, logs = factory.commits[0][0][1], factory.commits[0][1][1]
+    assert [row["id"] for row in events] == ids
+    assert logs[0]["event_id"] == ids[0]
+    assert persister.pending == 0
+    stats = persister.get_stats()
+    assert stats["flushes"] == 1
+    assert stats["avg_batch_size"] == 5
+
+
+@pytest.mark.asyncio
+async def test_background_loop_flushes_after_delay():
+    """Linhas abaixo de max_rows são gravadas após max_delay_ms."""
+    factory = FakeSessionFactory()
+    persister = EventPersister(factory, max_rows=100, max_delay_ms=20)
+    await persister.start()
+    try:
+        await add_events(persister, 3)
+        assert factory.commits == []
+        await asyncio.sleep(0.1)
+        assert len(factory.commits) == 1
+        assert len(factory.commits[0][0][1]) == 3
+    finally:
+        await persister.stop()
+
+
+@pytest.mark.asyncio
+async def test_zero_delay_writes_immediately():
+    """Com max_delay_ms=0 cada linha é gravada na hora."""
+    factory = FakeSessionFactory()
+    persister = EventPersister(factory, max_rows=100, max_delay_ms=0)
+
+    await add_events(persister, 2)
+
+    assert len(factory.commits) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows_for_retry():
+    """Lotes com erro voltam ao buffer e são gravados depois."""
+    factory = FakeSessionFactory()
+    factory.fail = True
+    persister = EventPersister(factory, max_rows=2, max_delay_ms=10000)
+
+    ids = await add_events(persister, 2)
+    assert persister.pending == 2
+    assert persister.get_stats()["failures"] == 1
+
+    # Durante a espera do backoff novas linhas não disparam gravação
+    factory.fail = False
+    await add_events(persister, 1)
+    assert factory.commits == []
+
+    await persister.flush()
+    assert len(factory.commits) == 1
+    assert [row["id"] for row in factory.commits[0][0][1]][:2] == ids
+
+
+@pytest.mark.asyncio
+async def test_failed_flushes_back_off_until_the_database_recovers():
+    """Com o banco fora as tentativas se espaçam e a espera zera ao gravar."""
+    factory = FakeSessionFactory()
+    factory.fail = True
+    persister = EventPersister(
+        factory, max_rows=100, max_delay_ms=1, retry_base_ms=20, max_retry_ms=80
+    )
+    await persister.start()
+    try:
+        await add_events(persister, 3)
+        await asyncio.sleep(0.3)
+        stats = persister.get_stats()
+        # Sem backoff seriam centenas de tentativas a cada 1ms
+        assert 3 <= stats["failures"] <= 8
+        assert stats["consecutive_failures"] == stats["failures"]
+        assert stats["retry_in_ms"] <= 80
+
+        factory.fail = False
+        await asyncio.sleep(0.15)
+        assert len(factory.commits) == 1
+        assert persister.pending == 0
+        assert persister.get_stats()["consecutive_failures"] == 0
+        assert persister.get_stats()["retry_in_ms"] == 0
+    finally:
+        await persister.stop()
+
+
+@pytest.mark.asyncio
+async def test_drops_oldest_above_max_pending():
+    """Com o banco fora, o buffer não passa de max_pending."""
+    factory = FakeSessionFactory()
+    factory.fail = True
+    persister = EventPersister(factory, max_rows=100, max_delay_ms=10000, max_pending=3)
+
+    ids = await add_events(persister, 5)
+
+    assert persister.pending == 3
+    assert persister.get_stats()["dropped"] == 2
+    assert [row["id"] for row in persister._events] == ids[2:]
+
+
+@pytest.mark.asyncio
+async def test_trim_drops_oldest_rows_across_events_and_logs():
+    """O descarte segue a idade das linhas e leva os logs junto com o evento."""
+    factory = FakeSessionFactory()
+    persister = EventPersister(factory, max_rows=100, max_delay_ms=10000, max_pending=3)
+    ids = await add_events(persister, 3)
+    log_id = await persister.add_alert_log(
+        event_id=ids[2],
+        alert_rule_id=uuid.uuid4(),
+        keywords_matched=["pessoa"],
+        sent_to=["+5511999999999"],
+        status="sent",
+        camera_id=uuid.uuid4(),
+    )
+
+    # O log mais novo fica; sai o evento mais antigo
+    assert [row["id"] for row in persister._events] == ids[1:]
+    assert [row["id"] for row in persister._alert_logs] == [log_id]
+
+    more = await add_events(persister, 2)
+
+    # ids[2] sai junto com o log dele
+    assert [row["id"] for row in persister._events] == more
+    assert not persister._alert_logs
+    assert persister._alert_cameras == {}
+    assert persister.get_stats()["dropped"] == 4
+    assert factory.commits == []
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_remaining_rows():
+    """stop() grava o que ainda está no buffer."""
+    factory = FakeSessionFactory()
+    persister = EventPersister(factory, max_rows=100, max_delay_ms=10000)
+    await persister.start()
+    await add_events(persister, 3)
+
+    await persister.stop()
+
+    assert persister.pending == 0
+    assert len(factory.commits) == 1
+
+
+@pytest.mark.asyncio
+async def test_rollups_are_written_with_the_batch():
+    """Cada lote soma eventos e alertas por câmera e hora na mesma transação."""
+    factory = FakeSessionFactory()
+    persister = EventPersister(factory, max_rows=100, max_delay_ms=10000)
+    camera_a, camera_b = uuid.uuid4(), uuid.uuid4()
+
+    event_id = await persister.add_event(
+        camera_id=camera_a, description="a", confidence=0.8, processing_time_ms=100
+    )
+    await persister.add_event(
+        camera_id=camera_a, description="b", confidence=0.6, processing_time_ms=300
+    )
+    await persister.add_event(camera_id=camera_b, description="c")
+    for status in ("sent", "failed"):
+        await persister.add_alert_log(
+            event_id=event_id,
+            alert_rule_id=uuid.uuid4(),
+            keywords_matched=["pessoa"],
+            sent_to=["+5511999999999"],
+            status=status,
+            camera_id=camera_a,
+        )
+    await persister.flush()
+
+    table, rows = factory.commits[0][2]
+    assert table == "event_rollups_hourly"
+    by_camera = {row["camera_id"]: row for row in rows}
+    a = by_camera[camera_a]
+    assert a["events"] == 2
+    assert a["alerts_sent"] == 1 and a["alerts_failed"] == 1
+    assert a["confidence_sum"] == pytest.approx(1.4)
+    assert a["confidence_count"] == 2
+    assert a["processing_time_sum"] == 400
+    assert a["hour"].minute == 0 and a["hour"].second == 0
+    b = by_camera[camera_b]
+    assert b["events"] == 1 and b["confidence_count"] == 0
+    assert persister._alert_cameras == {}
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_does_not_count_rollups_twice():
+    """Após uma falha, o lote regravado gera os agregados uma única vez."""
+    factory = FakeSessionFactory()
+    factory.fail = True
+    persister = EventPersister(factory, max_rows=100, max_delay_ms=10000)
+    camera_id = uuid.uuid4()
+    await persister.add_event(camera_id=camera_id, description="a")
+    await persister.flush()
+
+    factory.fail = False
+    await persister.flush()
+
+    table, rows = factory.commits[0][-1]
+    assert table == "event_rollups_hourly"
+    assert rows[0]["events"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_row_is_dead_lettered_and_does_not_block_batch():
+    """Uma linha que o banco sempre recusa é separada; as outras são gravadas."""
+    factory = FakeSessionFactory()
+    persister = EventPersister(factory, max_rows=100, max_delay_ms=10000)
+    ids = await add_events(persister, 5)
+    factory.rejected = {ids[2]}
+    log_id = await persister.add_alert_log(
+        event_id=ids[0],
+        alert_rule_id=uuid.uuid4(),
+        keywords_matched=["pessoa"],
+        sent_to=["+5511999999999"],
+        status="sent",
+    )
+
+    assert await persister.flush() == 5
+
+    written = [
+        row["id"] for commit in factory.commits for table, rows in commit
+        if table in ("events", "alert_logs") for row in rows
+    ]
+    assert sorted(written, key=str) == sorted(ids[:2] + ids[3:] + [log_id], key=str)
+    assert persister.pending == 0
+    (dead,) = persister.dead_letters
+    assert dead["table"] == "events" and dead["row"]["id"] == ids[2]
+    stats = persister.get_stats()
+    assert stats["dead_lettered"] == 1
+    assert stats["failures"] == 0
+
+    # O próximo lote não tenta a linha recusada de novo
+    factory.commits.clear()
+    await add_events(persister, 1)
+    await persister.flush()
+    assert len(factory.commits) == 1
+
+
+@pytest.mark.asyncio
+async def test_connection_error_while_isolating_restores_unwritten_rows(monkeypatch):
+    """Se o banco cai durante o isolamento, o que não foi gravado volta ao buffer."""
+    factory = FakeSessionFactory()
+    persister = EventPersister(factory, max_rows=100, max_delay_ms=10000)
+    ids = await add_events(persister, 4)
+    factory.rejected = {ids[0]}
+
+    original = FakeSession.execute
+
+    async def execute(session, statement, rows):
+        # A metade com a linha recusada é isolada; depois o banco cai
+        if len(rows) == 2 and ids[0] not in [row["id"] for row in rows]:
+            raise RuntimeError("conexão perdida")
+        await original(session, statement, rows)
+
+    monkeypatch.setattr(FakeSession, "execute", execute)
+    assert await persister.flush() == 1
+
+    assert [row["id"] for row in persister._events] == ids[2:]
+    assert persister.get_stats()["failures"] == 1
+    assert persister.get_stats()["dead_lettered"] == 1
@@ -0,0 +1,112 @@
+"""Testes para garantir que os provedores não bloqueiam o event loop."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.analysis import executor
+from src.analysis.executor import run_blocking
+from src.analysis.gemini_vision import GeminiVision
+
+MAX_LAG = 0.1
+
+
+async def measure_lag(coro, interval: float = 0.01) -> float:
+    """Executa a corrotina medindo o maior atraso do event loop."""
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal max_lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            max_lag = max(max_lag, time.perf_counter() - start - interval)
+
+    task = asyncio.create_task(ticker())
+    try:
+        await coro
+    finally:
+        done.set()
+        await task
+    return max_lag
+
+
+@pytest.mark.asyncio
+async def test_run_blocking_keeps_loop_responsive():
+    """Trabalho bloqueante no pool não atrasa o event loop."""
+
+    async def analyses():
+        await asyncio.gather(*(run_blocking(time.sleep, 0.3) for _ in range(4)))
+
+    assert await measure_lag(analyses()) < MAX_LAG
+
+
+@pytest.mark.asyncio
+async def test_pool_is_bounded():
+    """O pool respeita llm_thread_pool_size."""
+    executor.shutdown_executor()
+    with patch.object(executor.settings, "llm_thread_pool_size", 2):
+        pool = executor.get_executor()
+        try:
+            assert pool._max_workers == 2
+            start = time.perf_counter()
+            await asyncio.gather(*(run_blocking(time.sleep, 0.2) for _ in range(4)))
+            # 4 tarefas em 2 threads: duas rodadas
+            assert time.perf_counter() - start >= 0.4
+        finally:
+            executor.shutdown_executor()
+
+
+@pytest.mark.asyncio
+async def test_gemini_analysis_does_not_block_loop():
+    """GeminiVision usa a API assíncrona do SDK em vez da síncrona."""
+    vision = GeminiVision(api_key="test-key", model="gemini-1.5-flash")
+
+    def blocking_generate(*args, **kwargs):
+        time.sleep(2)
+        raise AssertionError("API síncrona não deve ser usada")
+
+    async def async_generate(contents, **kwargs):
+        await asyncio.sleep(0.3)
+        assert contents[1]["mime_type"] == "image/jpeg"
+        return SimpleNamespace(
+            text='{"description": "rua vazia", "keywords": ["rua"], "confidence": 0.9}'
+        )
+
+    vision.generative_model.generate_content = blocking_generate
+    vision.generative_model.generate_content_async = async_generate
+
+    results = []
+
+    async def analyses():
+        results.extend(
+            await asyncio.gather(
+                *(vision.analyze_frame(b"\xff\xd8fake-jpeg") for _ in range(3))
+            )
+        )
+
+    assert await measure_lag(analyses()) < MAX_LAG
+    assert [r.keywords for r in results] == [["rua"]] * 3
+
+
+@pytest.mark.asyncio
+async def test_gemini_health_check_offloads_sdk_call():
+    """O health check do Gemini roda a listagem síncrona fora do event loop."""
+    vision = GeminiVision(api_key="test-key", model="gemini-1.5-flash")
+
+    def slow_list_models():
+        time.sleep(0.3)
+        return iter(["models/gemini-1.5-flash"])
+
+    healthy = []
+
+    async def check():
+        healthy.append(await vision.health_check())
+
+    with patch("src.analysis.gemini_vision.genai.list_models", slow_list_models):
+        assert await measure_lag(check()) < MAX_LAG
+    assert healthy == [True]
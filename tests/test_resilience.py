@@ -0,0 +1,230 @@
+"""Testes para rate limit, retry e circuit breaker dos provedores LLM."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+
+from src.analysis.base import AnalysisResult, BaseLLMVision
+from src.analysis.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    RateLimiter,
+    ResilientVision,
+    TokenBucket,
+    is_transient,
+    retry_after,
+)
+
+
+class APIError(Exception):
+    """Erro no formato dos SDKs (status_code + response.headers)."""
+
+    def __init__(self, status_code: int, headers: Optional[dict] = None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+class FlakyVision(BaseLLMVision):
+    """Provedor falso que falha com os erros informados antes de responder."""
+
+    def __init__(self, errors: List[Exception]):
+        super().__init__(api_key="test", model="fake")
+        self.errors = list(errors)
+        self.calls = 0
+
+    @property
+    def provider_name(self) -> str:
+        return "fake"
+
+    async def analyze_frame(self, image_data, prompt=None) -> AnalysisResult:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return AnalysisResult(description="ok", provider="fake", model="fake")
+
+
+def test_token_bucket_refill():
+    """O bucket consome tokens e informa quanto falta para a reposição."""
+    bucket = TokenBucket(rate_per_minute=60)
+    assert bucket.try_acquire(60)
+    assert not bucket.try_acquire(1)
+    assert 0.9 < bucket.time_until(1) <= 1.0
+
+    unlimited = TokenBucket(rate_per_minute=0)
+    assert unlimited.try_acquire(10_000)
+    assert unlimited.time_until(10_000) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_waits_for_tokens():
+    """Sem requisições disponíveis, acquire espera a reposição."""
+    limiter = RateLimiter(requests_per_minute=600)
+    limiter.requests.try_acquire(600)
+
+    start = time.perf_counter()
+    await limiter.acquire()
+    assert time.perf_counter() - start >= 0.09
+    assert limiter.get_stats()["throttled"] == 1
+
+
+def test_error_classification():
+    """429/5xx/timeouts são transitórios; 400 não."""
+    assert is_transient(APIError(429))
+    assert is_transient(APIError(503))
+    assert is_transient(asyncio.TimeoutError())
+    assert not is_transient(APIError(400))
+    assert not is_transient(ValueError("json inválido"))
+    assert retry_after(APIError(429, {"retry-after": "7"})) == 7.0
+    assert retry_after(APIError(429)) is None
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors():
+    """Erros 429/5xx são repetidos até o provedor responder."""
+    inner = FlakyVision([APIError(429), APIError(502)])
+    vision = ResilientVision(inner, max_retries=3, base_delay=0.01)
+
+    result = await vision.analyze_frame(b"frame")
+
+    assert result.description == "ok"
+    assert inner.calls == 3
+    assert vision.get_stats()["retries"] == 2
+    assert vision.circuit_breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_does_not_retry_client_errors():
+    """Erros do pedido (4xx) são propagados sem nova tentativa."""
+    inner = FlakyVision([APIError(400)])
+    vision = ResilientVision(inner, max_retries=3, base_delay=0.01)
+
+    with pytest.raises(APIError):
+        await vision.analyze_frame(b"frame")
+    assert inner.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    """Depois de max_retries a exceção é propagada."""
+    inner = FlakyVision([APIError(500)] * 5)
+    vision = ResilientVision(inner, max_retries=2, base_delay=0.01)
+
+    with pytest.raises(APIError):
+        await vision.analyze_frame(b"frame")
+    assert inner.calls == 3
+    assert vision.get_stats()["failed"] == 1
+
+
+def test_backoff_honors_retry_after():
+    """Retry-After define a espera mínima, limitada a max_delay."""
+    vision = ResilientVision(FlakyVision([]), base_delay=0.01, max_delay=5.0)
+
+    assert vision.backoff_delay(0, APIError(429, {"retry-after": "3"})) >= 3.0
+    assert vision.backoff_delay(0, APIError(429, {"retry-after": "60"})) == 5.0
+    assert all(0 <= vision.backoff_delay(10) <= 5.0 for _ in range(50))
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_recovers():
+    """O circuito abre após falhas seguidas e libera uma chamada de teste."""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.2)
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.get_stats()["open_count"] == 1
+
+    start = time.perf_counter()
+    await breaker.before_call()
+    assert time.perf_counter() - start >= 0.15
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    # Falha na chamada de teste reabre o circuito
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+    await breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.get_stats()["consecutive_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_pauses_dispatch():
+    """Com o circuito aberto as chamadas aguardam em vez de falhar."""
+    inner = FlakyVision([APIError(503)] * 2)
+    vision = ResilientVision(
+        inner,
+        circuit_breaker=CircuitBreaker(failure_threshold=2, recovery_timeout=0.3),
+        max_retries=5,
+        base_delay=0.01,
+    )
+
+    start = time.perf_counter()
+    result = await vision.analyze_frame(b"frame")
+
+    assert result.description == "ok"
+    assert time.perf_counter() - start >= 0.25
+    assert vision.get_stats()["circuit"]["open_count"] == 1
+    assert vision.get_stats()["circuit"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_fail_fast_raises_instead_of_waiting():
+    """Com fail_fast não há retry e o circuito aberto falha na hora."""
+    inner = FlakyVision([APIError(503)] * 3)
+    vision = ResilientVision(
+        inner,
+        circuit_breaker=CircuitBreaker(failure_threshold=1, recovery_timeout=30),
+        max_retries=5,
+        base_delay=0.01,
+        fail_fast=True,
+    )
+
+    with pytest.raises(APIError):
+        await vision.analyze_frame(b"frame")
+    assert inner.calls == 1
+
+    start = time.perf_counter()
+    with pytest.raises(CircuitOpenError) as excinfo:
+        await vision.analyze_frame(b"frame")
+    assert time.perf_counter() - start < 0.1
+    assert excinfo.value.retry_in > 0
+    assert inner.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_half_open_probe_releases_circuit():
+    """Cancelar a chamada de teste do half-open não trava o circuito."""
+
+    class SlowVision(FlakyVision):
+        async def analyze_frame(self, image_data, prompt=None) -> AnalysisResult:
+            self.calls += 1
+            if self.calls == 1:
+                await asyncio.sleep(10)
+            return AnalysisResult(description="ok", provider="fake", model="fake")
+
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    vision = ResilientVision(
+        SlowVision([]), circuit_breaker=breaker, base_delay=0.01, fail_fast=True
+    )
+    breaker.record_failure()
+    await asyncio.sleep(0.06)
+
+    probe = asyncio.create_task(vision.analyze_frame(b"frame"))
+    await asyncio.sleep(0.01)
+    assert breaker.probe_in_flight
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.probe_in_flight
+    result = await vision.analyze_frame(b"frame")
+    assert result.description == "ok"
+    assert breaker.state == CircuitState.CLOSED
@@ -0,0 +1,105 @@
+"""Testes para o cache de resultados por hash perceptual."""
+
+import uuid
+
+import cv2
+import numpy as np
+
+from src.analysis.base import AnalysisResult
+from src.analysis.result_cache import PerceptualHashCache, dhash, hamming_distance
+
+
+def encode(frame: np.ndarray) -> bytes:
+    _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return buffer.tobytes()
+
+
+def make_scene(seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    scene = np.zeros((480, 640, 3), dtype=np.uint8)
+    for _ in range(12):
+        x, y = rng.integers(0, 560), rng.integers(0, 400)
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(scene, (x, y), (x + 80, y + 80), color, -1)
+    return scene
+
+
+def make_result(description: str = "carro estacionado") -> AnalysisResult:
+    return AnalysisResult(
+        description=description,
+        keywords=["carro"],
+        confidence=0.9,
+        provider="openai",
+        model="gpt-4o",
+        processing_time_ms=1500,
+    )
+
+
+def test_dhash_near_duplicates_are_close():
+    """Pequenas variações geram hashes próximos; cenas diferentes, distantes."""
+    scene = make_scene(1)
+    noisy = scene.copy()
+    cv2.circle(noisy, (20, 20), 4, (255, 255, 255), -1)
+
+    base_hash = dhash(encode(scene))
+    noisy_hash = dhash(encode(noisy))
+    other_hash = dhash(encode(make_scene(2)))
+
+    assert hamming_distance(base_hash, noisy_hash) <= 6
+    assert hamming_distance(base_hash, other_hash) > 6
+
+
+def test_dhash_invalid_image_returns_none():
+    """Bytes inválidos não geram hash."""
+    assert dhash(b"not an image") is None
+
+
+def test_lookup_hit_reuses_result():
+    """Frame parecido da mesma câmera reutiliza o resultado em cache."""
+    cache = PerceptualHashCache(max_distance=4, ttl_seconds=60)
+    camera_id = uuid.uuid4()
+
+    cache.store(camera_id, 0b1010, make_result(), now=100.0)
+    hit = cache.lookup(camera_id, 0b1011, now=110.0)
+
+    assert hit is not None
+    assert hit.cached is True
+    assert hit.description == "carro estacionado"
+    assert hit.processing_time_ms == 0
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_lookup_is_per_camera():
+    """Resultados não são compartilhados entre câmeras."""
+    cache = PerceptualHashCache()
+    cache.store(uuid.uuid4(), 42, make_result(), now=0.0)
+
+    assert cache.lookup(uuid.uuid4(), 42, now=1.0) is None
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl():
+    """Entradas mais antigas que o TTL são descartadas."""
+    cache = PerceptualHashCache(ttl_seconds=10)
+    camera_id = uuid.uuid4()
+    cache.store(camera_id, 7, make_result(), now=0.0)
+
+    assert cache.lookup(camera_id, 7, now=11.0) is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_lru_eviction_keeps_recently_used():
+    """Ao exceder o limite, a entrada menos usada recentemente sai."""
+    cache = PerceptualHashCache(max_distance=0, max_entries_per_camera=2)
+    camera_id = uuid.uuid4()
+    cache.store(camera_id, 1, make_result("a"), now=0.0)
+    cache.store(camera_id, 2, make_result("b"), now=0.0)
+
+    # Usa a entrada 1, tornando a 2 a menos recente
+    assert cache.lookup(camera_id, 1, now=1.0) is not None
+    cache.store(camera_id, 3, make_result("c"), now=1.0)
+
+    assert cache.lookup(camera_id, 2, now=2.0) is None
+    assert cache.lookup(camera_id, 1, now=2.0).description == "a"
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.get_camera_stats(camera_id)["hits"] == 2
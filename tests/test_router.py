@@ -0,0 +1,242 @@
+"""Testes para o roteador de provedores LLM."""
+
+import asyncio
+from typing import Optional
+
+import pytest
+
+from src.analysis.base import AnalysisResult, BaseLLMVision
+from src.analysis.cascade import CascadeVision
+from src.analysis.resilience import CircuitBreaker, CircuitOpenError, ResilientVision
+from src.analysis.router import RouterVision
+from src.config.settings import LLMProvider, Settings
+
+
+class FakeVision(BaseLLMVision):
+    """Provedor falso com latência fixa e falha opcional."""
+
+    def __init__(
+        self,
+        provider: str,
+        latency: float = 0.0,
+        error: Optional[Exception] = None,
+    ):
+        super().__init__(api_key="test", model=f"{provider}-model")
+        self._provider = provider
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    @property
+    def provider_name(self) -> str:
+        return self._provider
+
+    async def analyze_frame(self, image_data, prompt=None) -> AnalysisResult:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return AnalysisResult(
+            description=self._provider, provider=self._provider, model=self.model
+        )
+
+
+@pytest.mark.asyncio
+async def test_routes_to_lowest_latency_backend():
+    """Depois das primeiras medições, o backend mais rápido recebe os frames."""
+    slow = FakeVision("slow", latency=0.05)
+    fast = FakeVision("fast", latency=0.01)
+    router = RouterVision([slow, fast])
+
+    for _ in range(6):
+        await router.analyze_frame(b"frame")
+
+    assert fast.calls > slow.calls
+    assert router.stats_for(fast).ewma_latency_ms < router.stats_for(slow).ewma_latency_ms
+
+
+@pytest.mark.asyncio
+async def test_failover_to_next_backend():
+    """Se o backend escolhido falhar, o frame vai para o próximo."""
+    broken = FakeVision("broken", error=RuntimeError("down"))
+    healthy = FakeVision("healthy")
+    router = RouterVision([broken, healthy])
+
+    result = await router.analyze_frame(b"frame")
+
+    assert result.provider == "healthy"
+    assert router.stats_for(broken).errors == 1
+    assert router.stats_for(broken).ewma_error_rate > 0
+
+
+@pytest.mark.asyncio
+async def test_failing_backend_is_ejected():
+    """Backend com taxa de erro alta sai da rotação."""
+    broken = FakeVision("broken", error=RuntimeError("down"))
+    healthy = FakeVision("healthy")
+    router = RouterVision([broken, healthy], alpha=0.5, eject_seconds=60)
+
+    for _ in range(3):
+        await router.analyze_frame(b"frame")
+
+    assert not router.is_healthy(broken)
+    assert router.rank_backends()[0] is healthy
+    assert router.get_stats()["degraded"]
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_removes_backend_from_rotation():
+    """Backend com circuit breaker aberto não é escolhido."""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    guarded = ResilientVision(FakeVision("guarded"), circuit_breaker=breaker)
+    other = FakeVision("other", latency=0.02)
+    router = RouterVision([guarded, other])
+
+    breaker.record_failure()
+
+    assert not router.is_healthy(guarded)
+    assert (await router.analyze_frame(b"frame")).provider == "other"
+
+
+@pytest.mark.asyncio
+async def test_fail_fast_backend_fails_over_without_waiting():
+    """Backends do roteador não esperam o circuito: o frame vai para outro."""
+
+    class Unavailable(Exception):
+        status_code = 503
+
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    broken = FakeVision("broken", error=Unavailable())
+    guarded = ResilientVision(
+        broken, circuit_breaker=breaker, max_retries=3, fail_fast=True
+    )
+    other = FakeVision("other")
+    router = RouterVision([guarded, other])
+
+    # Primeira chamada: falha sem retry e segue para o outro backend
+    assert (await router.analyze_frame(b"frame")).provider == "other"
+    assert broken.calls == 1
+
+    # Circuito aberto e nenhum outro backend: falha na hora, sem esperar 60s
+    with pytest.raises(CircuitOpenError):
+        await asyncio.wait_for(RouterVision([guarded]).analyze_frame(b"frame"), 1)
+    assert broken.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_all_backends_failing_raises():
+    """Sem backend disponível a última exceção é propagada."""
+    router = RouterVision(
+        [FakeVision("a", error=RuntimeError("a")), FakeVision("b", error=RuntimeError("b"))]
+    )
+    with pytest.raises(RuntimeError):
+        await router.analyze_frame(b"frame")
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_uses_first_response():
+    """Com o primário lento, a requisição duplicada responde primeiro."""
+    primary = FakeVision("primary", latency=1.0)
+    secondary = FakeVision("secondary", latency=0.01)
+    router = RouterVision([primary, secondary], hedge_min_delay_ms=50)
+    router.DEFAULT_HEDGE_DELAY_MS = 50
+
+    result = await router.analyze_frame_hedged(b"frame")
+    await asyncio.sleep(0)
+
+    assert result.provider == "secondary"
+    assert result.llm_calls == 2
+    assert primary.cancelled == 1
+    assert router.get_stats()["hedges"] == 1
+    assert router.stats_for(secondary).hedges_won == 1
+
+
+@pytest.mark.asyncio
+async def test_hedge_against_half_open_backend_does_not_wedge_circuit():
+    """O hedge cancela o teste do half-open sem travar o circuito do perdedor."""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+    slow = FakeVision("guarded", latency=1.0)
+    guarded = ResilientVision(slow, circuit_breaker=breaker, fail_fast=True)
+    other = FakeVision("other", latency=0.01)
+    router = RouterVision([guarded, other], hedge_min_delay_ms=100)
+    router.DEFAULT_HEDGE_DELAY_MS = 100
+
+    breaker.record_failure()
+    await asyncio.sleep(0.02)
+    assert router.rank_backends()[0] is guarded
+
+    task = asyncio.create_task(router.analyze_frame_hedged(b"frame"))
+    await asyncio.sleep(0.05)
+    # Teste do half-open em andamento: o backend sai da rotação
+    assert breaker.probe_in_flight
+    assert not router.is_healthy(guarded)
+    assert router.rank_backends()[0] is other
+
+    result = await task
+    await asyncio.sleep(0)
+
+    assert result.provider == "other"
+    assert slow.cancelled == 1
+    assert not breaker.probe_in_flight
+    assert router.is_healthy(guarded)
+
+    slow.latency = 0.0
+    assert (await guarded.analyze_frame(b"frame")).provider == "guarded"
+    assert breaker.state.value == "closed"
+
+
+@pytest.mark.asyncio
+async def test_hedge_not_sent_when_primary_is_fast():
+    """Se o primário responde antes do p95, não há requisição duplicada."""
+    primary = FakeVision("primary", latency=0.01)
+    secondary = FakeVision("secondary", latency=0.01)
+    router = RouterVision([primary, secondary], hedge_min_delay_ms=500)
+
+    result = await router.analyze_frame_hedged(b"frame")
+
+    assert result.provider == "primary"
+    assert result.llm_calls == 1
+    assert secondary.calls == 0
+    assert router.get_stats()["hedges"] == 0
+
+
+@pytest.mark.asyncio
+async def test_single_provider_hedged_falls_back():
+    """Provedores únicos tratam analyze_frame_hedged como analyze_frame."""
+    vision = FakeVision("single")
+    result = await vision.analyze_frame_hedged(b"frame")
+    assert result.provider == "single"
+
+
+def test_can_hedge_only_with_another_backend():
+    """Só há hedge com mais de um backend; senão o frame segue em streaming."""
+    single = FakeVision("single")
+    assert not single.can_hedge
+    assert not ResilientVision(single).can_hedge
+    assert not RouterVision([single]).can_hedge
+    pool = RouterVision([FakeVision("a"), FakeVision("b")])
+    assert pool.can_hedge
+    assert CascadeVision(FakeVision("triage"), pool).can_hedge
+    assert not CascadeVision(FakeVision("triage"), single).can_hedge
+
+
+def test_parse_llm_pool():
+    """llm_pool aceita 'provedor:modelo' e usa o modelo padrão sem ':'."""
+    config = Settings(
+        llm_pool="openai:gpt-4o-mini, anthropic, lmstudio:qwen2-vl:7b",
+        anthropic_model="claude-test",
+    )
+    assert config.get_llm_pool() == [
+        (LLMProvider.OPENAI, "gpt-4o-mini"),
+        (LLMProvider.ANTHROPIC, "claude-test"),
+        (LLMProvider.LMSTUDIO, "qwen2-vl:7b"),
+    ]
+    assert Settings(llm_pool="").get_llm_pool() == []
+
+    with pytest.raises(ValueError):
+        Settings(llm_pool="unknown:model").get_llm_pool()
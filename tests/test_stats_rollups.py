@@ -0,0 +1,157 @@
+"""Testes dos agregados por câmera e hora usados nas estatísticas."""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.storage.database import run_migrations
+from src.storage.persister import EventPersister
+from src.storage.repository import StatsRepository
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+class CapturingSession:
+    """Sessão que guarda o SQL gerado e retorna uma linha vazia."""
+
+    def __init__(self):
+        self.sql = None
+
+    async def execute(self, statement):
+        self.sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        class Row:
+            events = alerts_sent = alerts_failed = 0
+            avg_confidence = avg_processing_time_ms = None
+
+        class Result:
+            def one(self):
+                return Row()
+
+            def all(self):
+                return []
+
+        return Result()
+
+
+@pytest.mark.asyncio
+async def test_totals_read_only_rollups():
+    """Os totais somam os agregados sem tocar na tabela de eventos."""
+    session = CapturingSession()
+    repo = StatsRepository(session)
+
+    totals = await repo.totals(start_date=datetime(2025, 1, 1))
+
+    assert "FROM event_rollups_hourly" in session.sql
+    assert "FROM events" not in session.sql
+    assert "event_rollups_hourly.hour >= " in session.sql
+    assert totals == {
+        "events": 0,
+        "alerts_sent": 0,
+        "alerts_failed": 0,
+        "avg_confidence": None,
+        "avg_processing_time_ms": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_timeseries_groups_by_bucket():
+    """A série agrupa por date_trunc na granularidade pedida."""
+    session = CapturingSession()
+    repo = StatsRepository(session)
+
+    await repo.timeseries(datetime(2025, 1, 1), camera_id=uuid.uuid4(), bucket="day")
+
+    assert "date_trunc(" in session.sql
+    assert "GROUP BY date_trunc(" in session.sql
+    assert "event_rollups_hourly.camera_id = " in session.sql
+
+    with pytest.raises(ValueError):
+        await repo.timeseries(datetime(2025, 1, 1), bucket="minute")
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL não configurada")
+@pytest.mark.asyncio
+async def test_persister_maintains_rollups():
+    """Eventos gravados pelo persister aparecem nos totais e na série."""
+    engine = create_async_engine(POSTGRES_URL, poolclass=NullPool)
+    await run_migrations(engine)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession)
+    camera_id = uuid.uuid4()
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "INSERT INTO cameras (id, name, url, source_type, enabled, "
+                    "frame_interval, motion_detection_enabled, motion_threshold, "
+                    "motion_sensitivity, priority, decoder_error_count, "
+                    "decoder_error_rate, created_at, updated_at) VALUES (:id, 'teste', "
+                    "'rtsp://x', 'rtsp', true, 10, true, 10, 'medium', 'normal', 0, 0, "
+                    "now(), now())"
+                ),
+                {"id": camera_id},
+            )
+            rule_id = uuid.uuid4()
+            await conn.execute(
+                text(
+                    "INSERT INTO alert_rules (id, name, keywords, phone_numbers, enabled, "
+                    "priority, cooldown_seconds, created_at, updated_at) VALUES (:id, "
+                    "'regra', ARRAY['pessoa'], ARRAY['+55'], true, 'normal', 0, now(), now())"
+                ),
+                {"id": rule_id},
+            )
+
+        persister = EventPersister(session_factory, max_rows=100, max_delay_ms=10000)
+        event_id = None
+        for i in range(3):
+            event_id = await persister.add_event(
+                camera_id=camera_id,
+                description=f"evento {i}",
+                confidence=0.5 + i * 0.1,
+                processing_time_ms=100 * (i + 1),
+            )
+        await persister.add_alert_log(
+            event_id=event_id,
+            alert_rule_id=rule_id,
+            keywords_matched=["pessoa"],
+            sent_to=["+55"],
+            status="sent",
+            camera_id=camera_id,
+        )
+        await persister.flush()
+        await persister.add_event(camera_id=camera_id, description="outro lote")
+        await persister.flush()
+
+        async with session_factory() as session:
+            repo = StatsRepository(session)
+            totals = await repo.totals(camera_id=camera_id)
+            series = await repo.timeseries(
+                datetime.utcnow() - timedelta(hours=2), camera_id=camera_id
+            )
+
+        assert totals["events"] == 4
+        assert totals["alerts_sent"] == 1
+        assert totals["avg_confidence"] == pytest.approx(0.6)
+        assert totals["avg_processing_time_ms"] == pytest.approx(200)
+        assert sum(point["events"] for point in series) == 4
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "DELETE FROM alert_logs WHERE event_id IN "
+                    "(SELECT id FROM events WHERE camera_id = :id)"
+                ),
+                {"id": camera_id},
+            )
+            await conn.execute(text("DELETE FROM alert_rules WHERE name = 'regra'"))
+            await conn.execute(
+                text("DELETE FROM events WHERE camera_id = :id"), {"id": camera_id}
+            )
+            await conn.execute(text("DELETE FROM cameras WHERE id = :id"), {"id": camera_id})
+        await engine.dispose()
@@ -0,0 +1,251 @@
+"""Testes para o streaming de respostas e os alertas antecipados."""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+
+from src.alerts.detector import AlertRule, KeywordDetector
+from src.analysis.base import AnalysisResult, BaseLLMVision
+from src.analysis.metrics import ProviderMetrics
+from src.analysis.resilience import ResilientVision
+from src.analysis.router import RouterVision
+from src.analysis.streaming import KeywordStreamParser
+
+
+class StreamVision(BaseLLMVision):
+    """Provedor falso que entrega a resposta em pedaços."""
+
+    supports_streaming = True
+
+    def __init__(self, chunks: List[str]):
+        super().__init__(api_key="test", model="stream-model")
+        self.chunks = chunks
+        self.events: List[str] = []
+
+    @property
+    def provider_name(self) -> str:
+        return "fake"
+
+    async def analyze_frame(self, image_data, prompt=None) -> AnalysisResult:
+        return self.build_result("".join(self.chunks), start_time=0)
+
+    async def _stream_chunks(self, image_data, prompt, usage):
+        for chunk in self.chunks:
+            self.events.append(f"chunk:{chunk}")
+            await asyncio.sleep(0)
+            yield chunk
+        usage.update(tokens_in=100, tokens_out=20)
+
+
+def test_parser_handles_split_chunks():
+    """As keywords são devolvidas quando o array fecha, mesmo dividido."""
+    parser = KeywordStreamParser()
+    assert parser.feed('{"') is None
+    assert parser.feed('k": ["pes') is None
+    assert parser.feed('soa", "arm') is None
+    assert parser.feed('a"], "c": 0.9, "d": "uma') == ["pessoa", "arma"]
+    assert parser.done
+    # A lista é entregue uma única vez
+    assert parser.feed(' pessoa"}') is None
+
+
+def test_parser_ignores_brackets_inside_strings():
+    """Colchetes e aspas escapadas dentro das keywords não fecham o array."""
+    parser = KeywordStreamParser()
+    keywords = parser.feed('{"keywords": ["a]b", "c\\"]d"], "description": "x"}')
+    assert keywords == ["a]b", 'c"]d']
+
+
+def test_parser_gives_up_on_malformed_array():
+    """Array malformado encerra o parser sem keywords."""
+    parser = KeywordStreamParser()
+    assert parser.feed('{"k": [pessoa]}') is None
+    assert parser.done
+    assert parser.keywords == []
+
+
+@pytest.mark.asyncio
+async def test_keywords_callback_runs_before_stream_ends():
+    """O callback recebe as keywords antes da descrição terminar."""
+    vision = StreamVision(
+        ['{"k": ["pessoa", ', '"arma"], ', '"c": 0.9, "d": "pessoa ', 'armada"}']
+    )
+
+    async def on_keywords(keywords):
+        vision.events.append(f"keywords:{','.join(keywords)}")
+
+    result = await vision.analyze_frame_stream(b"jpg", on_keywords=on_keywords)
+
+    assert vision.events.index("keywords:pessoa,arma") < vision.events.index(
+        'chunk:armada"}'
+    )
+    assert result.description == "pessoa armada"
+    assert result.keywords == ["pessoa", "arma"]
+    assert result.tokens_in == 100
+    assert result.first_keyword_ms is not None
+
+
+@pytest.mark.asyncio
+async def test_non_streaming_provider_falls_back_to_full_analysis():
+    """Sem streaming, a análise completa é feita e o callback chamado ao final."""
+    vision = StreamVision(['{"k": ["carro"], "c": 0.8, "d": "rua"}'])
+    vision.supports_streaming = False
+    received: List[List[str]] = []
+
+    async def on_keywords(keywords):
+        received.append(keywords)
+
+    result = await ResilientVision(vision).analyze_frame_stream(
+        b"jpg", on_keywords=on_keywords
+    )
+
+    assert received == [["carro"]]
+    assert vision.events == []
+    assert result.first_keyword_ms == result.processing_time_ms
+
+
+@pytest.mark.asyncio
+async def test_streaming_provider_without_override_delivers_single_chunk():
+    """Sem _stream_chunks próprio, a resposta completa chega num único pedaço."""
+
+    class PlainVision(BaseLLMVision):
+        supports_streaming = True
+
+        @property
+        def provider_name(self) -> str:
+            return "fake"
+
+        async def analyze_frame(self, image_data, prompt=None) -> AnalysisResult:
+            return self.build_result(
+                '{"k": ["pessoa"], "c": 0.9, "d": "portão"}',
+                start_time=0,
+                tokens_in=80,
+                tokens_out=12,
+            )
+
+    received: List[List[str]] = []
+
+    async def on_keywords(keywords):
+        received.append(keywords)
+
+    vision = PlainVision(api_key="test", model="plain-model")
+    result = await vision.analyze_frame_stream(b"jpg", on_keywords=on_keywords)
+
+    assert received == [["pessoa"]]
+    assert result.description == "portão"
+    assert result.tokens_in == 80
+
+
+class SlowStreamVision(StreamVision):
+    """Provedor em streaming com espera antes de cada pedaço."""
+
+    def __init__(self, chunks: List[str], delay: float):
+        super().__init__(chunks)
+        self.delay = delay
+
+    async def _stream_chunks(self, image_data, prompt, usage):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            self.events.append(f"chunk:{chunk}")
+            yield chunk
+
+
+def hedged_pool() -> RouterVision:
+    """Pool com primário lento e secundário rápido, com hedge após 50ms."""
+    primary = SlowStreamVision(['{"k": ["pessoa"], ', '"c": 0.9, "d": "lento"}'], 0.2)
+    secondary = SlowStreamVision(['{"k": ["pessoa"], ', '"c": 0.9, "d": "rapido"}'], 0.01)
+    router = RouterVision([primary, secondary], hedge_min_delay_ms=50)
+    router.DEFAULT_HEDGE_DELAY_MS = 50
+    return router
+
+
+@pytest.mark.asyncio
+async def test_hedged_stream_delivers_keywords_once():
+    """No hedge em streaming o callback recebe as primeiras keywords uma vez."""
+    router = hedged_pool()
+    received: List[List[str]] = []
+
+    async def on_keywords(keywords):
+        received.append(keywords)
+
+    result = await router.analyze_frame_hedged(b"jpg", on_keywords=on_keywords)
+
+    assert result.description == "rapido"
+    assert received == [["pessoa"]]
+    assert router.get_stats()["hedges"] == 1
+
+
+@pytest.mark.asyncio
+async def test_high_priority_camera_with_pool_keeps_early_alerts(monkeypatch):
+    """Câmera de prioridade alta no pool usa hedge sem perder o streaming."""
+    from src import main
+
+    router = hedged_pool()
+    camera_id = uuid.uuid4()
+    received: List[List[str]] = []
+
+    def early_alert_callback(item, early_alerts):
+        async def on_keywords(keywords):
+            received.append(keywords)
+
+        return on_keywords
+
+    async def no_cache(item):
+        return None, None
+
+    async def unchanged(llm, item):
+        return item.frame_data, 0.0
+
+    monkeypatch.setattr(main.settings, "llm_streaming_enabled", True)
+    monkeypatch.setattr(main.settings, "llm_hedge_enabled", True)
+    monkeypatch.setattr(main.LLMVisionFactory, "get_instance", lambda: router)
+    monkeypatch.setattr(main, "_lookup_cache", no_cache)
+    monkeypatch.setattr(main, "_prepare_image", unchanged)
+    monkeypatch.setattr(main, "_early_alert_callback", early_alert_callback)
+    monkeypatch.setitem(
+        main.camera_manager._grabbers,
+        camera_id,
+        SimpleNamespace(config=SimpleNamespace(priority="high")),
+    )
+
+    item = main.FrameItem(camera_id=camera_id, frame_data=b"jpg", timestamp=0.0)
+    result = await main._analyze_item(item, early_alerts=[])
+
+    assert result.description == "rapido"
+    assert received == [["pessoa"]]
+    assert router.get_stats()["hedges"] == 1
+
+
+def test_detect_filters_by_priority():
+    """Regras fora das prioridades pedidas não disparam nem entram em cooldown."""
+    detector = KeywordDetector()
+    high = AlertRule(
+        id=uuid.uuid4(), name="Arma", keywords=["arma"], phone_numbers=[], priority="high"
+    )
+    normal = AlertRule(
+        id=uuid.uuid4(), name="Pessoa", keywords=["pessoa"], phone_numbers=[]
+    )
+    detector.add_rule(high)
+    detector.add_rule(normal)
+
+    early = detector.detect("", ["pessoa", "arma"], priorities={"high"})
+    assert [m.rule_name for m in early] == ["Arma"]
+
+    # A regra de prioridade alta está em cooldown; a normal ainda dispara
+    late = detector.detect("pessoa armada", ["pessoa", "arma"])
+    assert [m.rule_name for m in late] == ["Pessoa"]
+
+
+def test_metrics_record_time_to_first_keyword():
+    """O tempo até as keywords é acumulado ao lado da latência total."""
+    metrics = ProviderMetrics()
+    metrics.record("openai", 1000, 900, first_keyword_ms=300)
+    metrics.record("openai", 1000, 1100, first_keyword_ms=500)
+    metrics.record("openai", 1000, 700)
+
+    stats = metrics.get_stats()["openai"]
+    assert stats["avg_first_keyword_ms"] == 400
+    assert stats["avg_latency_ms"] == 900
@@ -0,0 +1,126 @@
+"""Testes para o modo compacto de resposta, saída estruturada e métricas de tokens."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.analysis.anthropic_vision import AnthropicVision
+from src.analysis.metrics import ProviderMetrics
+from src.analysis.openai_vision import OpenAIVision
+from src.analysis.structured import extract_json
+
+
+def test_extract_json_tolerates_wrapping():
+    """JSON dentro de bloco de código ou cercado de texto é extraído."""
+    assert extract_json('{"d": "x"}') == {"d": "x"}
+    assert extract_json('```json\n{"d": "x", "k": []}\n```') == {"d": "x", "k": []}
+    assert extract_json('Claro! Segue a análise: {"d": "x"} Espero ter ajudado.') == {
+        "d": "x"
+    }
+    assert extract_json('[nota] {"d": "x"}') == {"d": "x"}
+    assert extract_json("sem json aqui") is None
+    assert extract_json("") is None
+
+
+def test_parse_compact_and_legacy_formats():
+    """Campos curtos e completos são aceitos e as keywords são limitadas."""
+    vision = OpenAIVision(api_key="test")
+    vision.max_keywords = 3
+
+    assert vision.parse_response(
+        '{"d": "pessoa no portão", "k": ["pessoa", "portão", "noite", "chuva"], "c": "0.8"}'
+    ) == ("pessoa no portão", ["pessoa", "portão", "noite"], 0.8)
+    assert vision.parse_response(
+        'Resposta: {"description": "rua", "keywords": "carro, moto", "confidence": 0.5}'
+    ) == ("rua", ["carro", "moto"], 0.5)
+
+
+def test_build_result_flags_parse_failure():
+    """Resposta sem JSON usa o texto como descrição e marca parse_failed."""
+    vision = OpenAIVision(api_key="test")
+    result = vision.build_result("Uma pessoa andando na calçada", start_time=0)
+    assert result.parse_failed
+    assert result.description == "Uma pessoa andando na calçada"
+    assert "pessoa" in result.keywords
+
+
+@pytest.mark.asyncio
+async def test_openai_uses_json_schema_and_records_usage():
+    """A OpenAI recebe o JSON schema no modo compacto e o uso de tokens é lido."""
+    vision = OpenAIVision(api_key="test")
+    vision.structured_output = True
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(
+            choices=[
+                SimpleNamespace(
+                    message=SimpleNamespace(content='{"d": "rua", "k": ["rua"], "c": 0.9}')
+                )
+            ],
+            usage=SimpleNamespace(
+                prompt_tokens=120,
+                completion_tokens=18,
+                prompt_tokens_details=SimpleNamespace(cached_tokens=64),
+            ),
+        )
+
+    vision.client.chat.completions.create = create
+
+    result = await vision.analyze_frame(b"jpg")
+    assert calls[0]["response_format"]["type"] == "json_schema"
+    assert "APENAS com JSON" in calls[0]["messages"][0]["content"][0]["text"]
+    assert (result.tokens_in, result.tokens_out, result.cached_tokens) == (120, 18, 64)
+    assert result.keywords == ["rua"] and not result.parse_failed
+
+    # Prompts customizados definem o próprio formato
+    await vision.analyze_frame(b"jpg", prompt="Descreva a imagem")
+    assert "response_format" not in calls[1]
+
+
+@pytest.mark.asyncio
+async def test_anthropic_forces_tool_and_records_cached_tokens():
+    """A Anthropic recebe a resposta via ferramenta e registra os tokens em cache."""
+    vision = AnthropicVision(api_key="test")
+    vision.structured_output = True
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(
+            content=[
+                SimpleNamespace(
+                    type="tool_use",
+                    input={"d": "garagem", "k": ["carro"], "c": 0.7},
+                )
+            ],
+            usage=SimpleNamespace(
+                input_tokens=900, output_tokens=25, cache_read_input_tokens=400
+            ),
+        )
+
+    vision.client.messages.create = create
+
+    result = await vision.analyze_frame(b"jpg")
+    kwargs = calls[0]
+    assert "system" not in kwargs
+    assert kwargs["tool_choice"]["name"] == AnthropicVision.TOOL_NAME
+    assert kwargs["messages"][0]["content"][1]["text"] == vision.analysis_prompt
+    assert result.description == "garagem"
+    assert result.cached_tokens == 400
+
+
+def test_metrics_record_tokens_cache_and_parse_failures():
+    """Tokens, acertos de cache e falhas de parse são acumulados por provedor."""
+    metrics = ProviderMetrics()
+    metrics.record("openai", 1000, 500, tokens_in=100, tokens_out=20, cached_tokens=64)
+    metrics.record("openai", 1000, 700, tokens_in=300, tokens_out=40, parse_failed=True)
+    metrics.record("openai", 1000, 600)
+
+    stats = metrics.get_stats()["openai"]
+    assert stats["tokens_in"] == 400
+    assert stats["avg_tokens_out"] == 30
+    assert stats["cache_hits"] == 1
+    assert stats["cached_tokens"] == 64
+    assert stats["parse_failures"] == 1
@@ -0,0 +1,123 @@
+"""Testes da busca textual nas descrições dos eventos."""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.storage.database import run_migrations
+from src.storage.repository import EventRepository
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+class CapturingSession:
+    """Sessão que guarda o SQL gerado em vez de executar."""
+
+    def __init__(self):
+        self.sql = None
+
+    async def execute(self, statement):
+        self.sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        class Result:
+            def all(self):
+                return []
+
+        return Result()
+
+
+@pytest.mark.asyncio
+async def test_search_text_query_shape():
+    """A busca usa o índice tsvector e só gera trechos para a página."""
+    session = CapturingSession()
+    repo = EventRepository(session)
+
+    await repo.search_text(
+        "homem de capacete",
+        camera_id=uuid.uuid4(),
+        start_date=datetime(2025, 1, 1),
+        end_date=datetime(2025, 2, 1),
+        limit=21,
+        offset=20,
+    )
+
+    sql = session.sql
+    assert "events.search_vector @@ websearch_to_tsquery" in sql
+    assert "ts_rank_cd(events.search_vector" in sql
+    assert "events.camera_id = " in sql
+    assert "events.timestamp >= " in sql and "events.timestamp <= " in sql
+    # ts_headline fica fora da subconsulta paginada
+    inner = sql[sql.index("JOIN (") :]
+    assert "ts_headline" not in inner
+    assert "LIMIT" in inner and "OFFSET" in inner
+    # A coluna tsvector não é carregada junto com o evento
+    assert "events.search_vector," not in sql.split("FROM")[0]
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL não configurada")
+@pytest.mark.asyncio
+async def test_search_text_ranks_and_highlights():
+    """Busca no PostgreSQL com stemming, ranking, filtros e destaque."""
+    engine = create_async_engine(POSTGRES_URL, poolclass=NullPool)
+    await run_migrations(engine)
+    camera_id = uuid.uuid4()
+    now = datetime.utcnow()
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "INSERT INTO cameras (id, name, url, source_type, enabled, "
+                    "frame_interval, motion_detection_enabled, motion_threshold, "
+                    "motion_sensitivity, priority, decoder_error_count, "
+                    "decoder_error_rate, created_at, updated_at) VALUES (:id, 'teste', "
+                    "'rtsp://x', 'rtsp', true, 10, true, 10, 'medium', 'normal', 0, 0, "
+                    "now(), now())"
+                ),
+                {"id": camera_id},
+            )
+            for offset, description in [
+                (1, "Homem de capacete na entrada, outro homem sem capacete ao fundo"),
+                (2, "Homens com capacetes amarelos descarregando caminhão"),
+                (3, "Carro vermelho estacionado no portão"),
+                (40, "Homem de capacete no portão"),
+            ]:
+                await conn.execute(
+                    text(
+                        "INSERT INTO events (id, camera_id, timestamp, description, "
+                        "escalated) VALUES (:id, :camera_id, :ts, :description, false)"
+                    ),
+                    {
+                        "id": uuid.uuid4(),
+                        "camera_id": camera_id,
+                        "ts": now - timedelta(hours=offset),
+                        "description": description,
+                    },
+                )
+
+        session_factory = async_sessionmaker(engine, class_=AsyncSession)
+        async with session_factory() as session:
+            repo = EventRepository(session)
+            rows = await repo.search_text(
+                "homem de capacete",
+                camera_id=camera_id,
+                start_date=now - timedelta(days=1),
+            )
+
+        descriptions = [event.description for event, _, _ in rows]
+        assert len(rows) == 2  # o de 40h atrás fica fora do período
+        assert descriptions[0].startswith("Homem de capacete na entrada")
+        assert rows[0][1] >= rows[1][1]
+        assert "<mark>capacete</mark>" in rows[0][2]
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("DELETE FROM events WHERE camera_id = :id"), {"id": camera_id}
+            )
+            await conn.execute(text("DELETE FROM cameras WHERE id = :id"), {"id": camera_id})
+        await engine.dispose()
@@ -0,0 +1,170 @@
+"""Benchmark da busca textual nas descrições dos eventos.
+
+Popula o banco com eventos sintéticos (10 milhões por padrão) e mede a
+latência das consultas de /api/v1/events/search/text. Use um banco
+descartável: os eventos gerados ficam numa câmera própria, removida com
+--cleanup.
+
+Uso:
+    python tools/benchmark_text_search.py --database-url postgresql+asyncpg://... --rows 10000000
+    python tools/benchmark_text_search.py --skip-seed --runs 50
+    python tools/benchmark_text_search.py --cleanup
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config import settings
+from src.storage.database import run_migrations
+from src.storage.repository import EventRepository
+
+BENCHMARK_CAMERA_ID = uuid.UUID("00000000-0000-0000-0000-00000000be4c")
+
+DEFAULT_QUERIES = [
+    "homem de capacete",
+    "carro vermelho estacionado",
+    '"entregador de moto"',
+    "pessoa -carro",
+    "caminhão or ônibus",
+]
+
+# Descrições montadas de partes aleatórias (frases parecidas com as do LLM)
+SEED_SQL = """
+INSERT INTO events (id, camera_id, timestamp, description, keywords, escalated)
+SELECT
+    gen_random_uuid(),
+    :camera_id,
+    :start + (random() * interval '30 days'),
+    (ARRAY['Homem', 'Mulher', 'Criança', 'Entregador', 'Carro', 'Caminhão',
+           'Ônibus', 'Cachorro', 'Motociclista', 'Pessoa'])[1 + floor(random() * 10)]
+    || ' ' ||
+    (ARRAY['de capacete', 'de moto', 'vermelho', 'branco', 'com mochila',
+           'de boné', 'com pacote', 'preto', 'azul', 'de bicicleta'])[1 + floor(random() * 10)]
+    || ' ' ||
+    (ARRAY['na entrada', 'no portão', 'estacionado na rua', 'passando na calçada',
+           'parado na garagem', 'saindo do prédio', 'perto da cerca',
+           'atravessando o pátio', 'na rampa', 'em frente à loja'])[1 + floor(random() * 10)]
+    || '. Cena ' || i || '.',
+    ARRAY['movimento'],
+    false
+FROM generate_series(1, :rows) AS i
+"""
+
+
+async def seed(engine, rows: int, batch: int):
+    """Insere os eventos sintéticos em lotes."""
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO cameras (id, name, url, source_type, enabled, frame_interval, "
+                "motion_detection_enabled, motion_threshold, motion_sensitivity, priority, "
+                "decoder_error_count, decoder_error_rate, created_at, updated_at) "
+                "VALUES (:id, 'benchmark', 'benchmark://', 'rtsp', false, 10, false, 10.0, "
+                "'medium', 'normal', 0, 0.0, now(), now()) ON CONFLICT (id) DO NOTHING"
+            ),
+            {"id": BENCHMARK_CAMERA_ID},
+        )
+
+    start = datetime.utcnow() - timedelta(days=30)
+    inserted = 0
+    seed_start = time.perf_counter()
+    while inserted < rows:
+        count = min(batch, rows - inserted)
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(SEED_SQL),
+                {"camera_id": BENCHMARK_CAMERA_ID, "start": start, "rows": count},
+            )
+        inserted += count
+        elapsed = time.perf_counter() - seed_start
+        print(f"  {inserted:,}/{rows:,} eventos ({inserted / elapsed:,.0f}/s)")
+
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE events"))
+
+
+async def benchmark(engine, queries, runs: int, page_size: int, camera: bool):
+    """Mede a latência de cada consulta pelo repositório."""
+    session_factory = async_sessionmaker(engine, class_=AsyncSession)
+    print(f"\n{'consulta':<32} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8} {'resultados':>10}")
+    for query in queries:
+        timings = []
+        found = 0
+        for _ in range(runs):
+            async with session_factory() as session:
+                repo = EventRepository(session)
+                start = time.perf_counter()
+                rows = await repo.search_text(
+                    query,
+                    camera_id=BENCHMARK_CAMERA_ID if camera else None,
+                    limit=page_size,
+                )
+                timings.append((time.perf_counter() - start) * 1000)
+                found = len(rows)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(
+            f"{query:<32} {statistics.median(timings):>8.1f} {p95:>8.1f} "
+            f"{timings[-1]:>8.1f} {found:>10}"
+        )
+
+
+async def cleanup(engine):
+    """Remove os eventos e a câmera do benchmark."""
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("DELETE FROM events WHERE camera_id = :id"), {"id": BENCHMARK_CAMERA_ID}
+        )
+        await conn.execute(
+            text("DELETE FROM cameras WHERE id = :id"), {"id": BENCHMARK_CAMERA_ID}
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark da busca textual de eventos"
+    )
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Eventos a gerar")
+    parser.add_argument("--batch", type=int, default=500_000, help="Eventos por transação")
+    parser.add_argument("--runs", type=int, default=20, help="Execuções por consulta")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--query", action="append", help="Consulta (repetível)")
+    parser.add_argument("--camera", action="store_true", help="Filtrar pela câmera")
+    parser.add_argument("--skip-seed", action="store_true", help="Usar eventos já gerados")
+    parser.add_argument("--cleanup", action="store_true", help="Remover eventos gerados")
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.database_url)
+    try:
+        if args.cleanup:
+            await cleanup(engine)
+            print("Eventos do benchmark removidos")
+            return
+
+        await run_migrations(engine)
+        if not args.skip_seed:
+            print(f"Gerando {args.rows:,} eventos...")
+            await seed(engine, args.rows, args.batch)
+
+        await benchmark(
+            engine, args.query or DEFAULT_QUERIES, args.runs, args.page_size, args.camera
+        )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())